@@ -0,0 +1,414 @@
+"""
+Load-test harness that runs the scrapers against the local mock retailer,
+and the LLM stage against the local mock Gemini API.
+
+Example:
+    poetry run python benchmark.py --modes fast,human --queries 12
+    poetry run python benchmark.py --stage llm --llm-products 200 --llm-batch-size 25
+"""
+import os
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import List, Dict, Tuple, Any, Callable, Optional
+
+from utils.metrics import metrics, enable_metrics, STAGE_METRIC
+from utils.mockRetailerServer import MockRetailerServer, MockRetailerConfig, build_catalog
+from utils.mockGeminiServer import MockGeminiServer, MockGeminiConfig
+
+# Models from main.py that the live site does not carry, used to keep a realistic miss rate
+MISSING_MODELS = [
+    ("samsung 75 4k smart cuhd tv", "UN75DU7100FXZC"),
+    ("hisense 50 4k smart google tv", "50A68N"),
+    ("samsung 65 neo qled 4k smart tv", "QN65QN85DBFXZC"),
+]
+
+
+def build_workload(count: int, seed: int = 7, config: Optional[MockRetailerConfig] = None) -> List[Tuple[str, str]]:
+    """
+    Build (search term, model number) pairs resembling the LLM's medium search terms
+
+    Args:
+        count: Number of queries to generate
+        seed: Random seed so every mode runs the same workload
+        config: Mock retailer settings, so the workload is drawn from the catalog it serves
+
+    Returns:
+        List of (search_term, model_no) tuples
+    """
+    rng = random.Random(seed)
+    config = config or MockRetailerConfig()
+    catalog = build_catalog(config.catalog_size, config.seed)
+    workload = []
+    for product in rng.sample(catalog, min(count, len(catalog))):
+        name_tokens = product["name"].replace("”", '"').replace('"', "").lower().split()
+        # "lg - 50 class ut75 series ..." -> "lg 50 ut75 tv"
+        search_term = f"{product['brand']} {name_tokens[2]} {name_tokens[4]} tv"
+        workload.append((search_term, product["model"]))
+
+    # Swap roughly one in six queries for a model the retailer does not carry
+    for index in range(0, len(workload), 6):
+        workload[index] = MISSING_MODELS[(index // 6) % len(MISSING_MODELS)]
+    return workload
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def run_selenium_mode(base_url: str, workload: List[Tuple[str, str]], headless: bool,
+                      **scraper_kwargs) -> List[Dict[str, Any]]:
+    """Run the workload through one BestBuyScraper session, timing each query"""
+    from scrapers.bestBuy import BestBuyScraper
+
+    records = []
+    scraper = BestBuyScraper(headless=headless, base_url=base_url, **scraper_kwargs)
+    try:
+        for search_term, model_no in workload:
+            started = time.perf_counter()
+            result = scraper.batch_search({search_term: model_no})
+            records.append({
+                "search_term": search_term,
+                "model_no": model_no,
+                "found": bool(result.get(model_no)),
+                "seconds": time.perf_counter() - started,
+            })
+    finally:
+        scraper.close()
+    return records
+
+
+def run_adaptive_mode(base_url: str, workload: List[Tuple[str, str]], headless: bool,
+                      **scraper_kwargs) -> List[Dict[str, Any]]:
+    """Run the workload with delays paced by a fresh AdaptiveRateController"""
+    from utils.rateController import AdaptiveRateController
+
+    controller = AdaptiveRateController()
+    records = run_selenium_mode(base_url, workload, headless, rate_controller=controller,
+                                session_id="benchmark", **scraper_kwargs)
+    print(f"Final session budget: {controller.snapshot().get('benchmark')}")
+    return records
+
+
+def run_proxied_mode(base_url: str, workload: List[Tuple[str, str]], headless: bool,
+                     **scraper_kwargs) -> List[Dict[str, Any]]:
+    """Run the workload through a pool of local proxy stand-ins, one of which is IP-blocked"""
+    from utils.mockProxyServer import MockProxyServer
+    from utils.proxyPool import ProxyPool
+
+    proxies = [MockProxyServer(blocked=True), MockProxyServer(latency_range=(0.2, 0.4)), MockProxyServer()]
+    for proxy in proxies:
+        proxy.start()
+    try:
+        pool = ProxyPool([proxy.proxy_url for proxy in proxies], cooldown_seconds=5)
+        records = run_selenium_mode(base_url, workload, headless, proxy_pool=pool,
+                                    session_id="benchmark", **scraper_kwargs)
+        print("Final proxy health:")
+        for state in pool.snapshot():
+            print(f"  {state}")
+        return records
+    finally:
+        for proxy in proxies:
+            proxy.stop()
+
+
+def run_persistent_mode(base_url: str, workload: List[Tuple[str, str]], headless: bool,
+                        **scraper_kwargs) -> List[Dict[str, Any]]:
+    """Run half the workload in a fresh session, then the other half in a session restored from it"""
+    import tempfile
+    from utils.fingerprintPool import FingerprintPool
+    from utils.sessionStore import SessionStore
+
+    half = max(1, len(workload) // 2)
+    with tempfile.TemporaryDirectory() as directory:
+        store = SessionStore(directory)
+        # One profile, so the second session restores the identity the first one saved
+        fingerprints = FingerprintPool(platforms=["windows"], viewports=[(1920, 1080)],
+                                       locales=[("en-US", "America/New_York")])
+        cold = run_selenium_mode(base_url, workload[:half], headless, session_store=store,
+                                 fingerprint_pool=fingerprints, session_id="benchmark", **scraper_kwargs)
+        warm = run_selenium_mode(base_url, workload[half:], headless, session_store=store,
+                                 fingerprint_pool=fingerprints, session_id="benchmark", **scraper_kwargs)
+    if cold and warm:
+        print(f"First query: {cold[0]['seconds']:.2f}s cold, {warm[0]['seconds']:.2f}s restored")
+    return cold + warm
+
+
+def run_async_mode(base_url: str, workload: List[Tuple[str, str]], headless: bool,
+                   sessions: int = 4, **scraper_kwargs) -> List[Dict[str, Any]]:
+    """Run the workload over several tabs of one Chrome driven from a single event loop"""
+    from scrapers.asyncBestBuy import AsyncBestBuyScraper
+    from scrapers.bestBuyParsing import LOOKUP_FAILURES
+    from scrapers.cdpBrowser import ChromeBrowser
+
+    async def run():
+        records = []
+        queue: "asyncio.Queue" = asyncio.Queue()
+        for pair in workload:
+            queue.put_nowait(pair)
+
+        async def worker(scraper):
+            while not queue.empty():
+                search_term, model_no = queue.get_nowait()
+                started = time.perf_counter()
+                try:
+                    product = await scraper.lookup(search_term, model_no)
+                except LOOKUP_FAILURES as e:
+                    print(f"Lookup for {model_no} failed: {e}")
+                    product = None
+                records.append({"search_term": search_term, "model_no": model_no,
+                                "found": bool(product), "seconds": time.perf_counter() - started})
+
+        async with ChromeBrowser(headless=headless) as browser:
+            scrapers = [AsyncBestBuyScraper(browser=browser, base_url=base_url, session_id=f"tab-{index + 1}",
+                                            **scraper_kwargs) for index in range(sessions)]
+            try:
+                await asyncio.gather(*(scraper.start() for scraper in scrapers))
+                await asyncio.gather(*(worker(scraper) for scraper in scrapers))
+            finally:
+                await asyncio.gather(*(scraper.close() for scraper in scrapers), return_exceptions=True)
+        return records
+
+    return asyncio.run(run())
+
+
+# Scraper modes the harness knows how to drive: name -> (runner, runner kwargs)
+MODES: Dict[str, Tuple[Callable[..., List[Dict[str, Any]]], Dict[str, Any]]] = {
+    "human": (run_selenium_mode, {"use_delays": True}),
+    "fast": (run_selenium_mode, {"use_delays": False}),
+    "adaptive": (run_adaptive_mode, {"use_delays": True}),
+    "proxied": (run_proxied_mode, {"use_delays": False}),
+    "persistent": (run_persistent_mode, {"use_delays": False}),
+    "async": (run_async_mode, {"use_delays": False}),
+}
+
+
+def summarize(mode: str, records: List[Dict[str, Any]], elapsed: float, server_stats: Dict[str, int]) -> Dict[str, Any]:
+    """Reduce per-query records to throughput and latency figures"""
+    latencies = [record["seconds"] for record in records]
+    return {
+        "mode": mode,
+        "queries": len(records),
+        "found": sum(1 for record in records if record["found"]),
+        "elapsed_seconds": round(elapsed, 2),
+        "products_per_minute": round(len(records) / elapsed * 60, 2) if elapsed else 0.0,
+        "latency_p50": round(percentile(latencies, 50), 2),
+        "latency_p95": round(percentile(latencies, 95), 2),
+        "latency_max": round(max(latencies), 2) if latencies else 0.0,
+        "server_stats": server_stats,
+        "per_query": records,
+    }
+
+
+def run_benchmark(modes: List[str], config: MockRetailerConfig, query_count: int, headless: bool) -> List[Dict[str, Any]]:
+    """
+    Run every requested mode against a fresh mock retailer
+
+    Args:
+        modes: Names of entries in MODES to run
+        config: Latency and fault injection settings for the mock retailer
+        query_count: Number of queries in the workload
+        headless: Whether to run browsers headless
+
+    Returns:
+        One summary dictionary per mode
+    """
+    workload = build_workload(query_count, config=config)
+    summaries = []
+    for mode in modes:
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}'. Available modes: {', '.join(MODES)}")
+        runner, runner_kwargs = MODES[mode]
+
+        print(f"\n{'='*60}\nRunning mode '{mode}' with {len(workload)} queries\n{'='*60}")
+        metrics.reset()
+        with MockRetailerServer(config) as server:
+            started = time.perf_counter()
+            records = runner(server.base_url, workload, headless, **runner_kwargs)
+            elapsed = time.perf_counter() - started
+            summary = summarize(mode, records, elapsed, dict(server.stats))
+        if metrics.enabled:
+            summary["stages"] = [entry for entry in metrics.snapshot()["histograms"] if entry["name"] == STAGE_METRIC]
+        summaries.append(summary)
+    return summaries
+
+
+def print_report(summaries: List[Dict[str, Any]]):
+    """Print one line of throughput and latency figures per mode"""
+    print("\n" + "="*80)
+    print(f"{'mode':<12}{'queries':>8}{'found':>7}{'prod/min':>10}{'p50 s':>8}{'p95 s':>8}{'max s':>8}{'elapsed s':>11}")
+    print("="*80)
+    for summary in summaries:
+        print(f"{summary['mode']:<12}{summary['queries']:>8}{summary['found']:>7}"
+              f"{summary['products_per_minute']:>10}{summary['latency_p50']:>8}"
+              f"{summary['latency_p95']:>8}{summary['latency_max']:>8}{summary['elapsed_seconds']:>11}")
+
+    for summary in summaries:
+        if not summary.get("stages"):
+            continue
+        print(f"\nStage breakdown for '{summary['mode']}':")
+        print(f"  {'stage':<28}{'count':>7}{'total s':>10}{'p50 s':>9}{'p95 s':>9}")
+        for stage in sorted(summary["stages"], key=lambda entry: -entry["sum"]):
+            extra = [value for key, value in sorted(stage["labels"].items()) if key != "stage"]
+            label = stage["labels"].get("stage", "") + "".join(f"[{value}]" for value in extra)
+            print(f"  {label:<28}{stage['count']:>7}{stage['sum']:>10.2f}{stage['p50']:>9.3f}{stage['p95']:>9.3f}")
+
+
+def build_llm_inputs(count: int, seed: int = 7) -> List[Dict[str, str]]:
+    """Build raw product names in the style of main.Products"""
+    rng = random.Random(seed)
+    catalog = build_catalog(size=max(count, 400))
+    inputs = []
+    for product in rng.sample(catalog, min(count, len(catalog))):
+        description = product["name"].split(" - ", 1)[1]
+        inputs.append({"name": f"{product['brand'].title()} {description} - {product['model']}"})
+    return inputs
+
+
+async def _run_llm_batches(products: List[Dict[str, str]], batch_size: int, concurrency: int,
+                           client_rpm: Optional[float] = None) -> List[Dict[str, Any]]:
+    from utils.geminiLLMService import GeminiClient
+    from utils.llmFunctions import process_products_with_llm, process_products_with_schema
+
+    semaphore = asyncio.Semaphore(concurrency)
+    client = GeminiClient(requests_per_minute=client_rpm) if client_rpm else None
+
+    async def run_batch(batch):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                if client:
+                    processed = await process_products_with_schema(batch, client=client)
+                else:
+                    processed = await process_products_with_llm(batch)
+            except Exception as e:
+                print(f"LLM batch failed: {e}")
+                processed = []
+            return {"inputs": len(batch), "outputs": len(processed), "seconds": time.perf_counter() - started}
+
+    batches = [products[i:i + batch_size] for i in range(0, len(products), batch_size)]
+    try:
+        return await asyncio.gather(*(run_batch(batch) for batch in batches))
+    finally:
+        if client:
+            await client.close()
+
+
+def run_llm_benchmark(product_count: int, batch_size: int, concurrency: int, config: MockGeminiConfig,
+                      client_rpm: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Run the LLM normalization stage against the mock Gemini API
+
+    Args:
+        product_count: Number of raw product names to normalize
+        batch_size: Products per generateContent request
+        concurrency: Maximum requests in flight
+        config: Latency and fault injection settings for the mock API
+        client_rpm: Run batches through a shared rate-limited GeminiClient at this RPM
+            (schema mode) instead of the legacy per-batch session
+
+    Returns:
+        Summary with throughput, batch latency and token usage
+    """
+    from utils.geminiLLMService import llm_usage
+
+    products = build_llm_inputs(product_count)
+    llm_usage.reset()
+    previous_base = os.environ.get("GEMINI_API_BASE")
+    with MockGeminiServer(config) as server:
+        os.environ["GEMINI_API_BASE"] = server.base_url
+        try:
+            started = time.perf_counter()
+            records = asyncio.run(_run_llm_batches(products, batch_size, concurrency, client_rpm))
+            elapsed = time.perf_counter() - started
+        finally:
+            if previous_base is None:
+                os.environ.pop("GEMINI_API_BASE", None)
+            else:
+                os.environ["GEMINI_API_BASE"] = previous_base
+        server_stats = dict(server.stats)
+
+    latencies = [record["seconds"] for record in records]
+    normalized = sum(record["outputs"] for record in records)
+    return {
+        "products": len(products),
+        "normalized": normalized,
+        "batch_size": batch_size,
+        "concurrency": concurrency,
+        "client_rpm": client_rpm,
+        "elapsed_seconds": round(elapsed, 2),
+        "products_per_minute": round(normalized / elapsed * 60, 2) if elapsed else 0.0,
+        "batch_latency_p50": round(percentile(latencies, 50), 2),
+        "batch_latency_p95": round(percentile(latencies, 95), 2),
+        "usage": llm_usage.summary(),
+        "server_stats": server_stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scraper modes against the local mock retailer")
+    parser.add_argument("--stage", choices=["scrape", "llm"], default="scrape",
+                        help="Benchmark the browser scraping stage or the LLM normalization stage")
+    parser.add_argument("--modes", default="fast", help=f"Comma separated modes ({', '.join(MODES)})")
+    parser.add_argument("--queries", type=int, default=10, help="Number of queries per mode")
+    parser.add_argument("--show-browser", action="store_true", help="Run browsers with a visible window")
+    parser.add_argument("--latency", type=float, nargs=2, default=(0.05, 0.25), metavar=("MIN", "MAX"),
+                        help="Seconds of latency added to every mock response")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Probability of HTTP 503 responses")
+    parser.add_argument("--block-rate", type=float, default=0.0, help="Probability of HTTP 403 block pages")
+    parser.add_argument("--captcha-rate", type=float, default=0.0, help="Probability of captcha pages")
+    parser.add_argument("--popup-rate", type=float, default=0.3, help="Probability of a homepage popup")
+    parser.add_argument("--first-visit-challenge-rate", type=float, default=0.0,
+                        help="Probability of a captcha for visitors without cookies")
+    parser.add_argument("--metrics", action="store_true", help="Collect and print per-stage timings")
+    parser.add_argument("--json-output", help="Write the full results (including per-query timings) to this file")
+    parser.add_argument("--llm-products", type=int, default=100, help="Products to normalize in the llm stage")
+    parser.add_argument("--llm-batch-size", type=int, default=20, help="Products per LLM request")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="LLM requests in flight")
+    parser.add_argument("--llm-rate-limit-rate", type=float, default=0.0, help="Probability of HTTP 429 from the mock")
+    parser.add_argument("--llm-malformed-rate", type=float, default=0.0, help="Probability of malformed JSON output")
+    parser.add_argument("--llm-quota-rpm", type=int, help="Requests per minute the mock allows before answering 429")
+    parser.add_argument("--llm-client-rpm", type=float,
+                        help="Pace requests through the rate-limited GeminiClient at this RPM")
+    args = parser.parse_args()
+
+    if args.stage == "llm":
+        llm_config = MockGeminiConfig(rate_limit_rate=args.llm_rate_limit_rate, malformed_rate=args.llm_malformed_rate,
+                                      quota_rpm=args.llm_quota_rpm)
+        summary = run_llm_benchmark(args.llm_products, args.llm_batch_size, args.llm_concurrency, llm_config,
+                                    client_rpm=args.llm_client_rpm)
+        print(json.dumps(summary, indent=2))
+        if args.json_output:
+            with open(args.json_output, "w") as f:
+                json.dump(summary, f, indent=2)
+        return
+
+    config = MockRetailerConfig(
+        latency_range=tuple(args.latency),
+        failure_rate=args.failure_rate,
+        block_rate=args.block_rate,
+        captcha_rate=args.captcha_rate,
+        popup_rate=args.popup_rate,
+        first_visit_challenge_rate=args.first_visit_challenge_rate,
+    )
+    if args.metrics:
+        enable_metrics()
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    summaries = run_benchmark(modes, config, args.queries, headless=not args.show_browser)
+    print_report(summaries)
+
+    if args.json_output:
+        with open(args.json_output, "w") as f:
+            json.dump(summaries, f, indent=2)
+        print(f"\nWrote detailed results to {args.json_output}")
+
+
+if __name__ == "__main__":
+    main()
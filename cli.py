@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+"""
+Command line entry point for the individual pipeline stages
+
+    python cli.py normalize catalog.csv -o validated.jsonl
+    python cli.py scrape validated.jsonl -o results.ndjson
+    python cli.py export results.ndjson -o results_by_brand.json --history history/
+    python cli.py cache-lookup 50UT7570PUB --results results.ndjson
+    python cli.py reextract pages/ -o products.jsonl
+    python cli.py run
+
+Only the standard library is imported up front. Each subcommand imports what it needs
+(aiohttp/pydantic for normalize, Selenium/webdriver_manager/bs4 for scrape, pandas for
+export), so a cache lookup doesn't pay for a browser stack it never starts.
+"""
+import os
+import sys
+import json
+import argparse
+import contextlib
+
+# Budget for `import cli` itself, checked by test_cli.py with `python -X importtime`
+IMPORT_BUDGET_MS = 50
+
+# Modules that must not be imported until a subcommand needs them
+HEAVY_MODULES = ("selenium", "webdriver_manager", "bs4", "pandas", "pyarrow", "aiohttp", "pydantic")
+
+
+def _open_output(path):
+    return sys.stdout if path in (None, "-") else open(path, "w", encoding="utf-8")
+
+
+def _progress_to_stderr(output_path):
+    """The stages print progress; keep it out of stdout when stdout carries the data"""
+    return contextlib.redirect_stdout(sys.stderr) if output_path in (None, "-") else contextlib.nullcontext()
+
+
+def _read_jsonl(path):
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def cmd_normalize(args):
+    """Normalize raw product names with the LLM and write validated products as JSON lines"""
+    import asyncio
+    from utils.catalogSource import iter_catalog_batches
+    from utils.llmFunctions import process_and_validate_products
+
+    async def run(output):
+        count = 0
+        for batch in iter_catalog_batches(args.catalog, args.batch_size):
+            validated, _ = await process_and_validate_products([{"name": p["name"]} for p in batch],
+                                                               use_schema=not args.free_text,
+                                                               batch_size=args.batch_size)
+            for product in validated:
+                output.write(json.dumps(product) + "\n")
+            output.flush()
+            count += len(validated)
+        return count
+
+    output = _open_output(args.output)
+    try:
+        with _progress_to_stderr(args.output):
+            count = asyncio.run(run(output))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"Normalized {count} products", file=sys.stderr)
+    return 0 if count else 1
+
+
+def cmd_scrape(args):
+    """Look up validated products (JSON lines from normalize) and stream results to a sink"""
+    from main import create_scraper, scrape_bestbuy_products
+    from utils.catalogSource import batched
+    from utils.resultSink import open_sink
+
+    products = _read_jsonl(args.validated)
+    if args.max_products:
+        products = (product for index, product in zip(range(args.max_products), products))
+    scraper = create_scraper(headless=not args.show_browser, base_url=args.base_url)
+    try:
+        with open_sink(args.output) as sink, _progress_to_stderr(args.output):
+            for batch in batched(products, args.batch_size):
+                scrape_bestbuy_products(batch, sink, max_products=None, scraper=scraper)
+            rows_written = sink.rows_written
+    finally:
+        scraper.close()
+    print(f"{rows_written} results written to {args.output}", file=sys.stderr)
+    return 0
+
+
+def cmd_export(args):
+    """Group a results file by brand, and optionally append it to the price history"""
+    from utils.resultSink import group_by_brand
+
+    structured_data = group_by_brand(args.results)
+    output = _open_output(args.output)
+    try:
+        json.dump(structured_data, output, indent=2)
+        output.write("\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    if args.history:
+        from utils.historyStore import PriceHistoryStore
+
+        store = PriceHistoryStore(args.history)
+        run_id = store.append_file(args.results)
+        print(f"Appended run {run_id} to {args.history}", file=sys.stderr)
+        if len(store.runs()) > 1:
+            changes = store.diff(run_id)
+            print(f"{len(changes)} listings changed since the previous run", file=sys.stderr)
+    return 0
+
+
+def cmd_cache_lookup(args):
+    """Print the last known listing for models from a results file or the price history, without a browser"""
+    wanted = {model_no.upper() for model_no in args.models}
+    found = {}
+    if args.results and os.path.exists(args.results):
+        from utils.resultSink import iter_result_rows
+
+        for row in iter_result_rows(args.results):
+            model_no = str(row.get("model_no") or "").upper()
+            # A failed lookup is no observation at all; fall back to an older row or the history
+            if model_no in wanted and not row.get("error"):
+                # Later rows are newer observations of the same model
+                found[model_no] = dict(row, source=args.results)
+    missing = wanted - set(found)
+    if missing and args.history and os.path.isdir(args.history):
+        from utils.historyStore import PriceHistoryStore
+
+        store = PriceHistoryStore(args.history)
+        if store.runs():
+            frame = store.lookup(sorted(missing))
+            for row in json.loads(frame.to_json(orient="records")):
+                found[row["model_no"]] = dict(row, source=args.history)
+
+    for model_no in args.models:
+        row = found.get(model_no.upper())
+        print(json.dumps(row if row else {"model_no": model_no.upper(), "cached": False}))
+    return 0 if len(found) == len(wanted) else 1
+
+
+def cmd_reextract(args):
+    """Parse archived results pages again, across all cores and without a browser, into JSON lines"""
+    if not os.path.isdir(args.archive):
+        print(f"No page archive at {args.archive}", file=sys.stderr)
+        return 1
+    from utils.pageArchive import PageArchive, reextract
+
+    archive = PageArchive(args.archive)
+    entries = list(archive.entries(retailer=args.retailer, since=args.since))
+    pages = products = 0
+    output = _open_output(args.output)
+    try:
+        for entry, page_products in reextract(archive, entries, workers=args.workers):
+            pages += 1
+            for product in page_products:
+                row = dict(product, query=entry.get("query"), page_url=entry["url"],
+                           archived_at=entry["archived_at"], page_sha256=entry["sha256"])
+                output.write(json.dumps(row) + "\n")
+                products += 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"Re-extracted {products} products from {pages} archived pages", file=sys.stderr)
+    return 0 if pages else 1
+
+
+def cmd_run(args):
+    """Run the whole pipeline (main.py)"""
+    import asyncio
+    import main
+
+    asyncio.run(main.main())
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Product normalization and Best Buy lookup pipeline")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    normalize = subcommands.add_parser("normalize", help=cmd_normalize.__doc__)
+    normalize.add_argument("catalog", nargs="?", default="-", help="CSV or JSON lines catalog ('-' for stdin)")
+    normalize.add_argument("-o", "--output", default="-", help="Validated products as JSON lines ('-' for stdout)")
+    normalize.add_argument("--batch-size", type=int, default=50, help="Products per LLM request")
+    normalize.add_argument("--free-text", action="store_true", help="Use the legacy free-text prompt instead of schema mode")
+    normalize.set_defaults(handler=cmd_normalize)
+
+    scrape = subcommands.add_parser("scrape", help=cmd_scrape.__doc__)
+    scrape.add_argument("validated", nargs="?", default="-", help="Output of normalize ('-' for stdin)")
+    scrape.add_argument("-o", "--output", default="results.ndjson", help="Results file (.ndjson, .csv or .parquet)")
+    scrape.add_argument("--batch-size", type=int, default=50, help="Products read per batch")
+    scrape.add_argument("--max-products", type=int, help="Stop after this many products")
+    scrape.add_argument("--base-url", default="https://www.bestbuy.com/", help="Site root (e.g. the mock retailer)")
+    scrape.add_argument("--show-browser", action="store_true", help="Run the browser with a visible window")
+    scrape.set_defaults(handler=cmd_scrape)
+
+    export = subcommands.add_parser("export", help=cmd_export.__doc__)
+    export.add_argument("results", help="Results file written by scrape")
+    export.add_argument("-o", "--output", default="-", help="Grouped JSON ('-' for stdout)")
+    export.add_argument("--history", help="Price history directory to append this run to")
+    export.set_defaults(handler=cmd_export)
+
+    cache_lookup = subcommands.add_parser("cache-lookup", help=cmd_cache_lookup.__doc__)
+    cache_lookup.add_argument("models", nargs="+", help="Model numbers")
+    cache_lookup.add_argument("--results", default=os.getenv("RESULTS_PATH", "results.ndjson"), help="Results file to search")
+    cache_lookup.add_argument("--history", default=os.getenv("HISTORY_DIR"), help="Price history directory to fall back to")
+    cache_lookup.set_defaults(handler=cmd_cache_lookup)
+
+    reextract = subcommands.add_parser("reextract", help=cmd_reextract.__doc__)
+    reextract.add_argument("archive", nargs="?", default=os.getenv("PAGE_ARCHIVE_DIR", "pages"),
+                           help="Page archive directory (PAGE_ARCHIVE_DIR)")
+    reextract.add_argument("-o", "--output", default="-", help="Products as JSON lines ('-' for stdout)")
+    reextract.add_argument("--workers", type=int, help="Parser processes (defaults to the number of CPUs)")
+    reextract.add_argument("--retailer", help="Only pages from this host (e.g. www.bestbuy.com)")
+    reextract.add_argument("--since", help="Only pages archived at or after this ISO timestamp")
+    reextract.set_defaults(handler=cmd_reextract)
+
+    run = subcommands.add_parser("run", help=cmd_run.__doc__)
+    run.set_defaults(handler=cmd_run)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command in ("normalize", "scrape", "run"):
+        import dotenv
+        dotenv.load_dotenv()
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
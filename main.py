@@ -1,8 +1,15 @@
+import os
+import json
 import dotenv
 import asyncio
 import pprint
-from utils.llmFunctions import process_and_validate_products
-from scrapers.bestBuy import BestBuyScraper
+from utils.metrics import span, metrics
+from utils.deadline import DEFAULT_LOOKUP_DEADLINE
+from utils.resultSink import build_result_row, open_sink, group_by_brand
+from utils.catalogSource import iter_catalog_batches, dedupe_products, batched
+
+# Selenium, aiohttp, pydantic and pandas are imported inside the functions that use them,
+# so importing this module (e.g. from cli.py) stays cheap
 
 dotenv.load_dotenv()
 
@@ -29,153 +36,312 @@ Products = [
   { "name": "Samsung 75\u201d 4K Tizen Smart CUHD TV - UN75DU8000FXZC" }, 
 ]
 
-def scrape_bestbuy_products(validated_products, max_products=18, headless=True):
+def extraction_workers():
+    """Processes parsing results pages while the browser moves on (EXTRACTION_WORKERS; default 0 parses inline)"""
+    return int(os.getenv("EXTRACTION_WORKERS", "0"))
+
+def create_scraper(headless=True, **scraper_kwargs):
+    """Start a Best Buy scraper whose delays adapt to how the site responds"""
+    from scrapers.bestBuy import BestBuyScraper
+    from utils.rateController import AdaptiveRateController
+    from utils.proxyPool import ProxyPool
+    from utils.sessionStore import SessionStore
+    from utils.recyclePolicy import RecyclePolicy
+    from utils.pageArchive import PageArchive
+    from utils.skuStore import SkuStore
+    
+    # Proxies come from the comma separated PROXY_LIST variable, saved browser sessions
+    # from SESSION_DIR, the raw page archive from PAGE_ARCHIVE_DIR and known product
+    # pages from SKU_STORE_PATH, when they are set
+    scraper_kwargs.setdefault("max_pages", int(os.getenv("MAX_RESULT_PAGES", "3")))
+    scraper_kwargs.setdefault("recycle_policy", RecyclePolicy.from_env())
+    scraper_kwargs.setdefault("archive", PageArchive.from_env())
+    scraper_kwargs.setdefault("sku_store", SkuStore.from_env())
+    scraper_kwargs.setdefault("prefetch", os.getenv("PREFETCH_NEXT_QUERY", "False").lower() in ("1", "true", "yes"))
+    workers = extraction_workers()
+    if workers and "extraction_pool" not in scraper_kwargs:
+        from scrapers.extractionPool import ExtractionPool
+        scraper_kwargs["extraction_pool"] = ExtractionPool(workers)
+    return BestBuyScraper(headless=headless, use_delays=True, rate_controller=AdaptiveRateController(),
+                          proxy_pool=ProxyPool.from_env(), session_store=SessionStore.from_env(), **scraper_kwargs)
+
+def load_catalog_batches(batch_size=50):
     """
-    Scrape Best Buy for product information using the validated products data
+    Stream input products in batches
+    
+    Reads CATALOG_PATH (CSV or JSON lines, "-" for stdin) when it is set, otherwise the
+    built-in Products list. Repeated names are dropped as they stream past.
+    """
+    catalog_path = os.getenv("CATALOG_PATH")
+    if catalog_path:
+        print(f"Reading products from {catalog_path}...")
+        return iter_catalog_batches(catalog_path, batch_size)
+    return batched(dedupe_products(Products), batch_size)
+
+def print_result(row):
+    """Print one result row as soon as it is produced"""
+    print(f"\nModel: {row['model_no']} ({row['brand']})")
+    print(f"Original Name: {row['original_name'] or 'N/A'}")
+    
+    if row['found']:
+        print(f"✅ Found at Best Buy:")
+        print(f"   Name: {row['name'] or 'N/A'}")
+        print(f"   Price: {row['price'] or 'N/A'}")
+        print(f"   Rating: {row['rating'] or 'N/A'}")
+        print(f"   SKU: {row['sku'] or 'N/A'}")
+        print(f"   URL: {row['url'] or 'N/A'}")
+    elif row.get('error'):
+        print(f"⚠️ Lookup failed ({row['error']}); not known whether Best Buy lists it")
+    else:
+        print(f"❌ Not found at Best Buy")
+
+def race_search_terms():
+    """Whether lookups race the short and long search terms against the medium one (RACE_SEARCH_TERMS)"""
+    return os.getenv("RACE_SEARCH_TERMS", "False").lower() in ("1", "true", "yes")
+
+def lookup_deadline():
+    """Seconds one product lookup may take, every page wait included (LOOKUP_DEADLINE; 0 for no limit)"""
+    return float(os.getenv("LOOKUP_DEADLINE", DEFAULT_LOOKUP_DEADLINE)) or None
+
+def hedge_lookups():
+    """Whether idle tabs duplicate lookups slower than the recent p95 (HEDGE_LOOKUPS, async backend)"""
+    return os.getenv("HEDGE_LOOKUPS", "True").lower() in ("1", "true", "yes")
+
+def prepare_lookups(validated_products, sink, max_products=None, race_terms=True):
+    """
+    Turn validated products into scraper input and a callback writing each result to the sink
     
     Args:
         validated_products: List of products with brand, model_no, and search terms
-        max_products: Maximum number of products to scrape (to limit runtime)
-        headless: Whether to run the browser in headless mode
-        
+        sink: ResultSink the callback writes to
+        max_products: Maximum number of products to look up
+        race_terms: Also search the short and long terms alongside the medium one
+    
     Returns:
-        Dictionary of results keyed by model number
+        (search term -> model number dictionary, lookup hints passed on to batch_search as
+        keyword arguments, on_result(model_no, product, error=None) callback)
     """
-    print("\nScraping Best Buy for product information...")
+    from scrapers.bestBuyParsing import failure_outcome
     
     # Create a dictionary of search terms to model numbers for batch processing
-    # Use the medium search term for each product
+    # Use the medium search term for each product, racing the others against it
     search_model_pairs = {}
+    alternate_terms = {}
+    # The input name lets the scraper recognize cards that don't show a model number
+    product_names = {}
     
     # Limit to max_products if specified
     products_to_process = validated_products[:max_products] if max_products else validated_products
+    originals = {}
     
     for product in products_to_process:
         model_no = product.get('model_no')
-        search_term = product.get('search_terms', {}).get('medium')
+        search_terms = product.get('search_terms', {})
+        search_term = search_terms.get('medium')
         
         if model_no and search_term:
             search_model_pairs[search_term] = model_no
+            originals.setdefault(model_no, product)
+            if product.get('input_name'):
+                product_names[search_term] = product['input_name']
+            if race_terms:
+                alternate_terms[search_term] = [search_terms[length] for length in ('short', 'long')
+                                                if search_terms.get(length)]
+    
+    def on_result(model_no, product_data, error=None):
+        # Combine the scraper result with the original product info and hand it straight to the sink
+        row = build_result_row(model_no, product_data, originals.get(model_no),
+                               failure_outcome(error) if error is not None else None)
+        print_result(row)
+        sink.write(row)
+    
+    lookup_hints = {"alternate_terms": alternate_terms, "product_names": product_names}
+    return search_model_pairs, lookup_hints, on_result
+
+def scrape_bestbuy_products(validated_products, sink, max_products=18, headless=True, scraper=None):
+    """
+    Scrape Best Buy for product information using the validated products data
+    
+    Args:
+        validated_products: List of products with brand, model_no, and search terms
+        sink: ResultSink each result row is written to as soon as its lookup finishes
+        max_products: Maximum number of products to scrape (to limit runtime)
+        headless: Whether to run the browser in headless mode
+        scraper: Already-running BestBuyScraper to reuse across batches (left open);
+            a new one is created and closed when omitted
+        
+    Returns:
+        Number of result rows written
+    """
+    print("\nScraping Best Buy for product information...")
+    search_model_pairs, lookup_hints, on_result = prepare_lookups(validated_products, sink, max_products,
+                                                                  race_search_terms())
     
-    # Initialize the scraper and perform batch search
-    scraper = BestBuyScraper(headless=headless, use_delays=True)
+    owns_scraper = scraper is None
+    if owns_scraper:
+        scraper = create_scraper(headless)
     
     try:
         # Perform the batch search
-        results = scraper.batch_search(search_model_pairs)
-        
-        # Enhance results with original product data
-        enhanced_results = {}
-        for model_no, product_data in results.items():
-            # Find the original product info
-            original_product = next((p for p in validated_products if p.get('model_no') == model_no), {})
-            
-            if product_data:
-                # Combine the scraper results with original product info
-                enhanced_results[model_no] = {
-                    "bestbuy_data": product_data,
-                    "original_info": original_product
-                }
-            else:
-                enhanced_results[model_no] = {
-                    "bestbuy_data": None,
-                    "original_info": original_product
-                }
-        
-        return enhanced_results
+        scraper.batch_search(search_model_pairs, on_result=on_result, deadline_seconds=lookup_deadline(),
+                             **lookup_hints)
+        sink.flush()
+        return sink.rows_written
     finally:
         # Ensure the scraper is closed properly
-        scraper.close()
+        if owns_scraper:
+            scraper.close()
+
+async def scrape_bestbuy_products_async(validated_products, sink, max_products=18, browser=None, sessions=4):
+    """
+    Scrape Best Buy through the asyncio CDP backend, several tabs at a time
+    
+    Args:
+        validated_products: List of products with brand, model_no, and search terms
+        sink: ResultSink each result row is written to as soon as its lookup finishes
+        max_products: Maximum number of products to scrape (to limit runtime)
+        browser: Started ChromeBrowser to reuse across batches (one is launched when omitted)
+        sessions: Concurrent tabs
+        
+    Returns:
+        Number of result rows written
+    """
+    from scrapers.asyncBestBuy import concurrent_batch_search
+    from utils.rateController import AdaptiveRateController
+    from utils.pageArchive import PageArchive
+    
+    print("\nScraping Best Buy for product information (async backend)...")
+    search_model_pairs, lookup_hints, on_result = prepare_lookups(validated_products, sink, max_products,
+                                                                  race_search_terms())
+    await concurrent_batch_search(search_model_pairs, sessions=sessions, on_result=on_result, browser=browser,
+                                  deadline_seconds=lookup_deadline(), hedge=hedge_lookups(),
+                                  rate_controller=AdaptiveRateController(), archive=PageArchive.from_env(),
+                                  max_pages=int(os.getenv("MAX_RESULT_PAGES", "3")), **lookup_hints)
+    sink.flush()
+    return sink.rows_written
 
 async def main():
     """Main entry point for the application."""
-    print("Processing products with LLM...")
+    from utils.llmFunctions import process_and_validate_products
+    from utils.geminiLLMService import llm_usage
     
     """
+    The catalog is processed in batches: while one batch is being scraped, the next is
+    normalized by the LLM, so neither stage waits for the whole catalog and memory stays
+    flat however many products the catalog holds.
+    
     Step 1:
     Generate the brand, model, and search terms for each product with a LLM
     Uses gemini-2.0-flash as it's only $0.40 per 1M output tokens and scores highly on benchmarks, arguably the best price to perfomance for LLMs
-    """
-    validated_products, success = await process_and_validate_products(Products)
     
-    if not success:
-        print("Failed to process products. Exiting...")
-        return
-    
-    print("\nValidated Products:")
-    pprint.pprint(validated_products[:2])  # Print just the first two for brevity
-    print(f"Total validated products: {len(validated_products)}")
-    
-    """
     Step 2:
     Scrape websites for product information
+    Each result is written to RESULTS_PATH (.ndjson, .csv or .parquet) as soon as it is found
     """
-    # Scrape Best Buy - limit to 3 products for testing
-    bestbuy_results = scrape_bestbuy_products(validated_products, max_products=18, headless=False)
+    batch_size = int(os.getenv("CATALOG_BATCH_SIZE", "50"))
+    max_products = int(os.getenv("MAX_PRODUCTS", "18")) or None
+    results_path = os.getenv("RESULTS_PATH", "results.ndjson")
+    # "cdp" drives Chrome from this event loop, several tabs at a time, instead of Selenium in a thread
+    backend = os.getenv("SCRAPER_BACKEND", "selenium").lower()
+    async_sessions = int(os.getenv("ASYNC_SESSIONS", "4"))
     
-    print("\nBest Buy Scraping Results:")
-    print("="*80)
+    async def normalize(batch):
+        print(f"Processing {len(batch)} products with LLM...")
+        with span("llm_stage"):
+            validated, success = await process_and_validate_products([{"name": p["name"]} for p in batch],
+                                                                      batch_size=batch_size)
+        return validated if success else []
     
-    for model_no, data in bestbuy_results.items():
-        bestbuy_data = data.get('bestbuy_data')
-        original_info = data.get('original_info', {})
-        
-        print(f"\nModel: {model_no} ({original_info.get('brand', 'Unknown')})")
-        print(f"Original Name: {original_info.get('input_name', 'N/A')}")
-        
-        if bestbuy_data:
-            print(f"✅ Found at Best Buy:")
-            print(f"   Name: {bestbuy_data.get('name', 'N/A')}")
-            print(f"   Price: {bestbuy_data.get('price', 'N/A')}")
-            print(f"   Rating: {bestbuy_data.get('rating', 'N/A')}")
-            print(f"   SKU: {bestbuy_data.get('sku', 'N/A')}")
-            print(f"   URL: {bestbuy_data.get('url', 'N/A')}")
-        else:
-            print(f"❌ Not found at Best Buy")
+    async def scrape(validated_products):
+        with span("scrape_stage"):
+            if backend == "cdp":
+                await scrape_bestbuy_products_async(validated_products, sink, None, browser, async_sessions)
+            else:
+                await asyncio.to_thread(scrape_bestbuy_products, validated_products, sink, None, False, scraper)
+    
+    scraper = None
+    browser = None
+    products_seen = 0
+    try:
+        with open_sink(results_path) as sink:
+            batches = load_catalog_batches(batch_size)
+            pending = None
+            for batch in batches:
+                if max_products:
+                    batch = batch[:max_products - products_seen]
+                    if not batch:
+                        break
+                products_seen += len(batch)
+                next_llm = asyncio.ensure_future(normalize(batch))
+                if pending:
+                    # Scrape the previous batch while the LLM handles this one
+                    await scrape(pending)
+                validated_products = await next_llm
+                if validated_products:
+                    print(f"Validated {len(validated_products)} products")
+                    pprint.pprint(validated_products[:2])  # Print just the first two for brevity
+                    if backend == "cdp" and browser is None:
+                        from scrapers.cdpBrowser import ChromeBrowser
+                        browser = await ChromeBrowser(headless=False).start()
+                    elif backend != "cdp" and scraper is None:
+                        print("\nBest Buy Scraping Results:")
+                        print("="*80)
+                        scraper = await asyncio.to_thread(create_scraper, False)
+                pending = validated_products
+            if pending:
+                await scrape(pending)
+            rows_written = sink.rows_written
+    finally:
+        if scraper:
+            scraper.close()
+        if browser:
+            await browser.close()
+    
+    for model, usage in llm_usage.summary().items():
+        print(f"LLM usage ({model}): {usage['calls']} calls, {usage['prompt_tokens']} prompt + "
+              f"{usage['output_tokens']} output tokens, {usage['latency_total']}s, "
+              f"~${usage.get('estimated_cost_usd', 'n/a')}")
+    if not rows_written:
+        print("Failed to process products. Exiting...")
+        return
+    print(f"\n{rows_written} results written to {results_path}")
             
     """
     Step 3:
     Export the results as structured JSON data grouped by brand
+    Grouping is a post-pass over the results file, so the scrape never holds the full result set
     """
-    # Create a structure to organize products by brand
-    structured_data = {"brands": {}}
-    
-    # Organize all products by brand
-    for model_no, data in bestbuy_results.items():
-        bestbuy_data = data.get('bestbuy_data')
-        original_info = data.get('original_info', {})
-        brand = original_info.get('brand', 'unknown').lower()
-        
-        # Initialize the brand in our structure if it doesn't exist
-        if brand not in structured_data["brands"]:
-            structured_data["brands"][brand] = []
-        
-        # Create a product entry
-        product_entry = {
-            "model_no": model_no,
-            "original_name": original_info.get('input_name', 'N/A'),
-            "bestbuy": {
-                "found": bestbuy_data is not None
-            }
-        }
-        
-        # Add BestBuy data if available
-        if bestbuy_data:
-            product_entry["bestbuy"].update({
-                "name": bestbuy_data.get('name', 'N/A'),
-                "price": bestbuy_data.get('price', 'N/A'),
-                "rating": bestbuy_data.get('rating', 'N/A'),
-                "sku": bestbuy_data.get('sku', 'N/A'),
-                "url": bestbuy_data.get('url', 'N/A')
-            })
-        
-        # Add the product to its brand's list
-        structured_data["brands"][brand].append(product_entry)
+    if results_path == "-":
+        print("\nDone!")
+        return
+    with span("export_stage"):
+        structured_data = group_by_brand(results_path)
+        export_path = os.path.splitext(results_path)[0] + "_by_brand.json"
+        with open(export_path, "w") as f:
+            json.dump(structured_data, f, indent=2)
     
-    # Print the structured data
     print("\n\nFINAL STRUCTURED DATA")
     print("="*80)
-    pprint.pprint(structured_data, width=100, sort_dicts=False)
+    for brand, entries in structured_data["brands"].items():
+        found = sum(entry["bestbuy"]["found"] for entry in entries)
+        print(f"{brand}: {found}/{len(entries)} found at Best Buy")
+    print(f"Grouped export written to {export_path}")
+    
+    # Keep a normalized price/rating history across runs when HISTORY_DIR is set
+    history_dir = os.getenv("HISTORY_DIR")
+    if history_dir:
+        from utils.historyStore import PriceHistoryStore
+        store = PriceHistoryStore(history_dir)
+        run_id = store.append_file(results_path)
+        if len(store.runs()) > 1:
+            changes = store.diff(run_id)
+            print(f"\n{len(changes)} listings changed since the previous run:")
+            print(changes[["model_no", "status", "price_usd_before", "price_usd_after", "price_change"]].to_string(index=False))
+    
+    # Export stage timings when METRICS_ENABLED is set
+    if metrics.enabled:
+        json_path, prom_path = metrics.export(os.getenv("METRICS_EXPORT_PREFIX", "metrics"))
+        print(f"\nMetrics written to {json_path} and {prom_path}")
     
     print("\nDone!")
 
@@ -0,0 +1,871 @@
+import time
+import json
+import random
+import asyncio
+import traceback
+
+from scrapers.cdpBrowser import ChromeBrowser, CDPError
+from scrapers.bestBuyParsing import (BLOCK_PAGE_SELECTORS, PRODUCT_SELECTOR, POPUP_INDICATOR_SELECTOR,
+                                     POPUP_SELECTORS, parse_products, match_product, parse_page_count, page_url,
+                                     search_page_url, detect_block_signal_in_text, LOOKUP_FAILURES,
+                                     SearchFailed)
+from utils.fingerprintPool import default_fingerprint_pool
+from utils.sessionStore import SAVED_COOKIE_FIELDS, identity_name
+from utils.delayUtils import async_random_delay, async_human_like_delay, random_typing_delay
+from utils.metrics import span, metrics
+from utils.deadline import Deadline, DeadlineExceeded, LatencyTracker
+from utils.proxyPool import BLOCK_SIGNALS, is_proxy_error
+
+
+class AsyncBestBuyScraper:
+    """
+    asyncio counterpart of BestBuyScraper, driving Chrome over the DevTools protocol
+
+    Exposes the same search / get_search_results / lookup / batch_search / close surface
+    as coroutines. Sessions share one ChromeBrowser, each in its own tab and browser
+    context (separate cookies and proxy), so many lookups run concurrently on one event
+    loop next to the async LLM code instead of holding a thread and a Chrome process each.
+    """
+
+    def __init__(self, browser=None, headless=True, use_delays=True, base_url="https://www.bestbuy.com/",
+                 rate_controller=None, session_id=None, proxy_pool=None, fingerprint_pool=None,
+                 session_store=None, max_pages=3, archive=None):
+        """
+        Args:
+            browser: Started ChromeBrowser to open the session's tab in (one is launched and
+                owned by this scraper when omitted)
+            headless: Whether to run the browser in headless mode (when launching one)
+            use_delays: Whether to add human-like delays between actions
+            base_url: Site root to scrape (point this at the mock retailer for local load tests)
+            rate_controller: Optional AdaptiveRateController that scales delays from block signals
+            session_id: Key for this session's budget in the rate controller and proxy pool
+            proxy_pool: Optional ProxyPool; the session's browser context uses the leased proxy
+            fingerprint_pool: FingerprintPool the session leases its identity from (defaults to the shared pool)
+            session_store: Optional SessionStore to restore and save this identity's cookies and localStorage
+            max_pages: Most results pages read per search; pages after the first load concurrently
+            archive: Optional PageArchive keeping the raw source of every results page read
+        """
+        self.browser = browser
+        self._owns_browser = browser is None
+        self.headless = headless
+        self.use_delays = use_delays
+        self.base_url = base_url.rstrip("/") + "/"
+        self.rate_controller = rate_controller
+        self.session_id = session_id or f"async-bestbuy-{id(self):x}"
+        self.proxy_pool = proxy_pool
+        self.proxy = None
+        self.fingerprint_pool = fingerprint_pool or default_fingerprint_pool
+        self.fingerprint = None
+        self.session_store = session_store
+        self._identity = None
+        self.restored = False
+        self.max_pages = max_pages
+        self.archive = archive
+        self.page = None
+        self._swap = None
+        self._last_page_load = None
+        # Deadline of the lookup in progress; every wait and pause is cut to it
+        self.deadline = None
+
+    async def start(self):
+        """Open the session's tab (launching Chrome first if no browser was given)"""
+        if self.browser is None:
+            self.browser = ChromeBrowser(headless=self.headless)
+        if self.browser.connection is None:
+            await self.browser.start()
+        self.proxy = self.proxy_pool.acquire(self.session_id) if self.proxy_pool else None
+        if self.proxy_pool and not self.proxy:
+            raise RuntimeError("No proxy available for a new session; every proxy is cooling down or fully leased")
+        self.fingerprint = self.fingerprint_pool.lease(self.session_id)
+        try:
+            await self._open_page()
+        except Exception:
+            await self.close()
+            raise
+        if self.use_delays:
+            await async_human_like_delay("general")
+        return self
+
+    async def _open_page(self):
+        """Open a tab in a new browser context with the session's proxy, fingerprint and saved state"""
+        if self.proxy:
+            print(f"Using proxy: {self.proxy}")
+        with span("page_open"):
+            self.page = await self.browser.new_page(proxy=self.proxy)
+        if self.browser.version and self.browser.version.split(".")[0] != self.fingerprint.major_version:
+            self.fingerprint_pool.set_browser_version(self.browser.version)
+            self.fingerprint = self.fingerprint_pool.lease(self.session_id)
+        print(f"Using fingerprint: {self.fingerprint}")
+        await self._apply_fingerprint(self.page)
+        await self._restore_session()
+
+    async def _apply_fingerprint(self, page):
+        """Present the session's fingerprint in a tab (overrides are per tab, not per context)"""
+        width, height = self.fingerprint.viewport
+        await page.send("Network.setUserAgentOverride", self.fingerprint.user_agent_override())
+        await page.send("Emulation.setTimezoneOverride", {"timezoneId": self.fingerprint.timezone})
+        await page.send("Emulation.setDeviceMetricsOverride", {
+            "width": width, "height": height, "deviceScaleFactor": 1, "mobile": False})
+
+    async def _restore_session(self):
+        """Load the identity's saved cookies and localStorage into the new context"""
+        self.restored = False
+        if not self.session_store:
+            return
+        identity = identity_name(self.fingerprint)
+        if not self.session_store.checkout(identity, self.session_id):
+            print(f"Saved session {identity} is in use elsewhere; starting with a fresh profile")
+            return
+        self._identity = identity
+        state = self.session_store.load(identity)
+        if not state or not state["cookies"]:
+            return
+        await self.page.set_cookies(state["cookies"])
+        storage = {entry["origin"]: {item["name"]: item["value"] for item in entry["localStorage"]}
+                   for entry in state["origins"]}
+        if storage:
+            await self.page.send("Page.addScriptToEvaluateOnNewDocument", {"source": (
+                f"(function() {{ var items = ({json.dumps(storage)})[location.origin]; if (!items) return;"
+                " try { for (var key in items) if (localStorage.getItem(key) === null)"
+                " localStorage.setItem(key, items[key]); } catch (e) {} })();"
+            )})
+        self.restored = True
+        metrics.increment("session_restores_total")
+        print(f"Restored {len(state['cookies'])} cookies for {identity}")
+
+    async def _save_session(self):
+        if not self._identity or not self.page or self.page.closed:
+            return
+        try:
+            cookies = [{key: cookie[key] for key in SAVED_COOKIE_FIELDS if key in cookie}
+                       for cookie in await self.page.cookies()]
+            previous = self.session_store.load(self._identity)
+            origins = previous["origins"] if previous else []
+            origin, items = await self.page.evaluate("[location.origin, Object.assign({}, window.localStorage)]")
+            if origin.startswith("http"):
+                origins = [entry for entry in origins if entry["origin"] != origin]
+                origins.append({"origin": origin,
+                                "localStorage": [{"name": key, "value": value} for key, value in items.items()]})
+            self.session_store.save(self._identity, cookies, origins)
+            print(f"Saved {len(cookies)} cookies for {self._identity}")
+        except Exception as e:
+            print(f"Could not save session: {str(e)}")
+
+    def _checkin_session(self, discard=False):
+        if self.session_store and self._identity:
+            if discard:
+                self.session_store.discard(self._identity)
+            self.session_store.checkin(self._identity, self.session_id)
+        self._identity = None
+
+    async def _rotate_proxy(self, signal):
+        """
+        Move this session to a different proxy and identity
+
+        Unlike the Selenium scraper this only replaces the tab's browser context; the
+        Chrome process keeps running.
+
+        Returns:
+            True if the session now runs on a new proxy
+        """
+        if not self.proxy_pool:
+            return False
+        new_proxy = self.proxy_pool.rotate(self.session_id, signal)
+        if not new_proxy:
+            print("No other healthy proxy available; keeping the current session")
+            return False
+
+        print(f"Rotating proxy after '{signal}': {self.proxy} -> {new_proxy}")
+        metrics.increment("proxy_rotations_total", signal=signal)
+        # A lookup won by another search term cancels this one, but the swap must not stop halfway
+        self._swap = asyncio.ensure_future(self._swap_context(new_proxy))
+        await asyncio.shield(self._swap)
+        return True
+
+    async def _swap_context(self, new_proxy):
+        await self.page.close()
+        self.proxy = new_proxy
+        # The blocked identity goes with the blocked IP, and its cookies are tainted
+        self._checkin_session(discard=True)
+        self.fingerprint = self.fingerprint_pool.rotate(self.session_id)
+        await self._open_page()
+
+    def _delay_scale(self):
+        """Current delay multiplier from the rate controller (1.0 without one)"""
+        if self.rate_controller:
+            return self.rate_controller.delay_scale(self.session_id)
+        return 1.0
+
+    def _tab_limit(self, tabs):
+        """Pages to load side by side: `tabs`, narrowed to the rate controller's concurrency window"""
+        if self.rate_controller:
+            return max(1, min(tabs, self.rate_controller.concurrency_limit(self.session_id)))
+        return tabs
+
+    async def _pause(self, seconds, minimum=0.5):
+        """Sleep for a content-loading pause scaled by the rate controller"""
+        await self._sleep(max(minimum, seconds * self._delay_scale()))
+
+    def _time_left(self):
+        """Seconds left in the current lookup's deadline, or None without one"""
+        return self.deadline.remaining() if self.deadline else None
+
+    async def _sleep(self, seconds):
+        """asyncio.sleep cut to the time left in the current lookup"""
+        if self.deadline:
+            seconds = min(seconds, self.deadline.remaining())
+        await asyncio.sleep(seconds)
+
+    def _wait_timeout(self, seconds=15):
+        """A wait_for_selector timeout cut to the time left in the current lookup"""
+        return self.deadline.timeout(seconds) if self.deadline else seconds
+
+    def _check_deadline(self, stage):
+        """
+        Raises:
+            DeadlineExceeded: If the current lookup has run out of time
+        """
+        if self.deadline:
+            self.deadline.check(stage)
+
+    async def _wait_for_cooldown(self):
+        """
+        Wait out the session's cooldown after a block signal
+
+        Raises:
+            DeadlineExceeded: Straight away, without sleeping, if the cooldown outlasts the
+                current lookup's time left
+        """
+        if not self.rate_controller:
+            return
+        remaining = self.rate_controller.cooldown_remaining(self.session_id)
+        if self.deadline and remaining > self.deadline.remaining():
+            raise DeadlineExceeded(f"cooldown: {remaining:.0f}s left, more than the lookup's "
+                                   f"{self.deadline.remaining():.0f}s")
+        if remaining > 0:
+            print(f"Cooling down for {remaining:.1f}s before the next request")
+            await asyncio.sleep(remaining)
+
+    async def _add_delay(self, action_type="general"):
+        """Add human-like delay if delays are enabled"""
+        if self.use_delays:
+            with span("delay", action=action_type):
+                await async_human_like_delay(action_type, scale=self._delay_scale(), limit=self._time_left())
+
+    def _report_success(self):
+        if self.rate_controller:
+            self.rate_controller.record_success(self.session_id)
+        if self.proxy_pool and self.proxy:
+            self.proxy_pool.report_success(self.proxy, self._last_page_load)
+
+    async def _report_signal(self, signal):
+        metrics.increment("block_signals_total", signal=signal)
+        if self.rate_controller:
+            self.rate_controller.record_signal(self.session_id, signal)
+        # The target has flagged this IP, so move the session elsewhere
+        if signal in BLOCK_SIGNALS:
+            await self._rotate_proxy(signal)
+
+    async def _detect_block_signal(self, page=None):
+        """
+        Check whether the session's tab (or another tab) shows a captcha or block page
+
+        Returns:
+            The signal name ('captcha', 'http_403', 'http_429') or None for a normal page
+        """
+        page = page or self.page
+        try:
+            for signal, selector in BLOCK_PAGE_SELECTORS.items():
+                if await page.query_count(selector):
+                    return signal
+            page_text = await page.evaluate(
+                "document.title + ' ' + (document.body ? document.body.innerText.slice(0, 2000) : '')")
+            return detect_block_signal_in_text(page_text)
+        except Exception as e:
+            print(f"Error checking for block page: {e}")
+        return None
+
+    async def _type_with_delays(self, selector, text):
+        """Type text into an input with human-like delays between characters"""
+        await self.page.focus(selector)
+        if not self.use_delays:
+            await self.page.type_text(text)
+            return
+
+        await self._add_delay("type")
+        text, total_delay = random_typing_delay(text, verbose=True)
+        for char in text:
+            await self.page.type_text(char)
+            await self._sleep(random.uniform(0.05, 0.2) * self._delay_scale())
+        await async_random_delay(0.2, 0.5, verbose=False, limit=self._time_left())
+
+    async def _handle_popups(self):
+        """Close the first known popup or modal on the page, if any"""
+        print("Checking for popups and modals...")
+        try:
+            if not await self.page.query_count(POPUP_INDICATOR_SELECTOR):
+                print("No popups detected, skipping popup handling")
+                return
+
+            for selector in POPUP_SELECTORS:
+                if not await self.page.query_count(selector["popup"]):
+                    continue
+                print(f"Found popup: {selector['popup']}")
+                if await self.page.click(selector["button"]):
+                    print("Popup closed successfully")
+                else:
+                    print("No close button found; trying to dismiss with ESC key")
+                    await self.page.press("Escape")
+                await self._sleep(0.5)
+                return
+
+            print("Using JavaScript to remove potential modal elements")
+            await self.page.evaluate(
+                "document.querySelectorAll('.modal-backdrop, #confirmIt-backdrop').forEach(e => e.remove());"
+                " document.body.classList.remove('modal-open');")
+        except Exception as e:
+            print(f"Error in popup handling: {e}")
+
+    async def search(self, query):
+        """Search for a product on Best Buy website, returning the results URL or None"""
+        try:
+            # Let a context swap that outlived a cancelled lookup finish first
+            if self._swap is not None and not self._swap.done():
+                await self._swap
+
+            # Respect any cooldown imposed after a block signal
+            await self._wait_for_cooldown()
+
+            print(f"Navigating to {self.base_url}...")
+            page_load_started = time.perf_counter()
+            with span("driver_get"):
+                await self.page.goto(self.base_url)
+            self._last_page_load = time.perf_counter() - page_load_started
+
+            block_signal = await self._detect_block_signal()
+            if block_signal:
+                print(f"Blocked while loading homepage ({block_signal})")
+                await self._report_signal(block_signal)
+                return None
+
+            with span("popups"):
+                await self._handle_popups()
+
+            with span("search_input_wait"):
+                await self.page.wait_for_selector("#gh-search-input", timeout=self._wait_timeout(), visible=True)
+
+            await self._add_delay("type")
+            print(f"Entering search query: {query}")
+            with span("typing"):
+                await self._type_with_delays("#gh-search-input", query)
+
+            await self._add_delay("click")
+            if not await self.page.click(".header-search-button"):
+                print("Search button not found; pressing Enter")
+                await self.page.press("Enter")
+
+            await self._add_delay("search")
+            print("Waiting for search results to load...")
+            try:
+                with span("results_wait"):
+                    await self.page.wait_for_selector(PRODUCT_SELECTOR, timeout=self._wait_timeout())
+            except CDPError:
+                # A wait cut short by the lookup's deadline says nothing about the site
+                self._check_deadline("results_wait")
+                # A results wait that times out is often a challenge page served after submit
+                await self._report_signal(await self._detect_block_signal() or "timeout")
+                return None
+
+            print("Search results loaded successfully.")
+            await self._add_delay("read")
+            return await self.page.url()
+
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            # A wait cut short by the lookup's deadline says nothing about the site
+            self._check_deadline("search")
+            print(f"An error occurred during search: {str(e)}")
+            traceback.print_exc()
+            if self.proxy_pool and is_proxy_error(e):
+                await self._rotate_proxy("proxy_error")
+            return None
+
+    async def _scroll_to_load(self, page, max_scroll_attempts=15):
+        """Scroll a tab progressively so lazily loaded cards are fetched"""
+        total_height = await page.evaluate("document.body.scrollHeight")
+        scroll_step = (await page.evaluate("window.innerHeight")) // 2
+        await page.evaluate("window.scrollTo(0, 0)")
+        current_position = 0
+        for _ in range(max_scroll_attempts):
+            if self.deadline and self.deadline.expired():
+                print("Lookup deadline reached; extracting the products loaded so far")
+                return
+            current_position += int(scroll_step * random.uniform(0.8, 1.2))
+            await page.evaluate(f"window.scrollTo(0, {current_position})")
+            await self._pause(1.5)
+            if current_position >= total_height:
+                new_height = await page.evaluate("document.body.scrollHeight")
+                if new_height > total_height:
+                    print(f"Page height increased: {total_height} -> {new_height}")
+                    total_height = new_height
+                else:
+                    print("Reached bottom of page")
+                    break
+        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        await self._pause(2)
+
+    async def _archive_page(self, html, url):
+        """Keep the raw source of a results page so it can be re-extracted offline"""
+        if not self.archive:
+            return
+        try:
+            with span("archive"):
+                # Compression and file writes stay off the event loop
+                await asyncio.get_running_loop().run_in_executor(None, self.archive.put, html, url, self.base_url)
+        except Exception as e:
+            print(f"Could not archive results page: {str(e)}")
+
+    async def _read_results_page(self, url, label, max_scroll_attempts=15):
+        """
+        Load one results page in an extra tab of the session's browser context
+
+        Args:
+            url: Results page to load
+            label: How the page is named in progress output (e.g. "page 2")
+            max_scroll_attempts: Maximum number of scroll attempts
+
+        Returns:
+            (products, block signal or None); the tab is closed before returning
+        """
+        page = await self.browser.new_page(context_id=self.page.context_id)
+        try:
+            await self._apply_fingerprint(page)
+            await page.goto(url)
+            try:
+                with span("results_wait"):
+                    await page.wait_for_selector(PRODUCT_SELECTOR, timeout=self._wait_timeout())
+            except CDPError:
+                signal = await self._detect_block_signal(page)
+                print(f"No results on {label}" + (f" ({signal})" if signal else ""))
+                return [], signal
+            with span("scrolling"):
+                await self._scroll_to_load(page, max_scroll_attempts)
+            html = await page.content()
+            await self._archive_page(html, url)
+            with span("parsing"):
+                products = parse_products(html, self.base_url)
+            print(f"Found {len(products)} product items on {label}")
+            return products, None
+        finally:
+            await page.close()
+
+    async def _get_more_pages(self, first_page_html, results_url, model_no=None, max_pages=3, max_scroll_attempts=15,
+                              title_query=None):
+        """
+        Read results pages 2..max_pages concurrently, each in its own tab
+
+        The tabs share the session's cookies and proxy, and no more of them load at once
+        than the rate controller's concurrency window allows. As soon as one page lists
+        model_no the others are cancelled and their tabs closed.
+
+        Returns:
+            Products from the pages that finished
+        """
+        page_count = min(parse_page_count(first_page_html), max_pages)
+        if page_count < 2:
+            return []
+        print(f"Loading results pages 2-{page_count} concurrently...")
+        slots = asyncio.Semaphore(self._tab_limit(page_count - 1))
+
+        async def read_page(number):
+            async with slots:
+                return await self._read_results_page(page_url(results_url, number), f"page {number}",
+                                                     max_scroll_attempts)
+
+        tasks = [asyncio.ensure_future(read_page(number)) for number in range(2, page_count + 1)]
+        metrics.increment("result_pages_total", len(tasks))
+        products = []
+        block_signal = None
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    page_products, signal = await next_done
+                except Exception as e:
+                    print(f"Error reading a results page: {str(e)}")
+                    continue
+                products.extend(page_products)
+                block_signal = block_signal or signal
+                if model_no and match_product(page_products, model_no, title_query):
+                    print(f"Model {model_no} found; cancelling the remaining pages")
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Reported only after the tabs are gone, since a block signal replaces the context
+        if block_signal:
+            await self._report_signal(block_signal)
+        return products
+
+    async def get_search_results(self, model_no=None, max_scroll_attempts=15, max_pages=None, title_query=None):
+        """
+        Extract product information from the search results page,
+        optionally searching for a specific model number
+
+        Later results pages are read concurrently (up to max_pages), unless model_no is
+        already on the first one.
+
+        Args:
+            model_no: If provided, search for this specific model number
+            max_scroll_attempts: Maximum number of times to scroll down
+            max_pages: Most results pages to read (defaults to the scraper's max_pages)
+            title_query: Product name used to match cards that show no model number
+
+        Returns:
+            List of product dictionaries, or a single product (or None) if model_no is given
+
+        Raises:
+            SearchFailed: If model_no was given and the results page could not be read
+        """
+        try:
+            await self.page.wait_for_selector(PRODUCT_SELECTOR, timeout=self._wait_timeout())
+
+            with span("scrolling"):
+                await self._scroll_to_load(self.page, max_scroll_attempts)
+
+            with span("page_source"):
+                html = await self.page.content()
+            if self.archive:
+                await self._archive_page(html, await self.page.url())
+            with span("parsing"):
+                products = parse_products(html, self.base_url)
+            print(f"Found {len(products)} total product items after scrolling")
+
+            # Feed the rate controller: an empty page is a soft block signal
+            if products:
+                self._report_success()
+            else:
+                await self._report_signal(await self._detect_block_signal() or "empty_results")
+
+            product = match_product(products, model_no, title_query) if model_no else None
+            # Models that rank low for the query are only listed on later pages
+            max_pages = max_pages or self.max_pages
+            if max_pages > 1 and products and not product:
+                more_products = await self._get_more_pages(html, await self.page.url(), model_no,
+                                                           max_pages, max_scroll_attempts, title_query)
+                products.extend(more_products)
+                if model_no:
+                    product = match_product(more_products, model_no, title_query)
+
+            if not model_no:
+                return products
+            if product:
+                print(f"Model {model_no} found!")
+            else:
+                print(f"Model {model_no} not found in {len(products)} products")
+            return product
+
+        except Exception as e:
+            print(f"An error occurred getting search results: {str(e)}")
+            traceback.print_exc()
+            self._check_deadline("results_wait")
+            if isinstance(e, CDPError):
+                await self._report_signal(await self._detect_block_signal() or "timeout")
+            if model_no:
+                raise SearchFailed(f"Could not read the results for model {model_no}: {e}") from e
+            return []
+
+    async def lookup(self, search_term, model_no, max_scroll_attempts=15, alternate_terms=None, product_name=None,
+                     deadline=None):
+        """
+        Search for one model and return its listing
+
+        With alternate_terms, each of those queries loads its results page in an extra tab
+        while search_term is typed into the site search as usual. The first search whose
+        results list the model wins and the others are cancelled, so trying three terms
+        costs about as long as the slowest useful one rather than all three in a row.
+
+        Args:
+            search_term: Query to type into the site search
+            model_no: Model number to pick out of the results
+            max_scroll_attempts: Maximum number of scroll attempts
+            alternate_terms: Other queries for the same model (e.g. the short and long search terms)
+            product_name: Input product name, used to match cards that show no model number
+                (defaults to search_term)
+            deadline: Optional Deadline; searches still running when it passes are cancelled
+
+        Returns:
+            The product dictionary, or None if the model was not listed
+
+        Raises:
+            SearchFailed: If no search could be run or read
+            DeadlineExceeded: If the deadline passed before any search found the model
+        """
+        print(f"\n{'='*60}\nSearching for '{search_term}' to find model '{model_no}'\n{'='*60}\n")
+        alternate_terms = [term for term in dict.fromkeys(alternate_terms or []) if term and term != search_term]
+        title_query = product_name or search_term
+
+        async def primary():
+            search_url = await self.search(search_term)
+            if not search_url:
+                print(f"❌ Search failed for term '{search_term}'")
+                return "primary", search_url, None, None
+            product = await self.get_search_results(model_no=model_no, max_scroll_attempts=max_scroll_attempts,
+                                                    title_query=title_query)
+            return "primary", search_url, product, None
+
+        async def alternate(term):
+            products, signal = await self._read_results_page(search_page_url(self.base_url, term),
+                                                             f"results for '{term}'", max_scroll_attempts)
+            return "alternate", None, match_product(products, model_no, title_query), signal
+
+        self.deadline = deadline
+        tasks = []
+        searched = False
+        product = None
+        block_signal = None
+        timed_out = False
+        try:
+            # Waited out before any tab opens, and no more tabs race than the concurrency window allows
+            await self._wait_for_cooldown()
+            alternate_terms = alternate_terms[:self._tab_limit(len(alternate_terms) + 1) - 1]
+            tasks = [asyncio.ensure_future(primary())] + [asyncio.ensure_future(alternate(term))
+                                                          for term in alternate_terms]
+            for next_done in asyncio.as_completed(tasks, timeout=deadline.remaining() if deadline else None):
+                try:
+                    source, search_url, product, signal = await next_done
+                except DeadlineExceeded as e:
+                    print(f"Search ran out of time: {e}")
+                    timed_out = True
+                    continue
+                except Exception as e:
+                    print(f"Error during search: {str(e)}")
+                    continue
+                searched = searched or source == "alternate" or bool(search_url)
+                block_signal = block_signal or signal
+                if product:
+                    if alternate_terms:
+                        metrics.increment("search_term_wins_total", term=source)
+                    break
+        except (asyncio.TimeoutError, DeadlineExceeded):
+            timed_out = True
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.deadline = None
+
+        if block_signal:
+            await self._report_signal(block_signal)
+        if product:
+            print(f"✅ Found model {model_no}!")
+            metrics.increment("lookups_total", outcome="found")
+        elif timed_out:
+            print(f"⏱️ Gave up on model {model_no}: deadline of {deadline.seconds:g}s passed")
+            metrics.increment("lookups_total", outcome="deadline_exceeded")
+            raise DeadlineExceeded(f"lookup: deadline of {deadline.seconds:g}s passed")
+        elif searched:
+            print(f"❌ Model {model_no} not found in search results.")
+            metrics.increment("lookups_total", outcome="not_found")
+        else:
+            metrics.increment("lookups_total", outcome="search_failed")
+            raise SearchFailed(f"Search failed for term '{search_term}'")
+        return product
+
+    async def batch_search(self, search_model_pairs, max_scroll_attempts=15, on_result=None, alternate_terms=None,
+                           product_names=None, deadline_seconds=None):
+        """
+        Perform multiple searches for specific models, one after another in this tab
+
+        Args:
+            search_model_pairs: Dictionary where keys are search terms and values are model numbers to find
+            max_scroll_attempts: Maximum number of scroll attempts per search
+            on_result: Optional callback(model_no, product, error=None) run as soon as each lookup
+                finishes; when given, results are handed off instead of being collected in memory.
+                A failed lookup is passed with product None and the exception as error
+            alternate_terms: Optional dictionary of search term to other queries for the same
+                model, raced against it (see lookup)
+            product_names: Optional dictionary of search term to the input product name
+            deadline_seconds: Optional time budget per lookup
+
+        Returns:
+            Dictionary of model number to product (or None); failed lookups are left out.
+            Empty when on_result is given
+        """
+        results = {}
+        try:
+            for search_term, model_no in search_model_pairs.items():
+                try:
+                    product = await self.lookup(search_term, model_no, max_scroll_attempts,
+                                                (alternate_terms or {}).get(search_term),
+                                                (product_names or {}).get(search_term),
+                                                Deadline(deadline_seconds) if deadline_seconds else None)
+                except LOOKUP_FAILURES as e:
+                    if on_result:
+                        on_result(model_no, None, e)
+                else:
+                    if on_result:
+                        on_result(model_no, product)
+                    else:
+                        results[model_no] = product
+                with span("delay", action="between_searches"):
+                    await self._pause(2)
+        except Exception as e:
+            print(f"Error during batch search: {str(e)}")
+            traceback.print_exc()
+        return results
+
+    async def close(self):
+        """Close the session's tab, and the browser if this scraper launched it"""
+        if self._swap is not None:
+            await asyncio.gather(self._swap, return_exceptions=True)
+        if self.page:
+            await self._save_session()
+            await self.page.close()
+        self._checkin_session()
+        if self.proxy_pool:
+            self.proxy_pool.release(self.session_id)
+        if self.fingerprint:
+            self.fingerprint_pool.release(self.session_id)
+        if self._owns_browser and self.browser:
+            await self.browser.close()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+async def concurrent_batch_search(search_model_pairs, sessions=4, max_scroll_attempts=15, on_result=None,
+                                  headless=True, browser=None, alternate_terms=None, product_names=None,
+                                  deadline_seconds=None, hedge=False, latency_tracker=None, **scraper_kwargs):
+    """
+    Spread lookups over several tabs of one Chrome, all on the current event loop
+
+    With hedge, a tab that runs out of queued lookups duplicates the oldest lookup still
+    running once that has taken longer than the tracker's p95 latency. The first copy to
+    succeed is reported and the other is cancelled, so one stuck page does not hold up
+    the end of the batch; the lookup only fails once both copies have failed.
+
+    Args:
+        search_model_pairs: Dictionary of search term to model number
+        sessions: Number of concurrent tabs
+        max_scroll_attempts: Maximum number of scroll attempts per search
+        on_result: Optional callback(model_no, product, error=None) run as each lookup finishes
+            (error is the exception of a failed lookup, passed with product None)
+        headless: Whether to run Chrome without a window (when launching one)
+        browser: Started ChromeBrowser to open the tabs in (one is launched and closed when omitted)
+        alternate_terms: Optional dictionary of search term to other queries raced against it
+        product_names: Optional dictionary of search term to the input product name
+        deadline_seconds: Optional time budget per product, shared by a lookup and its hedge
+        hedge: Duplicate slow lookups on idle tabs
+        latency_tracker: LatencyTracker deciding when a lookup is slow (one per call when omitted)
+        **scraper_kwargs: Passed to every AsyncBestBuyScraper (base_url, use_delays, ...)
+
+    Returns:
+        Dictionary of model number to product (or None); failed lookups are left out.
+        Empty when on_result is given
+    """
+    loop = asyncio.get_running_loop()
+    queue: "asyncio.Queue" = asyncio.Queue()
+    for pair in search_model_pairs.items():
+        queue.put_nowait(pair)
+    results = {}
+    tracker = (latency_tracker if latency_tracker is not None else LatencyTracker()) if hedge else None
+    # search term -> {"model_no", "started", "deadline", "tasks"} for lookups still running
+    in_flight = {}
+
+    async def attempt(scraper, search_term, model_no):
+        entry = in_flight.setdefault(search_term, {
+            "model_no": model_no,
+            "started": loop.time(),
+            "deadline": Deadline(deadline_seconds) if deadline_seconds else None,
+            "tasks": [],
+        })
+        task = asyncio.ensure_future(scraper.lookup(search_term, model_no, max_scroll_attempts,
+                                                    (alternate_terms or {}).get(search_term),
+                                                    (product_names or {}).get(search_term), entry["deadline"]))
+        entry["tasks"].append(task)
+        # Waiting on the task rather than awaiting it keeps its cancellation from cancelling this worker
+        await asyncio.wait([task])
+        if task.cancelled() or in_flight.get(search_term) is not entry:
+            return  # The other copy finished first
+        error = task.exception()
+        if error is not None:
+            # A failed copy only settles the lookup once no other copy can still find the model
+            others = [other for other in entry["tasks"] if other is not task]
+            if any(not other.done() or (not other.cancelled() and other.exception() is None) for other in others):
+                entry.setdefault("error", error)
+                return
+            error = entry.get("error", error)
+        del in_flight[search_term]
+        for other in entry["tasks"]:
+            if other is not task:
+                other.cancel()
+        if tracker is not None:
+            tracker.observe(loop.time() - entry["started"])
+        if len(entry["tasks"]) > 1 and error is None:
+            metrics.increment("hedge_wins_total", attempt="primary" if task is entry["tasks"][0] else "hedge")
+        if error is not None and not isinstance(error, LOOKUP_FAILURES):
+            raise error
+        if on_result:
+            if error is None:
+                on_result(model_no, task.result())
+            else:
+                on_result(model_no, None, error)
+        elif error is None:
+            results[model_no] = task.result()
+
+    async def next_straggler():
+        """Wait for the oldest unhedged lookup to turn slow; None when there is nothing left to hedge"""
+        while tracker is not None:
+            waiting = [(entry["started"], term) for term, entry in in_flight.items() if len(entry["tasks"]) == 1]
+            if not waiting:
+                return None
+            started, search_term = min(waiting)
+            delay = started + tracker.hedge_delay() - loop.time()
+            if delay <= 0:
+                metrics.increment("hedged_lookups_total")
+                print(f"Hedging slow lookup for '{search_term}' on an idle tab")
+                return search_term, in_flight[search_term]["model_no"]
+            await asyncio.sleep(min(delay, 0.5))
+        return None
+
+    async def worker(scraper):
+        while True:
+            try:
+                search_term, model_no = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                straggler = await next_straggler()
+                if straggler is None:
+                    return
+                search_term, model_no = straggler
+            await attempt(scraper, search_term, model_no)
+
+    owns_browser = browser is None
+    if owns_browser:
+        browser = await ChromeBrowser(headless=headless).start()
+    scrapers = [AsyncBestBuyScraper(browser=browser, session_id=f"tab-{index + 1}", **scraper_kwargs)
+                for index in range(min(sessions, len(search_model_pairs)))]
+    try:
+        await asyncio.gather(*(scraper.start() for scraper in scrapers))
+        await asyncio.gather(*(worker(scraper) for scraper in scrapers))
+    finally:
+        await asyncio.gather(*(scraper.close() for scraper in scrapers), return_exceptions=True)
+        if owns_browser:
+            await browser.close()
+    return results
+
+
+# Example usage (run from the project root with `python -m scrapers.asyncBestBuy`)
+if __name__ == "__main__":
+    search_model_pairs = {
+        "lg 50 4k smart led tv": "50UT7570PUB",
+        "sony 75 x77l tv": "KD75X77L",
+    }
+    results = asyncio.run(concurrent_batch_search(search_model_pairs, sessions=2))
+    for model_no, product in results.items():
+        print(model_no, product)
@@ -1,10 +1,8 @@
 import time
-import os
-import sys
 import random
-import pprint
-# Add the project root directory to Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import json
+import threading
+from concurrent.futures import Future
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -14,45 +12,98 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementNotInteractableException
-from webdriver_manager.chrome import ChromeDriverManager
 import traceback
 from bs4 import BeautifulSoup
-from utils.userAgentRotation import get_desktop_user_agent
+from utils.fingerprintPool import default_fingerprint_pool
+from utils.sessionStore import SAVED_COOKIE_FIELDS, identity_name
 from utils.delayUtils import random_delay, random_typing_delay, human_like_delay, scroll_down_pause
+from utils.metrics import span, metrics
+from utils.deadline import Deadline, DeadlineExceeded
+from utils.recyclePolicy import RecyclePolicy, process_tree_rss
+from utils.proxyPool import BLOCK_SIGNALS, is_proxy_error
+from utils.skuStore import clean_sku
+from scrapers.bestBuyParsing import (BLOCK_PAGE_SELECTORS, PRODUCT_SELECTOR, POPUP_INDICATOR_SELECTOR,
+                                     POPUP_SELECTORS, extract_product_info, parse_products, match_model, match_product,
+                                     parse_page_count, page_url, search_page_url, detect_block_signal_in_text,
+                                     PRODUCT_PAGE_SELECTOR, parse_product_page, product_page_url, LOOKUP_FAILURES,
+                                     SearchFailed, product_gone_in_text)
+
+# Page load timeout while a lookup deadline is set (cut to the time left)
+PAGE_LOAD_TIMEOUT = 30
+
+# Title and the start of the visible text of the current page, lowercased
+PAGE_TEXT_SCRIPT = ("return (document.title + ' ' + (document.body ? document.body.innerText.slice(0, 2000) : ''))"
+                    ".toLowerCase();")
 
 
 class BestBuyScraper:
-    def __init__(self, headless=True, use_delays=True):
-        """Initialize the Best Buy scraper with Selenium webdriver"""
-        self.base_url = "https://www.bestbuy.com/"
+    def __init__(self, headless=True, use_delays=True, base_url="https://www.bestbuy.com/",
+                 rate_controller=None, session_id=None, proxy_pool=None, fingerprint_pool=None,
+                 session_store=None, max_pages=3, recycle_policy=None, archive=None, extraction_pool=None,
+                 prefetch=False, sku_store=None):
+        """
+        Initialize the Best Buy scraper with Selenium webdriver
+
+        Args:
+            headless: Whether to run the browser in headless mode
+            use_delays: Whether to add human-like delays between actions
+            base_url: Site root to scrape (point this at the mock retailer for local load tests)
+            rate_controller: Optional AdaptiveRateController that scales delays from block signals
+            session_id: Key for this session's budget in the rate controller and proxy pool
+            proxy_pool: Optional ProxyPool; the session leases a proxy and rotates it on block signals
+            fingerprint_pool: FingerprintPool the session leases its UA, client hints, viewport and
+                locale from (defaults to the shared pool)
+            session_store: Optional SessionStore; the session reuses the Chrome profile, cookies
+                and localStorage saved by earlier runs with the same fingerprint
+            max_pages: Most results pages read per search (1 reads only the first page)
+            recycle_policy: RecyclePolicy deciding when Chrome is replaced between lookups
+                (memory watermark, search count, error streak, leaked tabs); defaults to
+                RecyclePolicy()
+            archive: Optional PageArchive keeping the raw source of every results page read
+            extraction_pool: Optional ExtractionPool; batch_search then parses each results page
+                in another process while the browser runs the next search (closed with the scraper)
+            prefetch: In batch_search, load the next query's results in a background tab
+                while the current one is scrolled and parsed, then switch to it
+            sku_store: Optional SkuStore; models found before are refreshed from their product
+                page instead of being searched for, and every model found is added to it
+        """
+        self.base_url = base_url.rstrip("/") + "/"
         self.use_delays = use_delays
+        self.headless = headless
+        self.rate_controller = rate_controller
+        self.session_id = session_id or f"bestbuy-{id(self):x}"
+        self.proxy_pool = proxy_pool
+        self.proxy = proxy_pool.acquire(self.session_id) if proxy_pool else None
+        if proxy_pool and not self.proxy:
+            # Running on the direct IP would defeat the point of configuring proxies
+            raise RuntimeError("No proxy available for a new session; every proxy is cooling down or fully leased")
+        self.fingerprint_pool = fingerprint_pool or default_fingerprint_pool
+        self.fingerprint = self.fingerprint_pool.lease(self.session_id)
+        self.session_store = session_store
+        self._identity = None
+        self.restored = False
+        # localStorage restore script, re-registered on every tab the session opens
+        self._storage_script = None
+        self.max_pages = max_pages
+        self._last_page_load = None
+        # Time budget of the lookup in progress (see lookup); None means the usual fixed timeouts
+        self.deadline = None
+        self.recycle_policy = recycle_policy if recycle_policy is not None else RecyclePolicy()
+        self.archive = archive
+        self.extraction_pool = extraction_pool
+        self.prefetch = prefetch
+        self.sku_store = sku_store
+        # Query -> (window handle, driver) of results tabs loading ahead of their search
+        self._prefetched = {}
+        self._searches_on_driver = 0
+        self._error_streak = 0
+        # Future of a browser being launched in the background to take over from this one,
+        # and the (proxy, fingerprint key) it was launched with
+        self._replacement = None
+        self._replacement_config = None
         
         try:
-            # Get a random user agent
-            random_user_agent = get_desktop_user_agent()
-            print(f"Using user agent: {random_user_agent}")
-            
-            # Configure Chrome options
-            chrome_options = Options()
-            if headless:
-                chrome_options.add_argument("--headless=new")
-            chrome_options.add_argument("--window-size=1920,1080")
-            chrome_options.add_argument("--disable-notifications")
-            chrome_options.add_argument("--disable-popup-blocking")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--disable-extensions")
-            chrome_options.add_argument("--disable-infobars")
-            chrome_options.add_argument(f"--user-agent={random_user_agent}")
-            
-            # Initialize the Chrome driver
-            print("Initializing Chrome WebDriver...")
-            self.driver = webdriver.Chrome(
-                service=Service(ChromeDriverManager().install()),
-                options=chrome_options
-            )
-            print("Chrome WebDriver initialized successfully.")
+            self.driver = self._create_driver()
             
             # Add initial delay after browser initialization
             if self.use_delays:
@@ -61,12 +112,405 @@ class BestBuyScraper:
         except Exception as e:
             print(f"Error initializing Chrome WebDriver: {str(e)}")
             traceback.print_exc()
+            self._checkin_session()
+            self.fingerprint_pool.release(self.session_id)
             raise
     
+    def _create_driver(self):
+        """Launch Chrome with the session's fingerprint profile and current proxy"""
+        user_data_dir = self._checkout_session()
+        driver = self._launch_driver(self.fingerprint, self.proxy, user_data_dir)
+        self._restore_session(driver)
+        self._apply_fingerprint(driver)
+        return driver
+    
+    def _launch_driver(self, fingerprint, proxy, user_data_dir=None):
+        """
+        Start Chrome for a launch config without reading or writing session state
+        
+        Safe to run on a background thread while the session keeps using its current browser.
+        
+        Args:
+            fingerprint: Fingerprint profile whose command-line switches Chrome starts with
+            proxy: Proxy URL to route traffic through, or None for a direct connection
+            user_data_dir: Chrome profile directory, or None for a throwaway one
+        """
+        print(f"Using fingerprint: {fingerprint}")
+        
+        # Configure Chrome options
+        chrome_options = Options()
+        if self.headless:
+            chrome_options.add_argument("--headless=new")
+        for argument in fingerprint.chrome_arguments():
+            chrome_options.add_argument(argument)
+        chrome_options.add_argument("--disable-notifications")
+        chrome_options.add_argument("--disable-popup-blocking")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--disable-extensions")
+        chrome_options.add_argument("--disable-infobars")
+        if user_data_dir:
+            print(f"Using browser profile: {user_data_dir}")
+            chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
+        if proxy:
+            print(f"Using proxy: {proxy}")
+            chrome_options.add_argument(f"--proxy-server={proxy}")
+            # Also route loopback traffic through the proxy so local stand-ins work
+            chrome_options.add_argument("--proxy-bypass-list=<-loopback>")
+        
+        # Initialize the Chrome driver
+        print("Initializing Chrome WebDriver...")
+        with span("driver_init"):
+            # Imported here: webdriver_manager is only needed once a browser actually starts
+            from webdriver_manager.chrome import ChromeDriverManager
+            driver = webdriver.Chrome(
+                service=Service(ChromeDriverManager().install()),
+                options=chrome_options
+            )
+        print("Chrome WebDriver initialized successfully.")
+        return driver
+    
+    def _apply_fingerprint(self, driver):
+        """
+        Make the running browser present the profile consistently
+        
+        --user-agent alone leaves the client hints and navigator.platform describing the
+        real binary (and "HeadlessChrome" in headless mode), so the UA, hints, platform,
+        language and time zone are all overridden through CDP. The profile is first
+        re-rendered for the Chrome version the driver actually runs.
+        """
+        browser_version = (getattr(driver, "capabilities", None) or {}).get("browserVersion")
+        if browser_version and browser_version.split(".")[0] != self.fingerprint.major_version:
+            self.fingerprint_pool.set_browser_version(browser_version)
+            self.fingerprint = self.fingerprint_pool.lease(self.session_id)
+        self._prepare_tab(driver)
+    
+    def _prepare_tab(self, driver):
+        """
+        Apply the per-tab CDP overrides to the driver's current tab
+        
+        The UA and time zone overrides and the localStorage restore script only hold for
+        the tab they were sent to, so every tab the session opens gets them before its
+        first page load.
+        """
+        try:
+            driver.execute_cdp_cmd("Network.setUserAgentOverride", self.fingerprint.user_agent_override())
+            driver.execute_cdp_cmd("Emulation.setTimezoneOverride", {"timezoneId": self.fingerprint.timezone})
+            if self._storage_script:
+                driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": self._storage_script})
+        except Exception as e:
+            print(f"Could not apply fingerprint overrides: {str(e)}")
+    
+    def _checkout_session(self):
+        """Reserve the saved state for this session's identity, returning its user-data dir"""
+        if not self.session_store:
+            return None
+        identity = identity_name(self.fingerprint)
+        if not self.session_store.checkout(identity, self.session_id):
+            print(f"Saved session {identity} is in use elsewhere; starting with a fresh profile")
+            return None
+        self._identity = identity
+        return self.session_store.user_data_dir(identity)
+    
+    def _checkin_session(self, discard=False):
+        if self.session_store and self._identity:
+            if discard:
+                self.session_store.discard(self._identity)
+            self.session_store.checkin(self._identity, self.session_id)
+        self._identity = None
+    
+    def _restore_session(self, driver):
+        """
+        Load saved cookies and localStorage into a new browser before its first page load
+        
+        Chrome already keeps both in the user-data dir; the JSON copy covers a profile
+        that is missing or could not be reused.
+        """
+        self.restored = False
+        self._storage_script = None
+        if not self._identity:
+            return
+        state = self.session_store.load(self._identity)
+        if not state or not state["cookies"]:
+            return
+        try:
+            driver.execute_cdp_cmd("Network.setCookies", {"cookies": state["cookies"]})
+            storage = {entry["origin"]: {item["name"]: item["value"] for item in entry["localStorage"]}
+                       for entry in state["origins"]}
+            if storage:
+                # Runs before any page script, only filling keys the page does not have yet;
+                # _prepare_tab registers it on each tab
+                self._storage_script = (
+                    f"(function() {{ var items = ({json.dumps(storage)})[location.origin]; if (!items) return;"
+                    " try { for (var key in items) if (localStorage.getItem(key) === null)"
+                    " localStorage.setItem(key, items[key]); } catch (e) {} })();"
+                )
+            self.restored = True
+            metrics.increment("session_restores_total")
+            print(f"Restored {len(state['cookies'])} cookies for {self._identity}")
+        except Exception as e:
+            print(f"Could not restore saved session: {str(e)}")
+    
+    def _save_session(self):
+        """Save the browser's cookies and the current origin's localStorage for the next run"""
+        if not self._identity or not getattr(self, "driver", None):
+            return
+        try:
+            cookies = [
+                {key: cookie[key] for key in SAVED_COOKIE_FIELDS if key in cookie}
+                for cookie in self.driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+            ]
+            origins = []
+            previous = self.session_store.load(self._identity)
+            if previous:
+                origins = previous["origins"]
+            if self.driver.current_url.startswith("http"):
+                origin, items = self.driver.execute_script(
+                    "return [location.origin, Object.assign({}, window.localStorage)];")
+                origins = [entry for entry in origins if entry["origin"] != origin]
+                origins.append({"origin": origin,
+                                "localStorage": [{"name": key, "value": value} for key, value in items.items()]})
+            self.session_store.save(self._identity, cookies, origins)
+            print(f"Saved {len(cookies)} cookies for {self._identity}")
+        except Exception as e:
+            print(f"Could not save session: {str(e)}")
+    
+    def _rotate_proxy(self, signal):
+        """
+        Move this session to a different proxy, restarting Chrome since its proxy is fixed at launch
+        
+        Returns:
+            True if the session now runs on a new proxy
+        """
+        if not self.proxy_pool:
+            return False
+        new_proxy = self.proxy_pool.rotate(self.session_id, signal)
+        if not new_proxy:
+            print("No other healthy proxy available; keeping the current session")
+            return False
+        
+        print(f"Rotating proxy after '{signal}': {self.proxy} -> {new_proxy}")
+        metrics.increment("proxy_rotations_total", signal=signal)
+        # A browser being warmed for recycling was launched on the blocked proxy and identity
+        self._discard_replacement()
+        try:
+            self.driver.quit()
+        except Exception as e:
+            print(f"Error closing Chrome WebDriver during rotation: {str(e)}")
+        self.proxy = new_proxy
+        # The blocked identity goes with the blocked IP, and its cookies are tainted
+        self._checkin_session(discard=True)
+        self.fingerprint = self.fingerprint_pool.rotate(self.session_id)
+        self.driver = self._create_driver()
+        self._searches_on_driver = self._error_streak = 0
+        return True
+    
+    def _driver_rss(self):
+        """Memory of chromedriver and every Chrome process under it, in bytes (None if unknown)"""
+        try:
+            pid = self.driver.service.process.pid
+        except AttributeError:
+            return None
+        rss = process_tree_rss(pid)
+        if rss is not None:
+            metrics.observe("driver_rss_mb", rss / 1024 / 1024, buckets=(256, 512, 1024, 1536, 2048, 4096))
+        return rss
+    
+    def _tab_count(self):
+        try:
+            return len(self.driver.window_handles)
+        except Exception:
+            return None
+    
+    def _maybe_recycle(self):
+        """
+        Replace Chrome between lookups once the recycle policy says it has aged out
+        
+        The replacement is launched in a background thread while this browser serves the
+        next lookup, and swapped in (with the cookies copied over) at the start of the one
+        after, so recycling costs no lookup a browser start. A browser on a saved profile is
+        restarted in place instead, since Chrome will not open a profile another Chrome holds,
+        and so is one failing every lookup, since it is not worth another.
+        """
+        if self._replacement is not None:
+            if self._replacement.done():
+                self._install_replacement()
+            return
+        if not self.recycle_policy:
+            return
+        reason = self.recycle_policy.reason(self._driver_rss(), self._searches_on_driver,
+                                            self._error_streak, self._tab_count())
+        if not reason:
+            return
+        print(f"Recycling Chrome after {self._searches_on_driver} searches ({reason})")
+        metrics.increment("driver_recycles_total", reason=reason)
+        if self._identity or reason == "errors":
+            self._restart_driver()
+            return
+        
+        # The warm-up thread only sees this snapshot; the session's own state stays on this thread
+        proxy, fingerprint = self.proxy, self.fingerprint
+        replacement = Future()
+        
+        def launch():
+            try:
+                replacement.set_result(self._launch_driver(fingerprint, proxy))
+            except Exception as e:
+                replacement.set_exception(e)
+        
+        self._replacement = replacement
+        self._replacement_config = (proxy, fingerprint.key)
+        threading.Thread(target=launch, name=f"{self.session_id}-warmup", daemon=True).start()
+    
+    def _discard_replacement(self):
+        """Drop the browser being warmed by _maybe_recycle, quitting it once it has started"""
+        replacement, self._replacement = self._replacement, None
+        if replacement is None:
+            return
+        
+        def quit_driver(future):
+            try:
+                future.result().quit()
+            except Exception:
+                pass
+        
+        replacement.add_done_callback(quit_driver)
+    
+    def _install_replacement(self):
+        """Swap in the browser warmed by _maybe_recycle and quit the old one"""
+        replacement, self._replacement = self._replacement, None
+        try:
+            driver = replacement.result()
+        except Exception as e:
+            # Keep the old browser; the policy asks again after the next lookup
+            print(f"Could not warm a replacement browser: {str(e)}")
+            return
+        if self._replacement_config != (self.proxy, self.fingerprint.key):
+            print("Discarding the warmed browser: the session has moved to another proxy or fingerprint")
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            return
+        self._apply_fingerprint(driver)
+        try:
+            cookies = [
+                {key: cookie[key] for key in SAVED_COOKIE_FIELDS if key in cookie}
+                for cookie in self.driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+            ]
+            if cookies:
+                driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
+        except Exception as e:
+            print(f"Could not carry cookies over to the new browser: {str(e)}")
+        old_driver, self.driver = self.driver, driver
+        self._searches_on_driver = self._error_streak = 0
+        try:
+            old_driver.quit()
+        except Exception as e:
+            print(f"Error closing recycled Chrome WebDriver: {str(e)}")
+        print("Switched to the recycled browser")
+    
+    def _restart_driver(self):
+        """Save the session, quit Chrome and start it again on the same profile and proxy"""
+        self._save_session()
+        try:
+            self.driver.quit()
+        except Exception as e:
+            print(f"Error closing Chrome WebDriver during recycling: {str(e)}")
+        self.driver = self._create_driver()
+        self._searches_on_driver = self._error_streak = 0
+    
+    def _delay_scale(self):
+        """Current delay multiplier from the rate controller (1.0 without one)"""
+        if self.rate_controller:
+            return self.rate_controller.delay_scale(self.session_id)
+        return 1.0
+    
+    def _tab_limit(self, tabs):
+        """Pages to load side by side: `tabs`, narrowed to the rate controller's concurrency window"""
+        if self.rate_controller:
+            return max(1, min(tabs, self.rate_controller.concurrency_limit(self.session_id)))
+        return tabs
+    
+    def _pause(self, seconds, minimum=0.5):
+        """Sleep for a content-loading pause scaled by the rate controller"""
+        self._sleep(max(minimum, seconds * self._delay_scale()))
+    
+    def _time_left(self):
+        """Seconds left in the current lookup's deadline, or None without one"""
+        return self.deadline.remaining() if self.deadline else None
+    
+    def _sleep(self, seconds):
+        """time.sleep cut to the time left in the current lookup"""
+        if self.deadline:
+            seconds = min(seconds, self.deadline.remaining())
+        time.sleep(seconds)
+    
+    def _wait_timeout(self, seconds=15):
+        """A WebDriverWait timeout cut to the time left in the current lookup"""
+        return self.deadline.timeout(seconds) if self.deadline else seconds
+    
+    def _check_deadline(self, stage):
+        """
+        Raises:
+            DeadlineExceeded: If the current lookup has run out of time
+        """
+        if self.deadline:
+            self.deadline.check(stage)
+    
+    def _wait_for_cooldown(self):
+        """
+        Wait out the session's cooldown after a block signal
+        
+        Raises:
+            DeadlineExceeded: Straight away, without sleeping, if the cooldown outlasts the
+                current lookup's time left
+        """
+        if not self.rate_controller:
+            return
+        cooldown = self.rate_controller.cooldown_remaining(self.session_id)
+        if self.deadline and cooldown > self.deadline.remaining():
+            raise DeadlineExceeded(f"cooldown: {cooldown:.0f}s left, more than the lookup's "
+                                   f"{self.deadline.remaining():.0f}s")
+        self.rate_controller.wait_for_cooldown(self.session_id)
+    
+    def _report_success(self):
+        if self.rate_controller:
+            self.rate_controller.record_success(self.session_id)
+        if self.proxy_pool and self.proxy:
+            self.proxy_pool.report_success(self.proxy, self._last_page_load)
+    
+    def _report_signal(self, signal):
+        metrics.increment("block_signals_total", signal=signal)
+        if self.rate_controller:
+            self.rate_controller.record_signal(self.session_id, signal)
+        # The target has flagged this IP, so move the session elsewhere
+        if signal in BLOCK_SIGNALS:
+            self._rotate_proxy(signal)
+    
+    def _detect_block_signal(self):
+        """
+        Check whether the current page is a captcha or block page
+        
+        Returns:
+            The signal name ('captcha', 'http_403', 'http_429') or None for a normal page
+        """
+        try:
+            for signal, selector in BLOCK_PAGE_SELECTORS.items():
+                if self.driver.find_elements(By.CSS_SELECTOR, selector):
+                    return signal
+            return detect_block_signal_in_text(self.driver.execute_script(PAGE_TEXT_SCRIPT))
+        except Exception as e:
+            print(f"Error checking for block page: {e}")
+        return None
+    
     def _add_delay(self, action_type="general"):
         """Add human-like delay if delays are enabled"""
+        self._check_deadline(action_type)
         if self.use_delays:
-            human_like_delay(action_type)
+            with span("delay", action=action_type):
+                human_like_delay(action_type, scale=self._delay_scale(), limit=self._time_left())
     
     def _type_with_delays(self, element, text):
         """Type text with human-like delays between characters"""
@@ -85,11 +529,12 @@ class BestBuyScraper:
         # Type each character with small random delays
         for char in text:
             element.send_keys(char)
-            char_delay = random.uniform(0.05, 0.2)  # Small delay between keystrokes
-            time.sleep(char_delay)
+            char_delay = random.uniform(0.05, 0.2) * self._delay_scale()  # Small delay between keystrokes
+            self._sleep(char_delay)
         
         # Additional small delay after typing
-        random_delay(0.2, 0.5, verbose=False)
+        random_delay(0.2, 0.5, verbose=False, limit=self._time_left())
+        self._check_deadline("typing")
     
     def _handle_popups(self):
         """Handle any popups or modals that might appear"""
@@ -102,38 +547,16 @@ class BestBuyScraper:
             try:
                 # Check for common popup indicators with a very short timeout
                 popup_exists = WebDriverWait(self.driver, 0.5).until(
-                    EC.presence_of_any_element_located((
-                        By.CSS_SELECTOR, 
-                        ".modal, .popup, .c-modal-grid, #confirmIt-backdrop, .cookie-banner"
-                    ))
+                    EC.presence_of_any_element_located((By.CSS_SELECTOR, POPUP_INDICATOR_SELECTOR))
                 )
             except TimeoutException:
                 # No popups detected, exit early
                 print("No popups detected, skipping popup handling")
                 return
             
-            # List of potential popup selectors and their corresponding action buttons
-            # Ordered by frequency of appearance for efficiency
-            popup_selectors = [
-                # Specific to BestBuy (most common)
-                {"popup": ".c-modal-grid", "button": ".c-close-icon, .c-button-secondary", "timeout": 0.5},
-                # Confirmit modal specific to Best Buy
-                {"popup": "#confirmIt-backdrop", "button": "#confirmIt-noBtn", "timeout": 0.5},
-                # Cookie consent
-                {"popup": ".cookie-banner", "button": ".cookie-accept-btn, .cookie-close-btn, .agree-button", "timeout": 0.5},
-                # Generic modals (common)
-                {"popup": ".modal-dialog", "button": ".close, .btn-close, .modal-close, .dismiss", "timeout": 0.5},
-                # Other less common popups
-                {"popup": ".email-signup-modal", "button": ".email-signup-close, .modal-close-btn", "timeout": 0.3},
-                {"popup": ".location-modal", "button": ".location-close-btn, .modal-close", "timeout": 0.3},
-                {"popup": ".survey-modal", "button": ".survey-close-btn, .modal-close", "timeout": 0.3},
-                {"popup": ".popup, .popup-container", "button": ".close, .btn-close, .popup-close", "timeout": 0.3},
-                {"popup": "#confirmIt-backdrop", "button": ".confirm-btn, .close-btn, .btn-close, .btn-primary", "timeout": 0.3},
-            ]
-            
             # Check each potential popup
             popup_found = False
-            for selector in popup_selectors:
+            for selector in POPUP_SELECTORS:
                 try:
                     # Use a short timeout for checking popups
                     timeout = selector.get("timeout", 0.5)
@@ -151,7 +574,7 @@ class BestBuyScraper:
                         print(f"Attempting to close popup with: {selector['button']}")
                         buttons[0].click()
                         print("Popup closed successfully")
-                        time.sleep(0.5)  # Brief pause after closing popup
+                        self._sleep(0.5)  # Brief pause after closing popup
                         
                         # Once we've handled one popup, break out to recheck the page
                         # This prevents trying to interact with elements that might be gone
@@ -162,7 +585,7 @@ class BestBuyScraper:
                         # Try pressing ESC key to dismiss modal
                         print("Trying to dismiss with ESC key")
                         webdriver.ActionChains(self.driver).send_keys(Keys.ESCAPE).perform()
-                        time.sleep(0.5)  # Brief pause after ESC
+                        self._sleep(0.5)  # Brief pause after ESC
                         break
                 except TimeoutException:
                     # This popup doesn't exist, try the next one
@@ -189,22 +612,47 @@ class BestBuyScraper:
     def search(self, query):
         """Search for a product on Best Buy website"""
         try:
+            # Respect any cooldown imposed after a block signal
+            self._wait_for_cooldown()
+            
+            if self._switch_to_prefetched(query):
+                print(f"Using the results for '{query}' prefetched in a background tab")
+                with span("results_wait"):
+                    WebDriverWait(self.driver, self._wait_timeout()).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, PRODUCT_SELECTOR))
+                    )
+                return self.driver.current_url
+            
             print(f"Navigating to {self.base_url}...")
             # Navigate to the Best Buy homepage
-            self.driver.get(self.base_url)
+            if self.deadline:
+                self._check_deadline("driver_get")
+                self.driver.set_page_load_timeout(self._wait_timeout(PAGE_LOAD_TIMEOUT))
+            page_load_started = time.perf_counter()
+            with span("driver_get"):
+                self.driver.get(self.base_url)
+            self._last_page_load = time.perf_counter() - page_load_started
+            
+            block_signal = self._detect_block_signal()
+            if block_signal:
+                print(f"Blocked while loading homepage ({block_signal})")
+                self._report_signal(block_signal)
+                return None
             print("Successfully loaded Best Buy homepage.")
             
             # Add delay after navigation
             # self._add_delay("navigate")
             
             # Handle any popups before proceeding
-            self._handle_popups()
+            with span("popups"):
+                self._handle_popups()
             
             # Wait for the search input field to be visible
             print("Waiting for search input field...")
-            search_input = WebDriverWait(self.driver, 15).until(
-                EC.visibility_of_element_located((By.ID, "gh-search-input"))
-            )
+            with span("search_input_wait"):
+                search_input = WebDriverWait(self.driver, self._wait_timeout()).until(
+                    EC.visibility_of_element_located((By.ID, "gh-search-input"))
+                )
             print("Search input field found.")
             
             # Add delay before typing
@@ -212,7 +660,8 @@ class BestBuyScraper:
             
             # Enter the search query with realistic typing delays
             print(f"Entering search query: {query}")
-            self._type_with_delays(search_input, query)
+            with span("typing"):
+                self._type_with_delays(search_input, query)
             
             # Add delay before clicking
             self._add_delay("click")
@@ -236,9 +685,10 @@ class BestBuyScraper:
             
             # Wait for search results to load
             print("Waiting for search results to load...")
-            WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".sku-item, .product-list-item"))
-            )
+            with span("results_wait"):
+                WebDriverWait(self.driver, self._wait_timeout()).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, PRODUCT_SELECTOR))
+                )
             
             print("Search results loaded successfully.")
             
@@ -248,9 +698,19 @@ class BestBuyScraper:
             # Return the current page URL (search results)
             return self.driver.current_url
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
+            # A wait cut short by the lookup's deadline says nothing about the site
+            self._check_deadline("search")
             print(f"An error occurred during search: {str(e)}")
             traceback.print_exc()
+            if isinstance(e, TimeoutException):
+                # A results wait that times out is often a challenge page served after submit
+                self._report_signal(self._detect_block_signal() or "timeout")
+            elif self.proxy_pool and is_proxy_error(e):
+                self._rotate_proxy("proxy_error")
+                return None
             # Save screenshot for debugging
             try:
                 self.driver.save_screenshot("error_screenshot.png")
@@ -263,141 +723,7 @@ class BestBuyScraper:
     
     def _extract_product_info(self, item):
         """Extract product information from a product item element"""
-        product = {}
-        
-        try:
-            # Store the item ID as SKU (often matches SKU)
-            if hasattr(item, 'attrs') and 'data-testid' in item.attrs:
-                product['sku'] = item['data-testid']
-            
-            # Product name
-            name_elem = item.select_one(".sku-title a, .product-title, h2.product-title")
-            if name_elem:
-                product['name'] = name_elem.text.strip()
-                
-                # Extract URL from anchor element
-                anchor = name_elem
-                if not name_elem.name == 'a':
-                    anchor = name_elem.find_parent('a')
-                
-                if anchor and anchor.has_attr('href'):
-                    if anchor['href'].startswith('http'):
-                        product['url'] = anchor['href']
-                    else:
-                        product['url'] = self.base_url + anchor['href'].lstrip('/')
-            
-            # Product price
-            price_elem = item.select_one(".priceView-customer-price span, .customer-price, #medium-customer-price")
-            if price_elem:
-                product['price'] = price_elem.text.strip()
-            
-            # Product rating
-            rating_elem = item.select_one(".c-ratings-reviews-v2, .c-ratings-reviews, .c-ratings-reviews-mini")
-            if rating_elem:
-                # Look for the visually-hidden text that contains the full rating
-                hidden_rating = rating_elem.select_one(".visually-hidden")
-                if hidden_rating:
-                    product['rating'] = hidden_rating.text.strip()
-                else:
-                    product['rating'] = rating_elem.text.strip()
-            
-            # PRIMARY METHOD: Extract model number and SKU from product-attributes
-            attribute_container = item.select_one(".product-attributes")
-            if attribute_container:
-                attributes = attribute_container.select(".attribute")
-                for attribute in attributes:
-                    attribute_text = attribute.text.strip()
-                    
-                    # Extract model
-                    if "Model:" in attribute_text:
-                        # First try to get model from value span
-                        model_value = attribute.select_one(".value")
-                        if model_value:
-                            product['model'] = model_value.text.strip()
-                        # If no value span, extract from text
-                        elif ":" in attribute_text:
-                            model_parts = attribute_text.split(":", 1)
-                            if len(model_parts) > 1:
-                                product['model'] = model_parts[1].strip()
-                    
-                    # Extract SKU
-                    if "SKU:" in attribute_text:
-                        # First try to get SKU from value span
-                        sku_value = attribute.select_one(".value")
-                        if sku_value:
-                            product['sku'] = sku_value.text.strip()
-                        # If no value span, extract from text
-                        elif ":" in attribute_text:
-                            sku_parts = attribute_text.split(":", 1)
-                            if len(sku_parts) > 1:
-                                product['sku'] = sku_parts[1].strip()
-            
-            # ALTERNATE METHOD 1: Look for any elements with model/sku info
-            if 'model' not in product or 'sku' not in product:
-                # Look for any elements containing Model: or SKU: text
-                all_elements = item.select("div, span, p")
-                for elem in all_elements:
-                    if not elem.text:
-                        continue
-                    
-                    elem_text = elem.text.strip()
-                    # Try to extract model
-                    if 'model' not in product and "Model:" in elem_text:
-                        try:
-                            # Try to extract model number after "Model:"
-                            model_parts = elem_text.split("Model:")
-                            if len(model_parts) > 1:
-                                model_text = model_parts[1].split("SKU:")[0].strip()
-                                if model_text:
-                                    product['model'] = model_text
-                        except Exception:
-                            pass
-                    
-                    # Try to extract SKU
-                    if 'sku' not in product and "SKU:" in elem_text:
-                        try:
-                            # Try to extract SKU after "SKU:"
-                            sku_parts = elem_text.split("SKU:")
-                            if len(sku_parts) > 1:
-                                sku_text = sku_parts[1].strip().split()[0]
-                                if sku_text:
-                                    product['sku'] = sku_text
-                        except Exception:
-                            pass
-            
-            # ALTERNATE METHOD 2: Check for other common patterns
-            # Sometimes model/sku are in other formats like data attributes or hidden fields
-            if 'model' not in product:
-                model_elems = item.select('[data-model], [data-model-number], .model-number')
-                for elem in model_elems:
-                    if elem.has_attr('data-model'):
-                        product['model'] = elem['data-model']
-                        break
-                    elif elem.has_attr('data-model-number'):
-                        product['model'] = elem['data-model-number']
-                        break
-                    elif elem.text:
-                        product['model'] = elem.text.strip()
-                        break
-            
-            # Last resort - use data-testid as SKU if not already found
-            if 'sku' not in product and 'data-testid' in product:
-                product['sku'] = product['data-testid']
-                
-            # Debug output if fields are still missing
-            if 'model' not in product or 'sku' not in product:
-                if 'name' in product:
-                    missing = []
-                    if 'model' not in product:
-                        missing.append('model')
-                    if 'sku' not in product:
-                        missing.append('sku')
-                    print(f"Missing {', '.join(missing)} for product: {product.get('name', 'Unknown')}")
-        
-        except Exception as e:
-            print(f"Error extracting product details: {e}")
-        
-        return product
+        return extract_product_info(item, self.base_url)
     
     def _has_more_products(self):
         """Check if there are more products to load by scrolling"""
@@ -426,96 +752,324 @@ class BestBuyScraper:
         # If not at the bottom, we can scroll more
         return True
     
-    def get_search_results(self, model_no=None, max_scroll_attempts=15):
+    def _scroll_to_load(self, max_scroll_attempts=15):
+        """Scroll the current tab progressively so every lazily loaded product card is fetched"""
+        # First scroll to bottom to force load all products
+        print("Pre-loading all products with progressive scrolling...")
+        total_height = self.driver.execute_script("return document.body.scrollHeight")
+        viewport_height = self.driver.execute_script("return window.innerHeight")
+        scroll_step = viewport_height // 2  # Half viewport per scroll
+
+        # Start from top
+        self.driver.execute_script("window.scrollTo(0, 0)")
+        self._sleep(1)
+
+        # Progress to bottom with pauses
+        current_position = 0
+        for i in range(max_scroll_attempts):
+            if self.deadline and self.deadline.expired():
+                print("Lookup deadline reached; extracting the products loaded so far")
+                return
+
+            # Calculate next position with some randomness
+            scroll_amount = int(scroll_step * random.uniform(0.8, 1.2))
+            current_position += scroll_amount
+
+            # Scroll down
+            self.driver.execute_script(f"window.scrollTo(0, {current_position});")
+            print(f"Scrolled to position {current_position}/{total_height}")
+
+            # Allow content to load with a fixed pause
+            self._pause(1.5)  # Consistent pause for content loading
+
+            # Check if we're at the bottom
+            if current_position >= total_height:
+                # Get updated height (may have increased with dynamic content)
+                new_height = self.driver.execute_script("return document.body.scrollHeight")
+                if new_height > total_height:
+                    # Page grew, update total height and continue
+                    print(f"Page height increased: {total_height} -> {new_height}")
+                    total_height = new_height
+                else:
+                    # We're truly at the bottom
+                    print("Reached bottom of page")
+                    break
+
+        # One final scroll to the very bottom to ensure all content is loaded
+        self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        self._pause(2)  # Final wait for any last content
+
+    def _archive_page(self, html):
+        """Keep the raw source of the current results page so it can be re-extracted offline"""
+        if not self.archive:
+            return
+        try:
+            with span("archive"):
+                self.archive.put(html, self.driver.current_url, self.base_url)
+        except Exception as e:
+            print(f"Could not archive results page: {str(e)}")
+
+    def _open_tabs(self, urls):
+        """
+        Start loading pages in background tabs without waiting for them
+
+        Unlike driver.get, assigning the location returns before the page has loaded, so
+        every page downloads at the same time while the current tab carries on. Each new
+        tab gets the session's fingerprint overrides before it navigates.
+
+        Args:
+            urls: (label, url) pairs
+
+        Returns:
+            (label, window handle) pairs; focus is back on the current tab
+        """
+        main_handle = self.driver.current_window_handle
+        tabs = []
+        try:
+            with span("tabs_open"):
+                for label, url in urls:
+                    self.driver.switch_to.new_window('tab')
+                    self._prepare_tab(self.driver)
+                    self.driver.execute_script("window.location.href = arguments[0];", url)
+                    tabs.append((label, self.driver.current_window_handle))
+        finally:
+            self.driver.switch_to.window(main_handle)
+        return tabs
+
+    def _read_tabs(self, tabs, model_no=None, max_scroll_attempts=15, title_query=None):
+        """
+        Scroll and parse results tabs opened by _open_tabs, in order
+
+        Stops at the first tab that lists model_no, or at a block page.
+
+        Returns:
+            (products from the tabs read, block signal or None)
+        """
+        main_handle = self.driver.current_window_handle
+        products = []
+        try:
+            for label, handle in tabs:
+                self.driver.switch_to.window(handle)
+                try:
+                    with span("results_wait"):
+                        WebDriverWait(self.driver, self._wait_timeout()).until(
+                            EC.presence_of_element_located((By.CSS_SELECTOR, PRODUCT_SELECTOR))
+                        )
+                except TimeoutException:
+                    self._check_deadline(label)
+                    block_signal = self._detect_block_signal()
+                    if block_signal:
+                        print(f"Blocked on {label} ({block_signal})")
+                        return products, block_signal
+                    print(f"No results on {label}; skipping it")
+                    continue
+
+                with span("scrolling"):
+                    self._scroll_to_load(max_scroll_attempts)
+                with span("page_source"):
+                    html = self.driver.page_source
+                self._archive_page(html)
+                with span("parsing"):
+                    tab_products = parse_products(html, self.base_url)
+                print(f"Found {len(tab_products)} product items on {label}")
+                products.extend(tab_products)
+                if model_no and match_product(tab_products, model_no, title_query):
+                    print(f"Model {model_no} found on {label}; skipping the remaining tabs")
+                    break
+        finally:
+            self.driver.switch_to.window(main_handle)
+        return products, None
+
+    def _close_tabs(self, tabs, driver=None):
+        """Close tabs opened by _open_tabs, unless the driver they belong to has been replaced"""
+        if not tabs or (driver is not None and driver is not self.driver):
+            return
+        main_handle = self.driver.current_window_handle
+        for _, handle in tabs:
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            except Exception:
+                pass
+        self.driver.switch_to.window(main_handle)
+
+    def _prefetch(self, query):
+        """Start loading a query's results in a background tab for a later search() to switch to"""
+        if query in self._prefetched:
+            return
+        try:
+            (_, handle), = self._open_tabs([(f"results for '{query}'", search_page_url(self.base_url, query))])
+        except Exception as e:
+            print(f"Could not prefetch '{query}': {str(e)}")
+            return
+        self._prefetched[query] = (handle, self.driver)
+
+    def _discard_prefetch(self, keep=()):
+        """Close prefetched tabs that will not be used (all but the queries in keep)"""
+        for query in [query for query in self._prefetched if query not in keep]:
+            handle, driver = self._prefetched.pop(query)
+            try:
+                self._close_tabs([(query, handle)], driver)
+            except Exception as e:
+                print(f"Could not close prefetched tab: {str(e)}")
+
+    def _switch_to_prefetched(self, query):
+        """
+        Make the tab prefetched for query the main tab, closing the current one
+
+        Returns:
+            False if no usable tab was prefetched for query
+        """
+        handle, driver = self._prefetched.pop(query, (None, None))
+        # A proxy rotation or recycle since the prefetch took the tab with the old browser
+        if handle is None or driver is not self.driver:
+            return False
+        self.driver.close()
+        self.driver.switch_to.window(handle)
+        metrics.increment("prefetch_hits_total")
+        return True
+
+    def _get_more_pages(self, first_page_html, model_no=None, max_pages=3, max_scroll_attempts=15, title_query=None,
+                        results_url=None, page_count=None):
+        """
+        Read results pages 2..max_pages, loading them side by side in extra tabs
+
+        The tabs of a group are all opened before any is read, so the browser downloads
+        those pages concurrently instead of paying one page load after another. They are
+        then read in page order, stopping at the first page that lists model_no. Groups
+        are as large as the rate controller's concurrency window allows.
+
+        Args:
+            first_page_html: Source of the first results page (for the page count)
+            model_no: Model number that ends the traversal once found
+            max_pages: Most pages to read, including the first
+            max_scroll_attempts: Maximum number of scroll attempts per page
+            title_query: Product name used to match cards that show no model number
+            results_url: First results page's URL (defaults to the current tab's)
+            page_count: Page count if already known (first_page_html is then not parsed)
+
+        Returns:
+            Products from the extra pages that were read
+        """
+        page_count = min(page_count if page_count is not None else parse_page_count(first_page_html), max_pages)
+        if page_count < 2:
+            return []
+
+        results_url = results_url or self.driver.current_url
+        print(f"Loading results pages 2-{page_count} in background tabs...")
+        pages = [(f"page {page}", page_url(results_url, page)) for page in range(2, page_count + 1)]
+        products = []
+        block_signal = None
+        while pages:
+            group_size = self._tab_limit(len(pages))
+            tabs = self._open_tabs(pages[:group_size])
+            pages = pages[group_size:]
+            try:
+                group_products, block_signal = self._read_tabs(tabs, model_no, max_scroll_attempts, title_query)
+            finally:
+                self._close_tabs(tabs)
+            metrics.increment("result_pages_total", len(tabs))
+            products.extend(group_products)
+            if block_signal or (model_no and match_product(group_products, model_no, title_query)):
+                break
+
+        # Reported only after the tabs are gone, since a block signal may replace the driver
+        if block_signal:
+            self._report_signal(block_signal)
+        return products
+    
+    def _capture_results_page(self, max_scroll_attempts=15):
+        """Wait for the results on the current tab, scroll every card in and return the page source"""
+        # Wait for initial product items to be present
+        WebDriverWait(self.driver, self._wait_timeout()).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, PRODUCT_SELECTOR))
+        )
+        
+        print("Initial products loaded, beginning extraction...")
+        
+        with span("scrolling"):
+            self._scroll_to_load(max_scroll_attempts)
+        
+        # Now grab ALL products at once after everything has loaded
+        print("Extracting all loaded products...")
+        with span("page_source"):
+            html = self.driver.page_source
+        self._archive_page(html)
+        return html
+    
+    def get_search_results(self, model_no=None, max_scroll_attempts=15, max_pages=None, title_query=None):
         """
         Extract product information from the search results page, 
         optionally searching for a specific model number
         
+        Later results pages are read too (up to max_pages), unless model_no is already on
+        the first one.
+        
         Args:
             model_no: If provided, search for this specific model number
             max_scroll_attempts: Maximum number of times to scroll down
+            max_pages: Most results pages to read (defaults to the scraper's max_pages)
+            title_query: Product name used to match cards that show no model number
         
         Returns:
             List of product dictionaries, or a single product if model_no is found
+        
+        Raises:
+            SearchFailed: If model_no was given and the results page could not be read, so
+                there is no telling whether the model is listed
         """
         try:
-            # Wait for initial product items to be present
-            WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".sku-item, .product-list-item"))
-            )
-            
-            print("Initial products loaded, beginning extraction...")
-            
-            # First scroll to bottom to force load all products
-            print("Pre-loading all products with progressive scrolling...")
-            total_height = self.driver.execute_script("return document.body.scrollHeight")
-            viewport_height = self.driver.execute_script("return window.innerHeight")
-            scroll_step = viewport_height // 2  # Half viewport per scroll
-            
-            # Start from top
-            self.driver.execute_script("window.scrollTo(0, 0)")
-            time.sleep(1)
-            
-            # Progress to bottom with pauses
-            current_position = 0
-            for i in range(max_scroll_attempts):
-                # Calculate next position with some randomness
-                scroll_amount = int(scroll_step * random.uniform(0.8, 1.2))
-                current_position += scroll_amount
-                
-                # Scroll down
-                self.driver.execute_script(f"window.scrollTo(0, {current_position});")
-                print(f"Scrolled to position {current_position}/{total_height}")
-                
-                # Allow content to load with a fixed pause
-                time.sleep(1.5)  # Consistent pause for content loading
+            html = self._capture_results_page(max_scroll_attempts)
+            with span("parsing"):
+                soup = BeautifulSoup(html, 'html.parser')
                 
-                # Check if we're at the bottom
-                if current_position >= total_height:
-                    # Get updated height (may have increased with dynamic content)
-                    new_height = self.driver.execute_script("return document.body.scrollHeight")
-                    if new_height > total_height:
-                        # Page grew, update total height and continue
-                        print(f"Page height increased: {total_height} -> {new_height}")
-                        total_height = new_height
-                    else:
-                        # We're truly at the bottom
-                        print("Reached bottom of page")
-                        break
-            
-            # One final scroll to the very bottom to ensure all content is loaded
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)  # Final wait for any last content
-            
-            # Now grab ALL products at once after everything has loaded
-            print("Extracting all loaded products...")
-            html = self.driver.page_source
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Find all product items
-            product_items = soup.select(".sku-item, .product-list-item")
+                # Find all product items
+                product_items = soup.select(PRODUCT_SELECTOR)
             print(f"Found {len(product_items)} total product items after scrolling")
             
+            # Feed the rate controller: an empty page is a soft block signal
+            if product_items:
+                self._report_success()
+            else:
+                self._report_signal(self._detect_block_signal() or "empty_results")
+            
             # Process all products
             all_results = []
             matching_product = None
             model_found = False
             
-            for item in product_items:
-                # Extract product information
-                product = self._extract_product_info(item)
+            with span("extraction"):
+                for item in product_items:
+                    # Extract product information
+                    product = self._extract_product_info(item)
                 
-                # Add product to results if it has essential data
-                if product and 'name' in product:
-                    all_results.append(product)
+                    # Add product to results if it has essential data
+                    if product and 'name' in product:
+                        all_results.append(product)
                     
-                    # Check if this matches our model
-                    if model_no and 'model' in product and product['model']:
-                        if (model_no.lower() == product['model'].lower() or 
-                                model_no.lower() in product['model'].lower()):
-                            print(f"Model {model_no} found!")
-                            model_found = True
-                            matching_product = product
+                        # Check if this matches our model
+                        if model_no and 'model' in product and product['model']:
+                            if (model_no.lower() == product['model'].lower() or 
+                                    model_no.lower() in product['model'].lower()):
+                                print(f"Model {model_no} found!")
+                                model_found = True
+                                matching_product = product
+            
+            # Cards without a model attribute can still be matched by their title
+            if model_no and not model_found and title_query:
+                matching_product = match_product(all_results, model_no, title_query)
+                model_found = matching_product is not None
+            
+            # Models that rank low for the query are only listed on later pages
+            max_pages = max_pages or self.max_pages
+            if self.deadline and self.deadline.expired():
+                max_pages = 1
+            if max_pages > 1 and product_items and not model_found:
+                more_products = self._get_more_pages(html, model_no, max_pages, max_scroll_attempts, title_query)
+                all_results.extend(more_products)
+                if model_no:
+                    matching_product = match_product(more_products, model_no, title_query)
+                    model_found = matching_product is not None
             
             # Print results if we didn't find the model
             if model_no and not model_found:
@@ -535,16 +1089,28 @@ class BestBuyScraper:
                 print(f"Found {len(all_results)} total products")
                 return all_results
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
+            self._check_deadline("results")
             print(f"An error occurred getting search results: {str(e)}")
             traceback.print_exc()
+            if isinstance(e, TimeoutException):
+                self._report_signal(self._detect_block_signal() or "timeout")
             if model_no:
-                return None
+                raise SearchFailed(f"Could not read the results for model {model_no}: {e}") from e
             return []
     
     def close(self):
         """Close the Selenium webdriver"""
+        if getattr(self, "_replacement", None) is not None:
+            try:
+                self._replacement.result().quit()
+            except Exception:
+                pass
+            self._replacement = None
         if hasattr(self, 'driver') and self.driver:
+            self._save_session()
             print("Closing Chrome WebDriver...")
             try:
                 # Add delay before closing
@@ -555,55 +1121,569 @@ class BestBuyScraper:
                 print("Chrome WebDriver closed successfully.")
             except Exception as e:
                 print(f"Error closing Chrome WebDriver: {str(e)}")
+        self._checkin_session()
+        if self.proxy_pool:
+            self.proxy_pool.release(self.session_id)
+        self.fingerprint_pool.release(self.session_id)
+        if getattr(self, "extraction_pool", None):
+            self.extraction_pool.close()
+        if getattr(self, "sku_store", None) is not None:
+            self.sku_store.save()
+    
+    def _known_page(self, model_no):
+        """Product page URL the SKU store has for a model, or None"""
+        if self.sku_store is None:
+            return None
+        mapping = self.sku_store.get(model_no)
+        if not mapping:
+            return None
+        return product_page_url(self.base_url, mapping.get("sku"), mapping.get("url"))
+    
+    def _remember(self, model_no, product):
+        """Add a found model to the SKU store"""
+        if self.sku_store is not None and product:
+            self.sku_store.remember(model_no, product)
     
-    def batch_search(self, search_model_pairs, max_scroll_attempts=15):
+    def _read_product_page(self, model_no):
+        """
+        Wait for the product page in the current tab and check it still lists the model
+        
+        Only a page that is gone or shows another product makes the mapping stale; a
+        page that is merely slow, or shows neither a model nor a SKU, keeps it and this
+        lookup falls back to a search.
+        
+        Returns:
+            (product or None, outcome): "fresh", "stale" when the page is gone or shows
+            another product (the mapping is then forgotten), "timeout", "unconfirmed" or
+            "blocked"
+        """
+        try:
+            with span("product_page_wait"):
+                WebDriverWait(self.driver, self._wait_timeout()).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, PRODUCT_PAGE_SELECTOR))
+                )
+        except TimeoutException:
+            self._check_deadline("product_page")
+            block_signal = self._detect_block_signal()
+            if block_signal:
+                print(f"Blocked on the product page for model {model_no} ({block_signal})")
+                self._report_signal(block_signal)
+                metrics.increment("direct_refreshes_total", outcome="blocked")
+                return None, "blocked"
+            if not self._product_page_gone():
+                print(f"Product page for model {model_no} did not load in time; searching instead")
+                metrics.increment("direct_refreshes_total", outcome="timeout")
+                return None, "timeout"
+            product = {}
+        else:
+            with span("page_source"):
+                html = self.driver.page_source
+            with span("parsing"):
+                product = parse_product_page(html, self.driver.current_url)
+        
+        if product.get("model"):
+            listed = match_model([product], model_no) is not None
+            stale = not listed
+        else:
+            # A page without a model number can only be confirmed by the SKU it was stored under
+            sku = clean_sku(product.get("sku"))
+            listed = sku is not None and sku == (self.sku_store.get(model_no) or {}).get("sku")
+            stale = not product or (sku is not None and not listed)
+        if not listed and not stale:
+            print(f"Product page for model {model_no} shows neither a model nor a SKU; searching instead")
+            metrics.increment("direct_refreshes_total", outcome="unconfirmed")
+            return None, "unconfirmed"
+        if not listed:
+            print(f"Product page for model {model_no} no longer lists it; searching instead")
+            self.sku_store.forget(model_no)
+            metrics.increment("direct_refreshes_total", outcome="stale")
+            return None, "stale"
+        self._report_success()
+        metrics.increment("direct_refreshes_total", outcome="fresh")
+        return product, "fresh"
+    
+    def _product_page_gone(self):
+        """Whether the current tab shows a not-found page rather than a product that is still loading"""
+        try:
+            return product_gone_in_text(self.driver.execute_script(PAGE_TEXT_SCRIPT))
+        except Exception as e:
+            print(f"Error checking for a missing product page: {e}")
+        return False
+    
+    def _refresh_known(self, model_no):
+        """
+        Load a known model's product page in the current tab instead of searching for it
+        
+        Returns:
+            The product, or None if the model has no mapping or its page could not be used
+        """
+        url = self._known_page(model_no)
+        if not url:
+            return None
+        print(f"Loading the product page for model {model_no}: {url}")
+        try:
+            if self.deadline:
+                self._check_deadline("driver_get")
+                self.driver.set_page_load_timeout(self._wait_timeout(PAGE_LOAD_TIMEOUT))
+            page_load_started = time.perf_counter()
+            with span("product_page_get"):
+                self.driver.get(url)
+            self._last_page_load = time.perf_counter() - page_load_started
+            return self._read_product_page(model_no)[0]
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"Could not load the product page for model {model_no}: {str(e)}")
+            metrics.increment("direct_refreshes_total", outcome="failed")
+            return None
+    
+    def refresh_known(self, model_nos, tabs=4, deadline_seconds=None):
+        """
+        Refresh models found before straight from their product pages
+        
+        Product pages are loaded up to `tabs` at a time in background tabs (fewer while
+        the rate controller's concurrency window is narrower), so a group of known
+        models costs no homepage, typing, scrolling or matching. Each page load is paced
+        like a search: it waits out the rate controller's cooldown and the (adaptive)
+        pause between searches, and every page read feeds the rate controller.
+        
+        Args:
+            model_nos: Model numbers to refresh (those without a mapping are skipped)
+            tabs: Most product pages loaded at once
+            deadline_seconds: Optional time budget per group of pages
+        
+        Returns:
+            Dictionary of model number to product for the models whose page still lists
+            them; the rest (unknown, stale or blocked) are left for a full search
+        """
+        known = [(model_no, url) for model_no in dict.fromkeys(model_nos)
+                 for url in [self._known_page(model_no)] if url]
+        results = {}
+        start = 0
+        while start < len(known):
+            group = known[start:start + self._tab_limit(tabs)]
+            self._maybe_recycle()
+            driver = self.driver
+            main_handle = driver.current_window_handle
+            # Waited out before the group's clock starts, so the cooldown isn't charged to it
+            self._wait_for_cooldown()
+            self.deadline = Deadline(deadline_seconds) if deadline_seconds else None
+            opened = []
+            blocked = False
+            try:
+                for index, page in enumerate(group):
+                    if start or index:
+                        with span("delay", action="between_searches"):
+                            self._pause(2)
+                    self._wait_for_cooldown()
+                    opened += self._open_tabs([page])
+                for model_no, handle in opened:
+                    self.driver.switch_to.window(handle)
+                    product, outcome = self._read_product_page(model_no)
+                    if product:
+                        print(f"✅ Refreshed model {model_no} from its product page")
+                        metrics.increment("lookups_total", outcome="found")
+                        self._remember(model_no, product)
+                        results[model_no] = product
+                    elif outcome == "blocked":
+                        blocked = True
+                        break
+            except DeadlineExceeded as e:
+                print(f"⏱️ Gave up on the remaining product pages: {e}")
+            finally:
+                self.deadline = None
+                self._searches_on_driver += len(opened)
+                if driver is self.driver:
+                    self.driver.switch_to.window(main_handle)
+                self._close_tabs(opened, driver)
+            if blocked:
+                break
+            start += len(group)
+        return results
+    
+    def lookup(self, search_term, model_no, max_scroll_attempts=15, alternate_terms=None, product_name=None,
+               deadline=None):
+        """
+        Search for one model and return its listing
+
+        With alternate_terms, the results pages for those queries load in background tabs
+        while search_term is typed into the site search as usual. They are only read if
+        the main search misses, and the first one that lists the model wins. Tabs open only
+        after any cooldown, and no more than the rate controller's concurrency window.
+
+        With a SKU store that knows the model, its product page is loaded instead and the
+        search only runs if that page no longer lists the model.
+
+        Args:
+            search_term: Query to type into the site search
+            model_no: Model number to pick out of the results
+            max_scroll_attempts: Maximum number of scroll attempts
+            alternate_terms: Other queries for the same model (e.g. the short and long search terms)
+            product_name: Input product name, used to match cards that show no model number
+                (defaults to search_term)
+            deadline: Optional Deadline that every wait, pause and scroll in the lookup is cut
+                to; once it passes, the products loaded so far are still checked
+
+        Returns:
+            The product dictionary, or None if the model was not listed
+        
+        Raises:
+            SearchFailed: If the search could not be run or its results could not be read
+            DeadlineExceeded: If the deadline passed (or was cancelled) before the lookup finished
+        """
+        print(f"\n{'='*60}\nSearching for '{search_term}' to find model '{model_no}'")
+        print(f"{'='*60}\n")
+        
+        alternate_terms = [term for term in dict.fromkeys(alternate_terms or []) if term and term != search_term]
+        title_query = product_name or search_term
+        self._maybe_recycle()
+        driver = self.driver
+        race_tabs = []
+        search_url = product = None
+        self.deadline = deadline
+        try:
+            # A model found before is read straight off its product page; the search is the fallback
+            product = self._refresh_known(model_no)
+            if product:
+                search_url = product.get("url") or self.driver.current_url
+            else:
+                # A block on the product page may have replaced the driver
+                driver = self.driver
+                # Waited out before any tab opens, and no more tabs race than the concurrency window allows
+                self._wait_for_cooldown()
+                alternate_terms = alternate_terms[:self._tab_limit(len(alternate_terms) + 1) - 1]
+                if alternate_terms:
+                    race_tabs = self._open_tabs((f"results for '{term}'", search_page_url(self.base_url, term))
+                                                for term in alternate_terms)
+                search_url, product = self._lookup_primary(search_term, model_no, max_scroll_attempts, title_query)
+                # A block on the main search rotates the proxy and replaces the driver, tabs included
+                if product is None and race_tabs and driver is self.driver:
+                    products, block_signal = self._read_tabs(race_tabs, model_no, max_scroll_attempts, title_query)
+                    product = match_product(products, model_no, title_query)
+                    if product:
+                        metrics.increment("search_term_wins_total", term="alternate")
+                    if block_signal:
+                        self._close_tabs(race_tabs)
+                        race_tabs = []
+                        self._report_signal(block_signal)
+                elif product:
+                    metrics.increment("search_term_wins_total", term="primary")
+        except DeadlineExceeded as e:
+            print(f"⏱️ Gave up on model {model_no}: {e}")
+            metrics.increment("lookups_total", outcome="cancelled" if deadline.cancelled else "deadline_exceeded")
+            search_url = None
+            raise
+        except SearchFailed:
+            metrics.increment("lookups_total", outcome="search_failed")
+            raise
+        finally:
+            self.deadline = None
+            self._close_tabs(race_tabs, driver)
+            self._searches_on_driver += 1
+            # A hedged copy cancelled by its twin says nothing about this browser
+            if search_url or (deadline and deadline.cancelled):
+                self._error_streak = 0
+            else:
+                self._error_streak += 1
+        
+        if product:
+            print(f"✅ Found model {model_no}!")
+            metrics.increment("lookups_total", outcome="found")
+            self._remember(model_no, product)
+        elif search_url:
+            print(f"❌ Model {model_no} not found in search results.")
+            metrics.increment("lookups_total", outcome="not_found")
+        else:
+            metrics.increment("lookups_total", outcome="search_failed")
+            raise SearchFailed(f"Search failed for term '{search_term}'")
+        return product
+    
+    def _lookup_primary(self, search_term, model_no, max_scroll_attempts=15, title_query=None):
+        """
+        Type search_term into the site search and look for the model in its results
+
+        Returns:
+            (results URL or None if the search failed, product or None)
+        """
+        # Perform the search
+        search_url = self.search(search_term)
+        
+        if not search_url:
+            print(f"❌ Search failed for term '{search_term}'")
+            return None, None
+        
+        print(f"Search URL: {search_url}")
+        
+        # Try to find the specific model
+        return search_url, self.get_search_results(model_no=model_no, max_scroll_attempts=max_scroll_attempts,
+                                                   title_query=title_query)
+    
+    def _begin_lookup(self, search_term, model_no, max_scroll_attempts=15, deadline_seconds=None,
+                      alternate_terms=None):
+        """
+        Browser half of a pipelined lookup: search, scroll the results in and queue the page for parsing
+        
+        As in lookup, the alternate terms' results start loading in background tabs before
+        the search is typed, and stay open for _finish_lookup to read on a miss.
+
+        Returns:
+            Pending lookup to pass to _finish_lookup
+        """
+        print(f"\n{'='*60}\nSearching for '{search_term}' to find model '{model_no}'")
+        print(f"{'='*60}\n")
+        self._maybe_recycle()
+        alternate_terms = [term for term in dict.fromkeys(alternate_terms or []) if term and term != search_term]
+        # Waited out before the lookup's clock starts, so the cooldown isn't charged to it
+        self._wait_for_cooldown()
+        alternate_terms = alternate_terms[:self._tab_limit(len(alternate_terms) + 1) - 1]
+        pending = {"search_term": search_term, "model_no": model_no, "search_url": None, "parsed": None,
+                   "error": None, "deadline": Deadline(deadline_seconds) if deadline_seconds else None,
+                   "race_tabs": [], "driver": self.driver}
+        self.deadline = pending["deadline"]
+        try:
+            try:
+                if alternate_terms:
+                    pending["race_tabs"] = self._open_tabs(
+                        (f"results for '{term}'", search_page_url(self.base_url, term)) for term in alternate_terms)
+                pending["search_url"] = self.search(search_term)
+                if pending["search_url"]:
+                    html = self._capture_results_page(max_scroll_attempts)
+                    pending["parsed"] = self.extraction_pool.submit(html, self.base_url)
+                else:
+                    print(f"❌ Search failed for term '{search_term}'")
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                self._check_deadline("results")
+                print(f"An error occurred getting search results: {str(e)}")
+                traceback.print_exc()
+                if isinstance(e, TimeoutException):
+                    self._report_signal(self._detect_block_signal() or "timeout")
+        except DeadlineExceeded as e:
+            print(f"⏱️ Gave up on model {model_no}: {e}")
+            pending["error"] = e
+        finally:
+            self.deadline = None
+            self._searches_on_driver += 1
+            self._error_streak = 0 if pending["parsed"] else self._error_streak + 1
+            # The next model's search runs before _finish_lookup; that time isn't this lookup's
+            if pending["deadline"]:
+                pending["deadline"].pause()
+        return pending
+    
+    def _finish_lookup(self, pending, max_scroll_attempts=15, product_name=None):
+        """
+        Parse half of a lookup started by _begin_lookup
+        
+        Collects the parsed page from the extraction pool and matches the model. On a miss,
+        later results pages are read in background tabs, and then the alternate terms'
+        tabs opened by _begin_lookup, which have been loading since the search started.
+        Both halves share the lookup's one deadline, which is paused in between so the
+        next model's search is not charged to it.
+        
+        Returns:
+            The product dictionary, or None
+        
+        Raises:
+            SearchFailed: If the search could not be run or its results page could not be read or parsed
+            DeadlineExceeded: If the lookup ran out of time in either half
+        """
+        search_term, model_no = pending["search_term"], pending["model_no"]
+        title_query = product_name or search_term
+        race_tabs, driver = pending["race_tabs"], pending["driver"]
+        self.deadline = pending["deadline"]
+        if self.deadline:
+            self.deadline.resume()
+        try:
+            if pending["error"]:
+                metrics.increment("lookups_total", outcome="deadline_exceeded")
+                raise pending["error"]
+            products, page_count, searched = [], 1, False
+            if pending["parsed"]:
+                try:
+                    with span("extraction_wait"):
+                        products, page_count = pending["parsed"].result()
+                    searched = True
+                except Exception as e:
+                    print(f"Could not parse the results for '{search_term}': {str(e)}")
+            if searched:
+                print(f"Found {len(products)} total product items for '{search_term}'")
+                if products:
+                    self._report_success()
+                else:
+                    self._report_signal("empty_results")
+            product = match_product(products, model_no, title_query)
+            if product and race_tabs:
+                metrics.increment("search_term_wins_total", term="primary")
+            
+            try:
+                if not product and products and self.max_pages > 1:
+                    more_products = self._get_more_pages(None, model_no, self.max_pages, max_scroll_attempts,
+                                                         title_query, results_url=pending["search_url"],
+                                                         page_count=page_count)
+                    product = match_product(more_products, model_no, title_query)
+                # A recycle or proxy rotation since the search took the tabs with the old browser
+                if not product and race_tabs and driver is self.driver:
+                    alternate_products, block_signal = self._read_tabs(race_tabs, model_no, max_scroll_attempts,
+                                                                       title_query)
+                    searched = searched or not block_signal
+                    product = match_product(alternate_products, model_no, title_query)
+                    if product:
+                        metrics.increment("search_term_wins_total", term="alternate")
+                    if block_signal:
+                        self._report_signal(block_signal)
+            except DeadlineExceeded as e:
+                print(f"⏱️ Gave up on model {model_no}: {e}")
+                metrics.increment("lookups_total", outcome="deadline_exceeded")
+                raise
+        finally:
+            self.deadline = None
+            self._close_tabs(race_tabs, driver)
+        
+        if product:
+            print(f"✅ Found model {model_no}!")
+            metrics.increment("lookups_total", outcome="found")
+            self._remember(model_no, product)
+        elif searched:
+            print(f"❌ Model {model_no} not found in search results.")
+            metrics.increment("lookups_total", outcome="not_found")
+        else:
+            metrics.increment("lookups_total", outcome="search_failed")
+            raise SearchFailed(f"Search failed for term '{search_term}'")
+        return product
+    
+    def _prefetch_after(self, search_terms, index):
+        """
+        With prefetch on, start loading the search after search_terms[index] in a background tab
+        
+        The tab prefetched for search_terms[index] itself is kept for its search to switch to.
+        A prefetch is a page load of its own, so it waits out the session's cooldown, and
+        none is started while the rate controller is slowing the session down.
+        """
+        if not self.prefetch:
+            return
+        upcoming = search_terms[index:index + 2]
+        self._discard_prefetch(keep=upcoming)
+        if len(upcoming) < 2 or self._delay_scale() > 1.0:
+            return
+        self._wait_for_cooldown()
+        self._prefetch(upcoming[1])
+    
+    def _pipelined_batch_search(self, search_model_pairs, deliver, max_scroll_attempts=15, alternate_terms=None,
+                                product_names=None, deadline_seconds=None):
+        """
+        batch_search with parsing overlapped: while one results page is parsed in the
+        extraction pool, the browser is already searching for the next model
+        """
+        def finish(pending):
+            try:
+                product = self._finish_lookup(pending, max_scroll_attempts,
+                                              (product_names or {}).get(pending["search_term"]))
+            except LOOKUP_FAILURES as e:
+                deliver(pending["model_no"], None, e)
+            else:
+                deliver(pending["model_no"], product)
+        
+        pending = None
+        search_terms = list(search_model_pairs)
+        for index, (search_term, model_no) in enumerate(search_model_pairs.items()):
+            self._prefetch_after(search_terms, index)
+            started = self._begin_lookup(search_term, model_no, max_scroll_attempts, deadline_seconds,
+                                         (alternate_terms or {}).get(search_term))
+            # The previous page was being parsed while this search ran
+            if pending:
+                finish(pending)
+            pending = started
+            
+            with span("delay", action="between_searches"):
+                self._pause(2)
+        if pending:
+            finish(pending)
+    
+    def batch_search(self, search_model_pairs, max_scroll_attempts=15, on_result=None, alternate_terms=None,
+                     product_names=None, deadline_seconds=None):
         """
         Perform multiple searches for specific models in a batch
         
         Args:
             search_model_pairs: Dictionary where keys are search terms and values are model numbers to find
             max_scroll_attempts: Maximum number of scroll attempts per search
+            on_result: Optional callback(model_no, product, error=None) run as soon as each lookup
+                finishes; when given, results are handed off instead of being collected in memory.
+                A lookup that failed (e.g. ran out of time) is passed with product None and the
+                exception as error, so it is not mistaken for a model that is not listed
+            alternate_terms: Optional dictionary of search term to other queries for the same
+                model, raced against it (see lookup)
+            product_names: Optional dictionary of search term to the input product name
+            deadline_seconds: Optional time budget per lookup, so one stuck page cannot
+                hold up the rest of the batch
+        
+        With an extraction pool, lookups are pipelined: each results page is parsed in a
+        worker process while the browser searches for the next model, and its result is
+        delivered once that next search has been captured.
+        
+        With a SKU store, models found on earlier runs are refreshed from their product
+        pages first (see refresh_known), and only the rest are searched for.
             
         Returns:
-            Dictionary where keys are model numbers and values are product details (or None if not found)
+            Dictionary where keys are model numbers and values are product details (or None if not found);
+            failed lookups are left out. Empty when on_result is given
         """
         results = {}
         
+        def deliver(model_no, product, error=None):
+            if on_result:
+                if error is None:
+                    on_result(model_no, product)
+                else:
+                    on_result(model_no, None, error)
+            elif error is None:
+                results[model_no] = product
+        
         try:
-            for search_term, model_no in search_model_pairs.items():
-                print(f"\n{'='*60}\nSearching for '{search_term}' to find model '{model_no}'")
-                print(f"{'='*60}\n")
-                
-                # Perform the search
-                search_url = self.search(search_term)
-                
-                if search_url:
-                    print(f"Search URL: {search_url}")
-                    
-                    # Try to find the specific model
-                    product = self.get_search_results(model_no=model_no, max_scroll_attempts=max_scroll_attempts)
-                    
-                    if product:
-                        print(f"✅ Found model {model_no}!")
-                        results[model_no] = product
-                    else:
-                        print(f"❌ Model {model_no} not found in search results.")
-                        results[model_no] = None
+            if self.sku_store is not None:
+                refreshed = self.refresh_known(search_model_pairs.values(), deadline_seconds=deadline_seconds)
+                for model_no, product in refreshed.items():
+                    deliver(model_no, product)
+                search_model_pairs = {search_term: model_no for search_term, model_no in search_model_pairs.items()
+                                      if model_no not in refreshed}
+            
+            if self.extraction_pool:
+                self._pipelined_batch_search(search_model_pairs, deliver, max_scroll_attempts, alternate_terms,
+                                             product_names, deadline_seconds)
+                return results
+            
+            search_terms = list(search_model_pairs)
+            for index, (search_term, model_no) in enumerate(search_model_pairs.items()):
+                self._prefetch_after(search_terms, index)
+                # Waited out before the lookup's clock starts, so the cooldown isn't charged to it
+                self._wait_for_cooldown()
+                deadline = Deadline(deadline_seconds) if deadline_seconds else None
+                try:
+                    product = self.lookup(search_term, model_no, max_scroll_attempts,
+                                          (alternate_terms or {}).get(search_term),
+                                          (product_names or {}).get(search_term), deadline)
+                except LOOKUP_FAILURES as e:
+                    deliver(model_no, None, e)
                 else:
-                    print(f"❌ Search failed for term '{search_term}'")
-                    results[model_no] = None
+                    deliver(model_no, product)
                 
                 # Add a pause between searches
-                time.sleep(2)
+                with span("delay", action="between_searches"):
+                    self._pause(2)
         
         except Exception as e:
             print(f"Error during batch search: {str(e)}")
             traceback.print_exc()
+        finally:
+            self._discard_prefetch()
+            if self.sku_store is not None:
+                self.sku_store.save()
             
         return results
 
 
-# Example usage
+# Example usage (run from the project root with `python -m scrapers.bestBuy`)
 if __name__ == "__main__":
     try:
         print("Starting Best Buy scraper...")
@@ -0,0 +1,403 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from bs4 import BeautifulSoup
+
+from utils.deadline import DeadlineExceeded
+from utils.titleRanker import default_title_ranker, title_conflict
+
+# Elements and page text that mean the site served a challenge or block page instead of content
+BLOCK_PAGE_SELECTORS = {
+    "captcha": "#px-captcha, .g-recaptcha, iframe[src*='captcha']",
+}
+BLOCK_PAGE_TEXT = {
+    "captcha": ("verify you are a human", "are you a robot", "captcha"),
+    "http_403": ("access denied", "you don't have permission"),
+    "http_429": ("too many requests",),
+}
+
+# Page text of a product page whose SKU no longer exists
+PRODUCT_GONE_TEXT = ("page not found", "no longer available", "couldn't find the page")
+
+# Result cards on a search results page
+PRODUCT_SELECTOR = ".sku-item, .product-list-item"
+
+# Product title on a product detail page, present once the page has rendered
+PRODUCT_PAGE_SELECTOR = ".shop-product-title h1, .sku-title h1"
+
+# Model and SKU values in the product detail page header
+PRODUCT_PAGE_MODEL_SELECTOR = ".model.product-data .product-data-value"
+PRODUCT_PAGE_SKU_SELECTOR = ".sku.product-data .product-data-value"
+
+# Numbered links in the results page footer
+PAGINATION_SELECTOR = ".paging-list a, .footer-pagination a"
+
+# Query parameter holding the results page number
+PAGE_PARAM = "cp"
+
+# Path the header search form submits to, with the query in the "st" parameter
+SEARCH_PATH = "site/searchpage.jsp"
+
+# Anything that looks like a modal, checked before the detailed POPUP_SELECTORS pass
+POPUP_INDICATOR_SELECTOR = ".modal, .popup, .c-modal-grid, #confirmIt-backdrop, .cookie-banner"
+
+# Potential popups and their close buttons, ordered by how often they appear
+POPUP_SELECTORS = [
+    # Specific to BestBuy (most common)
+    {"popup": ".c-modal-grid", "button": ".c-close-icon, .c-button-secondary", "timeout": 0.5},
+    # Confirmit modal specific to Best Buy
+    {"popup": "#confirmIt-backdrop", "button": "#confirmIt-noBtn", "timeout": 0.5},
+    # Cookie consent
+    {"popup": ".cookie-banner", "button": ".cookie-accept-btn, .cookie-close-btn, .agree-button", "timeout": 0.5},
+    # Generic modals (common)
+    {"popup": ".modal-dialog", "button": ".close, .btn-close, .modal-close, .dismiss", "timeout": 0.5},
+    # Other less common popups
+    {"popup": ".email-signup-modal", "button": ".email-signup-close, .modal-close-btn", "timeout": 0.3},
+    {"popup": ".location-modal", "button": ".location-close-btn, .modal-close", "timeout": 0.3},
+    {"popup": ".survey-modal", "button": ".survey-close-btn, .modal-close", "timeout": 0.3},
+    {"popup": ".popup, .popup-container", "button": ".close, .btn-close, .popup-close", "timeout": 0.3},
+    {"popup": "#confirmIt-backdrop", "button": ".confirm-btn, .close-btn, .btn-close, .btn-primary", "timeout": 0.3},
+]
+
+
+class SearchFailed(Exception):
+    """The site search could not be run or its results could not be read"""
+
+
+# A lookup ending in one of these never found out whether the model is listed, so callers
+# report it as a failure and never record or cache it as a miss
+LOOKUP_FAILURES = (SearchFailed, DeadlineExceeded)
+
+
+def extract_product_info(item, base_url):
+    """
+    Extract product information from a product item element
+
+    Args:
+        item: BeautifulSoup element for one result card
+        base_url: Site root used to absolutize relative product links
+
+    Returns:
+        Dictionary with whichever of name, url, price, rating, model and sku were found
+    """
+    product = {}
+
+    try:
+        # Store the item ID as SKU (often matches SKU)
+        if hasattr(item, 'attrs') and 'data-testid' in item.attrs:
+            product['sku'] = item['data-testid']
+
+        # Product name
+        name_elem = item.select_one(".sku-title a, .product-title, h2.product-title")
+        if name_elem:
+            product['name'] = name_elem.text.strip()
+
+            # Extract URL from anchor element
+            anchor = name_elem
+            if not name_elem.name == 'a':
+                anchor = name_elem.find_parent('a')
+
+            if anchor and anchor.has_attr('href'):
+                if anchor['href'].startswith('http'):
+                    product['url'] = anchor['href']
+                else:
+                    product['url'] = base_url + anchor['href'].lstrip('/')
+
+        # Product price
+        price_elem = item.select_one(".priceView-customer-price span, .customer-price, #medium-customer-price")
+        if price_elem:
+            product['price'] = price_elem.text.strip()
+
+        # Product rating
+        rating_elem = item.select_one(".c-ratings-reviews-v2, .c-ratings-reviews, .c-ratings-reviews-mini")
+        if rating_elem:
+            # Look for the visually-hidden text that contains the full rating
+            hidden_rating = rating_elem.select_one(".visually-hidden")
+            if hidden_rating:
+                product['rating'] = hidden_rating.text.strip()
+            else:
+                product['rating'] = rating_elem.text.strip()
+
+        # PRIMARY METHOD: Extract model number and SKU from product-attributes
+        attribute_container = item.select_one(".product-attributes")
+        if attribute_container:
+            attributes = attribute_container.select(".attribute")
+            for attribute in attributes:
+                attribute_text = attribute.text.strip()
+
+                # Extract model
+                if "Model:" in attribute_text:
+                    # First try to get model from value span
+                    model_value = attribute.select_one(".value")
+                    if model_value:
+                        product['model'] = model_value.text.strip()
+                    # If no value span, extract from text
+                    elif ":" in attribute_text:
+                        model_parts = attribute_text.split(":", 1)
+                        if len(model_parts) > 1:
+                            product['model'] = model_parts[1].strip()
+
+                # Extract SKU
+                if "SKU:" in attribute_text:
+                    # First try to get SKU from value span
+                    sku_value = attribute.select_one(".value")
+                    if sku_value:
+                        product['sku'] = sku_value.text.strip()
+                    # If no value span, extract from text
+                    elif ":" in attribute_text:
+                        sku_parts = attribute_text.split(":", 1)
+                        if len(sku_parts) > 1:
+                            product['sku'] = sku_parts[1].strip()
+
+        # ALTERNATE METHOD 1: Look for any elements with model/sku info
+        if 'model' not in product or 'sku' not in product:
+            # Look for any elements containing Model: or SKU: text
+            all_elements = item.select("div, span, p")
+            for elem in all_elements:
+                if not elem.text:
+                    continue
+
+                elem_text = elem.text.strip()
+                # Try to extract model
+                if 'model' not in product and "Model:" in elem_text:
+                    try:
+                        # Try to extract model number after "Model:"
+                        model_parts = elem_text.split("Model:")
+                        if len(model_parts) > 1:
+                            model_text = model_parts[1].split("SKU:")[0].strip()
+                            if model_text:
+                                product['model'] = model_text
+                    except Exception:
+                        pass
+
+                # Try to extract SKU
+                if 'sku' not in product and "SKU:" in elem_text:
+                    try:
+                        # Try to extract SKU after "SKU:"
+                        sku_parts = elem_text.split("SKU:")
+                        if len(sku_parts) > 1:
+                            sku_text = sku_parts[1].strip().split()[0]
+                            if sku_text:
+                                product['sku'] = sku_text
+                    except Exception:
+                        pass
+
+        # ALTERNATE METHOD 2: Check for other common patterns
+        # Sometimes model/sku are in other formats like data attributes or hidden fields
+        if 'model' not in product:
+            model_elems = item.select('[data-model], [data-model-number], .model-number')
+            for elem in model_elems:
+                if elem.has_attr('data-model'):
+                    product['model'] = elem['data-model']
+                    break
+                elif elem.has_attr('data-model-number'):
+                    product['model'] = elem['data-model-number']
+                    break
+                elif elem.text:
+                    product['model'] = elem.text.strip()
+                    break
+
+        # Last resort - use data-testid as SKU if not already found
+        if 'sku' not in product and 'data-testid' in product:
+            product['sku'] = product['data-testid']
+
+        # Debug output if fields are still missing
+        if 'model' not in product or 'sku' not in product:
+            if 'name' in product:
+                missing = []
+                if 'model' not in product:
+                    missing.append('model')
+                if 'sku' not in product:
+                    missing.append('sku')
+                print(f"Missing {', '.join(missing)} for product: {product.get('name', 'Unknown')}")
+
+    except Exception as e:
+        print(f"Error extracting product details: {e}")
+
+    return product
+
+
+def parse_products(html, base_url):
+    """
+    Parse every result card on a search results page
+
+    Args:
+        html: Page source of a results page
+        base_url: Site root used to absolutize relative product links
+
+    Returns:
+        Product dictionaries that have at least a name
+    """
+    return _products_in(BeautifulSoup(html, 'html.parser'), base_url)
+
+
+def _products_in(soup, base_url):
+    products = []
+    for item in soup.select(PRODUCT_SELECTOR):
+        product = extract_product_info(item, base_url)
+        if product and 'name' in product:
+            products.append(product)
+    return products
+
+
+def parse_results_page(html, base_url):
+    """
+    Parse a results page's cards and page count in one pass
+
+    This is the unit of work the extraction pool runs in its worker processes.
+
+    Returns:
+        (product dictionaries that have at least a name, number of results pages)
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    return _products_in(soup, base_url), _page_count_in(soup)
+
+
+def match_model(products, model_no):
+    """Pick the listing for a model number out of parsed results (the last match wins), or None"""
+    matching_product = None
+    for product in products:
+        if product.get('model'):
+            if model_no.lower() == product['model'].lower() or model_no.lower() in product['model'].lower():
+                matching_product = product
+    return matching_product
+
+
+def match_product(products, model_no, title_query=None, ranker=None):
+    """
+    Pick the listing for a model: by model number, or else by title among cards without one
+
+    Cards that show no model attribute can't be compared by model number, so they are
+    ranked by title similarity to title_query (the input product name) together with
+    every other card on the page. The best one is accepted only when it has no model
+    number of its own, is clearly ahead of the rest, and its screen size and series
+    don't contradict the query (see title_conflict).
+
+    Args:
+        products: Parsed result cards
+        model_no: Model number being looked for
+        title_query: Product name to compare card titles with (title matching is skipped without it)
+        ranker: TitleRanker to use (defaults to the shared one)
+
+    Returns:
+        The product (with match_confidence and match_method "title" when matched by title), or None
+    """
+    product = match_model(products, model_no)
+    if product or not title_query:
+        return product
+    # The same card can be parsed twice (e.g. from two searches), which would look like a tie
+    cards = list({(product.get('url'), product['name']): product for product in products}.values())
+    if not any(not product.get('model') for product in cards):
+        return None
+    query = f"{title_query} {model_no}"
+    match = (ranker or default_title_ranker).best_match(query, cards)
+    if not match:
+        return None
+    product, confidence = match
+    # A labeled card ranking first means the query reads more like some other model
+    if product.get('model'):
+        return None
+    conflict = title_conflict(query, product['name'])
+    if conflict:
+        print(f"Rejected title match for model {model_no} ({conflict}): {product['name']}")
+        return None
+    print(f"Matched model {model_no} by title ({confidence:.2f}): {product['name']}")
+    return dict(product, match_method="title", match_confidence=round(confidence, 3))
+
+
+def parse_page_count(html):
+    """
+    Number of results pages a search has, from the numbered footer links
+
+    Returns:
+        The highest page number linked, or 1 when the page has no pagination
+    """
+    return _page_count_in(BeautifulSoup(html, 'html.parser'))
+
+
+def _page_count_in(soup):
+    numbers = [int(link.text.strip()) for link in soup.select(PAGINATION_SELECTOR) if link.text.strip().isdigit()]
+    return max(numbers, default=1)
+
+
+def search_page_url(base_url, query):
+    """The results URL the site's search box leads to for a query"""
+    return f"{base_url.rstrip('/')}/{SEARCH_PATH}?{urlencode({'st': query})}"
+
+
+def product_page_url(base_url, sku=None, url=None):
+    """
+    Product detail page for a known listing
+
+    A stored URL is used as is when it points at base_url; otherwise the page is
+    addressed by SKU alone, which the site redirects to the full slugged URL.
+    """
+    root = base_url.rstrip('/') + '/'
+    if url and (url.startswith(root) or not sku):
+        return url
+    if not sku:
+        return None
+    return f"{root}site/{sku}.p?{urlencode({'skuId': sku})}"
+
+
+def parse_product_page(html, url=None):
+    """
+    Parse the listing shown on a product detail page
+
+    Args:
+        html: Page source of a product page
+        url: URL the page was loaded from, recorded as the product's url
+
+    Returns:
+        Dictionary with whichever of name, url, price, rating, model and sku were found
+        (empty when the page shows no product title, e.g. a removed listing)
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    title = soup.select_one(PRODUCT_PAGE_SELECTOR)
+    if not title:
+        return {}
+    product = {'name': title.text.strip()}
+    if url:
+        product['url'] = url
+    fields = {
+        'price': ".priceView-customer-price span",
+        'rating': ".c-ratings-reviews .visually-hidden, .ugc-c-review-average",
+        'model': PRODUCT_PAGE_MODEL_SELECTOR,
+        'sku': PRODUCT_PAGE_SKU_SELECTOR,
+    }
+    for field, selector in fields.items():
+        elem = soup.select_one(selector)
+        if elem and elem.text.strip():
+            product[field] = elem.text.strip()
+    return product
+
+
+def page_url(search_url, page):
+    """The results URL for another page of the same search"""
+    parts = urlsplit(search_url)
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key != PAGE_PARAM]
+    query.append((PAGE_PARAM, str(page)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def detect_block_signal_in_text(page_text):
+    """Block signal named by a page's title and visible text, or None for a normal page"""
+    page_text = (page_text or "").lower()
+    for signal, phrases in BLOCK_PAGE_TEXT.items():
+        if any(phrase in page_text for phrase in phrases):
+            return signal
+    return None
+
+
+def failure_outcome(error):
+    """Short name of a lookup failure, as written to a result row's error column"""
+    if isinstance(error, DeadlineExceeded):
+        return "deadline_exceeded"
+    if isinstance(error, SearchFailed):
+        return "search_failed"
+    return "lookup_failed"
+
+
+def product_gone_in_text(page_text):
+    """Whether a page's title and visible text say the product page no longer exists"""
+    page_text = (page_text or "").lower()
+    return any(phrase in page_text for phrase in PRODUCT_GONE_TEXT)
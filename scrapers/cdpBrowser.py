@@ -0,0 +1,414 @@
+import os
+import json
+import shutil
+import asyncio
+import tempfile
+import itertools
+from typing import List, Dict, Optional, Any, Callable, Tuple
+
+import aiohttp
+
+from utils.metrics import span
+
+# Chrome binaries tried in order when CHROME_BINARY is not set
+CHROME_CANDIDATES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+
+# Switches every CDP-driven Chrome gets, matching the Selenium scraper's launch options
+DEFAULT_CHROME_ARGUMENTS = [
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-notifications",
+    "--disable-popup-blocking",
+    "--disable-dev-shm-usage",
+    "--no-sandbox",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-infobars",
+]
+
+# Key event fields for the keys the scraper presses
+SPECIAL_KEYS = {
+    "Enter": {"key": "Enter", "code": "Enter", "windowsVirtualKeyCode": 13, "text": "\r"},
+    "Escape": {"key": "Escape", "code": "Escape", "windowsVirtualKeyCode": 27},
+}
+
+
+class CDPError(Exception):
+    """A DevTools protocol command failed, or a page wait timed out"""
+
+
+def find_chrome_executable() -> Optional[str]:
+    """Chrome binary from CHROME_BINARY or the PATH, or None if there is none"""
+    configured = os.getenv("CHROME_BINARY")
+    if configured:
+        return configured
+    for name in CHROME_CANDIDATES:
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+class CDPConnection:
+    """
+    One websocket to the browser, multiplexing every attached page
+
+    Commands are matched to responses by id, and events are routed by (sessionId, method)
+    to waiters, so any number of pages can be driven concurrently from one event loop.
+    """
+
+    def __init__(self, ws: aiohttp.ClientWebSocketResponse, http: aiohttp.ClientSession):
+        self._ws = ws
+        self._http = http
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._waiters: Dict[Tuple[Optional[str], str], List[Tuple[Callable[[Dict[str, Any]], bool], asyncio.Future]]] = {}
+        self._reader = asyncio.ensure_future(self._read())
+
+    @classmethod
+    async def connect(cls, ws_url: str) -> "CDPConnection":
+        http = aiohttp.ClientSession()
+        try:
+            # Results pages run to megabytes of HTML
+            ws = await http.ws_connect(ws_url, max_msg_size=0)
+        except Exception:
+            await http.close()
+            raise
+        return cls(ws, http)
+
+    async def _read(self):
+        try:
+            async for message in self._ws:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                data = json.loads(message.data)
+                if "id" in data:
+                    future = self._pending.pop(data["id"], None)
+                    if future and not future.done():
+                        if "error" in data:
+                            future.set_exception(CDPError(f"{data['error'].get('message')} ({data['error'].get('code')})"))
+                        else:
+                            future.set_result(data.get("result", {}))
+                    continue
+                key = (data.get("sessionId"), data.get("method"))
+                waiters = self._waiters.get(key, [])
+                for waiter in list(waiters):
+                    predicate, future = waiter
+                    if future.done():
+                        waiters.remove(waiter)
+                    elif predicate(data.get("params", {})):
+                        future.set_result(data.get("params", {}))
+                        waiters.remove(waiter)
+        finally:
+            error = CDPError("Browser connection closed")
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+
+    async def send(self, method: str, params: Optional[Dict[str, Any]] = None,
+                   session_id: Optional[str] = None, timeout: float = 30.0) -> Dict[str, Any]:
+        """
+        Send a protocol command and wait for its result
+
+        Args:
+            method: Command name, e.g. "Page.navigate"
+            params: Command parameters
+            session_id: Attached target the command is for (None for the browser itself)
+            timeout: Seconds to wait for the response
+        """
+        if self._ws.closed:
+            raise CDPError("Browser connection closed")
+        message_id = next(self._ids)
+        message: Dict[str, Any] = {"id": message_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[message_id] = future
+        await self._ws.send_str(json.dumps(message))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise CDPError(f"{method} timed out after {timeout}s") from None
+        finally:
+            self._pending.pop(message_id, None)
+
+    def expect_event(self, method: str, session_id: Optional[str] = None,
+                     predicate: Optional[Callable[[Dict[str, Any]], bool]] = None) -> asyncio.Future:
+        """
+        Future resolved with the params of the next matching event
+
+        Register it before sending the command that triggers the event, so the event
+        cannot arrive first.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault((session_id, method), []).append((predicate or (lambda params: True), future))
+        return future
+
+    async def close(self):
+        await self._ws.close()
+        await self._http.close()
+        self._reader.cancel()
+        try:
+            await self._reader
+        except (asyncio.CancelledError, Exception):
+            pass
+
+
+class CDPPage:
+    """
+    A tab in its own browser context, driven through DevTools
+
+    Each page has a separate cookie jar and can use its own proxy, so one Chrome process
+    can host many independent scraper sessions.
+    """
+
+    def __init__(self, connection: CDPConnection, session_id: str, target_id: str, context_id: str,
+                 owns_context: bool = True):
+        self.connection = connection
+        self.session_id = session_id
+        self.target_id = target_id
+        self.context_id = context_id
+        # Extra tabs opened in another page's context leave the context to that page
+        self.owns_context = owns_context
+        self.closed = False
+
+    async def send(self, method: str, params: Optional[Dict[str, Any]] = None, timeout: float = 30.0) -> Dict[str, Any]:
+        return await self.connection.send(method, params, session_id=self.session_id, timeout=timeout)
+
+    async def goto(self, url: str, timeout: float = 30.0):
+        """Navigate and wait for the load event"""
+        loaded = self.connection.expect_event("Page.loadEventFired", self.session_id)
+        result = await self.send("Page.navigate", {"url": url}, timeout=timeout)
+        if result.get("errorText"):
+            loaded.cancel()
+            raise CDPError(f"Navigation to {url} failed: {result['errorText']}")
+        try:
+            await asyncio.wait_for(loaded, timeout)
+        except asyncio.TimeoutError:
+            raise CDPError(f"Timed out loading {url}") from None
+
+    async def evaluate(self, expression: str, await_promise: bool = False) -> Any:
+        """Evaluate a JavaScript expression in the page and return its JSON value"""
+        result = await self.send("Runtime.evaluate", {
+            "expression": expression,
+            "returnByValue": True,
+            "awaitPromise": await_promise,
+        })
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            raise CDPError(details.get("exception", {}).get("description") or details.get("text", "Script error"))
+        return result.get("result", {}).get("value")
+
+    async def query_count(self, selector: str, visible: bool = False) -> int:
+        """Number of elements matching a CSS selector (only those with a layout box when visible)"""
+        check = ".filter(e => e.offsetParent !== null || e.getClientRects().length)" if visible else ""
+        return await self.evaluate(f"Array.from(document.querySelectorAll({json.dumps(selector)})){check}.length") or 0
+
+    async def wait_for_selector(self, selector: str, timeout: float = 15.0, visible: bool = False,
+                                poll_interval: float = 0.1) -> bool:
+        """
+        Wait for an element to appear
+
+        Raises:
+            CDPError: If no element matched within timeout
+        """
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            try:
+                if await self.query_count(selector, visible):
+                    return True
+            except CDPError:
+                # The document can be swapped out mid-check during a navigation
+                pass
+            if asyncio.get_running_loop().time() >= deadline:
+                raise CDPError(f"Timed out waiting for '{selector}'")
+            await asyncio.sleep(poll_interval)
+
+    async def click(self, selector: str) -> bool:
+        """
+        Click the first visible element matching selector with real mouse events
+
+        Returns:
+            False if no such element exists
+        """
+        box = await self.evaluate(
+            f"(() => {{ const e = document.querySelector({json.dumps(selector)}); if (!e) return null;"
+            " e.scrollIntoView({block: 'center'}); const r = e.getBoundingClientRect();"
+            " return [r.x + r.width / 2, r.y + r.height / 2, r.width * r.height]; })()")
+        if not box or not box[2]:
+            return False
+        x, y = box[0], box[1]
+        await self.send("Input.dispatchMouseEvent", {"type": "mouseMoved", "x": x, "y": y})
+        await self.send("Input.dispatchMouseEvent", {"type": "mousePressed", "x": x, "y": y, "button": "left", "clickCount": 1})
+        await self.send("Input.dispatchMouseEvent", {"type": "mouseReleased", "x": x, "y": y, "button": "left", "clickCount": 1})
+        return True
+
+    async def focus(self, selector: str, clear: bool = True) -> bool:
+        """Focus an input (clearing it), returning False if it does not exist"""
+        reset = "e.value = '';" if clear else ""
+        return bool(await self.evaluate(
+            f"(() => {{ const e = document.querySelector({json.dumps(selector)}); if (!e) return false;"
+            f" e.focus(); {reset} return true; }})()"))
+
+    async def type_text(self, text: str):
+        """Type into the focused element, one key event per character"""
+        for char in text:
+            await self.send("Input.dispatchKeyEvent", {"type": "keyDown", "text": char, "key": char, "unmodifiedText": char})
+            await self.send("Input.dispatchKeyEvent", {"type": "keyUp", "key": char})
+
+    async def press(self, key: str):
+        """Press and release a key from SPECIAL_KEYS"""
+        fields = SPECIAL_KEYS[key]
+        await self.send("Input.dispatchKeyEvent", dict(fields, type="keyDown"))
+        await self.send("Input.dispatchKeyEvent", {"type": "keyUp", "key": fields["key"], "code": fields["code"],
+                                                   "windowsVirtualKeyCode": fields["windowsVirtualKeyCode"]})
+
+    async def content(self) -> str:
+        """Serialized DOM of the page, including content added by scripts"""
+        return await self.evaluate("document.documentElement.outerHTML") or ""
+
+    async def url(self) -> str:
+        return await self.evaluate("location.href") or ""
+
+    async def cookies(self) -> List[Dict[str, Any]]:
+        """Every cookie in this page's browser context"""
+        result = await self.connection.send("Storage.getCookies", {"browserContextId": self.context_id})
+        return result.get("cookies", [])
+
+    async def set_cookies(self, cookies: List[Dict[str, Any]]):
+        await self.connection.send("Storage.setCookies", {"cookies": cookies, "browserContextId": self.context_id})
+
+    async def close(self):
+        """Close the tab and throw away its browser context (if the tab created it)"""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            await self.connection.send("Target.closeTarget", {"targetId": self.target_id}, timeout=5)
+            if self.owns_context:
+                await self.connection.send("Target.disposeBrowserContext", {"browserContextId": self.context_id},
+                                           timeout=5)
+        except CDPError as e:
+            print(f"Error closing page: {e}")
+
+
+class ChromeBrowser:
+    """
+    One Chrome process hosting many CDPPage sessions
+
+    Compared to a Selenium driver per session, a session here costs one tab and one
+    browser context rather than a Chrome process plus a chromedriver process and a
+    blocked thread.
+    """
+
+    def __init__(self, headless: bool = True, executable: Optional[str] = None,
+                 arguments: Optional[List[str]] = None, startup_timeout: float = 30.0):
+        """
+        Args:
+            headless: Whether to run without a window
+            executable: Chrome binary (defaults to CHROME_BINARY or the first Chrome on the PATH)
+            arguments: Extra command line switches
+            startup_timeout: Seconds to wait for the DevTools endpoint
+        """
+        self.headless = headless
+        self.executable = executable
+        self.arguments = arguments or []
+        self.startup_timeout = startup_timeout
+        self.connection: Optional[CDPConnection] = None
+        self.version: Optional[str] = None
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._user_data_dir: Optional[str] = None
+
+    async def start(self) -> "ChromeBrowser":
+        """Launch Chrome with a DevTools port and connect to it"""
+        executable = self.executable or find_chrome_executable()
+        if not executable:
+            raise CDPError("Chrome not found; install it or set CHROME_BINARY")
+        self._user_data_dir = tempfile.mkdtemp(prefix="cdp-chrome-")
+        arguments = DEFAULT_CHROME_ARGUMENTS + self.arguments + [
+            "--remote-debugging-port=0",
+            f"--user-data-dir={self._user_data_dir}",
+        ]
+        if self.headless:
+            arguments.append("--headless=new")
+        print("Starting Chrome for the async backend...")
+        with span("driver_init"):
+            self._process = await asyncio.create_subprocess_exec(
+                executable, *arguments, "about:blank",
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+            ws_url = await self._wait_for_endpoint()
+            self.connection = await CDPConnection.connect(ws_url)
+            version = await self.connection.send("Browser.getVersion")
+        # "HeadlessChrome/131.0.6778.85" -> "131.0.6778.85"
+        self.version = version.get("product", "").split("/")[-1] or None
+        print(f"Chrome {self.version} ready.")
+        return self
+
+    async def _wait_for_endpoint(self) -> str:
+        # Chrome writes the port it picked, and the browser target path, to DevToolsActivePort
+        port_file = os.path.join(self._user_data_dir, "DevToolsActivePort")
+        deadline = asyncio.get_running_loop().time() + self.startup_timeout
+        while asyncio.get_running_loop().time() < deadline:
+            if self._process.returncode is not None:
+                raise CDPError(f"Chrome exited during startup with code {self._process.returncode}")
+            try:
+                with open(port_file) as f:
+                    lines = f.read().split()
+                if len(lines) >= 2:
+                    return f"ws://127.0.0.1:{lines[0]}{lines[1]}"
+            except FileNotFoundError:
+                pass
+            await asyncio.sleep(0.05)
+        raise CDPError("Timed out waiting for Chrome's DevTools endpoint")
+
+    async def new_page(self, proxy: Optional[str] = None, context_id: Optional[str] = None) -> CDPPage:
+        """
+        Open a tab in a fresh browser context, or in an existing one
+
+        Args:
+            proxy: Proxy URL for a fresh context only (e.g. "http://10.0.0.5:3128")
+            context_id: Browser context of another page to open the tab in, sharing its
+                cookies and proxy
+        """
+        if not self.connection:
+            raise CDPError("Browser is not started")
+        owns_context = context_id is None
+        if owns_context:
+            params: Dict[str, Any] = {"disposeOnDetach": True}
+            if proxy:
+                params.update(proxyServer=proxy, proxyBypassList="<-loopback>")
+            context_id = (await self.connection.send("Target.createBrowserContext", params))["browserContextId"]
+        target_id = (await self.connection.send("Target.createTarget", {
+            "url": "about:blank", "browserContextId": context_id}))["targetId"]
+        session_id = (await self.connection.send("Target.attachToTarget", {
+            "targetId": target_id, "flatten": True}))["sessionId"]
+        page = CDPPage(self.connection, session_id, target_id, context_id, owns_context)
+        await page.send("Page.enable")
+        await page.send("Runtime.enable")
+        return page
+
+    async def close(self):
+        """Disconnect and stop the Chrome process"""
+        if self.connection:
+            try:
+                await self.connection.send("Browser.close", timeout=5)
+            except CDPError:
+                pass
+            await self.connection.close()
+            self.connection = None
+        if self._process and self._process.returncode is None:
+            self._process.terminate()
+            try:
+                await asyncio.wait_for(self._process.wait(), 10)
+            except asyncio.TimeoutError:
+                self._process.kill()
+        if self._user_data_dir:
+            shutil.rmtree(self._user_data_dir, ignore_errors=True)
+            self._user_data_dir = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -0,0 +1,75 @@
+import os
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional
+
+from scrapers.bestBuyParsing import parse_results_page
+from utils.metrics import metrics
+
+
+class ExtractionPool:
+    """
+    Worker processes that parse results pages off the browser thread
+
+    BeautifulSoup and the card extractor are pure Python, so a large results page holds
+    the GIL for a noticeable time, during which the thread driving Chrome cannot issue
+    the next command. Handing the captured HTML to another process lets the browser start
+    the next search straight away; the scraper collects the parsed products later.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        """
+        Args:
+            workers: Parser processes (defaults to one less than the number of CPUs, leaving
+                a core for the browser thread)
+        """
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        # Forking a process that already runs the browser, metrics and prefetch threads can
+        # copy a lock mid-acquire into the child, so workers start from a clean interpreter
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context(start_method))
+
+    def submit(self, html: str, base_url: str) -> Future:
+        """
+        Queue a results page for parsing
+
+        Returns:
+            Future of (products, page count), as from bestBuyParsing.parse_results_page
+        """
+        metrics.increment("pages_offloaded_total")
+        return self._executor.submit(parse_results_page, html, base_url)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# Example usage (run from the project root with `python -m scrapers.extractionPool`)
+if __name__ == "__main__":
+    import time
+    from scrapers.bestBuyParsing import parse_results_page as parse_inline
+    from utils.mockRetailerServer import build_catalog, render_product_card
+
+    catalog = build_catalog()
+    pages = ["<html><body>" + "".join(render_product_card(product) for product in catalog[start:start + 48])
+             + "</body></html>" for start in range(0, 384, 48)]
+
+    started = time.perf_counter()
+    for html in pages:
+        parse_inline(html, "https://www.bestbuy.com/")
+    print(f"Inline: {len(pages)} pages in {time.perf_counter() - started:.2f}s of browser-thread time")
+
+    with ExtractionPool() as pool:
+        pool.submit(pages[0], "https://www.bestbuy.com/").result()  # Start the workers
+        started = time.perf_counter()
+        futures = [pool.submit(html, "https://www.bestbuy.com/") for html in pages]
+        handed_off = time.perf_counter() - started
+        products = sum(len(future.result()[0]) for future in futures)
+        print(f"Pool ({pool.workers} workers): handed off in {handed_off:.3f}s, "
+              f"{products} products parsed after {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,203 @@
+import time
+import queue
+import threading
+import traceback
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Optional, Any, Callable
+
+from utils.metrics import span, metrics
+from utils.deadline import Deadline, DeadlineExceeded, LatencyTracker, DEFAULT_LOOKUP_DEADLINE
+
+
+class ScraperPool:
+    """
+    Pool of warm scraper sessions shared by concurrent callers
+
+    Starting Chrome costs seconds, so long-running callers (the HTTP service, the
+    refresh scheduler) lease an already-initialized BestBuyScraper instead of creating
+    one per lookup. A session that raises during a lease is closed and replaced so one
+    crashed browser cannot poison the pool (a lookup that only ran out of time keeps its
+    session).
+
+    With hedge, a lookup still running after the pool's p95 latency is duplicated on
+    another idle session; the first copy to finish is returned and the other is cancelled
+    through its Deadline, so a stuck page costs one extra session instead of the caller's
+    whole wait.
+    """
+
+    def __init__(self,
+                 size: int = 2,
+                 factory: Optional[Callable[[str], Any]] = None,
+                 deadline_seconds: Optional[float] = None,
+                 hedge: bool = False,
+                 latency_tracker: Optional[LatencyTracker] = None,
+                 **scraper_kwargs):
+        """
+        Args:
+            size: Number of warm sessions
+            factory: Function creating a scraper for a session id (defaults to BestBuyScraper)
+            deadline_seconds: Optional time budget per lookup, passed to the scraper as a Deadline
+            hedge: Duplicate slow lookups on an idle session
+            latency_tracker: LatencyTracker deciding when a lookup is slow (one per pool when omitted)
+            **scraper_kwargs: Passed to BestBuyScraper by the default factory (headless,
+                base_url, rate_controller, proxy_pool, ...)
+        """
+        if factory is None:
+            from scrapers.bestBuy import BestBuyScraper
+
+            def factory(session_id):
+                return BestBuyScraper(session_id=session_id, **scraper_kwargs)
+
+        self.size = size
+        self.factory = factory
+        self._idle: "queue.Queue[Any]" = queue.Queue()
+        self._all: List[Any] = []
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+        self.stats: Dict[str, int] = {"created": 0, "leases": 0, "recycled": 0}
+        self.deadline_seconds = deadline_seconds
+        self.hedge = hedge
+        self.latency = latency_tracker if latency_tracker is not None else LatencyTracker()
+        # A hedged lookup runs both copies here while the caller's thread waits for the first
+        self._hedge_executor = ThreadPoolExecutor(max_workers=2 * size, thread_name_prefix="hedge") if hedge else None
+
+    def _create(self) -> Any:
+        with self._lock:
+            self._created += 1
+            session_id = f"pool-{self._created}"
+        with span("pool_create"):
+            scraper = self.factory(session_id)
+        with self._lock:
+            self._all.append(scraper)
+            self.stats["created"] += 1
+        return scraper
+
+    def start(self) -> "ScraperPool":
+        """Start every session in parallel so the first requests don't pay for a cold browser"""
+        missing = self.size - len(self._all)
+        if missing > 0:
+            with ThreadPoolExecutor(max_workers=missing) as executor:
+                for scraper in executor.map(lambda _: self._create(), range(missing)):
+                    self._idle.put(scraper)
+        return self
+
+    def _discard(self, scraper: Any):
+        with self._lock:
+            if scraper in self._all:
+                self._all.remove(scraper)
+        try:
+            scraper.close()
+        except Exception as e:
+            print(f"Error closing pooled scraper: {e}")
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        """
+        Borrow a warm session for the duration of a with-block
+
+        Args:
+            timeout: Seconds to wait for an idle session (None waits forever)
+        """
+        if self._closed:
+            raise RuntimeError("Scraper pool is closed")
+        with span("pool_wait"):
+            scraper = self._idle.get(timeout=timeout)
+        self.stats["leases"] += 1
+        try:
+            yield scraper
+        except DeadlineExceeded:
+            # Running out of time says nothing about the browser, which gave up cleanly
+            if not self._closed:
+                self._idle.put(scraper)
+            raise
+        except Exception:
+            # The browser may be wedged mid-page; replace it rather than hand it to the next caller
+            self.stats["recycled"] += 1
+            metrics.increment("pool_recycled_total")
+            self._discard(scraper)
+            if not self._closed:
+                try:
+                    self._idle.put(self._create())
+                except Exception as e:
+                    print(f"Could not replace pooled scraper: {e}")
+                    traceback.print_exc()
+            raise
+        else:
+            if not self._closed:
+                self._idle.put(scraper)
+
+    def lookup(self, search_term: str, model_no: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Run BestBuyScraper.lookup on a leased session, hedged when the pool is set up for it
+
+        Raises:
+            DeadlineExceeded: If the pool's deadline passed before any copy of the lookup finished
+        """
+        if self.hedge:
+            return self._hedged_lookup(search_term, model_no, timeout)
+        deadline = Deadline(self.deadline_seconds) if self.deadline_seconds else None
+        return self._attempt(search_term, model_no, deadline, timeout)
+
+    def _attempt(self, search_term: str, model_no: str, deadline: Optional[Deadline],
+                 timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        with self.lease(timeout) as scraper:
+            started = time.perf_counter()
+            if deadline is None:
+                product = scraper.lookup(search_term, model_no)
+            else:
+                product = scraper.lookup(search_term, model_no, deadline=deadline)
+        if deadline is None or not deadline.cancelled:
+            self.latency.observe(time.perf_counter() - started)
+        return product
+
+    def _hedged_lookup(self, search_term: str, model_no: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        deadline = Deadline(self.deadline_seconds or DEFAULT_LOOKUP_DEADLINE)
+        attempts = {self._hedge_executor.submit(self._attempt, search_term, model_no, deadline, timeout): deadline}
+        done, _ = wait(attempts, timeout=self.latency.hedge_delay())
+        if not done and self.idle_count() > 0:
+            hedge_deadline = deadline.fork()
+            # Lease without waiting: a hedge is only worth it on a session nobody else needs
+            hedge = self._hedge_executor.submit(self._attempt, search_term, model_no, hedge_deadline, 0)
+            attempts[hedge] = hedge_deadline
+            metrics.increment("hedged_lookups_total")
+            print(f"Hedging slow lookup for '{search_term}' on another session")
+
+        pending = set(attempts)
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        attempts[other].cancel()
+                    if len(attempts) > 1:
+                        metrics.increment("hedge_wins_total",
+                                          attempt="primary" if attempts[future] is deadline else "hedge")
+                    return future.result()
+                # A hedge that found no idle session by the time it ran is simply dropped
+                if attempts[future] is deadline or not isinstance(future.exception(), queue.Empty):
+                    error = error or future.exception()
+        raise error
+
+    def idle_count(self) -> int:
+        return self._idle.qsize()
+
+    def close(self):
+        """Close every session, idle or leased"""
+        self._closed = True
+        if self._hedge_executor:
+            self._hedge_executor.shutdown(wait=False)
+        with self._lock:
+            scrapers = list(self._all)
+        for scraper in scrapers:
+            self._discard(scraper)
+        while not self._idle.empty():
+            self._idle.get_nowait()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,253 @@
+import os
+import re
+import time
+import asyncio
+import argparse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple, Any
+
+from aiohttp import web
+
+from utils.metrics import span, metrics
+from utils.deadline import DeadlineExceeded, DEFAULT_LOOKUP_DEADLINE
+from scrapers.scraperPool import ScraperPool
+
+# Model numbers mix letters and digits and are at least this long (skips "4K", "TV", "65")
+MODEL_TOKEN = re.compile(r"[A-Za-z0-9]+")
+MIN_MODEL_LENGTH = 5
+
+
+def parse_lookup_request(name: Optional[str] = None, model_no: Optional[str] = None,
+                         search_term: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Work out what to search for and which model to pick from the results
+
+    Args:
+        name: Product name as listed by a supplier, e.g. 'LG 50" UHD 4K Smart LED TV - 50UT7570PUB'
+        model_no: Model number, when the caller already knows it
+        search_term: Explicit site search query
+
+    Returns:
+        Tuple of (search_term, model_no)
+
+    Raises:
+        ValueError: If no model number can be found
+    """
+    if not model_no and name:
+        # Listing names end in the model number, usually after " - " but sometimes glued on ("TV-UN43...")
+        candidates = [token for token in MODEL_TOKEN.findall(name.rsplit(" - ", 1)[-1])
+                      if len(token) >= MIN_MODEL_LENGTH and re.search(r"\d", token) and re.search(r"[A-Za-z]", token)]
+        if candidates:
+            model_no = candidates[-1]
+    if not model_no:
+        raise ValueError("Pass a model number, or a product name that ends with one")
+    model_no = model_no.strip().upper()
+    # The site search resolves exact model numbers reliably, which long listing names don't
+    return (search_term or model_no).strip(), model_no
+
+
+class LookupService:
+    """
+    Product lookups backed by a warm scraper pool
+
+    Recent results are served from an in-memory LRU cache, and concurrent requests for
+    the same model share a single in-flight lookup instead of each taking a browser.
+    """
+
+    def __init__(self,
+                 pool: ScraperPool,
+                 cache_ttl: float = 15 * 60.0,
+                 miss_ttl: float = 60.0,
+                 cache_size: int = 1024):
+        """
+        Args:
+            pool: Warm scraper sessions to run lookups on
+            cache_ttl: Seconds a found listing is served from memory
+            miss_ttl: Seconds a not-found result is served from memory
+            cache_size: Maximum number of cached models
+        """
+        self.pool = pool
+        self.cache_ttl = cache_ttl
+        self.miss_ttl = miss_ttl
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Tuple[float, Optional[Dict[str, Any]]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix="lookup")
+        self.stats: Dict[str, int] = {"requests": 0, "cache_hits": 0, "coalesced": 0, "lookups": 0}
+
+    def _cached(self, model_no: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        entry = self._cache.get(model_no)
+        if entry is None:
+            return False, None
+        expires, product = entry
+        if time.monotonic() >= expires:
+            del self._cache[model_no]
+            return False, None
+        self._cache.move_to_end(model_no)
+        return True, product
+
+    def _store(self, model_no: str, product: Optional[Dict[str, Any]]):
+        ttl = self.cache_ttl if product else self.miss_ttl
+        self._cache[model_no] = (time.monotonic() + ttl, product)
+        self._cache.move_to_end(model_no)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def lookup(self, search_term: str, model_no: str) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Look up a model, reusing cached and in-flight results
+
+        Returns:
+            Tuple of (product or None, source) where source is "cache", "coalesced" or "lookup"
+
+        Raises:
+            DeadlineExceeded: If the lookup ran out of time (failures are never cached)
+        """
+        self.stats["requests"] += 1
+        hit, product = self._cached(model_no)
+        if hit:
+            self.stats["cache_hits"] += 1
+            metrics.increment("service_requests_total", source="cache")
+            return product, "cache"
+
+        future = self._inflight.get(model_no)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            metrics.increment("service_requests_total", source="coalesced")
+            # Shielded so one caller disconnecting doesn't cancel the lookup for the others
+            return await asyncio.shield(future), "coalesced"
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self.pool.lookup, search_term, model_no)
+        self._inflight[model_no] = future
+        # Settled by callback so the result is cached even if every waiting client disconnects
+        future.add_done_callback(lambda done: self._settle(model_no, done))
+        self.stats["lookups"] += 1
+        metrics.increment("service_requests_total", source="lookup")
+        with span("service_lookup"):
+            return await asyncio.shield(future), "lookup"
+
+    def _settle(self, model_no: str, future: asyncio.Future):
+        self._inflight.pop(model_no, None)
+        # Only a finished lookup is cached; a failed one says nothing about whether the model is listed
+        if not future.cancelled() and future.exception() is None:
+            self._store(model_no, future.result())
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.pool.close()
+
+
+SERVICE_KEY = web.AppKey("service", LookupService)
+
+
+async def handle_lookup(request: web.Request) -> web.Response:
+    service = request.app[SERVICE_KEY]
+    params = dict(request.query)
+    if request.method == "POST":
+        try:
+            body = await request.json()
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            return web.json_response({"error": "Body must be a JSON object"}, status=400)
+        fields = [field for field in ("name", "model", "q") if body.get(field) is not None
+                  and not isinstance(body[field], str)]
+        if fields:
+            return web.json_response({"error": f"{', '.join(fields)} must be a string"}, status=400)
+        params.update(body)
+    try:
+        search_term, model_no = parse_lookup_request(params.get("name"), params.get("model"), params.get("q"))
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+
+    started = time.perf_counter()
+    try:
+        product, source = await service.lookup(search_term, model_no)
+    except DeadlineExceeded as e:
+        return web.json_response({"model_no": model_no, "error": f"Lookup timed out: {e}"}, status=504)
+    except Exception as e:
+        return web.json_response({"model_no": model_no, "error": f"Lookup failed: {e}"}, status=502)
+    return web.json_response({
+        "model_no": model_no,
+        "search_term": search_term,
+        "found": product is not None,
+        "product": product,
+        "source": source,
+        "seconds": round(time.perf_counter() - started, 3),
+    })
+
+
+async def handle_health(request: web.Request) -> web.Response:
+    service = request.app[SERVICE_KEY]
+    return web.json_response({
+        "status": "ok",
+        "pool_size": service.pool.size,
+        "idle_sessions": service.pool.idle_count(),
+        "pool": service.pool.stats,
+        "service": service.stats,
+    })
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(text=metrics.to_prometheus(), content_type="text/plain")
+
+
+def build_app(service: LookupService) -> web.Application:
+    """Create the aiohttp application exposing /lookup, /health and /metrics"""
+    app = web.Application()
+    app[SERVICE_KEY] = service
+    app.router.add_get("/lookup", handle_lookup)
+    app.router.add_post("/lookup", handle_lookup)
+    app.router.add_get("/health", handle_health)
+    app.router.add_get("/metrics", handle_metrics)
+
+    async def shutdown(app):
+        await asyncio.get_running_loop().run_in_executor(None, service.close)
+
+    app.on_cleanup.append(shutdown)
+    return app
+
+
+def main():
+    import dotenv
+
+    # Loaded before the parser: --session-dir and --deadline default to environment variables
+    dotenv.load_dotenv()
+    parser = argparse.ArgumentParser(description="Serve Best Buy lookups from a pool of warm browser sessions")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--pool-size", type=int, default=2, help="Warm Chrome sessions")
+    parser.add_argument("--cache-ttl", type=float, default=900, help="Seconds to serve a found listing from memory")
+    parser.add_argument("--base-url", default="https://www.bestbuy.com/", help="Site root (e.g. the mock retailer)")
+    parser.add_argument("--show-browser", action="store_true", help="Run browsers with a visible window")
+    parser.add_argument("--session-dir", default=os.getenv("SESSION_DIR"),
+                        help="Directory to keep browser profiles and cookies in between restarts")
+    parser.add_argument("--deadline", type=float, default=float(os.getenv("LOOKUP_DEADLINE", DEFAULT_LOOKUP_DEADLINE)),
+                        help="Seconds one lookup may take, every page wait included (0 for no limit)")
+    parser.add_argument("--hedge", action="store_true",
+                        help="Repeat lookups slower than the recent p95 on an idle session; the first to finish wins")
+    args = parser.parse_args()
+
+    from utils.metrics import enable_metrics
+    from utils.proxyPool import ProxyPool
+    from utils.rateController import AdaptiveRateController
+    from utils.sessionStore import SessionStore
+    from utils.recyclePolicy import RecyclePolicy
+    from utils.pageArchive import PageArchive
+
+    enable_metrics()
+    pool = ScraperPool(args.pool_size, deadline_seconds=args.deadline or None, hedge=args.hedge,
+                       headless=not args.show_browser, base_url=args.base_url,
+                       rate_controller=AdaptiveRateController(), proxy_pool=ProxyPool.from_env(),
+                       session_store=SessionStore(args.session_dir) if args.session_dir else None,
+                       recycle_policy=RecyclePolicy.from_env(), archive=PageArchive.from_env())
+    print(f"Starting {args.pool_size} browser sessions...")
+    pool.start()
+    service = LookupService(pool, cache_ttl=args.cache_ttl)
+    web.run_app(build_app(service), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+import os
+import sys
+import json
+import time
+import asyncio
+import urllib.request
+from urllib.parse import urlsplit, parse_qs
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from aiohttp import web
+
+from scrapers.bestBuyParsing import (parse_products, match_model, parse_page_count, page_url,
+                                     detect_block_signal_in_text, SearchFailed)
+from scrapers.cdpBrowser import CDPConnection, CDPPage, CDPError, find_chrome_executable
+import scrapers.asyncBestBuy as asyncBestBuy
+from scrapers.asyncBestBuy import AsyncBestBuyScraper, concurrent_batch_search
+from utils.deadline import LatencyTracker
+from utils.mockRetailerServer import MockRetailerServer, MockRetailerConfig, CAPTCHA_PAGE
+
+
+def fetch(url):
+    with urllib.request.urlopen(url) as response:
+        return response.read().decode("utf-8")
+
+
+async def fake_devtools(request):
+    """Answers commands out of order and fires load events, like a browser with several tabs"""
+    ws = web.WebSocketResponse()
+    await ws.prepare(request)
+
+    async def answer(message):
+        method, session_id = message["method"], message.get("sessionId")
+        if method == "Slow.echo":
+            await asyncio.sleep(0.2)
+        if method == "Broken.command":
+            await ws.send_str(json.dumps({"id": message["id"], "error": {"code": -32601, "message": "not found"}}))
+            return
+        if method == "Page.navigate":
+            await ws.send_str(json.dumps({"id": message["id"], "sessionId": session_id, "result": {"frameId": "f"}}))
+            await asyncio.sleep(0.05)
+            await ws.send_str(json.dumps({"method": "Page.loadEventFired", "sessionId": session_id, "params": {"timestamp": 1}}))
+            return
+        await ws.send_str(json.dumps({"id": message["id"], "sessionId": session_id,
+                                      "result": {"echo": message["params"], "session": session_id}}))
+
+    tasks = [asyncio.ensure_future(answer(json.loads(message.data))) async for message in ws]
+    await asyncio.gather(*tasks)
+    return ws
+
+
+def test_cdp_connection_multiplexes_sessions():
+    async def run():
+        app = web.Application()
+        app.router.add_get("/devtools/browser", fake_devtools)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        connection = await CDPConnection.connect(f"ws://127.0.0.1:{port}/devtools/browser")
+        try:
+            pages = [CDPPage(connection, f"session-{index}", f"target-{index}", "context") for index in range(3)]
+            slow = asyncio.ensure_future(pages[0].send("Slow.echo", {"n": 0}))
+            fast = await asyncio.gather(*(page.send("Fast.echo", {"n": index}) for index, page in enumerate(pages)))
+            assert not slow.done()
+            assert [result["session"] for result in fast] == ["session-0", "session-1", "session-2"]
+            assert (await slow)["echo"] == {"n": 0}
+
+            # Load events are routed to the tab that navigated
+            await asyncio.gather(*(page.goto("http://example.invalid/") for page in pages))
+            try:
+                await pages[1].send("Broken.command")
+                assert False, "expected CDPError"
+            except CDPError as e:
+                assert "not found" in str(e)
+        finally:
+            await connection.close()
+            await runner.cleanup()
+
+    asyncio.run(run())
+
+
+def test_shared_parser_reads_mock_results():
+    config = MockRetailerConfig(latency_range=(0, 0))
+    with MockRetailerServer(config) as server:
+        html = fetch(server.base_url + "site/searchpage.jsp?st=lg+50+ut75+tv")
+        html += fetch(server.base_url + "api/search-cards?st=lg+50+ut75+tv&cp=1&offset=6&limit=12")
+    products = parse_products(html, server.base_url)
+    assert len(products) == config.page_size
+    product = match_model(products, "50ut7570pub")
+    assert product["sku"] == "6578195" and product["price"] == "$299.99"
+    assert product["url"].startswith(server.base_url)
+    assert match_model(products, "NOPE123") is None
+    assert detect_block_signal_in_text(CAPTCHA_PAGE) == "captcha"
+
+
+def test_later_results_pages_are_found():
+    config = MockRetailerConfig(latency_range=(0, 0))
+    with MockRetailerServer(config) as server:
+        search_url = server.base_url + "site/searchpage.jsp?st=lg+50+ut75+tv"
+        first_page = fetch(search_url)
+        assert parse_page_count(first_page) == 8
+        assert match_model(parse_products(first_page, server.base_url), "50QN90DPUA") is None
+
+        second_url = page_url(page_url(search_url, 3), 2)
+        assert second_url.endswith("?st=lg+50+ut75+tv&cp=2")
+        second_page = fetch(second_url)
+        second_page += fetch(server.base_url + "api/search-cards?st=lg+50+ut75+tv&cp=2&offset=6&limit=12")
+    assert match_model(parse_products(second_page, server.base_url), "50QN90DPUA") is not None
+    assert parse_page_count(CAPTCHA_PAGE) == 1
+
+
+class RacingScraper(AsyncBestBuyScraper):
+    """Stands in for the browser: each search term's results arrive after their own delay"""
+
+    def __init__(self, listings, delays):
+        super().__init__(use_delays=False, base_url="http://mock.invalid/")
+        self.listings = listings
+        self.delays = delays
+        self.cancelled = []
+        self._query = None
+
+    async def _results_for(self, term):
+        try:
+            await asyncio.sleep(self.delays[term])
+        except asyncio.CancelledError:
+            self.cancelled.append(term)
+            raise
+        return [{"name": model, "model": model} for model in self.listings.get(term, [])]
+
+    async def search(self, query):
+        self._query = query
+        return "http://mock.invalid/site/searchpage.jsp"
+
+    async def get_search_results(self, model_no=None, max_scroll_attempts=15, max_pages=None, title_query=None):
+        return match_model(await self._results_for(self._query), model_no)
+
+    async def _read_results_page(self, url, label, max_scroll_attempts=15):
+        return await self._results_for(parse_qs(urlsplit(url).query)["st"][0]), None
+
+
+def test_search_terms_race_first_hit_wins():
+    delays = {"lg oled tv": 0.4, "lg oled": 0.05, "lg 55 inch oled evo c4 tv": 0.8}
+
+    async def run(listings):
+        scraper = RacingScraper(listings, delays)
+        started = time.perf_counter()
+        product = await scraper.lookup("lg oled tv", "OLED55C4PUA",
+                                       alternate_terms=["lg oled", "lg 55 inch oled evo c4 tv", "lg oled tv"])
+        return product, time.perf_counter() - started, sorted(scraper.cancelled)
+
+    # The short term lists the model first; the slower searches are cancelled
+    product, seconds, cancelled = asyncio.run(run({"lg oled": ["OLED55C4PUA"]}))
+    assert product["model"] == "OLED55C4PUA" and seconds < 0.3
+    assert cancelled == ["lg 55 inch oled evo c4 tv", "lg oled tv"]
+
+    # A term that answers first without the model does not end the race
+    product, seconds, cancelled = asyncio.run(run({"lg oled": ["OLED65C4PUA"], "lg oled tv": ["OLED55C4PUA"]}))
+    assert product["model"] == "OLED55C4PUA" and seconds < 0.7
+    assert cancelled == ["lg 55 inch oled evo c4 tv"]
+
+    product, seconds, cancelled = asyncio.run(run({}))
+    assert product is None and cancelled == [] and seconds < 1.2
+
+
+class HedgedScraper(AsyncBestBuyScraper):
+    """No browser: the first lookup of a slow model succeeds late, its hedge fails at once"""
+
+    calls = {}
+
+    async def start(self):
+        return self
+
+    async def close(self):
+        pass
+
+    async def lookup(self, search_term, model_no, max_scroll_attempts=15, alternate_terms=None, product_name=None,
+                     deadline=None):
+        attempt = self.calls[model_no] = self.calls.get(model_no, 0) + 1
+        if model_no == "SLOW" and attempt > 1:
+            raise SearchFailed("results page did not load")
+        await asyncio.sleep(0.4 if model_no == "SLOW" else 0)
+        return {"model": model_no, "session": self.session_id}
+
+
+def test_failed_hedge_does_not_cancel_the_primary():
+    original, asyncBestBuy.AsyncBestBuyScraper = asyncBestBuy.AsyncBestBuyScraper, HedgedScraper
+    try:
+        results = asyncio.run(concurrent_batch_search({"fast tv": "FAST", "slow tv": "SLOW"}, sessions=2,
+                                                      browser=object(), hedge=True,
+                                                      latency_tracker=LatencyTracker(fallback=0.1)))
+    finally:
+        asyncBestBuy.AsyncBestBuyScraper = original
+    assert HedgedScraper.calls["SLOW"] == 2
+    assert results["SLOW"]["model"] == "SLOW" and results["FAST"]["model"] == "FAST"
+
+
+def test_async_scraper_against_mock_retailer():
+    if not find_chrome_executable():
+        print("Chrome not installed; skipping the browser run")
+        return
+    config = MockRetailerConfig(latency_range=(0, 0.05), popup_rate=0.5)
+    with MockRetailerServer(config) as server:
+        results = asyncio.run(concurrent_batch_search(
+            {"lg 50 tv": "50UT7570PUB", "lg 50 ut75 tv": "50QN90DPUA", "samsung 75 cuhd tv": "UN75DU7100FXZC"},
+            sessions=3, base_url=server.base_url, use_delays=False))
+    assert results["50UT7570PUB"]["sku"] == "6578195"
+    # Listed on the second results page
+    assert results["50QN90DPUA"] is not None
+    assert results["UN75DU7100FXZC"] is None
+
+
+if __name__ == "__main__":
+    test_cdp_connection_multiplexes_sessions()
+    test_shared_parser_reads_mock_results()
+    test_later_results_pages_are_found()
+    test_search_terms_race_first_hit_wins()
+    test_failed_hedge_does_not_cancel_the_primary()
+    test_async_scraper_against_mock_retailer()
+    print("Async scraper tests passed.")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+import os
+import sys
+import json
+import tempfile
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from utils.catalogSource import iter_catalog, iter_catalog_batches, dedupe_products, batched
+
+
+def _write(directory, filename, text):
+    path = os.path.join(directory, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+
+def test_reads_csv_and_jsonl_catalogs():
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = _write(directory, "catalog.csv",
+                          'sku,Product Name\n1,"LG 50"" UHD 4K Smart LED TV - 50UT7570PUB"\n2,\n')
+        headerless_path = _write(directory, "catalog.txt", "Hisense 32\" HD Smart VIDAA LED TV - 32A4KV\nSONY 75 TV - KD75X77L\n")
+        jsonl_path = _write(directory, "catalog.jsonl", "\n".join([
+            json.dumps({"name": "Samsung 75” 4K Tizen Smart CUHD TV - UN75DU7100FXZC", "brand": "samsung"}),
+            "not json",
+            json.dumps("LG 65\" UHD 4K Smart LED TV - 65UT7570PUB"),
+        ]))
+
+        assert list(iter_catalog(csv_path)) == [{"sku": "1", "product_name": "LG 50\" UHD 4K Smart LED TV - 50UT7570PUB",
+                                                  "name": "LG 50\" UHD 4K Smart LED TV - 50UT7570PUB"}]
+        assert [p["name"] for p in iter_catalog(headerless_path)] == ["Hisense 32\" HD Smart VIDAA LED TV - 32A4KV",
+                                                                        "SONY 75 TV - KD75X77L"]
+        jsonl = list(iter_catalog(jsonl_path))
+        assert [p["name"] for p in jsonl] == ["Samsung 75” 4K Tizen Smart CUHD TV - UN75DU7100FXZC",
+                                              "LG 65\" UHD 4K Smart LED TV - 65UT7570PUB"]
+        assert jsonl[0]["brand"] == "samsung"
+
+
+def test_dedupe_ignores_case_whitespace_and_quote_style():
+    products = [{"name": "Samsung 75” 4K TV - UN75DU7100FXZC"},
+                {"name": "samsung  75\" 4K TV - UN75DU7100FXZC"},
+                {"name": "Samsung 65” 4K TV - UN65DU7100FXZC"}]
+    assert [p["name"] for p in dedupe_products(products)] == [products[0]["name"], products[2]["name"]]
+
+
+def test_batches_are_produced_lazily():
+    consumed = []
+
+    def endless():
+        index = 0
+        while True:
+            consumed.append(index)
+            yield {"name": f"TV {index}"}
+            index += 1
+
+    batches = batched(dedupe_products(endless()), 25)
+    first, second = next(batches), next(batches)
+    assert [len(first), len(second)] == [25, 25]
+    assert len(consumed) == 50
+
+
+def test_catalog_batches_dedupe_across_batches():
+    with tempfile.TemporaryDirectory() as directory:
+        path = _write(directory, "catalog.jsonl", "\n".join(json.dumps(f"TV - MODEL{i % 7}") for i in range(30)))
+        batches = list(iter_catalog_batches(path, batch_size=3))
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+
+
+if __name__ == "__main__":
+    test_reads_csv_and_jsonl_catalogs()
+    test_dedupe_ignores_case_whitespace_and_quote_style()
+    test_batches_are_produced_lazily()
+    test_catalog_batches_dedupe_across_batches()
+    print("Catalog source tests passed.")
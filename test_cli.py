@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+import os
+import re
+import sys
+import json
+import tempfile
+import subprocess
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import cli
+from utils.resultSink import build_result_row, open_sink
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+
+
+def _python(code, *args):
+    return subprocess.run([sys.executable, *args, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+
+
+def test_cli_import_stays_within_budget():
+    # Best of three so a noisy machine doesn't fail the budget
+    timings = []
+    for _ in range(3):
+        stderr = _python("import cli", "-X", "importtime").stderr
+        cumulative = [int(match.group(1)) for match in re.finditer(r"\|\s*(\d+)\s*\|\s*cli$", stderr, re.MULTILINE)]
+        timings.append(cumulative[0] / 1000)
+    print(timings)
+    assert min(timings) < cli.IMPORT_BUDGET_MS
+
+
+def test_cache_lookup_skips_heavy_imports():
+    with tempfile.TemporaryDirectory() as directory:
+        results_path = os.path.join(directory, "results.ndjson")
+        with open_sink(results_path) as sink:
+            sink.write(build_result_row("50UT7570PUB", {"price": "$299.99"}, {"brand": "LG"}))
+            sink.write(build_result_row("50UT7570PUB", {"price": "$279.99"}, {"brand": "LG"}))
+        code = (
+            "import sys, json, cli\n"
+            f"status = cli.main(['cache-lookup', '50ut7570pub', 'MISSING1', '--results', {results_path!r}])\n"
+            "print(json.dumps({'status': status, 'heavy': [m for m in cli.HEAVY_MODULES if m in sys.modules]}))\n"
+        )
+        lines = _python(code).stdout.strip().splitlines()
+
+    hit, miss, summary = (json.loads(line) for line in lines)
+    assert hit["price"] == "$279.99" and hit["brand"] == "lg"
+    assert miss == {"model_no": "MISSING1", "cached": False}
+    assert summary == {"status": 1, "heavy": []}
+
+
+def test_export_groups_results_and_records_history():
+    with tempfile.TemporaryDirectory() as directory:
+        results_path = os.path.join(directory, "results.csv")
+        export_path = os.path.join(directory, "by_brand.json")
+        history_dir = os.path.join(directory, "history")
+        with open_sink(results_path) as sink:
+            sink.write(build_result_row("KD75X77L", {"price": "$799.99"}, {"brand": "Sony"}))
+        assert cli.main(["export", results_path, "-o", export_path, "--history", history_dir]) == 0
+        with open(export_path) as f:
+            assert f.read().count("KD75X77L") == 1
+        assert cli.main(["cache-lookup", "kd75x77l", "--results", "missing.csv", "--history", history_dir]) == 0
+
+
+if __name__ == "__main__":
+    test_cli_import_stays_within_budget()
+    test_cache_lookup_skips_heavy_imports()
+    test_export_groups_results_and_records_history()
+    print("CLI tests passed.")
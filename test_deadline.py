@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+import os
+import sys
+import time
+import asyncio
+import threading
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from scrapers.asyncBestBuy import AsyncBestBuyScraper
+from scrapers.bestBuy import BestBuyScraper
+from scrapers.scraperPool import ScraperPool
+from utils.deadline import Deadline, DeadlineExceeded, LatencyTracker
+from utils.delayUtils import async_human_like_delay
+from utils.rateController import AdaptiveRateController
+
+
+class StuckScraper:
+    """Stands in for BestBuyScraper: the first session hangs on its page until its deadline ends it"""
+    lock = threading.Lock()
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.stuck = session_id == "pool-1"
+        self.gave_up = None
+
+    def lookup(self, search_term, model_no, deadline=None):
+        if self.stuck:
+            while not deadline.expired():
+                time.sleep(0.01)
+            self.gave_up = "cancelled" if deadline.cancelled else "deadline_exceeded"
+            deadline.check("results_wait")
+        time.sleep(0.05)
+        return {"name": f"TV {model_no}", "model": model_no, "session": self.session_id}
+
+    def close(self):
+        pass
+
+
+def test_deadline_cuts_waits_and_can_be_cancelled():
+    deadline = Deadline(1.0)
+    assert 0.9 < deadline.timeout(15) <= 1.0
+    assert deadline.timeout(0.2) == 0.2
+    deadline.check("results_wait")
+
+    hedge = deadline.fork()
+    hedge.cancel()
+    assert hedge.expired() and hedge.timeout(15) > 0
+    assert not deadline.expired()
+    try:
+        hedge.check("results_wait")
+        assert False, "expected DeadlineExceeded"
+    except DeadlineExceeded as e:
+        assert "cancelled" in str(e)
+
+
+def test_paused_deadline_does_not_run_down():
+    deadline = Deadline(0.2)
+    deadline.pause()
+    time.sleep(0.3)
+    assert not deadline.expired() and deadline.remaining() > 0.15
+    deadline.resume()
+    assert 0.1 < deadline.remaining() <= 0.2
+    time.sleep(0.25)
+    assert deadline.expired()
+
+
+def test_latency_tracker_hedges_after_p95():
+    tracker = LatencyTracker(min_samples=10, fallback=7.0)
+    assert tracker.hedge_delay() == 7.0
+    for seconds in [1.0] * 18 + [5.0, 9.0]:
+        tracker.observe(seconds)
+    assert tracker.hedge_delay() == 9.0
+    tracker.observe(1.0)
+    assert tracker.hedge_delay() == 5.0
+
+
+def test_pool_deadline_bounds_a_stuck_lookup():
+    pool = ScraperPool(size=1, factory=StuckScraper, deadline_seconds=0.3).start()
+    stuck = pool._idle.queue[0]
+    started = time.perf_counter()
+    try:
+        pool.lookup("lg 50 tv", "50UT7570PUB")
+        assert False, "expected DeadlineExceeded"
+    except DeadlineExceeded:
+        pass
+    assert time.perf_counter() - started < 1.0
+    assert stuck.gave_up == "deadline_exceeded"
+    # Running out of time is not a crash: the session goes back to the pool
+    assert pool.idle_count() == 1 and pool._idle.queue[0] is stuck and pool.stats["recycled"] == 0
+    pool.close()
+
+
+def test_hedged_lookup_returns_first_finisher():
+    pool = ScraperPool(size=2, factory=StuckScraper, deadline_seconds=5, hedge=True,
+                       latency_tracker=LatencyTracker(fallback=0.2)).start()
+    stuck = pool._idle.queue[0]
+    started = time.perf_counter()
+    product = pool.lookup("lg 50 tv", "50UT7570PUB")
+    elapsed = time.perf_counter() - started
+
+    print(product, f"{elapsed:.2f}s")
+    assert product["session"] == "pool-2"
+    assert elapsed < 1.0
+    # The stuck copy is cancelled rather than left to run out the full deadline
+    for _ in range(100):
+        if stuck.gave_up:
+            break
+        time.sleep(0.01)
+    assert stuck.gave_up == "cancelled"
+    pool.close()
+
+
+class DriverlessScraper(BestBuyScraper):
+    def _create_driver(self):
+        return None
+
+
+def test_cooldown_longer_than_the_deadline_fails_without_sleeping():
+    controller = AdaptiveRateController(signal_cooldown={"captcha": 60})
+    controller.record_signal("blocked", "captcha")
+    scraper = DriverlessScraper(use_delays=False, rate_controller=controller, session_id="blocked")
+    async_scraper = AsyncBestBuyScraper(use_delays=False, rate_controller=controller, session_id="blocked")
+    scraper.deadline = async_scraper.deadline = Deadline(5)
+    started = time.perf_counter()
+    for wait in (scraper._wait_for_cooldown, lambda: asyncio.run(async_scraper._wait_for_cooldown())):
+        try:
+            wait()
+            assert False, "expected DeadlineExceeded"
+        except DeadlineExceeded as e:
+            assert "cooldown" in str(e)
+    assert time.perf_counter() - started < 0.5
+
+
+def test_async_waits_are_cut_to_the_deadline():
+    scraper = AsyncBestBuyScraper(use_delays=True)
+    scraper.deadline = Deadline(0.2)
+    assert 0.1 < scraper._wait_timeout() <= 0.2
+    started = time.perf_counter()
+    asyncio.run(scraper._add_delay("read"))  # 2-5 seconds without a deadline
+    asyncio.run(scraper._pause(3))
+    assert time.perf_counter() - started < 0.5
+    assert asyncio.run(async_human_like_delay("read", verbose=False, limit=0)) == 0
+
+
+if __name__ == "__main__":
+    test_deadline_cuts_waits_and_can_be_cancelled()
+    test_paused_deadline_does_not_run_down()
+    test_latency_tracker_hedges_after_p95()
+    test_pool_deadline_bounds_a_stuck_lookup()
+    test_hedged_lookup_returns_first_finisher()
+    test_cooldown_longer_than_the_deadline_fails_without_sleeping()
+    test_async_waits_are_cut_to_the_deadline()
+    print("Deadline tests passed.")
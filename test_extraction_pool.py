@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+import os
+import sys
+import time
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from scrapers.bestBuy import BestBuyScraper
+from scrapers.bestBuyParsing import parse_products, parse_page_count, parse_results_page, SearchFailed
+from scrapers.extractionPool import ExtractionPool
+from utils.deadline import DeadlineExceeded
+from utils.mockRetailerServer import build_catalog, render_product_card
+from utils.rateController import AdaptiveRateController
+
+BASE_URL = "https://www.bestbuy.com/"
+CATALOG = build_catalog()
+
+
+class FakeDriver:
+    window_handles = ["main"]
+
+    def quit(self):
+        pass
+
+
+class PipelinedScraper(BestBuyScraper):
+    """Serves canned results pages in place of a browser and records the order of events"""
+
+    def __init__(self, pages, **kwargs):
+        self.pages = pages
+        self.events = []
+        super().__init__(use_delays=False, **kwargs)
+
+    def _create_driver(self):
+        return FakeDriver()
+
+    def _pause(self, seconds, minimum=0.5):
+        pass
+
+    def search(self, query):
+        self.events.append(("search", query))
+        if query == "slow query":
+            raise DeadlineExceeded("search_box: deadline of 1s passed")
+        return f"{BASE_URL}site/searchpage.jsp?st={query}" if query in self.pages else None
+
+    def _capture_results_page(self, max_scroll_attempts=15):
+        return self.pages[self.events[-1][1]]
+
+
+class RacingScraper(PipelinedScraper):
+    """Also serves the alternate terms' tabs, recording when they are opened and read"""
+
+    def _open_tabs(self, urls):
+        urls = list(urls)
+        self.events.append(("tabs", [label for label, _ in urls], self.deadline))
+        return [(label, url) for label, url in urls]
+
+    def _read_tabs(self, tabs, model_no=None, max_scroll_attempts=15, title_query=None):
+        self.events.append(("read", [label for label, _ in tabs], self.deadline))
+        products = []
+        for label, _ in tabs:
+            products.extend(parse_products(self.pages[label], BASE_URL))
+        return products, None
+
+    def _close_tabs(self, tabs, driver=None):
+        self.events.append(("close", [label for label, _ in tabs]))
+
+
+class SlowNextSearchScraper(RacingScraper):
+    """Its second search takes longer than a whole lookup's deadline"""
+
+    def search(self, query):
+        if query == "query 1":
+            time.sleep(0.4)
+        return super().search(query)
+
+
+def _page(products):
+    return "<html><body>" + "".join(render_product_card(product) for product in products) + "</body></html>"
+
+
+def test_parse_results_page_matches_the_separate_parsers():
+    html = _page(CATALOG[:24])
+    products, page_count = parse_results_page(html, BASE_URL)
+    assert products == parse_products(html, BASE_URL) and len(products) == 24
+    assert page_count == parse_page_count(html) == 1
+
+
+def test_pipelined_batch_search_parses_while_the_next_search_runs():
+    wanted = {f"query {index}": CATALOG[index * 12 + 3]["model"] for index in range(3)}
+    pages = {f"query {index}": _page(CATALOG[index * 12:index * 12 + 12]) for index in range(3)}
+    pages["unlisted query"] = _page(CATALOG[40:44])
+    scraper = PipelinedScraper(pages, extraction_pool=ExtractionPool(workers=1), max_pages=1)
+    delivered = []
+
+    def on_result(model_no, product, error=None):
+        scraper.events.append(("result", model_no))
+        delivered.append((model_no, product, error))
+
+    scraper.batch_search(dict(wanted, **{"unlisted query": "MISSING1", "no such query": "BROKEN1",
+                                         "slow query": "SLOW1"}), on_result=on_result)
+    scraper.close()
+
+    print(scraper.events)
+    # Each result is delivered only after the browser has moved on to the next search
+    assert scraper.events[:4] == [("search", "query 0"), ("search", "query 1"),
+                                  ("result", wanted["query 0"]), ("search", "query 2")]
+    assert [model_no for model_no, _, _ in delivered] == list(wanted.values()) + ["MISSING1", "BROKEN1", "SLOW1"]
+    assert all(product and product["model"] == model_no for model_no, product, _ in delivered[:3])
+    # A miss, a search that failed and a lookup that ran out of time are told apart
+    assert delivered[3][1:] == (None, None)
+    assert delivered[4][1] is None and isinstance(delivered[4][2], SearchFailed)
+    assert delivered[5][1] is None and isinstance(delivered[5][2], DeadlineExceeded)
+
+
+def test_pipelined_lookups_race_the_alternate_terms():
+    wanted = CATALOG[30]
+    pages = {"query 0": _page(CATALOG[:12]), "query 1": _page(CATALOG[12:24]),
+             "results for 'alt 0'": _page(CATALOG[24:36])}
+    scraper = RacingScraper(pages, extraction_pool=ExtractionPool(workers=1), max_pages=1)
+    delivered = {}
+    scraper.batch_search({"query 0": wanted["model"], "query 1": CATALOG[15]["model"]},
+                         on_result=lambda model_no, product, error=None: delivered.update({model_no: product}),
+                         alternate_terms={"query 0": ["alt 0"]}, deadline_seconds=60)
+    scraper.close()
+
+    events = [event[:2] for event in scraper.events]
+    print(events)
+    # The alternate's tab was opened before the main search was typed, and read after the miss
+    assert events[:2] == [("tabs", ["results for 'alt 0'"]), ("search", "query 0")]
+    assert events.index(("read", ["results for 'alt 0'"])) > events.index(("search", "query 1"))
+    assert ("close", ["results for 'alt 0'"]) in events
+    assert delivered[wanted["model"]]["model"] == wanted["model"]
+    # Both halves of the lookup ran against one deadline
+    opened, read = (event for event in scraper.events if event[0] in ("tabs", "read"))
+    assert opened[2] is read[2] and opened[2] is not None
+
+
+def test_pipelined_deadline_is_not_charged_for_the_next_search():
+    wanted = CATALOG[30]
+    pages = {"query 0": _page(CATALOG[:12]), "query 1": _page(CATALOG[12:24]),
+             "results for 'alt 0'": _page(CATALOG[24:36])}
+    scraper = SlowNextSearchScraper(pages, extraction_pool=ExtractionPool(workers=1), max_pages=1)
+    delivered = {}
+    scraper.batch_search({"query 0": wanted["model"], "query 1": CATALOG[15]["model"]},
+                         on_result=lambda model_no, product, error=None: delivered.update({model_no: (product, error)}),
+                         alternate_terms={"query 0": ["alt 0"]}, deadline_seconds=0.3)
+    scraper.close()
+
+    read = next(event for event in scraper.events if event[0] == "read")
+    # The 0.4s spent searching for the next model did not use up the first lookup's 0.3s
+    assert not read[2].expired()
+    product, error = delivered[wanted["model"]]
+    assert error is None and product["model"] == wanted["model"]
+
+
+def test_race_tabs_wait_for_the_cooldown_and_the_concurrency_window():
+    wanted = CATALOG[30]
+    pages = {"query 0": _page(CATALOG[:12]), "results for 'alt 0'": _page(CATALOG[24:36]),
+             "results for 'alt 1'": _page(CATALOG[36:48])}
+    controller = AdaptiveRateController(initial_concurrency=4, signal_cooldown={"captcha": 0.3})
+    scraper = RacingScraper(pages, extraction_pool=ExtractionPool(workers=1), max_pages=1,
+                            rate_controller=controller, session_id="throttled")
+    controller.record_signal("throttled", "captcha")
+    cooldowns = []
+    open_tabs = scraper._open_tabs
+    scraper._open_tabs = lambda urls: cooldowns.append(controller.cooldown_remaining("throttled")) or open_tabs(urls)
+    delivered = {}
+    scraper.batch_search({"query 0": wanted["model"]},
+                         on_result=lambda model_no, product, error=None: delivered.update({model_no: product}),
+                         alternate_terms={"query 0": ["alt 0", "alt 1"]}, deadline_seconds=60)
+    scraper.close()
+
+    # The window was halved to 2 pages by the captcha: the search and one alternate, opened after the cooldown
+    assert cooldowns == [0.0]
+    assert [event[1] for event in scraper.events if event[0] == "tabs"] == [["results for 'alt 0'"]]
+    assert delivered[wanted["model"]]["model"] == wanted["model"]
+
+
+if __name__ == "__main__":
+    test_parse_results_page_matches_the_separate_parsers()
+    test_pipelined_batch_search_parses_while_the_next_search_runs()
+    test_pipelined_lookups_race_the_alternate_terms()
+    test_pipelined_deadline_is_not_charged_for_the_next_search()
+    test_race_tabs_wait_for_the_cooldown_and_the_concurrency_window()
+    print("Extraction pool tests passed.")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from utils.fingerprintPool import FingerprintPool, FingerprintProfile
+from scrapers.bestBuy import BestBuyScraper
+
+
+class FakeDriver:
+    """Records CDP commands instead of driving Chrome"""
+
+    def __init__(self, browser_version):
+        self.capabilities = {"browserVersion": browser_version}
+        self.commands = []
+
+    def execute_cdp_cmd(self, command, params):
+        self.commands.append((command, params))
+
+
+def test_profiles_are_internally_consistent():
+    profile = FingerprintProfile("macos", (1440, 900), "en-US", "America/Chicago", "131.0.6778.85")
+    override = profile.user_agent_override()
+    assert "Macintosh" in profile.user_agent and "Chrome/131.0.0.0" in profile.user_agent
+    assert profile.client_hints()["sec-ch-ua-platform"] == '"macOS"'
+    assert '"Google Chrome";v="131"' in profile.client_hints()["sec-ch-ua"]
+    assert override["platform"] == "MacIntel"
+    assert override["userAgentMetadata"]["fullVersionList"][2]["version"] == "131.0.6778.85"
+    assert "--window-size=1440,900" in profile.chrome_arguments()
+
+
+def test_concurrent_sessions_get_distinct_sticky_profiles():
+    pool = FingerprintPool(seed=1)
+    sessions = [f"worker-{i}" for i in range(40)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        profiles = list(executor.map(pool.lease, sessions))
+    assert len({profile.key for profile in profiles}) == 40
+    # A session keeps its identity until it lets go of it
+    assert pool.lease("worker-0") is profiles[0]
+    assert pool.available() == len(pool) - 40
+
+    rotated = pool.rotate("worker-0")
+    assert rotated.key != profiles[0].key
+    for session_id in sessions:
+        pool.release(session_id)
+    assert pool.available() == len(pool)
+    assert pool.stats["shared"] == 0
+
+
+def test_exhausted_pool_shares_profiles():
+    pool = FingerprintPool(platforms=["windows"], viewports=[(1920, 1080)], locales=[("en-US", "America/New_York")])
+    first = pool.lease("s1")
+    assert pool.lease("s2") is first
+    assert pool.stats["shared"] == 1
+    pool.release("s1")
+    # Still held by s2, so it is not free yet
+    assert pool.available() == 0
+    pool.release("s2")
+    assert pool.available() == 1
+
+
+def test_scraper_aligns_profile_with_real_driver_version():
+    pool = FingerprintPool(browser_version="120", seed=2)
+    scraper = BestBuyScraper.__new__(BestBuyScraper)
+    scraper.session_id = "s1"
+    scraper.fingerprint_pool = pool
+    scraper.fingerprint = pool.lease("s1")
+    key = scraper.fingerprint.key
+
+    driver = FakeDriver("131.0.6778.85")
+    scraper._apply_fingerprint(driver)
+    commands = dict(driver.commands)
+    assert scraper.fingerprint.key == key
+    assert "Chrome/131.0.0.0" in commands["Network.setUserAgentOverride"]["userAgent"]
+    assert commands["Emulation.setTimezoneOverride"]["timezoneId"] == scraper.fingerprint.timezone
+    # Later sessions launch with the right version from the start
+    assert "Chrome/131.0.0.0" in pool.lease("s2").user_agent
+
+
+if __name__ == "__main__":
+    test_profiles_are_internally_consistent()
+    test_concurrent_sessions_get_distinct_sticky_profiles()
+    test_exhausted_pool_shares_profiles()
+    test_scraper_aligns_profile_with_real_driver_version()
+    print("Fingerprint pool tests passed.")
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+import os
+import sys
+import tempfile
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import pandas as pd
+from utils.historyStore import PriceHistoryStore, normalize_results
+from utils.resultSink import build_result_row, open_sink
+
+
+def test_normalize_parses_display_strings():
+    frame = normalize_results(pd.DataFrame([
+        {"model_no": "oled65c4pua", "price": "$1,399.99", "rating": "Rating 4.8 out of 5 stars with 719 reviews"},
+        {"model_no": "KD75X77L", "price": "Sold Out", "rating": "Not Yet Reviewed"},
+        {"model_no": "50UT7570PUB", "price": None, "rating": None},
+    ]))
+    assert frame["model_no"].tolist() == ["OLED65C4PUA", "KD75X77L", "50UT7570PUB"]
+    assert frame["price_usd"].iloc[0] == 1399.99
+    assert frame["rating_value"].iloc[0] == 4.8
+    assert frame["review_count"].iloc[0] == 719
+    assert frame[["price_usd", "rating_value", "review_count"]].iloc[1:].isna().all().all()
+
+
+def test_diff_reports_price_moves_and_listing_changes():
+    with tempfile.TemporaryDirectory() as directory:
+        results_path = os.path.join(directory, "results.csv")
+        with open_sink(results_path) as sink:
+            sink.write(build_result_row("50UT7570PUB", {"price": "$299.99", "rating": "Rating 4.6 out of 5 stars with 169 reviews"}))
+            sink.write(build_result_row("KD75X77L", {"price": "$799.99", "rating": "Rating 4.7 out of 5 stars with 119 reviews"}))
+            sink.write(build_result_row("65UT7570PUB", {"price": "$399.99", "rating": None}))
+
+        store = PriceHistoryStore(os.path.join(directory, "history"))
+        store.append_file(results_path, run_id="20250101T000000Z")
+        store.append([
+            build_result_row("50UT7570PUB", {"price": "$279.99", "rating": "Rating 4.6 out of 5 stars with 170 reviews"}),
+            build_result_row("KD75X77L", {"price": "$799.99", "rating": "Rating 4.7 out of 5 stars with 119 reviews"}),
+            build_result_row("OLED65C4PUA", {"price": "$1,399.99", "rating": None}),
+        ], run_id="20250102T000000Z")
+
+        assert store.runs() == ["20250101T000000Z", "20250102T000000Z"]
+        changes = store.diff().set_index("model_no")
+
+    print(changes)
+    assert changes["status"].to_dict() == {"50UT7570PUB": "changed", "65UT7570PUB": "removed", "OLED65C4PUA": "new"}
+    assert round(changes.loc["50UT7570PUB", "price_change"], 2) == -20.0
+    assert round(changes.loc["50UT7570PUB", "price_change_pct"], 2) == -6.67
+
+
+if __name__ == "__main__":
+    test_normalize_parses_display_strings()
+    test_diff_reports_price_moves_and_listing_changes()
+    print("History store tests passed.")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+import os
+import sys
+import time
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from utils.metrics import MetricsRegistry, STAGE_METRIC
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    with registry.span("driver_get"):
+        pass
+    registry.increment("lookups_total")
+    assert registry.snapshot() == {"histograms": [], "counters": []}
+
+
+def test_spans_are_aggregated_and_exported():
+    registry = MetricsRegistry(enabled=True)
+    for _ in range(3):
+        with registry.span("parsing"):
+            time.sleep(0.001)
+    try:
+        with registry.span("driver_get"):
+            raise TimeoutError("page load timed out")
+    except TimeoutError:
+        pass
+    registry.increment("lookups_total", outcome="found")
+
+    snapshot = registry.snapshot()
+    stages = {entry["labels"]["stage"]: entry for entry in snapshot["histograms"] if entry["name"] == STAGE_METRIC}
+    assert stages["parsing"]["count"] == 3
+    assert stages["parsing"]["min"] <= stages["parsing"]["p50"] <= stages["parsing"]["max"]
+    assert stages["driver_get"]["count"] == 1
+
+    prometheus = registry.to_prometheus()
+    print(prometheus)
+    assert 'snapwrite_stage_duration_seconds_count{stage="parsing"} 3' in prometheus
+    assert 'snapwrite_stage_duration_seconds_bucket{stage="parsing",le="+Inf"} 3' in prometheus
+    assert 'snapwrite_stage_errors_total{stage="driver_get"} 1' in prometheus
+    assert 'snapwrite_lookups_total{outcome="found"} 1' in prometheus
+
+
+def test_environment_switch_is_read_on_first_use():
+    registry = MetricsRegistry(enabled=None)
+    previous = os.environ.get("METRICS_ENABLED")
+    # Set after the registry was built, as a .env file loaded after import would
+    os.environ["METRICS_ENABLED"] = "true"
+    try:
+        registry.increment("lookups_total")
+    finally:
+        if previous is None:
+            del os.environ["METRICS_ENABLED"]
+        else:
+            os.environ["METRICS_ENABLED"] = previous
+    assert registry.enabled and registry.snapshot()["counters"]
+
+
+if __name__ == "__main__":
+    test_disabled_registry_records_nothing()
+    test_spans_are_aggregated_and_exported()
+    test_environment_switch_is_read_on_first_use()
+    print("Metrics tests passed.")
@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+import os
+import sys
+import json
+import asyncio
+import urllib.error
+import urllib.request
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import time
+
+import aiohttp
+from aiohttp import web
+from utils.backgroundServer import BackgroundAppServer
+from utils.geminiLLMService import send_gemini_chat, LLMUsageTracker, llm_usage, GeminiClient, GeminiAPIError
+from utils.tokenBucket import AsyncTokenBucket
+from utils.llmFunctions import process_products_with_schema
+from utils.mockGeminiServer import MockGeminiServer, MockGeminiConfig, default_responder, _extract_product_list
+
+
+def test_mock_gemini_normalizes_products_and_reports_usage():
+    prompt = "Now process the following product list:\n" + json.dumps([
+        {"name": "LG 50\" UHD 4K Smart LED TV - 50UT7570PUB"},
+        {"name": "Samsung 43” 4K Tizen Smart CUHD TV-UN43DU7100FXZC"},
+    ])
+    messages = [{"role": "user", "parts": [{"text": prompt}]}]
+
+    async def call(base_url):
+        async with aiohttp.ClientSession() as session:
+            return await send_gemini_chat(session, messages, base_url=base_url)
+
+    llm_usage.reset()
+    with MockGeminiServer(MockGeminiConfig(latency_range=(0, 0))) as server:
+        response = asyncio.run(call(server.base_url))
+
+    text = response["candidates"][0]["content"]["parts"][0]["text"]
+    products = json.loads(text.split("```json")[1].split("```")[0])
+    assert [p["model_no"] for p in products] == ["50UT7570PUB", "UN43DU7100FXZC"]
+    assert products[0]["brand"] == "lg"
+
+    usage = llm_usage.summary()["gemini-2.0-flash"]
+    print(usage)
+    assert usage["calls"] == 1
+    assert usage["total_tokens"] == response["usageMetadata"]["totalTokenCount"] > 0
+
+
+def test_mock_gemini_rate_limit_injection():
+    config = MockGeminiConfig(latency_range=(0, 0), rate_limit_rate=1.0, retry_after_seconds=3)
+    with MockGeminiServer(config) as server:
+        request = urllib.request.Request(
+            server.base_url + "/v1beta/models/gemini-2.0-flash:generateContent",
+            data=json.dumps({"contents": []}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            urllib.request.urlopen(request)
+            assert False, "expected HTTP 429"
+        except urllib.error.HTTPError as e:
+            assert e.code == 429
+            assert e.headers["Retry-After"] == "3"
+            assert json.loads(e.read())["error"]["status"] == "RESOURCE_EXHAUSTED"
+
+
+def test_usage_tracker_estimates_cost():
+    tracker = LLMUsageTracker()
+    tracker.record("gemini-2.0-flash", {"promptTokenCount": 1_000_000, "candidatesTokenCount": 1_000_000}, 1.5)
+    summary = tracker.summary()["gemini-2.0-flash"]
+    assert summary["total_tokens"] == 2_000_000
+    assert summary["estimated_cost_usd"] == 0.5
+
+
+def test_schema_mode_retries_only_failed_items():
+    requested_batches = []
+
+    def flaky_responder(prompt, payload):
+        assert payload["generationConfig"]["responseMimeType"] == "application/json"
+        requested_batches.append([product["name"] for product in _extract_product_list(prompt)])
+        items = json.loads(default_responder(prompt, payload))
+        if len(requested_batches) == 1:
+            del items[1]["model_no"]                       # one invalid row
+            return json.dumps(items)[:-40]                 # and a truncated tail
+        return json.dumps(items)
+
+    products = [{"name": "LG 50\" UHD 4K Smart LED TV - 50UT7570PUB"},
+                {"name": "LG 65\" UHD 4K Smart LED TV - 65UT7570PUB"},
+                {"name": "SONY 75\" X77L 4K HDR LED TV Google TV - KD75X77L"}]
+    previous_base = os.environ.get("GEMINI_API_BASE")
+    with MockGeminiServer(MockGeminiConfig(latency_range=(0, 0)), responder=flaky_responder) as server:
+        os.environ["GEMINI_API_BASE"] = server.base_url
+        try:
+            results = asyncio.run(process_products_with_schema(products))
+        finally:
+            if previous_base is None:
+                os.environ.pop("GEMINI_API_BASE")
+            else:
+                os.environ["GEMINI_API_BASE"] = previous_base
+
+    print(requested_batches)
+    assert [p.model_no for p in results] == ["50UT7570PUB", "65UT7570PUB", "KD75X77L"]
+    # The second request only carried the invalid and truncated items
+    assert requested_batches[1] == [products[1]["name"], products[2]["name"]]
+
+
+def test_token_bucket_paces_bursts():
+    async def drain():
+        bucket = AsyncTokenBucket(rate=20, capacity=2)
+        started = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # Two tokens are available immediately, the other four refill at 20/s
+    elapsed = asyncio.run(drain())
+    assert 0.15 <= elapsed < 1.0
+
+
+def test_client_honors_quota_retry_hint():
+    config = MockGeminiConfig(latency_range=(0, 0), quota_rpm=2, quota_window_seconds=0.5)
+    messages = [{"role": "user", "parts": [{"text": "Now process the following product list:\n[]"}]}]
+
+    async def burst(base_url):
+        async with GeminiClient(base_url=base_url, api_key="test", requests_per_minute=6000) as client:
+            return await asyncio.gather(*(client.generate(messages) for _ in range(4)))
+
+    with MockGeminiServer(config) as server:
+        responses = asyncio.run(burst(server.base_url))
+        stats = dict(server.stats)
+
+    print(stats)
+    assert len(responses) == 4
+    assert stats["quota_429"] >= 1
+    # Every 429 paused the whole client, so retries did not hammer the exhausted quota
+    assert stats["quota_429"] <= 4
+
+
+def test_client_does_not_retry_client_errors():
+    async def call(base_url):
+        async with GeminiClient(base_url=base_url + "/missing", api_key="test") as client:
+            await client.generate([{"role": "user", "parts": [{"text": "hi"}]}])
+
+    llm_usage.reset()
+    with MockGeminiServer(MockGeminiConfig(latency_range=(0, 0))) as server:
+        try:
+            asyncio.run(call(server.base_url))
+            assert False, "expected GeminiAPIError"
+        except GeminiAPIError as e:
+            assert e.status == 404
+    # A 404 will not go away on retry, so exactly one attempt was made
+    assert llm_usage.summary()["gemini-2.0-flash"]["errors"] == 1
+
+
+def test_client_retries_unreadable_bodies_and_returns_tokens_of_failed_attempts():
+    replies = [web.Response(text="<html>upstream hiccup</html>", content_type="text/html"),
+               web.Response(status=503, text="overloaded"),
+               web.json_response({"candidates": [], "usageMetadata": {"totalTokenCount": 10}})]
+
+    async def generate_content(request):
+        return replies.pop(0)
+
+    app = web.Application()
+    app.router.add_post("/v1beta/models/{model}:generateContent", generate_content)
+
+    refunds = []
+
+    async def call(base_url):
+        async with GeminiClient(base_url=base_url, api_key="test", base_backoff=0.01) as client:
+            refund = client.token_bucket.refund
+            client.token_bucket.refund = lambda amount: refunds.append(amount) or refund(amount)
+            return await client.generate([{"role": "user", "parts": [{"text": "hi"}]}], max_tokens=100)
+
+    with BackgroundAppServer(app) as server:
+        response = asyncio.run(call(server.base_url))
+
+    assert response["usageMetadata"]["totalTokenCount"] == 10 and not replies
+    # The unreadable 200 keeps its 100 token reservation, the 503 gets all of it back
+    # and the success returns the 90 it did not use
+    assert refunds == [100, 90]
+
+
+if __name__ == "__main__":
+    test_mock_gemini_normalizes_products_and_reports_usage()
+    test_mock_gemini_rate_limit_injection()
+    test_usage_tracker_estimates_cost()
+    test_schema_mode_retries_only_failed_items()
+    test_token_bucket_paces_bursts()
+    test_client_honors_quota_retry_hint()
+    test_client_does_not_retry_client_errors()
+    test_client_retries_unreadable_bodies_and_returns_tokens_of_failed_attempts()
+    print("Mock Gemini tests passed.")
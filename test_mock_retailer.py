@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+import os
+import sys
+import json
+import urllib.error
+import urllib.request
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from bs4 import BeautifulSoup
+from benchmark import build_workload, MISSING_MODELS
+from utils.mockRetailerServer import MockRetailerServer, MockRetailerConfig, build_catalog
+
+
+def fetch(url):
+    with urllib.request.urlopen(url) as response:
+        return response.read().decode("utf-8")
+
+
+def test_mock_retailer_serves_scraper_markup():
+    config = MockRetailerConfig(latency_range=(0, 0), popup_rate=1.0)
+    with MockRetailerServer(config) as server:
+        homepage = BeautifulSoup(fetch(server.base_url), "html.parser")
+        assert homepage.select_one("#gh-search-input") is not None
+        assert homepage.select_one(".header-search-button") is not None
+        assert homepage.select_one("#confirmIt-backdrop, .c-modal-grid") is not None
+
+        results = BeautifulSoup(fetch(server.base_url + "site/searchpage.jsp?st=lg+50+ut75+tv"), "html.parser")
+        cards = results.select(".sku-item")
+        assert len(cards) == config.initial_cards
+        models = [card.select_one(".product-attributes .value").text for card in cards]
+        print(f"First page models: {models}")
+        assert "50UT7570PUB" in models
+        assert results.select_one(".paging-list") is not None
+
+        # The rest of the page arrives through the lazy loading endpoint
+        more = BeautifulSoup(fetch(server.base_url + "api/search-cards?st=lg+50+ut75+tv&cp=1&offset=6&limit=6"),
+                             "html.parser")
+        assert len(more.select(".sku-item")) == 6
+
+        # Product links lead to a detail page with the same model, and unknown SKUs to a 404
+        product_url = cards[models.index("50UT7570PUB")].select_one(".sku-title a")["href"]
+        product_page = BeautifulSoup(fetch(server.base_url + product_url.lstrip("/")), "html.parser")
+        assert product_page.select_one(".model.product-data .product-data-value").text == "50UT7570PUB"
+        try:
+            fetch(server.base_url + "site/1.p?skuId=1")
+            assert False, "expected a 404"
+        except urllib.error.HTTPError as e:
+            assert e.code == 404
+
+        stats = json.loads(fetch(server.base_url + "__stats"))
+        assert stats["homepage"] == 1 and stats["popups"] == 1 and stats["product_page"] == 2
+
+
+def test_mock_retailer_fault_injection():
+    config = MockRetailerConfig(latency_range=(0, 0), captcha_rate=1.0)
+    with MockRetailerServer(config) as server:
+        page = fetch(server.base_url + "site/searchpage.jsp?st=tv")
+        assert "px-captcha" in page
+        assert json.loads(fetch(server.base_url + "__stats"))["injected_captcha"] == 1
+
+
+def test_bad_page_numbers_fall_back_to_page_one():
+    config = MockRetailerConfig(latency_range=(0, 0))
+    with MockRetailerServer(config) as server:
+        first = fetch(server.base_url + "site/searchpage.jsp?st=lg+50+ut75+tv")
+        assert fetch(server.base_url + "site/searchpage.jsp?st=lg+50+ut75+tv&cp=two") == first
+        more = fetch(server.base_url + "api/search-cards?st=lg+50+ut75+tv&cp=2x&offset=six&limit=6")
+        assert more == fetch(server.base_url + "api/search-cards?st=lg+50+ut75+tv&cp=1&offset=0&limit=6")
+
+
+def test_benchmark_workload_comes_from_the_served_catalog():
+    config = MockRetailerConfig(catalog_size=30, seed=3)
+    served = {product["model"] for product in build_catalog(config.catalog_size, config.seed)}
+    missing = {model_no for _, model_no in MISSING_MODELS}
+    workload = build_workload(20, config=config)
+    assert len(workload) == 20
+    assert all(model_no in served or model_no in missing for _, model_no in workload)
+
+
+if __name__ == "__main__":
+    test_mock_retailer_serves_scraper_markup()
+    test_mock_retailer_fault_injection()
+    test_bad_page_numbers_fall_back_to_page_one()
+    test_benchmark_workload_comes_from_the_served_catalog()
+    print("Mock retailer tests passed.")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+import os
+import sys
+import json
+import tempfile
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import cli
+from scrapers.bestBuyParsing import parse_products
+from utils.mockRetailerServer import build_catalog, render_product_card
+from utils.pageArchive import PageArchive, reextract
+
+BASE_URL = "https://www.bestbuy.com/"
+
+
+def _results_pages(count=6, per_page=12):
+    catalog = build_catalog()
+    return ["<html><body>" + "".join(render_product_card(product) for product in catalog[start:start + per_page])
+            + "</body></html>" for start in range(0, count * per_page, per_page)]
+
+
+def _fill(archive, pages):
+    for number, html in enumerate(pages):
+        archive.put(html, f"{BASE_URL}site/searchpage.jsp?st=lg+tv+{number}&cp=1", BASE_URL, model_no=f"M{number}")
+
+
+def test_pages_are_stored_once_and_indexed_per_fetch():
+    pages = _results_pages(2)
+    with tempfile.TemporaryDirectory() as root:
+        archive = PageArchive(root, compression="gzip")
+        first = archive.put(pages[0], f"{BASE_URL}site/searchpage.jsp?st=lg+50+tv", BASE_URL)
+        again = archive.put(pages[0], f"{BASE_URL}site/searchpage.jsp?st=lg+50+tv", BASE_URL)
+        archive.put(pages[1], "http://127.0.0.1:8765/site/searchpage.jsp?st=sony", "http://127.0.0.1:8765/")
+
+        stored = [name for _, _, names in os.walk(os.path.join(root, "objects")) for name in names]
+        assert first == again and len(stored) == 2
+        assert sum(os.path.getsize(os.path.join(root, "objects", name[:2], name)) for name in stored) < len(pages[0])
+        entries = list(archive.entries())
+        assert [entry["query"] for entry in entries] == ["lg 50 tv", "lg 50 tv", "sony"]
+        assert [entry["retailer"] for entry in archive.entries(retailer="127.0.0.1:8765")] == ["127.0.0.1:8765"]
+        assert archive.get(first) == pages[0]
+
+
+def test_reextract_matches_the_live_parser():
+    pages = _results_pages()
+    with tempfile.TemporaryDirectory() as root:
+        archive = PageArchive(root)
+        _fill(archive, pages)
+        _fill(archive, pages[:2])  # Fetched again later; parsed once
+        results = list(reextract(archive, workers=2))
+
+    assert len(results) == len(pages)
+    for entry, products in results:
+        expected = parse_products(pages[int(entry["model_no"][1:])], BASE_URL)
+        assert products == expected and len(products) == 12
+
+
+def test_cli_reextract_writes_products():
+    with tempfile.TemporaryDirectory() as root:
+        _fill(PageArchive(os.path.join(root, "pages")), _results_pages(3))
+        output_path = os.path.join(root, "products.jsonl")
+        assert cli.main(["reextract", os.path.join(root, "pages"), "-o", output_path, "--workers", "2"]) == 0
+        with open(output_path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+        assert cli.main(["reextract", os.path.join(root, "missing")]) == 1
+
+    assert len(rows) == 36
+    assert rows[0]["query"] == "lg tv 0" and rows[0]["page_sha256"] and rows[0]["name"]
+
+
+if __name__ == "__main__":
+    test_pages_are_stored_once_and_indexed_per_fetch()
+    test_reextract_matches_the_live_parser()
+    test_cli_reextract_writes_products()
+    print("Page archive tests passed.")
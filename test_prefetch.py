@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+import os
+import sys
+from urllib.parse import urlparse, parse_qs
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from scrapers.bestBuy import BestBuyScraper
+from utils.rateController import AdaptiveRateController
+
+
+class FakeTabDriver:
+    """Stands in for a Chrome WebDriver with tabs: each handle remembers the URL it was sent to"""
+
+    def __init__(self):
+        self.tabs = {"tab-0": "about:blank"}
+        self.current_window_handle = "tab-0"
+        self.opened = 0
+        self.gets = []
+        self.cdp = []
+        self.switch_to = self
+
+    # switch_to API
+    def new_window(self, kind):
+        self.opened += 1
+        self.current_window_handle = f"tab-{self.opened}"
+        self.tabs[self.current_window_handle] = "about:blank"
+
+    def window(self, handle):
+        assert handle in self.tabs, f"no such window {handle}"
+        self.current_window_handle = handle
+
+    @property
+    def window_handles(self):
+        return list(self.tabs)
+
+    @property
+    def current_url(self):
+        return self.tabs[self.current_window_handle]
+
+    def execute_script(self, script, *args):
+        if "location.href" in script:
+            self.tabs[self.current_window_handle] = args[0]
+
+    def execute_cdp_cmd(self, command, params):
+        self.cdp.append((self.current_window_handle, command, self.current_url))
+        return {}
+
+    def find_element(self, by, selector):
+        return object()
+
+    def get(self, url):
+        self.gets.append(url)
+        self.tabs[self.current_window_handle] = url
+
+    def close(self):
+        del self.tabs[self.current_window_handle]
+
+    def quit(self):
+        self.tabs.clear()
+
+
+class PrefetchScraper(BestBuyScraper):
+    def __init__(self, **kwargs):
+        self.calls = []
+        super().__init__(use_delays=False, prefetch=True, **kwargs)
+
+    def _create_driver(self):
+        return FakeTabDriver()
+
+    def _pause(self, seconds, minimum=0.5):
+        pass
+
+    def lookup(self, search_term, model_no, *args, **kwargs):
+        self.calls.append((search_term, sorted(self._prefetched), len(self.driver.tabs)))
+        return None
+
+
+def test_search_switches_to_the_prefetched_tab():
+    scraper = PrefetchScraper()
+    driver = scraper.driver
+    scraper._prefetch("lg 50 tv")
+    assert driver.current_window_handle == "tab-0" and len(driver.tabs) == 2
+
+    url = scraper.search("lg 50 tv")
+    assert parse_qs(urlparse(url).query)["st"] == ["lg 50 tv"]
+    # No homepage load or typing, and the old main tab is gone
+    assert driver.gets == [] and list(driver.tabs) == ["tab-1"]
+    assert scraper._prefetched == {}
+    scraper.close()
+
+
+def test_new_tabs_get_the_session_overrides_before_loading():
+    scraper = PrefetchScraper()
+    driver = scraper.driver
+    scraper._storage_script = "/* restore localStorage */"
+    scraper._prefetch("lg 50 tv")
+
+    print(driver.cdp)
+    assert [(handle, command) for handle, command, _ in driver.cdp] == [
+        ("tab-1", "Network.setUserAgentOverride"),
+        ("tab-1", "Emulation.setTimezoneOverride"),
+        ("tab-1", "Page.addScriptToEvaluateOnNewDocument"),
+    ]
+    # Sent while the tab was still blank
+    assert all(url == "about:blank" for _, _, url in driver.cdp)
+    scraper.close()
+
+
+def test_no_prefetch_while_the_session_is_slowed_down():
+    controller = AdaptiveRateController()
+    controller.record_signal("prefetch", "empty_results")
+    scraper = PrefetchScraper(rate_controller=controller, session_id="prefetch")
+    scraper.batch_search({"query a": "A1", "query b": "B1"})
+
+    assert [prefetched for _, prefetched, _ in scraper.calls] == [[], []]
+    assert scraper.driver.opened == 0
+    scraper.close()
+
+
+def test_batch_search_keeps_one_query_ahead():
+    scraper = PrefetchScraper()
+    scraper.batch_search({"query a": "A1", "query b": "B1", "query c": "C1"})
+
+    print(scraper.calls)
+    assert [prefetched for _, prefetched, _ in scraper.calls] == [["query b"], ["query b", "query c"], ["query c"]]
+    # Prefetched tabs that were never switched to are closed once the batch ends
+    assert scraper._prefetched == {} and list(scraper.driver.tabs) == ["tab-0"]
+    scraper.close()
+
+
+if __name__ == "__main__":
+    test_search_switches_to_the_prefetched_tab()
+    test_new_tabs_get_the_session_overrides_before_loading()
+    test_no_prefetch_while_the_session_is_slowed_down()
+    test_batch_search_keeps_one_query_ahead()
+    print("Prefetch tests passed.")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+import os
+import sys
+import asyncio
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from utils.proxyPool import ProxyPool
+from utils.mockProxyServer import MockProxyServer
+from utils.mockRetailerServer import MockRetailerServer, MockRetailerConfig
+
+
+def test_sessions_get_distinct_healthy_proxies():
+    pool = ProxyPool(["http://a:1", "http://b:1", "http://c:1"])
+    pool.report_success("http://a:1", latency=0.5)
+    pool.report_success("http://b:1", latency=4.0)
+    pool.report_failure("http://c:1")
+
+    assert pool.acquire("s1") == "http://a:1"
+    assert pool.acquire("s2") == "http://b:1"
+    # c is cooling down and a/b are fully leased
+    assert pool.acquire("s3") is None
+    pool.release("s1")
+    assert pool.acquire("s3") == "http://a:1"
+
+
+def test_block_rotates_and_repeated_failures_evict():
+    pool = ProxyPool(["http://a:1", "http://b:1"], cooldown_seconds=0, eviction_failures=3)
+    assert pool.acquire("s1") == "http://a:1"
+    assert pool.rotate("s1", "captcha") == "http://b:1"
+    assert pool.proxy_for("s1") == "http://b:1"
+
+    for _ in range(3):
+        pool.report_failure("http://a:1")
+    states = {state["url"]: state for state in pool.snapshot()}
+    assert states["http://a:1"]["evicted"]
+    assert states["http://a:1"]["blocks"] == 1
+    assert pool.rotate("s1", "http_403") is None
+
+
+def test_failed_rotation_keeps_the_current_lease():
+    pool = ProxyPool(["http://a:1", "http://b:1"], cooldown_seconds=0)
+    assert pool.acquire("s1") == "http://a:1"
+    assert pool.acquire("s2") == "http://b:1"
+    # b is fully leased, so s1 has nowhere to go and still holds a
+    assert pool.rotate("s1", "captcha") is None
+    assert pool.proxy_for("s1") == "http://a:1"
+    states = {state["url"]: state for state in pool.snapshot()}
+    assert states["http://a:1"]["sessions"] == ["s1"]
+    # Another session cannot lease a proxy beyond max_sessions_per_proxy
+    assert pool.acquire("s3") is None
+    # Re-acquiring can hand a session back the proxy it already holds
+    assert pool.acquire("s1") == "http://a:1"
+
+
+def test_health_check_against_local_proxy_stand_ins():
+    config = MockRetailerConfig(latency_range=(0, 0))
+    with MockRetailerServer(config) as retailer, MockProxyServer() as good, \
+            MockProxyServer(blocked=True) as blocked, MockProxyServer(failure_rate=1.0) as broken:
+        pool = ProxyPool([good.proxy_url, blocked.proxy_url, broken.proxy_url])
+        outcomes = asyncio.run(pool.health_check(retailer.base_url, timeout=5))
+        print(outcomes)
+        assert outcomes[good.proxy_url][0]
+        assert not outcomes[blocked.proxy_url][0]
+        assert not outcomes[broken.proxy_url][0]
+        states = {state["url"]: state for state in pool.snapshot()}
+        assert states[blocked.proxy_url]["blocks"] == 1 and states[broken.proxy_url]["blocks"] == 0
+        assert pool.acquire("s1") == good.proxy_url
+        assert retailer.stats["homepage"] == 1
+
+
+if __name__ == "__main__":
+    test_sessions_get_distinct_healthy_proxies()
+    test_block_rotates_and_repeated_failures_evict()
+    test_failed_rotation_keeps_the_current_lease()
+    test_health_check_against_local_proxy_stand_ins()
+    print("Proxy pool tests passed.")
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from utils.rateController import AdaptiveRateController
+
+
+def test_clean_pages_shorten_delays_and_open_concurrency():
+    controller = AdaptiveRateController(additive_step=0.1, max_rate=2.0, max_concurrency=4)
+    assert controller.delay_scale("a") == 1.0
+    for _ in range(30):
+        controller.record_success("a")
+    assert controller.delay_scale("a") == 0.5  # capped at max_rate
+    assert controller.concurrency_limit("a") == 4
+
+
+def test_block_signals_back_off_per_session():
+    controller = AdaptiveRateController(signal_cooldown={"captcha": 60})
+    for _ in range(10):
+        controller.record_success("a")
+        controller.record_success("b")
+    fast_scale = controller.delay_scale("a")
+
+    controller.record_signal("a", "captcha")
+    print(controller.snapshot())
+    assert controller.delay_scale("a") > fast_scale * 3
+    assert controller.cooldown_remaining("a") > 59
+    # Other sessions keep their own budget
+    assert controller.delay_scale("b") == fast_scale
+    assert controller.cooldown_remaining("b") == 0
+
+
+def test_soft_signals_back_off_less_than_hard_blocks():
+    controller = AdaptiveRateController()
+    controller.record_signal("soft", "empty_results")
+    controller.record_signal("hard", "http_403")
+    assert controller.delay_scale("soft") < controller.delay_scale("hard")
+    assert controller.delay_scale("hard") <= 1 / controller.min_rate
+
+
+if __name__ == "__main__":
+    test_clean_pages_shorten_delays_and_open_concurrency()
+    test_block_signals_back_off_per_session()
+    test_soft_signals_back_off_less_than_hard_blocks()
+    print("Rate controller tests passed.")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+import os
+import sys
+import time
+import subprocess
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from scrapers.bestBuy import BestBuyScraper
+from utils.recyclePolicy import RecyclePolicy, process_tree_rss
+
+
+class FakeDriver:
+    """Stands in for a Chrome WebDriver: just enough for recycling to swap it out"""
+
+    def __init__(self, number):
+        self.number = number
+        self.cookies = []
+        self.quit_called = False
+        self.window_handles = ["main"]
+
+    def execute_cdp_cmd(self, command, params):
+        if command == "Network.getAllCookies":
+            return {"cookies": self.cookies}
+        if command == "Network.setCookies":
+            self.cookies = params["cookies"]
+        return {}
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FakeDriverScraper(BestBuyScraper):
+    launched = 0
+
+    def _launch_driver(self, fingerprint, proxy, user_data_dir=None):
+        time.sleep(0.1)  # Browser start-up
+        FakeDriverScraper.launched += 1
+        driver = FakeDriver(FakeDriverScraper.launched)
+        driver.launch_config = (fingerprint, proxy)
+        return driver
+
+
+def test_process_tree_rss_includes_children():
+    own = process_tree_rss(os.getpid())
+    if own is None:
+        return  # Memory is not readable on this platform
+    child = subprocess.Popen([sys.executable, "-c", "import time; data = bytearray(50 * 1024 * 1024); time.sleep(5)"])
+    try:
+        time.sleep(0.5)
+        assert process_tree_rss(os.getpid()) > own + 40 * 1024 * 1024
+    finally:
+        child.kill()
+        child.wait()
+    assert process_tree_rss(child.pid) is None
+
+
+def test_policy_reasons():
+    policy = RecyclePolicy(max_rss_mb=100, max_searches=10, max_error_streak=3, max_tabs=4)
+    assert policy.reason(50 * 1024 * 1024, searches=9, error_streak=2, tabs=4) is None
+    assert policy.reason(150 * 1024 * 1024, searches=1) == "memory"
+    assert policy.reason(None, searches=10) == "searches"
+    assert policy.reason(None, error_streak=3) == "errors"
+    assert policy.reason(None, tabs=7) == "tabs"
+    assert RecyclePolicy(max_rss_mb=None, max_searches=0).reason(10 ** 12, searches=10 ** 6) is None
+
+
+def test_scraper_swaps_in_a_warmed_browser_between_lookups():
+    FakeDriverScraper.launched = 0
+    scraper = FakeDriverScraper(use_delays=False, recycle_policy=RecyclePolicy(max_rss_mb=None, max_searches=2))
+    first = scraper.driver
+    first.cookies = [{"name": "session", "value": "abc", "domain": ".bestbuy.com", "path": "/", "size": 10}]
+    scraper._searches_on_driver = 2
+
+    scraper._maybe_recycle()
+    # The old browser keeps serving lookups while the new one starts
+    assert scraper.driver is first and scraper._replacement is not None
+    scraper._replacement.result()
+    scraper._maybe_recycle()
+
+    assert scraper.driver.number == 2
+    assert first.quit_called
+    assert scraper.driver.cookies == [{"name": "session", "value": "abc", "domain": ".bestbuy.com", "path": "/"}]
+    assert scraper._searches_on_driver == 0
+    scraper._maybe_recycle()
+    assert scraper._replacement is None
+    scraper.close()
+
+
+def test_warmed_browser_is_dropped_when_the_session_moves():
+    FakeDriverScraper.launched = 0
+    scraper = FakeDriverScraper(use_delays=False, recycle_policy=RecyclePolicy(max_rss_mb=None, max_searches=2))
+    first = scraper.driver
+    scraper._searches_on_driver = 2
+    scraper._maybe_recycle()
+    pending = scraper._replacement
+    assert pending.result().launch_config == (scraper.fingerprint, None)
+
+    # A rotation happened while the browser was warming
+    scraper.fingerprint = scraper.fingerprint_pool.rotate(scraper.session_id)
+    scraper._maybe_recycle()
+    assert scraper.driver is first and not first.quit_called
+    assert pending.result().quit_called and scraper._replacement is None
+
+    scraper._searches_on_driver = 2
+    scraper._maybe_recycle()
+    warming = scraper._replacement
+    warmed = warming.result()
+    scraper._discard_replacement()
+    assert scraper._replacement is None and warmed.quit_called
+    scraper.close()
+
+
+def test_error_streak_restarts_the_browser_in_place():
+    FakeDriverScraper.launched = 0
+    scraper = FakeDriverScraper(use_delays=False, recycle_policy=RecyclePolicy(max_error_streak=2))
+    first = scraper.driver
+    scraper._error_streak = 2
+    scraper._maybe_recycle()
+    assert first.quit_called and scraper.driver.number == 2 and scraper._replacement is None
+    scraper.close()
+
+
+if __name__ == "__main__":
+    test_process_tree_rss_includes_children()
+    test_policy_reasons()
+    test_scraper_swaps_in_a_warmed_browser_between_lookups()
+    test_warmed_browser_is_dropped_when_the_session_moves()
+    test_error_streak_restarts_the_browser_in_place()
+    print("Recycle policy tests passed.")
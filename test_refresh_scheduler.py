@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+import os
+import sys
+import tempfile
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from utils.refreshScheduler import RefreshScheduler
+
+
+class SimulatedClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_volatile_products_are_refreshed_more_often():
+    clock = SimulatedClock()
+    checks = {"VOLATILE": 0, "STABLE": 0}
+
+    def lookup(search_term, model_no):
+        checks[model_no] += 1
+        # The volatile listing changes price on every check, the stable one never does
+        price = checks[model_no] if model_no == "VOLATILE" else 100
+        return {"name": search_term, "price": f"${price}", "rating": "4.5"}
+
+    scheduler = RefreshScheduler(lookup, lookups_per_hour=10, min_interval=600,
+                                 prior_change_interval=6 * 3600, clock=clock, sleep=clock.sleep)
+    scheduler.track("VOLATILE", "volatile tv")
+    scheduler.track("STABLE", "stable tv")
+    outcomes = scheduler.run(until=clock.now + 3 * 86400)
+
+    print(checks, scheduler.snapshot())
+    assert checks["VOLATILE"] > 3 * checks["STABLE"]
+    assert {outcome["outcome"] for outcome in outcomes if outcome["model_no"] == "STABLE"} == {"unchanged"}
+
+
+def test_lookups_stay_within_hourly_budget():
+    clock = SimulatedClock()
+    timestamps = []
+
+    def lookup(search_term, model_no):
+        timestamps.append(clock.now)
+        return {"name": search_term, "price": "$1"}
+
+    scheduler = RefreshScheduler(lookup, lookups_per_hour=12, clock=clock, sleep=clock.sleep)
+    for index in range(50):
+        scheduler.track(f"MODEL{index}", f"tv {index}")
+    scheduler.run(max_lookups=30)
+
+    gaps = [later - earlier for earlier, later in zip(timestamps, timestamps[1:])]
+    assert len(timestamps) == 30
+    assert min(gaps) >= 300  # 12 per hour
+
+
+def test_failed_lookups_back_off_and_state_persists():
+    clock = SimulatedClock()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "refresh_state.json")
+        scheduler = RefreshScheduler(lambda term, model: None, min_interval=600, state_path=path,
+                                     clock=clock, sleep=clock.sleep)
+        scheduler.track("FLAKY", "flaky tv")
+        scheduler.run(max_lookups=3)
+        state = scheduler.snapshot()[0]
+        assert state["consecutive_failures"] == 3
+        assert state["last_checked"] is None and state["expected_staleness"] == 1.0
+        assert state["due_in"] == 2400  # 600 * 2 ** 2
+
+        restored = RefreshScheduler(lambda term, model: None, min_interval=600, state_path=path, clock=clock)
+        due, restored_state = restored.next_due()
+        assert restored_state.failures == 3
+        assert due == clock.now + 2400
+        # Looking ahead to the next due model doesn't make it due any earlier
+        assert restored.next_due()[0] == due
+
+
+def test_the_most_stale_due_product_goes_first():
+    clock = SimulatedClock()
+    scheduler = RefreshScheduler(lambda term, model: None, min_interval=60, prior_change_interval=86400,
+                                 clock=clock, sleep=clock.sleep)
+    scheduler.track("STABLE", "stable tv")
+    scheduler.track("VOLATILE", "volatile tv")
+    # Checked once two days ago, so due a day ago under the one-change-a-day prior
+    scheduler.record("STABLE", {"price": "$100"}, now=clock.now - 2 * 86400)
+    # Changed on every check ten minutes apart
+    for index, minutes in enumerate((20, 10, 0)):
+        scheduler.record("VOLATILE", {"price": f"${index}"}, now=clock.now - minutes * 60)
+    clock.sleep(1000)
+
+    due, state = scheduler.next_due()
+    stable = next(row for row in scheduler.snapshot() if row["model_no"] == "STABLE")
+    assert stable["due_in"] < 0 and due == clock.now
+    assert state.model_no == "VOLATILE"
+
+    # A failed check neither refreshes last_checked nor lowers the staleness
+    scheduler.record("VOLATILE", None)
+    volatile = next(row for row in scheduler.snapshot() if row["model_no"] == "VOLATILE")
+    assert volatile["last_checked"] == clock.now - 1000 and volatile["last_attempt"] == clock.now
+    assert scheduler.next_due()[1].model_no == "STABLE"
+
+
+if __name__ == "__main__":
+    test_volatile_products_are_refreshed_more_often()
+    test_lookups_stay_within_hourly_budget()
+    test_failed_lookups_back_off_and_state_persists()
+    test_the_most_stale_due_product_goes_first()
+    print("Refresh scheduler tests passed.")
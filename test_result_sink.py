@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+import os
+import sys
+import json
+import tempfile
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from utils.resultSink import build_result_row, open_sink, group_by_brand, NDJSONSink
+
+
+ORIGINALS = {
+    "50UT7570PUB": {"brand": "LG", "input_name": "LG 50\" UHD 4K Smart LED TV - 50UT7570PUB"},
+    "KD75X77L": {"brand": "Sony", "input_name": "SONY 75\" X77L 4K HDR LED TV Google TV - KD75X77L"},
+    "65UT7570PUB": {"brand": "LG", "input_name": "LG 65\" UHD 4K Smart LED TV - 65UT7570PUB"},
+}
+LISTINGS = {
+    "50UT7570PUB": {"name": "LG - 50\" Class UT75 Series LED 4K UHD Smart webOS TV", "price": "$279.99",
+                    "rating": "Rating 4.5 out of 5 stars with 812 reviews", "sku": "6593578",
+                    "url": "https://www.bestbuy.com/site/6593578.p"},
+    "KD75X77L": None,
+    "65UT7570PUB": {"name": "LG - 65\" Class UT75 Series LED 4K UHD Smart webOS TV", "price": "$429.99",
+                    "rating": None, "sku": "6593580", "url": "https://www.bestbuy.com/site/6593580.p"},
+}
+
+
+def test_sinks_round_trip_into_brand_groups():
+    for extension in ("ndjson", "csv", "parquet"):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, f"results.{extension}")
+            with open_sink(path, buffer_size=2) as sink:
+                for model_no, listing in LISTINGS.items():
+                    sink.write(build_result_row(model_no, listing, ORIGINALS[model_no]))
+                sink.write(build_result_row("KD65X77L", None, {"brand": "Sony"}, error="deadline_exceeded"))
+            grouped = group_by_brand(path, chunk_size=2)
+
+        print(extension, json.dumps(grouped, indent=2))
+        assert sorted(grouped["brands"]) == ["lg", "sony"]
+        lg = {entry["model_no"]: entry for entry in grouped["brands"]["lg"]}
+        assert lg["50UT7570PUB"]["bestbuy"]["price"] == "$279.99"
+        assert lg["65UT7570PUB"]["bestbuy"]["rating"] == "N/A"
+        assert grouped["brands"]["sony"][0]["bestbuy"] == {"found": False}
+        # A failed lookup is not reported as a plain miss
+        assert grouped["brands"]["sony"][1]["bestbuy"] == {"found": False, "error": "deadline_exceeded"}
+
+
+def test_rows_reach_disk_once_the_buffer_fills():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "results.ndjson")
+        sink = NDJSONSink(path, buffer_size=2)
+        sink.write(build_result_row("A1234", None))
+        assert os.path.getsize(path) == 0
+        sink.write(build_result_row("B1234", None))
+        with open(path) as f:
+            assert [json.loads(line)["model_no"] for line in f] == ["A1234", "B1234"]
+        sink.close()
+
+
+if __name__ == "__main__":
+    test_sinks_round_trip_into_brand_groups()
+    test_rows_reach_disk_once_the_buffer_fills()
+    print("Result sink tests passed.")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+import os
+import sys
+import json
+import time
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from scrapers.scraperPool import ScraperPool
+from service import LookupService, build_app, parse_lookup_request
+from utils.backgroundServer import BackgroundAppServer
+from scrapers.bestBuyParsing import SearchFailed
+from utils.deadline import DeadlineExceeded
+
+
+class SlowScraper:
+    """Stands in for BestBuyScraper: a lookup holds the session for a fixed time"""
+    lookups = []
+    lock = threading.Lock()
+
+    def __init__(self, session_id, fail_on=None):
+        self.session_id = session_id
+        self.fail_on = fail_on
+        self.closed = False
+
+    def lookup(self, search_term, model_no):
+        with self.lock:
+            self.lookups.append(model_no)
+        time.sleep(0.3)
+        if model_no == self.fail_on:
+            raise RuntimeError("browser crashed")
+        if model_no.startswith("BROKEN"):
+            raise SearchFailed("Search failed for term 'broken'")
+        if model_no.startswith("TIMEOUT"):
+            raise DeadlineExceeded("results_wait: deadline of 0.3s passed")
+        if model_no.startswith("MISSING"):
+            return None
+        return {"name": f"TV {model_no}", "model": model_no, "price": "$499.99"}
+
+    def close(self):
+        self.closed = True
+
+
+def _get(base_url, query):
+    with urllib.request.urlopen(base_url + "lookup?" + query) as response:
+        return json.loads(response.read())
+
+
+def _request(base_url, query, body=None):
+    data = None if body is None else json.dumps(body).encode()
+    request = urllib.request.Request(base_url + "lookup?" + query, data=data,
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_parse_lookup_request_finds_model_numbers():
+    assert parse_lookup_request(name="LG 50\" UHD 4K Smart LED TV - 50UT7570PUB") == ("50UT7570PUB", "50UT7570PUB")
+    assert parse_lookup_request(name="Samsung 43” 4K Tizen Smart CUHD TV-UN43DU7100FXZC")[1] == "UN43DU7100FXZC"
+    assert parse_lookup_request(model_no="kd75x77l", search_term="sony 75 tv") == ("sony 75 tv", "KD75X77L")
+    try:
+        parse_lookup_request(name="Some 4K TV")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+
+def test_concurrent_requests_coalesce_and_results_are_cached():
+    SlowScraper.lookups = []
+    pool = ScraperPool(size=2, factory=SlowScraper).start()
+    service = LookupService(pool)
+    with BackgroundAppServer(build_app(service)) as server:
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            responses = list(executor.map(lambda _: _get(server.base_url, "model=50UT7570PUB"), range(6)))
+        cached = _get(server.base_url, "name=LG%2050%22%20TV%20-%2050UT7570PUB")
+        missing = _get(server.base_url, "model=MISSING1")
+
+    print(responses, service.stats)
+    assert SlowScraper.lookups == ["50UT7570PUB", "MISSING1"]
+    assert all(response["found"] for response in responses)
+    assert sorted(response["source"] for response in responses) == ["coalesced"] * 5 + ["lookup"]
+    assert cached["source"] == "cache" and cached["seconds"] < 0.1
+    assert missing["found"] is False
+
+
+def test_timed_out_lookups_are_reported_and_not_cached():
+    SlowScraper.lookups = []
+    pool = ScraperPool(size=1, factory=SlowScraper).start()
+    service = LookupService(pool)
+    with BackgroundAppServer(build_app(service)) as server:
+        first = _request(server.base_url, "model=TIMEOUT1")
+        second = _request(server.base_url, "model=TIMEOUT1")
+
+    print(first, second, pool.stats)
+    assert first[0] == second[0] == 504
+    # Retried rather than served from the cache as a miss, on the same session
+    assert SlowScraper.lookups == ["TIMEOUT1", "TIMEOUT1"]
+    assert pool.stats["recycled"] == 0
+    service.close()
+
+
+def test_failed_searches_are_not_cached_and_bad_bodies_are_rejected():
+    SlowScraper.lookups = []
+    pool = ScraperPool(size=1, factory=SlowScraper).start()
+    service = LookupService(pool)
+    with BackgroundAppServer(build_app(service)) as server:
+        first = _request(server.base_url, "model=BROKEN1")
+        second = _request(server.base_url, "model=BROKEN1")
+        array_body = _request(server.base_url, "", body=["model", "50UT7570PUB"])
+        number_model = _request(server.base_url, "", body={"model": 50, "name": ["LG TV"]})
+        posted = _request(server.base_url, "", body={"model": "50UT7570PUB"})
+
+    print(first, second, array_body, number_model, posted, pool.stats)
+    assert first[0] == second[0] == 502
+    assert SlowScraper.lookups == ["BROKEN1", "BROKEN1", "50UT7570PUB"]
+    # The session that failed to search is replaced
+    assert pool.stats["recycled"] == 2
+    assert array_body == (400, {"error": "Body must be a JSON object"})
+    assert number_model == (400, {"error": "name, model must be a string"})
+    assert posted[0] == 200 and posted[1]["found"]
+    service.close()
+
+
+def test_pool_replaces_crashed_sessions():
+    pool = ScraperPool(size=1, factory=lambda session_id: SlowScraper(session_id, fail_on="CRASH1")).start()
+    first = pool._idle.queue[0]
+    try:
+        pool.lookup("crash", "CRASH1")
+        assert False, "expected RuntimeError"
+    except RuntimeError:
+        pass
+    assert first.closed
+    assert pool.stats == {"created": 2, "leases": 1, "recycled": 1}
+    assert pool.lookup("ok", "OK12345")["model"] == "OK12345"
+    pool.close()
+
+
+if __name__ == "__main__":
+    test_parse_lookup_request_finds_model_numbers()
+    test_concurrent_requests_coalesce_and_results_are_cached()
+    test_timed_out_lookups_are_reported_and_not_cached()
+    test_failed_searches_are_not_cached_and_bad_bodies_are_rejected()
+    test_pool_replaces_crashed_sessions()
+    print("Service tests passed.")
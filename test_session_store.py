@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+import urllib.request
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from scrapers.bestBuy import BestBuyScraper
+from utils.fingerprintPool import FingerprintPool
+from utils.sessionStore import SessionStore, identity_name
+from utils.mockRetailerServer import MockRetailerServer, MockRetailerConfig
+
+
+class FakeDriver:
+    """Keeps cookies the way Chrome's CDP cookie commands do"""
+
+    def __init__(self, cookies=None):
+        self.cookies = list(cookies or [])
+        self.scripts = []
+        self.current_url = "http://127.0.0.1:8000/"
+
+    def execute_cdp_cmd(self, command, params):
+        if command == "Network.setCookies":
+            self.cookies.extend(params["cookies"])
+        elif command == "Network.getAllCookies":
+            return {"cookies": [dict(cookie, size=10, session=False) for cookie in self.cookies]}
+        elif command == "Page.addScriptToEvaluateOnNewDocument":
+            self.scripts.append(params["source"])
+        return {}
+
+    def execute_script(self, script):
+        return ["http://127.0.0.1:8000", {"recently_viewed": "6578195"}]
+
+
+def _scraper(store, pool):
+    scraper = BestBuyScraper.__new__(BestBuyScraper)
+    scraper.session_id = "s1"
+    scraper.session_store = store
+    scraper.fingerprint_pool = pool
+    scraper.fingerprint = pool.lease("s1")
+    scraper._identity = None
+    return scraper
+
+
+def test_state_round_trip_and_expiry():
+    with tempfile.TemporaryDirectory() as directory:
+        store = SessionStore(directory, max_age_seconds=60)
+        store.save("id1", [
+            {"name": "visitor_id", "value": "abc", "domain": "127.0.0.1", "path": "/", "expires": time.time() + 3600},
+            {"name": "old", "value": "x", "domain": "127.0.0.1", "path": "/", "expires": time.time() - 10},
+        ])
+        state = store.load("id1")
+        assert [cookie["name"] for cookie in state["cookies"]] == ["visitor_id"]
+        assert store.identities() == ["id1"]
+
+        assert SessionStore(directory, max_age_seconds=0).load("id1") is None
+        store.discard("id1")
+        assert store.load("id1") is None
+
+
+# Checks out id2 in a separate process and holds it until stdin closes
+HOLD_IDENTITY = """
+import sys
+sys.path.insert(0, %r)
+from utils.sessionStore import SessionStore
+store = SessionStore(sys.argv[1])
+assert store.checkout("id2", "holder")
+print("checked out", flush=True)
+sys.stdin.read()
+""" % os.path.abspath(os.path.dirname(__file__))
+
+
+def test_identity_is_checked_out_by_one_session_at_a_time():
+    with tempfile.TemporaryDirectory() as directory:
+        store, other_process = SessionStore(directory), SessionStore(directory)
+        assert store.checkout("id1", "s1")
+        assert store.checkout("id1", "s1")
+        assert not store.checkout("id1", "s2")
+        # The lock file is visible to other stores (and processes) on the same directory
+        assert not other_process.checkout("id1", "s3")
+        store.checkin("id1", "s1")
+        assert other_process.checkout("id1", "s3")
+        other_process.checkin("id1", "s3")
+
+        # Another process holds the identity until it exits, without ever checking it in
+        holder = subprocess.Popen([sys.executable, "-c", HOLD_IDENTITY, directory], stdout=subprocess.PIPE, text=True,
+                                  stdin=subprocess.PIPE)
+        assert holder.stdout.readline().strip() == "checked out"
+        assert not store.checkout("id2", "s1")
+        holder.communicate("")
+        assert store.checkout("id2", "s1")
+        store.checkin("id2", "s1")
+
+
+def test_scraper_saves_and_restores_cookies_for_its_identity():
+    with tempfile.TemporaryDirectory() as directory:
+        store, pool = SessionStore(directory), FingerprintPool(seed=3)
+        first = _scraper(store, pool)
+        assert first._checkout_session() == store.user_data_dir(identity_name(first.fingerprint))
+        first.driver = FakeDriver([{"name": "popup_dismissed", "value": "1", "domain": "127.0.0.1",
+                                    "path": "/", "expires": time.time() + 3600}])
+        first._save_session()
+        first._checkin_session()
+
+        saved = store.load(identity_name(first.fingerprint))
+        assert "size" not in saved["cookies"][0]
+        assert saved["origins"][0]["localStorage"] == [{"name": "recently_viewed", "value": "6578195"}]
+
+        second = _scraper(store, pool)
+        second._checkout_session()
+        driver = FakeDriver()
+        second._restore_session(driver)
+        assert second.restored
+        assert driver.cookies[0]["name"] == "popup_dismissed"
+        # The localStorage script is registered with the rest of the per-tab overrides
+        second._prepare_tab(driver)
+        assert "recently_viewed" in driver.scripts[0]
+
+
+def test_mock_retailer_remembers_returning_visitors():
+    config = MockRetailerConfig(latency_range=(0, 0), popup_rate=1.0, first_visit_challenge_rate=1.0)
+    with MockRetailerServer(config) as server:
+        with urllib.request.urlopen(server.base_url) as response:
+            assert "px-captcha" in response.read().decode("utf-8")
+
+        request = urllib.request.Request(server.base_url, headers={"Cookie": "visitor_id=abc; popup_dismissed=1"})
+        with urllib.request.urlopen(request) as response:
+            page = response.read().decode("utf-8")
+        assert "gh-search-input" in page
+        assert 'id="confirmIt-backdrop"' not in page and 'id="location-modal"' not in page
+        print(server.stats)
+        assert server.stats["first_visit_challenges"] == 1
+        assert server.stats["returning_visits"] == 1
+        assert "popups" not in server.stats
+
+
+if __name__ == "__main__":
+    test_state_round_trip_and_expiry()
+    test_identity_is_checked_out_by_one_session_at_a_time()
+    test_scraper_saves_and_restores_cookies_for_its_identity()
+    test_mock_retailer_remembers_returning_visitors()
+    print("Session store tests passed.")
@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+import os
+import sys
+import tempfile
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from bs4 import BeautifulSoup
+from selenium.common.exceptions import NoSuchElementException
+
+from scrapers.bestBuy import BestBuyScraper
+from scrapers.bestBuyParsing import parse_product_page, parse_products, product_page_url
+from utils.mockRetailerServer import (build_catalog, render_product_card, render_product_page,
+                                      PRODUCT_NOT_FOUND_PAGE)
+from utils.rateController import AdaptiveRateController
+from utils.skuStore import SkuStore
+
+BASE_URL = "https://www.bestbuy.com/"
+CATALOG = build_catalog()
+
+
+class FakePageDriver:
+    """Stands in for a Chrome WebDriver with tabs, serving canned pages by URL"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.tabs = {"tab-0": "about:blank"}
+        self.current_window_handle = "tab-0"
+        self.opened = 0
+        self.most_tabs = 1
+        self.loaded = []
+        self.switch_to = self
+
+    # switch_to API
+    def new_window(self, kind):
+        self.opened += 1
+        self.current_window_handle = f"tab-{self.opened}"
+        self.tabs[self.current_window_handle] = "about:blank"
+        self.most_tabs = max(self.most_tabs, len(self.tabs))
+
+    def window(self, handle):
+        self.current_window_handle = handle
+
+    @property
+    def window_handles(self):
+        return list(self.tabs)
+
+    @property
+    def current_url(self):
+        return self.tabs[self.current_window_handle]
+
+    @property
+    def page_source(self):
+        return self.pages.get(self.current_url, PRODUCT_NOT_FOUND_PAGE)
+
+    def execute_script(self, script, *args):
+        if "location.href" in script:
+            self.get(args[0])
+            return None
+        return BeautifulSoup(self.page_source, "html.parser").get_text(" ").lower()
+
+    def get(self, url):
+        self.loaded.append(url)
+        self.tabs[self.current_window_handle] = url
+
+    def find_element(self, by, selector):
+        element = BeautifulSoup(self.page_source, "html.parser").select_one(selector)
+        if element is None:
+            raise NoSuchElementException(selector)
+        return element
+
+    def find_elements(self, by, selector):
+        return BeautifulSoup(self.page_source, "html.parser").select(selector)
+
+    def close(self):
+        del self.tabs[self.current_window_handle]
+
+    def quit(self):
+        pass
+
+
+class StoreScraper(BestBuyScraper):
+    """Reads product pages from a fake driver and answers searches from canned result cards"""
+
+    def __init__(self, pages, **kwargs):
+        self.pages = pages
+        self.searched = []
+        super().__init__(use_delays=False, max_pages=1, **kwargs)
+
+    def _create_driver(self):
+        return FakePageDriver(self.pages)
+
+    def _pause(self, seconds, minimum=0.5):
+        pass
+
+    def _wait_timeout(self, seconds=15):
+        return 0.1
+
+    def _lookup_primary(self, search_term, model_no, max_scroll_attempts=15, title_query=None):
+        self.searched.append(model_no)
+        cards = [product for product in CATALOG if product["model"] == model_no]
+        html = "<html><body>" + "".join(render_product_card(product) for product in cards) + "</body></html>"
+        products = parse_products(html, BASE_URL)
+        return f"{BASE_URL}site/searchpage.jsp?st={search_term}", products[0] if products else None
+
+
+def test_store_persists_clean_mappings():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "skus.json")
+        store = SkuStore(path)
+        assert store.remember("50ut7570pub", {"sku": "6578195Rating", "url": f"{BASE_URL}site/lg/6578195.p"})
+        assert not store.remember("KD75X77L", {"sku": "6544129", "match_method": "title"})
+        assert not store.remember("OLED65C4PUA", {"name": "no sku or url"})
+        store.save()
+
+        restored = SkuStore(path)
+        assert len(restored) == 1 and "50UT7570PUB" in restored
+        assert restored.get("50UT7570PUB")["sku"] == "6578195"
+        restored.forget("50UT7570PUB")
+        restored.save()
+        assert len(SkuStore(path)) == 0
+
+
+def test_stores_sharing_a_file_keep_each_others_mappings():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "skus.json")
+        first, second = SkuStore(path), SkuStore(path)
+        first.remember("50UT7570PUB", {"sku": "6578195"})
+        second.remember("KD75X77L", {"sku": "6544129"})
+        first.save()
+        second.save()
+        second.forget("50UT7570PUB")
+        second.save()
+
+        restored = SkuStore(path)
+        assert "KD75X77L" in restored and "50UT7570PUB" not in restored
+        assert sorted(os.listdir(directory)) == ["skus.json", "skus.json.lock"]
+        assert SkuStore.shared(path) is SkuStore.shared(os.path.join(directory, ".", "skus.json"))
+
+
+def test_product_page_carries_the_card_fields():
+    product = CATALOG[0]
+    card = parse_products(render_product_card(product), BASE_URL)[0]
+    page = parse_product_page(render_product_page(product), card["url"])
+    assert page == card
+    assert product_page_url(BASE_URL, product["sku"]) == f"{BASE_URL}site/{product['sku']}.p?skuId={product['sku']}"
+    assert product_page_url(BASE_URL, product["sku"], card["url"]) == card["url"]
+
+
+def test_batch_search_refreshes_known_models_without_searching():
+    known, moved, unknown = CATALOG[0], CATALOG[1], CATALOG[2]
+    pages = {product_page_url(BASE_URL, product["sku"]): render_product_page(product) for product in CATALOG[:10]}
+    # The moved model's old SKU now shows a different product
+    pages[product_page_url(BASE_URL, "1234567")] = render_product_page(CATALOG[5])
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = SkuStore(os.path.join(directory, "skus.json"))
+        store.remember(known["model"], {"sku": known["sku"]})
+        store.remember(moved["model"], {"sku": "1234567"})
+        scraper = StoreScraper(pages, sku_store=store)
+        results = scraper.batch_search({"known tv": known["model"], "moved tv": moved["model"],
+                                        "unknown tv": unknown["model"]})
+        loaded = scraper.driver.loaded
+        scraper.close()
+
+        print(results, scraper.searched, loaded)
+        assert scraper.searched == [moved["model"], unknown["model"]]
+        assert results[known["model"]]["price"] == f"${known['price']:,.2f}"
+        assert all(results[product["model"]]["model"] == product["model"] for product in (known, moved, unknown))
+        # Both product pages were loaded in one group of tabs; the stale mapping was replaced by the search
+        assert loaded == [product_page_url(BASE_URL, known["sku"]), product_page_url(BASE_URL, "1234567")]
+        restored = SkuStore(store.path)
+        assert restored.get(moved["model"])["sku"] == moved["sku"]
+        assert restored.get(unknown["model"])["url"].endswith(f"skuId={unknown['sku']}")
+
+
+def test_refresh_opens_no_more_tabs_than_the_concurrency_window():
+    products = CATALOG[:4]
+    pages = {product_page_url(BASE_URL, product["sku"]): render_product_page(product) for product in products}
+    with tempfile.TemporaryDirectory() as directory:
+        store = SkuStore(os.path.join(directory, "skus.json"))
+        for product in products:
+            store.remember(product["model"], {"sku": product["sku"]})
+        controller = AdaptiveRateController(initial_concurrency=1, max_concurrency=2)
+        scraper = StoreScraper(pages, sku_store=store, rate_controller=controller, session_id="window")
+        results = scraper.refresh_known([product["model"] for product in products])
+        most_tabs = scraper.driver.most_tabs
+        scraper.close()
+
+    assert len(results) == 4
+    # One background tab for the first page; the window then opens to two
+    assert most_tabs == 3 and controller.concurrency_limit("window") == 2
+
+
+def test_lookup_falls_back_to_search_when_the_page_is_gone():
+    product = CATALOG[3]
+    with tempfile.TemporaryDirectory() as directory:
+        store = SkuStore(os.path.join(directory, "skus.json"))
+        store.remember(product["model"], {"sku": "7654321"})
+        scraper = StoreScraper({}, sku_store=store)
+        found = scraper.lookup("some tv", product["model"])
+        scraper.close()
+
+    assert found["model"] == product["model"] and scraper.searched == [product["model"]]
+    assert store.get(product["model"])["sku"] == product["sku"]
+
+
+if __name__ == "__main__":
+    test_store_persists_clean_mappings()
+    test_stores_sharing_a_file_keep_each_others_mappings()
+    test_product_page_carries_the_card_fields()
+    test_batch_search_refreshes_known_models_without_searching()
+    test_refresh_opens_no_more_tabs_than_the_concurrency_window()
+    test_lookup_falls_back_to_search_when_the_page_is_gone()
+    print("SKU store tests passed.")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+import os
+import sys
+import urllib.request
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from scrapers.bestBuyParsing import parse_products, match_product
+from utils.titleRanker import TitleRanker, expand_model_numbers, screen_size, title_conflict
+from utils.mockRetailerServer import MockRetailerServer, MockRetailerConfig
+
+
+def fetch(url):
+    with urllib.request.urlopen(url) as response:
+        return response.read().decode("utf-8")
+
+
+def test_model_numbers_split_into_series():
+    words = expand_model_numbers("TCL 65\" 4K TV - 65S4PUB").split()
+    assert words[:4] == ["tcl", "65", "4k", "tv"]
+    assert {"s4", "65s4", "s4pub"} <= set(words)
+
+
+def test_ranker_prefers_matching_series_and_size():
+    products = [{"name": name} for name in (
+        "TCL - 65\" Class Q6 Series QLED 4K Smart Google TV (2023)",
+        "TCL - 65\" Class S4 Series LED 4K UHD Smart Google TV (2024)",
+        "TCL - 50\" Class S4 Series LED 4K UHD Smart Google TV (2024)",
+    )]
+    ranker = TitleRanker()
+    ranked = ranker.rank("TCL 65\" 4K Smart TV - 65S4PUB", products)
+    assert ranked[0][0] is products[1]
+    assert ranked[0][1] > ranked[1][1] > 0
+
+    product, confidence = ranker.best_match("TCL 65\" 4K Smart TV - 65S4PUB", products)
+    assert product is products[1] and 0 < confidence <= 1
+    # Two identical titles are too close to call
+    assert ranker.best_match("TCL 65\" 4K Smart TV - 65S4PUB", products + [dict(products[1])]) is None
+    assert ranker.best_match("Apple iPhone 15", products) is None
+    assert ranker.rank("anything", []) == []
+
+
+def test_size_and_series_must_agree_with_the_query():
+    assert screen_size("LG 50\" UHD 4K Smart LED TV") == 50
+    assert screen_size("LG 50 inch UT75 4K Smart TV") == 50
+    assert screen_size("QN65S90DAFXZC") == 65 and screen_size("Smart TV") is None
+    assert title_conflict("LG 50 inch UT75 TV 50UT7570PUB", "LG - 50” Class UT75 Series LED 4K UHD (2024)") is None
+    assert title_conflict("LG 50 inch UT75 TV 50UT7570PUB", "LG - 55” Class UT75 Series LED 4K UHD") is not None
+    assert title_conflict("LG 50 inch TV 50UT7570PUB", "LG - 50” Class QNED80 Series 4K UHD HDR10 120Hz") is not None
+
+
+def test_speed_classes_are_not_series_words():
+    query = "TP-Link Archer AX55 Wi-Fi 6E Router AX55"
+    assert title_conflict(query, "TP-Link - Archer AX55 AX3000 Dual-Band Wi-Fi 6 Router") is None
+    assert title_conflict(query, "TP-Link - Archer AX21 AX1800 Dual-Band Wi-Fi 6 Router") is not None
+
+
+def test_title_match_rejects_lookalike_cards():
+    query = "LG 50 inch UT75 4K Smart TV"
+    # A lone card has no runner-up to lose to, so the size decides
+    wrong_size = {"name": "LG - 55\" Class UT75 Series LED 4K UHD Smart webOS TV (2024)", "url": "a"}
+    assert match_product([wrong_size], "50UT7570PUB", query) is None
+    wrong_series = {"name": "LG - 50\" Class QNED80 Series QNED 4K UHD Smart webOS TV (2024)", "url": "b"}
+    assert match_product([wrong_series], "50UT7570PUB", query) is None
+    # The closest title belongs to a card labeled with another model
+    other_model = {"name": "LG - 50\" Class UT75 Series LED 4K UHD Smart webOS TV (2024)", "url": "c",
+                   "model": "50UT7580PUB"}
+    unrelated = {"name": "Insignia - 50\" Class F30 Series LED 4K UHD Smart Fire TV", "url": "d"}
+    assert match_product([other_model, unrelated], "50UT7570PUB", query) is None
+    right = {"name": "LG - 50\" Class UT75 Series LED 4K UHD Smart webOS TV (2024)", "url": "e"}
+    assert match_product([wrong_size, wrong_series, right], "50UT7570PUB", query)["url"] == "e"
+
+
+def test_cards_without_model_matched_by_title():
+    config = MockRetailerConfig(latency_range=(0, 0), missing_model_rate=1.0)
+    with MockRetailerServer(config) as server:
+        html = fetch(server.base_url + "site/searchpage.jsp?st=lg+50+ut75+tv")
+        html += fetch(server.base_url + "api/search-cards?st=lg+50+ut75+tv&cp=1&offset=6&limit=12")
+    products = parse_products(html, server.base_url)
+    assert len(products) == config.page_size and not any(product.get("model") for product in products)
+
+    product = match_product(products, "50UT7570PUB", "LG 50\" UHD 4K Smart LED TV - 50UT7570PUB")
+    assert product["url"].endswith("skuId=6578195")
+    assert product["match_method"] == "title" and product["match_confidence"] > 0
+    # Without a product name only model numbers are compared
+    assert match_product(products, "50UT7570PUB") is None
+
+
+if __name__ == "__main__":
+    test_model_numbers_split_into_series()
+    test_ranker_prefers_matching_series_and_size()
+    test_size_and_series_must_agree_with_the_query()
+    test_speed_classes_are_not_series_words()
+    test_title_match_rejects_lookalike_cards()
+    test_cards_without_model_matched_by_title()
+    print("Title ranker tests passed.")
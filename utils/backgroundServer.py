@@ -0,0 +1,122 @@
+import asyncio
+import threading
+from typing import Optional, Callable, Awaitable
+
+from aiohttp import web
+
+
+class BackgroundServer:
+    """Run a server on its own event loop in a daemon thread.
+
+    The scrapers are synchronous, so the local stand-in servers used for
+    testing and benchmarking need to keep serving while the calling thread
+    blocks inside Selenium. Subclasses implement _start() and _cleanup().
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self._startup_error: Optional[BaseException] = None
+
+    @property
+    def base_url(self) -> str:
+        """Root URL of the running server, always ending with a slash"""
+        return f"http://{self.host}:{self.port}/"
+
+    async def _start(self):
+        """Bind and start serving; must set self.port to the bound port"""
+        raise NotImplementedError
+
+    async def _cleanup(self):
+        """Release everything _start() created"""
+        raise NotImplementedError
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._start())
+        except BaseException as e:
+            self._startup_error = e
+            self._started.set()
+            return
+        self._started.set()
+        self._loop.run_forever()
+        self._loop.run_until_complete(self._cleanup())
+        self._loop.close()
+
+    def start(self, timeout: float = 10.0) -> str:
+        """
+        Start serving in a background thread
+
+        Args:
+            timeout: Seconds to wait for the server to bind
+
+        Returns:
+            The base URL of the running server
+        """
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        if not self._started.wait(timeout):
+            raise RuntimeError("Background server did not start in time")
+        if self._startup_error:
+            raise self._startup_error
+        return self.base_url
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the server and wait for the background thread to exit"""
+        if self._loop and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class BackgroundAppServer(BackgroundServer):
+    """Serve an aiohttp application from a background thread"""
+
+    def __init__(self, app: web.Application, host: str = "127.0.0.1", port: int = 0):
+        super().__init__(host, port)
+        self.app = app
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _start(self):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Resolve the real port when an ephemeral one (0) was requested
+        self.port = self._runner.addresses[0][1]
+
+    async def _cleanup(self):
+        await self._runner.cleanup()
+
+
+class BackgroundStreamServer(BackgroundServer):
+    """Serve a raw asyncio stream handler (for protocols aiohttp.web cannot speak, like CONNECT)"""
+
+    def __init__(self,
+                 handler: Callable[[asyncio.StreamReader, asyncio.StreamWriter], Awaitable[None]],
+                 host: str = "127.0.0.1",
+                 port: int = 0):
+        super().__init__(host, port)
+        self.handler = handler
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def _start(self):
+        self._server = await asyncio.start_server(self.handler, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def _cleanup(self):
+        self._server.close()
+        await self._server.wait_closed()
@@ -0,0 +1,156 @@
+import os
+import csv
+import sys
+import json
+import hashlib
+from itertools import islice
+from typing import List, Dict, Optional, Iterable, Iterator, Set, TextIO
+
+# Columns accepted as the product name in CSV catalogs, in order of preference
+NAME_COLUMNS = ("name", "product_name", "title", "product")
+
+# Typographic quotes suppliers mix with plain ones ('65” TV' vs '65" TV')
+QUOTE_TRANSLATION = str.maketrans({"“": '"', "”": '"', "″": '"', "‘": "'", "’": "'"})
+
+
+def _open_text(path: str) -> TextIO:
+    return sys.stdin if path == "-" else open(path, newline="", encoding="utf-8-sig")
+
+
+def _detect_format(path: str, format: Optional[str], stream: TextIO) -> str:
+    if format:
+        return format.lower()
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    if extension in ("csv", "tsv"):
+        return extension
+    if extension in ("jsonl", "ndjson", "json"):
+        return "jsonl"
+    # stdin or an unknown extension: JSON lines start with "{" or '"', anything else is CSV
+    if hasattr(stream, "buffer"):
+        head = stream.buffer.peek(1)[:1] if hasattr(stream.buffer, "peek") else b""
+        return "jsonl" if head in (b"{", b'"') else "csv"
+    return "csv"
+
+
+def _iter_csv(stream: TextIO, delimiter: str) -> Iterator[Dict[str, str]]:
+    reader = csv.reader(stream, delimiter=delimiter)
+    header = next(reader, None)
+    if header is None:
+        return
+    lowered = ["_".join(column.strip().lower().split()) for column in header]
+    name_index = next((lowered.index(column) for column in NAME_COLUMNS if column in lowered), None)
+    if name_index is None:
+        # Headerless single-column file: the first line is a product too
+        name_index = 0
+        lowered = ["name"] + lowered[1:]
+        yield {"name": header[0]}
+    for row in reader:
+        if len(row) > name_index:
+            product = {column: value for column, value in zip(lowered, row) if column and value}
+            product["name"] = row[name_index]
+            yield product
+
+
+def _iter_jsonl(stream: TextIO) -> Iterator[Dict[str, str]]:
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as e:
+            print(f"Skipping malformed catalog line {line_no}: {e}")
+            continue
+        if isinstance(item, str):
+            yield {"name": item}
+        elif isinstance(item, dict):
+            name = next((item[column] for column in NAME_COLUMNS if item.get(column)), None)
+            if name:
+                yield dict(item, name=name)
+
+
+def iter_catalog(path: str = "-", format: Optional[str] = None) -> Iterator[Dict[str, str]]:
+    """
+    Lazily read product dictionaries from a catalog file or stdin
+
+    CSV catalogs take the name from a name/product_name/title column (or the first column
+    when there is no header); JSON lines may be objects with one of those keys or bare
+    strings. Lines are read one at a time, so memory does not grow with the file.
+
+    Args:
+        path: File path, or "-" for stdin
+        format: "csv", "tsv" or "jsonl" (defaults to the file extension, or sniffed for stdin)
+
+    Yields:
+        Dictionaries with at least a 'name' key
+    """
+    stream = _open_text(path)
+    try:
+        format = _detect_format(path, format, stream)
+        if format == "jsonl":
+            rows = _iter_jsonl(stream)
+        else:
+            rows = _iter_csv(stream, "\t" if format == "tsv" else ",")
+        for product in rows:
+            product["name"] = " ".join(str(product["name"]).split())
+            if product["name"]:
+                yield product
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def product_key(name: str) -> bytes:
+    """Dedupe key: case, whitespace and quote style are ignored, stored as an 8 byte digest"""
+    normalized = " ".join(name.translate(QUOTE_TRANSLATION).casefold().split())
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest()
+
+
+def dedupe_products(products: Iterable[Dict[str, str]], seen: Optional[Set[bytes]] = None) -> Iterator[Dict[str, str]]:
+    """
+    Drop products whose name was already seen, as they stream past
+
+    Only an 8 byte digest per distinct name is kept rather than the name itself. Each
+    digest still costs about 75-100 bytes once its bytes object and set slot are
+    counted, so expect roughly 100 MB of dedupe state per million distinct products.
+
+    Args:
+        products: Product dictionaries with a 'name' key
+        seen: Shared digest set, to dedupe across several sources
+    """
+    seen = set() if seen is None else seen
+    for product in products:
+        key = product_key(product["name"])
+        if key not in seen:
+            seen.add(key)
+            yield product
+
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    """Group an iterable into lists of at most size items without materializing it"""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_catalog_batches(path: str = "-", batch_size: int = 50, format: Optional[str] = None,
+                         dedupe: bool = True) -> Iterator[List[Dict[str, str]]]:
+    """
+    Stream a catalog as deduplicated batches sized for the LLM and scraper stages
+
+    Args:
+        path: File path, or "-" for stdin
+        batch_size: Products per batch
+        format: Catalog format (see iter_catalog)
+        dedupe: Drop repeated product names
+
+    Yields:
+        Lists of product dictionaries
+    """
+    products = iter_catalog(path, format)
+    if dedupe:
+        products = dedupe_products(products)
+    yield from batched(products, batch_size)
@@ -0,0 +1,134 @@
+import time
+import threading
+from collections import deque
+from typing import Optional
+
+# Deadline for one product lookup when none is configured
+DEFAULT_LOOKUP_DEADLINE = 120.0
+
+# A wait is never given less than this, so an almost-spent budget still gets one clean check
+MIN_WAIT_SECONDS = 0.1
+
+
+class DeadlineExceeded(Exception):
+    """A lookup ran out of its time budget, or was cancelled because a hedged copy finished first"""
+
+
+class Deadline:
+    """
+    Time budget for one lookup, shared by every wait and sleep inside it
+
+    Waits ask for min(their usual timeout, time left) instead of a fixed 15 seconds, so a
+    stuck page costs at most the budget rather than every timeout added up. cancel()
+    expires the budget early; the lookup then stops at its next wait.
+    """
+
+    def __init__(self, seconds: float):
+        """
+        Args:
+            seconds: Budget from now
+        """
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self.cancelled = False
+        self.paused_at = None
+
+    def remaining(self) -> float:
+        if self.cancelled:
+            return 0.0
+        now = self.paused_at if self.paused_at is not None else time.monotonic()
+        return max(0.0, self.expires_at - now)
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, default: float) -> float:
+        """A wait's usual timeout, cut to the time left"""
+        return max(MIN_WAIT_SECONDS, min(default, self.remaining()))
+
+    def check(self, stage: str = "lookup"):
+        """
+        Raises:
+            DeadlineExceeded: If the budget is spent
+        """
+        if self.expired():
+            reason = "cancelled" if self.cancelled else f"deadline of {self.seconds:g}s passed"
+            raise DeadlineExceeded(f"{stage}: {reason}")
+
+    def cancel(self):
+        self.cancelled = True
+
+    def pause(self):
+        """Stop the clock, e.g. while a pipelined lookup waits for the browser to finish other work"""
+        if self.paused_at is None:
+            self.paused_at = time.monotonic()
+
+    def resume(self):
+        """Restart the clock, moving the end back by the time spent paused"""
+        if self.paused_at is not None:
+            self.expires_at += time.monotonic() - self.paused_at
+            self.paused_at = None
+
+    def fork(self) -> "Deadline":
+        """A budget ending at the same time that can be cancelled on its own (for a hedged copy)"""
+        child = Deadline(self.seconds)
+        child.expires_at = self.expires_at
+        return child
+
+    def __repr__(self):
+        return f"Deadline({self.remaining():.1f}s left of {self.seconds:g}s)"
+
+
+class LatencyTracker:
+    """
+    Recent lookup latencies, for deciding when a lookup is slow enough to hedge
+
+    Keeps a sliding window so the threshold follows the site's current speed. Until
+    enough lookups have finished the configured fallback delay is used.
+    """
+
+    def __init__(self, quantile: float = 0.95, window: int = 200, min_samples: int = 20,
+                 fallback: float = 30.0):
+        """
+        Args:
+            quantile: Latency quantile after which a duplicate lookup is started
+            window: Number of recent lookups kept
+            min_samples: Lookups needed before the quantile is trusted
+            fallback: Hedge delay in seconds until then
+        """
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.fallback = fallback
+        self._samples: "deque[float]" = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait on a lookup before starting a duplicate"""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return self.fallback
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(self.quantile * len(ordered)))]
+
+
+# Example usage
+if __name__ == "__main__":
+    deadline = Deadline(2.0)
+    print(deadline, "-> a 15s wait gets", round(deadline.timeout(15), 2), "s")
+    deadline.cancel()
+    try:
+        deadline.check("results_wait")
+    except DeadlineExceeded as e:
+        print("Stopped:", e)
+
+    tracker = LatencyTracker(min_samples=5)
+    for seconds in (4.1, 3.8, 5.0, 4.4, 12.0, 3.9, 4.2):
+        tracker.observe(seconds)
+    print(f"p95 hedge delay over {len(tracker)} lookups: {tracker.hedge_delay():.1f}s")
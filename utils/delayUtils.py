@@ -1,23 +1,22 @@
 import time
 import random
+import asyncio
 from typing import Tuple, Optional
 
 
-def random_delay(min_seconds: float = 1.0, 
-                max_seconds: float = 3.0, 
-                human_factor: bool = True,
-                verbose: bool = False) -> float:
+def pick_random_delay(min_seconds: float = 1.0,
+                      max_seconds: float = 3.0,
+                      human_factor: bool = True) -> float:
     """
-    Pause execution for a random amount of time to simulate human behavior
+    Choose a random delay duration without sleeping (shared by the sync and async delays)
     
     Args:
         min_seconds: Minimum delay time in seconds
         max_seconds: Maximum delay time in seconds
         human_factor: Add human-like randomness to the delay pattern
-        verbose: Whether to print the delay duration
         
     Returns:
-        The actual sleep duration in seconds
+        The delay duration in seconds
     """
     # Ensure valid range
     if min_seconds < 0:
@@ -39,7 +38,30 @@ def random_delay(min_seconds: float = 1.0,
             base_delay += random.uniform(1.0, 4.0)
     
     # Round to make logs more readable but keep 2 decimal points for variability
-    sleep_duration = round(base_delay, 2)
+    return round(base_delay, 2)
+
+
+def random_delay(min_seconds: float = 1.0, 
+                max_seconds: float = 3.0, 
+                human_factor: bool = True,
+                verbose: bool = False,
+                limit: Optional[float] = None) -> float:
+    """
+    Pause execution for a random amount of time to simulate human behavior
+    
+    Args:
+        min_seconds: Minimum delay time in seconds
+        max_seconds: Maximum delay time in seconds
+        human_factor: Add human-like randomness to the delay pattern
+        verbose: Whether to print the delay duration
+        limit: Optional hard cap on the sleep (e.g. the time left in a lookup's deadline)
+        
+    Returns:
+        The actual sleep duration in seconds
+    """
+    sleep_duration = pick_random_delay(min_seconds, max_seconds, human_factor)
+    if limit is not None:
+        sleep_duration = round(max(0.0, min(sleep_duration, limit)), 2)
     
     if verbose:
         print(f"Waiting for {sleep_duration}s...")
@@ -50,6 +72,21 @@ def random_delay(min_seconds: float = 1.0,
     return sleep_duration
 
 
+async def async_random_delay(min_seconds: float = 1.0,
+                             max_seconds: float = 3.0,
+                             human_factor: bool = True,
+                             verbose: bool = False,
+                             limit: Optional[float] = None) -> float:
+    """random_delay for asyncio code: awaits instead of blocking the event loop"""
+    sleep_duration = pick_random_delay(min_seconds, max_seconds, human_factor)
+    if limit is not None:
+        sleep_duration = round(max(0.0, min(sleep_duration, limit)), 2)
+    if verbose:
+        print(f"Waiting for {sleep_duration}s...")
+    await asyncio.sleep(sleep_duration)
+    return sleep_duration
+
+
 def random_typing_delay(text: str, 
                        min_cps: float = 5.0, 
                        max_cps: float = 15.0,
@@ -87,53 +124,68 @@ def random_typing_delay(text: str,
     return text, total_time
 
 
-def human_like_delay(action_type: str = "general", verbose: bool = True) -> float:
+# Delay range in seconds per action type, and what is printed while waiting
+ACTION_DELAY_RANGES = {
+    "navigate": (1.5, 3.5),     # Page navigation delay
+    "click": (0.3, 1.2),        # Clicking a button/link
+    "type": (0.5, 1.5),         # Before typing
+    "search": (1.0, 2.5),       # After search submission
+    "read": (2.0, 5.0),         # Simulating reading content
+    "scroll": (0.7, 2.0),       # After scrolling
+    "general": (0.5, 2.0)       # Default delay
+}
+
+ACTION_MESSAGES = {
+    "navigate": "Waiting for page to load",
+    "click": "Preparing to click",
+    "type": "Getting ready to type",
+    "search": "Waiting for search results",
+    "read": "Reading content",
+    "scroll": "Pausing after scrolling",
+    "general": "Waiting briefly"
+}
+
+
+def human_like_delay(action_type: str = "general", verbose: bool = True, scale: float = 1.0,
+                     limit: Optional[float] = None) -> float:
     """
     Add a human-like delay based on the type of action being performed
     
     Args:
         action_type: Type of action ('navigate', 'click', 'type', 'search', 'read', 'general')
         verbose: Whether to print the delay information
+        scale: Multiplier for the delay range (set by the adaptive rate controller)
+        limit: Optional hard cap on the sleep (e.g. the time left in a lookup's deadline)
         
     Returns:
         The actual sleep duration in seconds
     """
-    delay_ranges = {
-        "navigate": (1.5, 3.5),     # Page navigation delay
-        "click": (0.3, 1.2),        # Clicking a button/link
-        "type": (0.5, 1.5),         # Before typing
-        "search": (1.0, 2.5),       # After search submission
-        "read": (2.0, 5.0),         # Simulating reading content
-        "scroll": (0.7, 2.0),       # After scrolling
-        "general": (0.5, 2.0)       # Default delay
-    }
-    
     # Get the delay range for the specified action type
-    action_range = delay_ranges.get(action_type.lower(), delay_ranges["general"])
+    action_range = ACTION_DELAY_RANGES.get(action_type.lower(), ACTION_DELAY_RANGES["general"])
     
     # Add a descriptive message if verbose
     if verbose:
-        action_messages = {
-            "navigate": "Waiting for page to load",
-            "click": "Preparing to click",
-            "type": "Getting ready to type",
-            "search": "Waiting for search results",
-            "read": "Reading content",
-            "scroll": "Pausing after scrolling",
-            "general": "Waiting briefly"
-        }
-        message = action_messages.get(action_type.lower(), "Waiting")
-        print(f"{message}...")
+        print(f"{ACTION_MESSAGES.get(action_type.lower(), 'Waiting')}...")
     
     # Use the basic random delay function
     return random_delay(
-        min_seconds=action_range[0],
-        max_seconds=action_range[1],
+        min_seconds=action_range[0] * scale,
+        max_seconds=action_range[1] * scale,
         human_factor=True,
-        verbose=verbose
+        verbose=verbose,
+        limit=limit
     )
 
 
+async def async_human_like_delay(action_type: str = "general", verbose: bool = True, scale: float = 1.0,
+                                 limit: Optional[float] = None) -> float:
+    """human_like_delay for asyncio code: awaits instead of blocking the event loop"""
+    action_range = ACTION_DELAY_RANGES.get(action_type.lower(), ACTION_DELAY_RANGES["general"])
+    if verbose:
+        print(f"{ACTION_MESSAGES.get(action_type.lower(), 'Waiting')}...")
+    return await async_random_delay(action_range[0] * scale, action_range[1] * scale, True, verbose, limit)
+
+
 def get_random_scroll_size(min_pixels: int = 300, 
                           max_pixels: int = 800,
                           human_factor: bool = True) -> int:
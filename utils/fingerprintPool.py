@@ -0,0 +1,300 @@
+import random
+import threading
+from collections import deque
+from itertools import product
+from typing import List, Dict, Optional, Tuple, Any
+
+from utils.metrics import metrics
+
+# Operating systems a desktop Chrome profile can claim: UA token, navigator.platform,
+# client-hint platform and platform version
+PLATFORMS = {
+    "windows": ("Windows NT 10.0; Win64; x64", "Win32", "Windows", "10.0.0"),
+    "macos": ("Macintosh; Intel Mac OS X 10_15_7", "MacIntel", "macOS", "13.6.0"),
+    "linux": ("X11; Linux x86_64", "Linux x86_64", "Linux", "6.5.0"),
+}
+
+# Common desktop window sizes
+VIEWPORTS = [(1920, 1080), (1536, 864), (1440, 900), (1366, 768), (1680, 1050), (1280, 800)]
+
+# Best Buy is a US site, so every profile browses in US English from a US time zone
+LOCALES = [
+    ("en-US", "America/New_York"),
+    ("en-US", "America/Chicago"),
+    ("en-US", "America/Denver"),
+    ("en-US", "America/Los_Angeles"),
+]
+
+# Chrome version assumed before the real driver reports its own
+DEFAULT_BROWSER_VERSION = "120"
+
+
+class FingerprintProfile:
+    """
+    One consistent browser identity: user agent, client hints, viewport and locale
+
+    Every field is derived from the same platform and Chrome version, so the UA string,
+    the Sec-CH-UA headers and navigator.platform never contradict each other.
+    """
+
+    def __init__(self, platform: str, viewport: Tuple[int, int], locale: str, timezone: str,
+                 browser_version: str = DEFAULT_BROWSER_VERSION):
+        """
+        Args:
+            platform: Key of PLATFORMS ("windows", "macos" or "linux")
+            viewport: Window width and height in pixels
+            locale: BCP 47 language tag
+            timezone: IANA time zone name
+            browser_version: Chrome version of the driver using the profile ("120" or "120.0.6099.109")
+        """
+        if platform not in PLATFORMS:
+            raise ValueError(f"Unknown platform '{platform}' (expected one of {', '.join(PLATFORMS)})")
+        self.platform = platform
+        self.viewport = tuple(viewport)
+        self.locale = locale
+        self.timezone = timezone
+        self.browser_version = str(browser_version)
+
+    @property
+    def major_version(self) -> str:
+        return self.browser_version.split(".")[0]
+
+    @property
+    def key(self) -> Tuple[str, Tuple[int, int], str, str]:
+        """Identity of the profile, independent of the Chrome version"""
+        return (self.platform, self.viewport, self.locale, self.timezone)
+
+    @property
+    def user_agent(self) -> str:
+        # Chrome reports a reduced version (major.0.0.0) in the UA string
+        os_token = PLATFORMS[self.platform][0]
+        return (f"Mozilla/5.0 ({os_token}) AppleWebKit/537.36 (KHTML, like Gecko) "
+                f"Chrome/{self.major_version}.0.0.0 Safari/537.36")
+
+    @property
+    def navigator_platform(self) -> str:
+        return PLATFORMS[self.platform][1]
+
+    @property
+    def accept_language(self) -> str:
+        language = self.locale.split("-")[0]
+        return f"{self.locale},{language};q=0.9"
+
+    def _brands(self, version: str) -> List[Dict[str, str]]:
+        return [
+            {"brand": "Not_A Brand", "version": "8" if version == self.major_version else "8.0.0.0"},
+            {"brand": "Chromium", "version": version},
+            {"brand": "Google Chrome", "version": version},
+        ]
+
+    def client_hints(self) -> Dict[str, str]:
+        """Low-entropy Sec-CH-UA headers Chrome sends with every request"""
+        brands = ", ".join(f'"{brand["brand"]}";v="{brand["version"]}"' for brand in self._brands(self.major_version))
+        return {
+            "sec-ch-ua": brands,
+            "sec-ch-ua-mobile": "?0",
+            "sec-ch-ua-platform": f'"{PLATFORMS[self.platform][2]}"',
+        }
+
+    def user_agent_override(self) -> Dict[str, Any]:
+        """Parameters for the CDP Network.setUserAgentOverride command, including client hint metadata"""
+        full_version = self.browser_version if "." in self.browser_version else f"{self.browser_version}.0.0.0"
+        return {
+            "userAgent": self.user_agent,
+            "acceptLanguage": self.accept_language,
+            "platform": self.navigator_platform,
+            "userAgentMetadata": {
+                "brands": self._brands(self.major_version),
+                "fullVersionList": self._brands(full_version),
+                "platform": PLATFORMS[self.platform][2],
+                "platformVersion": PLATFORMS[self.platform][3],
+                "architecture": "x86",
+                "bitness": "64",
+                "model": "",
+                "mobile": False,
+            },
+        }
+
+    def chrome_arguments(self) -> List[str]:
+        """Chrome command line switches that must be set at launch"""
+        width, height = self.viewport
+        return [f"--user-agent={self.user_agent}", f"--window-size={width},{height}", f"--lang={self.locale}"]
+
+    def with_browser_version(self, browser_version: str) -> "FingerprintProfile":
+        """The same identity re-rendered for another Chrome version"""
+        return FingerprintProfile(self.platform, self.viewport, self.locale, self.timezone, browser_version)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "platform": self.platform,
+            "viewport": list(self.viewport),
+            "locale": self.locale,
+            "timezone": self.timezone,
+            "browser_version": self.browser_version,
+            "user_agent": self.user_agent,
+        }
+
+    def __repr__(self):
+        return f"FingerprintProfile({self.platform}, {self.viewport[0]}x{self.viewport[1]}, {self.timezone}, Chrome {self.browser_version})"
+
+
+class FingerprintPool:
+    """
+    Leases distinct, internally consistent fingerprint profiles to concurrent sessions
+
+    Free profiles sit in a shuffled deque and leases are tracked in a dict, so leasing and
+    returning are O(1) under one short lock. A session keeps the same profile until it
+    releases or rotates it. Once a driver reports its real Chrome version, set_browser_version()
+    re-renders every profile so the UA matches the binary that sends it.
+    """
+
+    def __init__(self,
+                 platforms: Optional[List[str]] = None,
+                 viewports: Optional[List[Tuple[int, int]]] = None,
+                 locales: Optional[List[Tuple[str, str]]] = None,
+                 browser_version: str = DEFAULT_BROWSER_VERSION,
+                 seed: Optional[int] = None):
+        """
+        Args:
+            platforms: PLATFORMS keys to draw from (defaults to all of them)
+            viewports: Window sizes to draw from (defaults to VIEWPORTS)
+            locales: (locale, time zone) pairs to draw from (defaults to LOCALES)
+            browser_version: Chrome version assumed until a driver reports its own
+            seed: Seed for the shuffle, for reproducible tests
+        """
+        combinations = list(product(platforms or list(PLATFORMS), viewports or VIEWPORTS, locales or LOCALES))
+        random.Random(seed).shuffle(combinations)
+        self.browser_version = str(browser_version)
+        self._lock = threading.Lock()
+        self._free: "deque[FingerprintProfile]" = deque(
+            FingerprintProfile(platform, viewport, locale, timezone, self.browser_version)
+            for platform, viewport, (locale, timezone) in combinations)
+        self._leases: Dict[str, FingerprintProfile] = {}
+        # Sessions holding each profile; above 1 only once the pool is exhausted and profiles are shared
+        self._holders: Dict[Tuple, int] = {}
+        self._size = len(self._free)
+        self.stats: Dict[str, int] = {"leases": 0, "releases": 0, "rotations": 0, "shared": 0}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def available(self) -> int:
+        """Profiles not leased to any session"""
+        return len(self._free)
+
+    def lease(self, session_id: str) -> FingerprintProfile:
+        """
+        Give a session its profile, reusing the one it already holds
+
+        When every profile is leased the session shares a random one rather than failing,
+        which is counted in stats["shared"].
+
+        Args:
+            session_id: Driver session that will present the profile
+        """
+        with self._lock:
+            profile = self._leases.get(session_id)
+            if profile is None:
+                if self._free:
+                    profile = self._free.popleft()
+                else:
+                    profile = random.choice(list(self._leases.values()))
+                    self.stats["shared"] += 1
+                    metrics.increment("fingerprint_shared_total")
+                self._hold(profile)
+                self._leases[session_id] = profile
+                self.stats["leases"] += 1
+            return profile
+
+    def release(self, session_id: str):
+        """Return a session's profile to the back of the free queue"""
+        with self._lock:
+            profile = self._leases.pop(session_id, None)
+            if profile is not None:
+                self.stats["releases"] += 1
+                self._drop(profile)
+
+    def rotate(self, session_id: str) -> FingerprintProfile:
+        """Swap a session onto a different profile, e.g. after its identity was blocked"""
+        with self._lock:
+            old = self._leases.pop(session_id, None)
+            if self._free:
+                profile = self._free.popleft()
+            else:
+                profile = old or random.choice(list(self._leases.values()))
+            self._hold(profile)
+            self._leases[session_id] = profile
+            if old is not None:
+                self._drop(old)
+            self.stats["rotations"] += 1
+            return profile
+
+    def profile_for(self, session_id: str) -> Optional[FingerprintProfile]:
+        with self._lock:
+            return self._leases.get(session_id)
+
+    def _hold(self, profile: FingerprintProfile):
+        self._holders[profile.key] = self._holders.get(profile.key, 0) + 1
+
+    def _drop(self, profile: FingerprintProfile):
+        # Callers hold the lock; the profile is free again once its last session lets go
+        remaining = self._holders.pop(profile.key) - 1
+        if remaining:
+            self._holders[profile.key] = remaining
+        else:
+            self._free.append(profile)
+
+    def set_browser_version(self, browser_version: str) -> bool:
+        """
+        Re-render every profile for the Chrome version the real driver reports
+
+        Leased profiles are updated in place so each session keeps its identity.
+
+        Returns:
+            True if the version changed
+        """
+        browser_version = str(browser_version)
+        with self._lock:
+            if browser_version == self.browser_version:
+                return False
+            self.browser_version = browser_version
+            self._free = deque(profile.with_browser_version(browser_version) for profile in self._free)
+            updated: Dict[int, FingerprintProfile] = {}
+            for session_id, profile in self._leases.items():
+                if id(profile) not in updated:
+                    updated[id(profile)] = profile.with_browser_version(browser_version)
+                self._leases[session_id] = updated[id(profile)]
+            return True
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Current leases, for logging"""
+        with self._lock:
+            return [dict(profile.to_dict(), session=session_id) for session_id, profile in sorted(self._leases.items())]
+
+
+# Shared pool for scrapers created without one
+default_fingerprint_pool = FingerprintPool()
+
+
+# Example usage
+if __name__ == "__main__":
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    pool = FingerprintPool()
+    print(f"{len(pool)} distinct profiles")
+    for session_id in ("worker-1", "worker-2", "worker-3"):
+        profile = pool.lease(session_id)
+        print(session_id, profile)
+        print("   ", profile.user_agent)
+        print("   ", profile.client_hints()["sec-ch-ua-platform"])
+
+    def churn(worker):
+        for _ in range(10_000):
+            pool.lease(f"churn-{worker}")
+            pool.release(f"churn-{worker}")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(churn, range(8)))
+    print(f"80,000 lease/release pairs across 8 threads in {time.perf_counter() - started:.2f}s")
@@ -1,13 +1,124 @@
 import os
+import re
 import json
+import time
+import random
 import pprint
 import asyncio
+import threading
+from typing import List, Dict, Optional, Any
 
 import aiohttp
 import dotenv
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+from utils.metrics import span, metrics, Histogram
+from utils.tokenBucket import AsyncTokenBucket
+
+DEFAULT_API_BASE = "https://generativelanguage.googleapis.com"
+
+# Transient failures worth retrying; anything else (400, 401, 403, 404) will fail again
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# USD per 1M tokens as (input, output)
+MODEL_PRICING = {
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+}
+
+
+class LLMUsageTracker:
+    """Accumulates token counts and latency from usageMetadata on every Gemini call"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.models: Dict[str, Dict[str, Any]] = {}
+
+    def _model_stats(self, model: str) -> Dict[str, Any]:
+        if model not in self.models:
+            self.models[model] = {
+                "calls": 0,
+                "errors": 0,
+                "prompt_tokens": 0,
+                "output_tokens": 0,
+                "total_tokens": 0,
+                "latency": Histogram(),
+            }
+        return self.models[model]
+
+    def record(self, model: str, usage: Optional[Dict[str, Any]], latency_seconds: float):
+        """
+        Record a successful call
+
+        Args:
+            model: Model name the request was sent to
+            usage: The response's usageMetadata block (may be missing)
+            latency_seconds: Wall time of the HTTP round trip
+        """
+        usage = usage or {}
+        prompt_tokens = usage.get("promptTokenCount", 0)
+        output_tokens = usage.get("candidatesTokenCount", 0)
+        total_tokens = usage.get("totalTokenCount", prompt_tokens + output_tokens)
+        with self._lock:
+            stats = self._model_stats(model)
+            stats["calls"] += 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["output_tokens"] += output_tokens
+            stats["total_tokens"] += total_tokens
+            stats["latency"].observe(latency_seconds)
+        metrics.increment("llm_tokens_total", prompt_tokens, model=model, kind="prompt")
+        metrics.increment("llm_tokens_total", output_tokens, model=model, kind="output")
+
+    def record_error(self, model: str, latency_seconds: float):
+        """Record a failed call"""
+        with self._lock:
+            stats = self._model_stats(model)
+            stats["errors"] += 1
+            stats["latency"].observe(latency_seconds)
+
+    def reset(self):
+        with self._lock:
+            self.models.clear()
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get per-model usage totals
+
+        Returns:
+            Dictionary keyed by model with call counts, token totals, latency percentiles
+            and an estimated cost in USD (when the model's pricing is known)
+        """
+        with self._lock:
+            summary = {}
+            for model, stats in self.models.items():
+                latency = stats["latency"]
+                entry = {key: value for key, value in stats.items() if key != "latency"}
+                entry.update({
+                    "latency_total": round(latency.sum, 3),
+                    "latency_p50": round(latency.quantile(0.5), 3),
+                    "latency_p95": round(latency.quantile(0.95), 3),
+                })
+                if model in MODEL_PRICING:
+                    input_price, output_price = MODEL_PRICING[model]
+                    entry["estimated_cost_usd"] = round(
+                        (stats["prompt_tokens"] * input_price + stats["output_tokens"] * output_price) / 1_000_000, 6
+                    )
+                summary[model] = entry
+            return summary
+
+
+# Create a singleton instance for easy import
+llm_usage = LLMUsageTracker()
+
+def _is_retryable_error(error: BaseException) -> bool:
+    """Whether a failed Gemini request is worth sending again"""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RETRYABLE_STATUSES
+    return isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10),
+       retry=retry_if_exception(_is_retryable_error))
 async def send_gemini_chat(
     session: aiohttp.ClientSession,
     messages: list,
@@ -16,14 +127,22 @@ async def send_gemini_chat(
     temperature: float = 0.7,
     max_tokens: int = 1024,
     top_p: float = 1.0,
+    base_url: str = None,
+    response_schema: dict = None,
 ):
     """
     Send a request to the Gemini LLM API 
+
+    The API root defaults to GEMINI_API_BASE (or the public endpoint), so runs can be
+    pointed at utils/mockGeminiServer.py for offline load tests. Passing response_schema
+    switches the model to constrained JSON output matching that (OpenAPI subset) schema.
     """
     api_key = os.getenv("GOOGLE_API_KEY")
+    api_base = (base_url or os.getenv("GEMINI_API_BASE") or DEFAULT_API_BASE).rstrip("/")
+    started = time.perf_counter()
 
     try:
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+        url = f"{api_base}/v1beta/models/{model}:generateContent"
         url = f"{url}?key={api_key}"
 
         headers = {
@@ -39,23 +158,261 @@ async def send_gemini_chat(
             }
         }
 
+        if response_schema:
+            payload["generationConfig"]["responseMimeType"] = "application/json"
+            payload["generationConfig"]["responseSchema"] = response_schema
+
         if tools:
             payload["tools"] = tools
             payload["tool_config"] = None
-        async with session.post(url, headers=headers, json=payload) as response:
-            if response.status != 200:
-                error_text = await response.text()
-                print(f"Error response from Gemini API: {error_text}")
-                response.raise_for_status()
+        with span("llm_request", model=model):
+            async with session.post(url, headers=headers, json=payload) as response:
+                metrics.increment("llm_requests_total", model=model, status=response.status)
+                if response.status != 200:
+                    error_text = await response.text()
+                    print(f"Error response from Gemini API: {error_text}")
+                    response.raise_for_status()
 
-            response_data = await response.json()
-            return response_data
+                response_data = await response.json()
+                llm_usage.record(model, response_data.get("usageMetadata"), time.perf_counter() - started)
+                return response_data
 
     except Exception as e:
         print(f"Error in Gemini API request: {str(e)}")
+        llm_usage.record_error(model, time.perf_counter() - started)
         raise
 
 
+class GeminiAPIError(Exception):
+    """Non-retryable (or retries exhausted) error from the Gemini API"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Gemini API error {status}: {message}")
+        self.status = status
+        self.message = message
+
+
+def parse_retry_delay(headers: Any, body: Any) -> Optional[float]:
+    """
+    Extract the server's backoff hint from a failed response
+
+    Gemini sends a google.rpc.RetryInfo detail with a retryDelay such as "7s" or "0.5s";
+    proxies and gateways may send a Retry-After header instead.
+
+    Returns:
+        Seconds to wait, or None if the response carries no hint
+    """
+    if isinstance(body, dict):
+        for detail in body.get("error", {}).get("details", []) or []:
+            if detail.get("@type", "").endswith("google.rpc.RetryInfo"):
+                match = re.match(r"^\s*([0-9.]+)s\s*$", str(detail.get("retryDelay", "")))
+                if match:
+                    return float(match.group(1))
+    retry_after = headers.get("Retry-After") if headers else None
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return None
+
+
+class GeminiClient:
+    """
+    Rate-limit-aware Gemini client with a pooled aiohttp session
+
+    Requests-per-minute and tokens-per-minute budgets are enforced with token buckets
+    shared by every concurrent call, so the LLM stage runs just under quota instead of
+    bursting into 429s. Server backoff hints pause the whole client, and only retryable
+    errors (429, 5xx, timeouts, dropped connections) are retried.
+
+    Usage:
+        async with GeminiClient() as client:
+            response = await client.generate(messages)
+    """
+
+    def __init__(self,
+                 model: str = "gemini-2.0-flash",
+                 api_key: Optional[str] = None,
+                 base_url: Optional[str] = None,
+                 requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 max_retries: int = 5,
+                 base_backoff: float = 1.0,
+                 max_backoff: float = 60.0,
+                 max_connections: int = 32,
+                 request_timeout: float = 120.0):
+        """
+        Args:
+            model: Default model for generate()
+            api_key: API key (defaults to GOOGLE_API_KEY)
+            base_url: API root (defaults to GEMINI_API_BASE or the public endpoint)
+            requests_per_minute: RPM quota (defaults to GEMINI_RPM or 2000)
+            tokens_per_minute: TPM quota (defaults to GEMINI_TPM or 4,000,000)
+            max_retries: Retries per request for retryable errors
+            base_backoff: First exponential backoff step in seconds when the server gives no hint
+            max_backoff: Upper bound on a single backoff
+            max_connections: Connection pool size of the shared session
+            request_timeout: Total seconds allowed per HTTP request
+        """
+        self.model = model
+        self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
+        self.base_url = (base_url or os.getenv("GEMINI_API_BASE") or DEFAULT_API_BASE).rstrip("/")
+        self.requests_per_minute = requests_per_minute or float(os.getenv("GEMINI_RPM", "2000"))
+        self.tokens_per_minute = tokens_per_minute or float(os.getenv("GEMINI_TPM", "4000000"))
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_connections = max_connections
+        self.request_timeout = request_timeout
+        self.request_bucket = AsyncTokenBucket.per_minute(self.requests_per_minute)
+        self.token_bucket = AsyncTokenBucket.per_minute(self.tokens_per_minute)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def start(self):
+        """Open the pooled HTTP session"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            )
+
+    async def close(self):
+        """Close the pooled HTTP session"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    def _estimate_tokens(self, payload: Dict[str, Any]) -> int:
+        """Upper-bound token cost of a request: prompt characters / 4 plus the output budget"""
+        prompt_chars = sum(
+            len(part.get("text", ""))
+            for message in payload.get("contents", [])
+            for part in message.get("parts", [])
+        )
+        return prompt_chars // 4 + payload["generationConfig"].get("maxOutputTokens", 0)
+
+    def _backoff(self, attempt: int, hint: Optional[float]) -> float:
+        if hint is not None:
+            return min(self.max_backoff, hint)
+        # Full jitter so concurrent callers don't retry in lockstep
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+
+    async def generate(self,
+                       messages: List[Dict[str, Any]],
+                       model: Optional[str] = None,
+                       temperature: float = 0.7,
+                       max_tokens: int = 1024,
+                       top_p: float = 1.0,
+                       response_schema: Optional[Dict[str, Any]] = None,
+                       tools: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Send a generateContent request within the client's rate budgets
+
+        Args:
+            messages: Gemini `contents` list
+            model: Model override for this call
+            temperature: Sampling temperature
+            max_tokens: maxOutputTokens
+            top_p: Nucleus sampling parameter
+            response_schema: Optional schema for constrained JSON output
+            tools: Optional tool declarations
+
+        Returns:
+            The parsed response body
+
+        Each attempt reserves a request slot and the estimated tokens. A successful call
+        returns the tokens it did not use; an error response or dropped connection returns
+        all of them. A 200 whose body is not valid JSON is retried like a 5xx.
+
+        Raises:
+            GeminiAPIError: On a non-retryable error or when retries are exhausted
+        """
+        await self.start()
+        model = model or self.model
+        payload = {
+            "contents": messages,
+            "generationConfig": {
+                "temperature": temperature,
+                "topP": top_p,
+                "maxOutputTokens": max_tokens,
+            },
+        }
+        if response_schema:
+            payload["generationConfig"]["responseMimeType"] = "application/json"
+            payload["generationConfig"]["responseSchema"] = response_schema
+        if tools:
+            payload["tools"] = tools
+        url = f"{self.base_url}/v1beta/models/{model}:generateContent?key={self.api_key}"
+        estimated_tokens = self._estimate_tokens(payload)
+
+        for attempt in range(self.max_retries + 1):
+            with span("llm_rate_wait", model=model):
+                await self.request_bucket.acquire(1)
+                await self.token_bucket.acquire(estimated_tokens)
+
+            started = time.perf_counter()
+            hint = None
+            try:
+                with span("llm_request", model=model):
+                    async with self._session.post(url, json=payload) as response:
+                        metrics.increment("llm_requests_total", model=model, status=response.status)
+                        if response.status == 200:
+                            try:
+                                response_data = await response.json()
+                            except (aiohttp.ContentTypeError, json.JSONDecodeError) as e:
+                                # A proxy's error page or a cut-off body; the next attempt may read fine
+                                llm_usage.record_error(model, time.perf_counter() - started)
+                                failure, status = f"unreadable response body ({type(e).__name__})", 200
+                            else:
+                                usage = response_data.get("usageMetadata") or {}
+                                llm_usage.record(model, usage, time.perf_counter() - started)
+                                # Return the unused part of the token reservation to the budget
+                                actual_tokens = usage.get("totalTokenCount")
+                                if actual_tokens is not None and actual_tokens < estimated_tokens:
+                                    self.token_bucket.refund(estimated_tokens - actual_tokens)
+                                return response_data
+                        else:
+                            error_text = await response.text()
+                            try:
+                                error_body = json.loads(error_text)
+                            except json.JSONDecodeError:
+                                error_body = None
+                            llm_usage.record_error(model, time.perf_counter() - started)
+                            # A rejected request generated nothing, so its tokens go back to the budget
+                            self.token_bucket.refund(estimated_tokens)
+                            if response.status not in RETRYABLE_STATUSES:
+                                raise GeminiAPIError(response.status, error_text)
+                            hint = parse_retry_delay(response.headers, error_body)
+                            failure = f"HTTP {response.status}"
+                            status = response.status
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                llm_usage.record_error(model, time.perf_counter() - started)
+                # No answer came back: whether the request counted is unknown, so only the tokens are returned
+                self.token_bucket.refund(estimated_tokens)
+                failure, status = f"{type(e).__name__}: {e}", 0
+
+            if attempt == self.max_retries:
+                break
+            delay = self._backoff(attempt, hint)
+            if status == 429:
+                # Quota is shared, so every in-flight caller has to back off, not just this one
+                self.request_bucket.pause_until(time.monotonic() + delay)
+                self.token_bucket.pause_until(time.monotonic() + delay)
+            print(f"Gemini request failed ({failure}); retrying in {delay:.1f}s "
+                  f"(attempt {attempt + 1}/{self.max_retries})")
+            metrics.increment("llm_retries_total", model=model, reason=str(status or "connection"))
+            await asyncio.sleep(delay)
+
+        raise GeminiAPIError(status, f"giving up after {self.max_retries} retries ({failure})")
+
+
 async def main():
     """Test the Gemini API functions"""
     dotenv.load_dotenv()
@@ -0,0 +1,213 @@
+import os
+import re
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Any, Union
+
+import pandas as pd
+
+from utils.resultSink import iter_result_chunks
+
+PRICE_PATTERN = r"([\d,]+(?:\.\d+)?)"
+RATING_PATTERN = r"([\d.]+)\s+out of\s+5"
+REVIEWS_PATTERN = r"with\s+([\d,]+)\s+reviews?"
+
+# Columns kept per snapshot; raw display strings are dropped once parsed
+SNAPSHOT_COLUMNS = ["model_no", "sku", "brand", "name", "url", "found",
+                    "price_usd", "rating_value", "review_count", "scraped_at"]
+
+PARTITION_PREFIX = "run="
+
+
+def normalize_results(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parse display strings into numeric columns for a whole batch at once
+
+    "$1,399.99" becomes price_usd 1399.99 and "Rating 4.8 out of 5 stars with 719 reviews"
+    becomes rating_value 4.8 and review_count 719. Unparsable or missing values are NaN.
+
+    Args:
+        frame: Result rows with at least model_no, price and rating columns
+
+    Returns:
+        A new frame with SNAPSHOT_COLUMNS
+    """
+    frame = frame.copy()
+    for column in SNAPSHOT_COLUMNS + ["price", "rating"]:
+        if column not in frame:
+            frame[column] = None
+    price = frame["price"].astype("string")
+    rating = frame["rating"].astype("string")
+    frame["price_usd"] = pd.to_numeric(
+        price.str.extract(PRICE_PATTERN, expand=False).str.replace(",", "", regex=False), errors="coerce")
+    frame["rating_value"] = pd.to_numeric(rating.str.extract(RATING_PATTERN, expand=False), errors="coerce")
+    frame["review_count"] = pd.to_numeric(
+        rating.str.extract(REVIEWS_PATTERN, expand=False).str.replace(",", "", regex=False),
+        errors="coerce").astype("Int64")
+    frame["found"] = frame["found"].astype(str).str.lower().isin(["true", "1"]) | frame["price_usd"].notna()
+    for column in ("model_no", "sku", "brand", "name", "url", "scraped_at"):
+        frame[column] = frame[column].astype("string")
+    frame["model_no"] = frame["model_no"].str.upper()
+    return frame[SNAPSHOT_COLUMNS].reset_index(drop=True)
+
+
+class PriceHistoryStore:
+    """
+    Parquet-partitioned history of normalized lookup results
+
+    Every run is appended as its own partition (<root>/run=<run_id>/part-0.parquet), so
+    appending never rewrites earlier data and a snapshot is a single columnar read.
+    Changes between two runs are computed with one vectorized outer join on model_no.
+    """
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root: Directory holding the run partitions (created if missing)
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def runs(self) -> List[str]:
+        """Run ids in chronological order"""
+        return sorted(name[len(PARTITION_PREFIX):] for name in os.listdir(self.root)
+                      if name.startswith(PARTITION_PREFIX)
+                      and os.path.exists(os.path.join(self.root, name, "part-0.parquet")))
+
+    def _partition_path(self, run_id: str) -> str:
+        return os.path.join(self.root, f"{PARTITION_PREFIX}{run_id}", "part-0.parquet")
+
+    def append(self, results: Union[pd.DataFrame, List[Dict[str, Any]]], run_id: Optional[str] = None) -> str:
+        """
+        Normalize a run's results and store them as a new partition
+
+        Args:
+            results: Result rows (RESULT_FIELDS-shaped dicts or a DataFrame); rows with an
+                error are skipped
+            run_id: Sortable partition name (defaults to the current UTC time)
+
+        Returns:
+            The run id
+        """
+        frame = results if isinstance(results, pd.DataFrame) else pd.DataFrame(list(results))
+        run_id = run_id or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        if not re.fullmatch(r"[\w.-]+", run_id):
+            raise ValueError(f"Run id '{run_id}' must be usable as a directory name")
+        if "error" in frame:
+            # A failed lookup never observed the listing, so it must not read as "no longer listed"
+            frame = frame[frame["error"].fillna("").astype(str) == ""]
+        snapshot = normalize_results(frame)
+        # A model seen twice in one run (e.g. two search terms) keeps its last observation
+        snapshot = snapshot.drop_duplicates("model_no", keep="last")
+        path = self._partition_path(run_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        snapshot.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        return run_id
+
+    def append_file(self, path: str, run_id: Optional[str] = None, format: Optional[str] = None) -> str:
+        """Append a results file written by a ResultSink (NDJSON, CSV or Parquet)"""
+        chunks = list(iter_result_chunks(path, format))
+        frame = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+        return self.append(frame, run_id)
+
+    def snapshot(self, run_id: Optional[str] = None) -> pd.DataFrame:
+        """Normalized results of one run (the latest by default)"""
+        runs = self.runs()
+        if not runs:
+            raise LookupError(f"No runs stored in {self.root}")
+        run_id = run_id or runs[-1]
+        return pd.read_parquet(self._partition_path(run_id))
+
+    def lookup(self, model_nos: List[str], run_id: Optional[str] = None) -> pd.DataFrame:
+        """Rows for the given models from one run (the latest by default), read with a pushed-down filter"""
+        runs = self.runs()
+        if not runs:
+            raise LookupError(f"No runs stored in {self.root}")
+        run_id = run_id or runs[-1]
+        wanted = [model_no.upper() for model_no in model_nos]
+        return pd.read_parquet(self._partition_path(run_id), filters=[("model_no", "in", wanted)])
+
+    def diff(self, run_id: Optional[str] = None, previous_run_id: Optional[str] = None,
+             changed_only: bool = True) -> pd.DataFrame:
+        """
+        Compare a run against the one before it
+
+        Args:
+            run_id: Run to inspect (defaults to the latest)
+            previous_run_id: Baseline run (defaults to the run just before run_id)
+            changed_only: Drop models whose price, rating and availability did not change
+
+        Returns:
+            One row per model with before/after price, rating and review columns, the
+            absolute and percentage price change, and a status of new, removed, changed
+            or unchanged
+        """
+        runs = self.runs()
+        run_id = run_id or (runs[-1] if runs else None)
+        if run_id not in runs:
+            raise LookupError(f"Run '{run_id}' not found in {self.root}")
+        if previous_run_id is None:
+            index = runs.index(run_id)
+            if index == 0:
+                raise LookupError(f"Run '{run_id}' has no earlier run to compare against")
+            previous_run_id = runs[index - 1]
+
+        columns = ["model_no", "found", "price_usd", "rating_value", "review_count"]
+        before = pd.read_parquet(self._partition_path(previous_run_id), columns=columns)
+        after = pd.read_parquet(self._partition_path(run_id), columns=columns + ["sku", "brand", "name"])
+        merged = before.merge(after, on="model_no", how="outer", suffixes=("_before", "_after"), indicator=True)
+
+        merged["price_change"] = merged["price_usd_after"] - merged["price_usd_before"]
+        merged["price_change_pct"] = merged["price_change"] / merged["price_usd_before"] * 100
+        merged["rating_change"] = merged["rating_value_after"] - merged["rating_value_before"]
+        # NaN != NaN, so compare "both missing" explicitly to avoid flagging every unlisted price
+        price_changed = ~((merged["price_usd_before"] == merged["price_usd_after"])
+                          | (merged["price_usd_before"].isna() & merged["price_usd_after"].isna()))
+        rating_changed = ~((merged["rating_value_before"] == merged["rating_value_after"])
+                           | (merged["rating_value_before"].isna() & merged["rating_value_after"].isna()))
+        availability_changed = merged["found_before"].fillna(False) != merged["found_after"].fillna(False)
+
+        merged["status"] = "unchanged"
+        merged.loc[price_changed | rating_changed | availability_changed, "status"] = "changed"
+        merged.loc[merged["_merge"] == "left_only", "status"] = "removed"
+        merged.loc[merged["_merge"] == "right_only", "status"] = "new"
+        merged = merged.drop(columns="_merge")
+        if changed_only:
+            merged = merged[merged["status"] != "unchanged"]
+        return merged.sort_values("model_no").reset_index(drop=True)
+
+
+# Example usage
+if __name__ == "__main__":
+    import sys
+    import time
+    import tempfile
+    import numpy as np
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = np.random.default_rng(0)
+    models = [f"MODEL{i:07d}" for i in range(count)]
+    prices = rng.uniform(100, 3000, count).round(2)
+    reviews = rng.integers(0, 5000, count)
+
+    def run_rows(price_values):
+        return pd.DataFrame({
+            "model_no": models,
+            "found": True,
+            "price": [f"${value:,.2f}" for value in price_values],
+            "rating": [f"Rating 4.5 out of 5 stars with {value} reviews" for value in reviews],
+        })
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = PriceHistoryStore(directory)
+        first, second = run_rows(prices), run_rows(np.where(rng.random(count) < 0.05, prices * 0.9, prices))
+        started = time.perf_counter()
+        store.append(first, run_id="001")
+        store.append(second, run_id="002")
+        appended = time.perf_counter()
+        changes = store.diff()
+        finished = time.perf_counter()
+        print(f"Appended 2 x {count} rows in {appended - started:.2f}s; "
+              f"diff found {len(changes)} changes in {finished - appended:.3f}s")
+        print(changes.head())
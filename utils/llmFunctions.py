@@ -1,9 +1,11 @@
 import json
-from typing import List, Dict, Any, Tuple
+import asyncio
+from typing import List, Dict, Any, Optional, Tuple
 import aiohttp
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter, ValidationError
 
-from utils.geminiLLMService import send_gemini_chat
+from utils.geminiLLMService import send_gemini_chat, GeminiClient
+from utils.metrics import span, metrics
 
 # Define Pydantic models for validation
 class SearchTerms(BaseModel):
@@ -20,10 +22,8 @@ class ProductOutput(BaseModel):
 class ProductInput(BaseModel):
     name: str
 
-async def process_products_with_llm(products: List[Dict[str, str]]) -> List[ProductOutput]:
-    """Process products with the LLM to get structured search data."""
-    # Create prompt for the LLM
-    prompt = """
+
+NORMALIZATION_PROMPT = """
 You are an expert at extracting structured information from product names and creating optimal search terms.
 
 For each product name I provide, extract the following information and return it as JSON:
@@ -59,14 +59,46 @@ OUTPUT:
 
 Now process the following product list and return a JSON array with each product processed:
 """
-    
+
+# Gemini responseSchema (OpenAPI subset) mirroring ProductOutput
+PRODUCT_RESPONSE_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "input_name": {"type": "STRING"},
+            "brand": {"type": "STRING"},
+            "model_no": {"type": "STRING"},
+            "search_terms": {
+                "type": "OBJECT",
+                "properties": {
+                    "short": {"type": "STRING"},
+                    "medium": {"type": "STRING"},
+                    "long": {"type": "STRING"},
+                },
+                "required": ["short", "medium", "long"],
+                "propertyOrdering": ["short", "medium", "long"],
+            },
+        },
+        "required": ["input_name", "brand", "model_no", "search_terms"],
+        "propertyOrdering": ["input_name", "brand", "model_no", "search_terms"],
+    },
+}
+
+# Validators are built once; TypeAdapter construction is the expensive part
+_product_list_adapter = TypeAdapter(List[ProductOutput])
+_product_adapter = TypeAdapter(ProductOutput)
+
+
+async def process_products_with_llm(products: List[Dict[str, str]]) -> List[ProductOutput]:
+    """Process products with the LLM to get structured search data."""
     # Prepare messages for LLM
     messages = [
         {
             "role": "user",
             "parts": [
                 {
-                    "text": prompt + json.dumps(products)
+                    "text": NORMALIZATION_PROMPT + json.dumps(products)
                 }
             ]
         }
@@ -92,22 +124,23 @@ Now process the following product list and return a JSON array with each product
             response_text = response_text.split("```")[1].split("```")[0].strip()
         
         try:
-            processed_data = json.loads(response_text)
+            with span("llm_parse"):
+                processed_data = json.loads(response_text)
             
-            # Validate with Pydantic
-            validated_products = []
-            for item in processed_data:
-                validated_product = ProductOutput(
-                    input_name=item["input_name"],
-                    brand=item["brand"],
-                    model_no=item["model_no"],
-                    search_terms=SearchTerms(
-                        short=item["search_terms"]["short"],
-                        medium=item["search_terms"]["medium"],
-                        long=item["search_terms"]["long"]
+                # Validate with Pydantic
+                validated_products = []
+                for item in processed_data:
+                    validated_product = ProductOutput(
+                        input_name=item["input_name"],
+                        brand=item["brand"],
+                        model_no=item["model_no"],
+                        search_terms=SearchTerms(
+                            short=item["search_terms"]["short"],
+                            medium=item["search_terms"]["medium"],
+                            long=item["search_terms"]["long"]
+                        )
                     )
-                )
-                validated_products.append(validated_product)
+                    validated_products.append(validated_product)
             
             return validated_products
         except json.JSONDecodeError as e:
@@ -122,12 +155,135 @@ Now process the following product list and return a JSON array with each product
         return []
 
 
-async def process_and_validate_products(products: List[Dict[str, str]]) -> Tuple[List[Dict[str, Any]], bool]:
+def _salvage_items(response_text: str) -> List[Any]:
+    """
+    Recover every complete element of a JSON array, even if the array itself is truncated
+
+    Args:
+        response_text: Raw model output that should be a JSON array
+
+    Returns:
+        The decoded elements that precede the first malformed one
+    """
+    decoder = json.JSONDecoder()
+    start = response_text.find("[")
+    if start == -1:
+        return []
+    items = []
+    position = start + 1
+    while True:
+        # Skip whitespace and separators between elements
+        while position < len(response_text) and response_text[position] in " \t\r\n,":
+            position += 1
+        if position >= len(response_text) or response_text[position] == "]":
+            break
+        try:
+            item, position = decoder.raw_decode(response_text, position)
+        except json.JSONDecodeError:
+            break
+        items.append(item)
+    return items
+
+
+def _validate_response(response_text: str) -> Tuple[List[ProductOutput], int]:
+    """
+    Validate a JSON-mode response, falling back to item-by-item validation
+
+    Returns:
+        Tuple of (valid products, number of items that were present but invalid)
+    """
+    try:
+        # Fast path: parse and validate the whole array in a single pass
+        return _product_list_adapter.validate_json(response_text), 0
+    except ValidationError:
+        pass
+
+    valid, invalid = [], 0
+    for item in _salvage_items(response_text):
+        try:
+            valid.append(_product_adapter.validate_python(item))
+        except ValidationError:
+            invalid += 1
+    return valid, invalid
+
+
+async def process_products_with_schema(
+    products: List[Dict[str, str]],
+    max_item_retries: int = 2,
+    client: Optional[GeminiClient] = None,
+) -> List[ProductOutput]:
+    """
+    Process products with schema-constrained JSON output, re-requesting only failed items
+
+    Gemini is asked for application/json matching PRODUCT_RESPONSE_SCHEMA, and the raw
+    response is validated in one pass with a Pydantic TypeAdapter. When some items are
+    missing or invalid (or the output is truncated), only those products are sent again.
+
+    Args:
+        products: List of product dictionaries with 'name' key
+        max_item_retries: Follow-up requests allowed for items that failed validation
+        client: Shared rate-limited client (a private one is opened when omitted)
+
+    Returns:
+        Validated products in input order (failed items are left out)
+    """
+    if client is None:
+        async with GeminiClient() as client:
+            return await process_products_with_schema(products, max_item_retries, client)
+
+    results: Dict[str, ProductOutput] = {}
+    pending = list(products)
+
+    for attempt in range(max_item_retries + 1):
+        if not pending:
+            break
+        if attempt:
+            print(f"Re-requesting {len(pending)} of {len(products)} products that failed validation")
+            metrics.increment("llm_item_retries_total", len(pending))
+
+        messages = [{"role": "user", "parts": [{"text": NORMALIZATION_PROMPT + json.dumps(pending)}]}]
+        try:
+            response = await client.generate(
+                messages=messages,
+                temperature=0.2,
+                max_tokens=max(1024, 256 * len(pending)),
+                response_schema=PRODUCT_RESPONSE_SCHEMA,
+            )
+            response_text = response["candidates"][0]["content"]["parts"][0]["text"]
+        except Exception as e:
+            print(f"LLM request failed: {e}")
+            continue
+
+        with span("llm_parse"):
+            valid, invalid = _validate_response(response_text)
+
+        pending_names = {product["name"] for product in pending}
+        for index, product in enumerate(valid):
+            if product.input_name in pending_names:
+                results[product.input_name] = product
+            elif len(valid) == len(pending) and pending[index]["name"] not in results:
+                # The model reformatted the name (e.g. quotes); the arrays line up, so trust the position
+                results[pending[index]["name"]] = product.model_copy(update={"input_name": pending[index]["name"]})
+        if invalid:
+            print(f"{invalid} items failed validation")
+        pending = [product for product in pending if product["name"] not in results]
+
+    if pending:
+        print(f"Giving up on {len(pending)} products after {max_item_retries} retries")
+    return [results[product["name"]] for product in products if product["name"] in results]
+
+
+async def process_and_validate_products(products: List[Dict[str, str]],
+                                        use_schema: bool = True,
+                                        batch_size: int = 50) -> Tuple[List[Dict[str, Any]], bool]:
     """
     Process products with LLM and return validated results.
     
     Args:
         products: List of product dictionaries with 'name' key
+        use_schema: Use schema-constrained JSON output with per-item retries instead of free text
+        batch_size: Products per request in schema mode; batches run concurrently under the
+            client's RPM/TPM budgets
         
     Returns:
         Tuple containing:
@@ -135,7 +291,14 @@ async def process_and_validate_products(products: List[Dict[str, str]]) -> Tuple
         - Boolean indicating success
     """
     # Process products with LLM
-    processed_products = await process_products_with_llm(products)
+    if use_schema:
+        batches = [products[i:i + batch_size] for i in range(0, len(products), batch_size)]
+        async with GeminiClient() as client:
+            batch_results = await asyncio.gather(
+                *(process_products_with_schema(batch, client=client) for batch in batches))
+        processed_products = [product for batch in batch_results for product in batch]
+    else:
+        processed_products = await process_products_with_llm(products)
     
     # Print processing results
     if not processed_products:
@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import bisect
+import threading
+from typing import Dict, Tuple, Optional, Sequence, Any
+
+# Upper bounds (seconds) for stage duration histograms, from fast DOM calls to full page loads
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_PREFIX = "snapwrite_"
+STAGE_METRIC = "stage_duration_seconds"
+
+
+class Histogram:
+    """Cumulative bucket histogram in the Prometheus style"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.bucket_counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside the matching bucket"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        lower = 0.0
+        for index, bucket_count in enumerate(self.bucket_counts):
+            upper = self.buckets[index] if index < len(self.buckets) else self.max
+            if cumulative + bucket_count >= target and bucket_count:
+                fraction = (target - cumulative) / bucket_count
+                estimate = lower + (upper - lower) * fraction
+                return min(max(estimate, self.min), self.max)
+            cumulative += bucket_count
+            lower = upper
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "min": round(self.min, 6) if self.min is not None else None,
+            "max": round(self.max, 6) if self.max is not None else None,
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": round(self.quantile(0.5), 6),
+            "p95": round(self.quantile(0.95), 6),
+            "buckets": {str(bound): count for bound, count in zip(self.buckets + ("+Inf",), self.bucket_counts)},
+        }
+
+
+class _NoopSpan:
+    """Shared do-nothing span returned while metrics are disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    """Times a block of code and records it into the stage histogram on exit"""
+
+    __slots__ = ("registry", "stage", "labels", "started")
+
+    def __init__(self, registry: "MetricsRegistry", stage: str, labels: Dict[str, str]):
+        self.registry = registry
+        self.stage = stage
+        self.labels = labels
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        self.registry.observe(STAGE_METRIC, elapsed, stage=self.stage, **self.labels)
+        if exc_type is not None:
+            self.registry.increment("stage_errors_total", stage=self.stage, **self.labels)
+        return False
+
+
+def _label_key(labels: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape_label_value(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """Collects stage timings, histograms and counters for the scraping pipeline"""
+
+    def __init__(self, enabled: Optional[bool] = False):
+        """
+        Args:
+            enabled: Whether to record anything; None reads METRICS_ENABLED when the
+                registry is first used, so a .env file loaded after import still applies
+        """
+        self._enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Tuple], Histogram] = {}
+        self._counters: Dict[Tuple[str, Tuple], float] = {}
+
+    @property
+    def enabled(self) -> bool:
+        if self._enabled is None:
+            self._enabled = os.getenv("METRICS_ENABLED", "").lower() in ("1", "true", "yes")
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, enabled: bool):
+        self._enabled = enabled
+
+    def span(self, stage: str, **labels):
+        """
+        Time a pipeline stage
+
+        Usage:
+            with metrics.span("driver_get"):
+                driver.get(url)
+
+        Args:
+            stage: Stage name recorded as the `stage` label
+            **labels: Extra labels (e.g. retailer="bestbuy")
+
+        Returns:
+            A context manager; a shared no-op one while metrics are disabled
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, stage, labels)
+
+    def observe(self, metric: str, value: float, buckets: Optional[Sequence[float]] = None, **labels):
+        """Record a value into a histogram"""
+        if not self.enabled:
+            return
+        key = (metric, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets or DEFAULT_BUCKETS)
+            histogram.observe(value)
+
+    def increment(self, metric: str, amount: float = 1, **labels):
+        """Add to a counter"""
+        if not self.enabled:
+            return
+        key = (metric, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def reset(self):
+        """Drop all recorded values"""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get all recorded metrics as plain data
+
+        Returns:
+            Dictionary with "histograms" and "counters" lists, each entry carrying its labels
+        """
+        with self._lock:
+            histograms = [
+                {"name": name, "labels": dict(labels), **histogram.to_dict()}
+                for (name, labels), histogram in sorted(self._histograms.items())
+            ]
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+        return {"histograms": histograms, "counters": counters}
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        snapshot = self.snapshot()
+
+        def format_labels(labels: Dict[str, str], extra: Optional[Dict[str, str]] = None) -> str:
+            merged = dict(labels, **(extra or {}))
+            if not merged:
+                return ""
+            return "{" + ",".join(f'{key}="{_escape_label_value(value)}"' for key, value in merged.items()) + "}"
+
+        declared = set()
+        for entry in snapshot["histograms"]:
+            name = METRIC_PREFIX + entry["name"]
+            if name not in declared:
+                lines.append(f"# TYPE {name} histogram")
+                declared.add(name)
+            cumulative = 0
+            for bound, count in entry["buckets"].items():
+                cumulative += count
+                lines.append(f"{name}_bucket{format_labels(entry['labels'], {'le': bound})} {cumulative}")
+            lines.append(f"{name}_sum{format_labels(entry['labels'])} {entry['sum']}")
+            lines.append(f"{name}_count{format_labels(entry['labels'])} {entry['count']}")
+
+        for entry in snapshot["counters"]:
+            name = METRIC_PREFIX + entry["name"]
+            if name not in declared:
+                lines.append(f"# TYPE {name} counter")
+                declared.add(name)
+            lines.append(f"{name}{format_labels(entry['labels'])} {entry['value']}")
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, path_prefix: str) -> Tuple[str, str]:
+        """
+        Write the metrics as <prefix>.json and <prefix>.prom
+
+        Returns:
+            Tuple of (json_path, prometheus_path)
+        """
+        json_path, prom_path = f"{path_prefix}.json", f"{path_prefix}.prom"
+        with open(json_path, "w") as f:
+            f.write(self.to_json())
+        with open(prom_path, "w") as f:
+            f.write(self.to_prometheus())
+        return json_path, prom_path
+
+
+# Create a singleton instance for easy import; enable with METRICS_ENABLED=true
+metrics = MetricsRegistry(enabled=None)
+
+
+def span(stage: str, **labels):
+    """Time a pipeline stage on the shared registry"""
+    return metrics.span(stage, **labels)
+
+
+def enable_metrics(enabled: bool = True):
+    """Turn metric collection on or off for the shared registry"""
+    metrics.enabled = enabled
+
+
+# Example usage
+if __name__ == "__main__":
+    enable_metrics()
+    for delay in (0.01, 0.02, 0.05):
+        with span("example_stage"):
+            time.sleep(delay)
+    metrics.increment("example_events_total")
+    print(metrics.to_prometheus())
@@ -0,0 +1,261 @@
+import re
+import json
+import math
+import time
+import random
+import asyncio
+from collections import deque
+from typing import List, Dict, Optional, Tuple, Any, Callable
+
+from aiohttp import web
+
+from utils.backgroundServer import BackgroundAppServer
+
+
+class MockGeminiConfig:
+    """Latency and fault injection knobs for the mock Gemini endpoint"""
+
+    def __init__(self,
+                 latency_range: Tuple[float, float] = (0.2, 0.6),
+                 per_output_token_latency: float = 0.0005,
+                 rate_limit_rate: float = 0.0,
+                 retry_after_seconds: float = 2.0,
+                 quota_rpm: Optional[int] = None,
+                 quota_window_seconds: float = 60.0,
+                 malformed_rate: float = 0.0,
+                 chars_per_token: float = 4.0,
+                 seed: Optional[int] = 42):
+        """
+        Args:
+            latency_range: Min and max seconds of fixed latency per request
+            per_output_token_latency: Extra seconds per generated token (models decode serially)
+            rate_limit_rate: Probability of answering with HTTP 429 RESOURCE_EXHAUSTED
+            retry_after_seconds: Backoff hint sent with 429 responses
+            quota_rpm: Requests allowed per sliding quota window before answering 429 (None for unlimited)
+            quota_window_seconds: Length of the quota window (shorten it to keep tests fast)
+            malformed_rate: Probability of returning truncated, unparsable JSON text
+            chars_per_token: Characters per token used for usageMetadata accounting
+            seed: Random seed for fault injection (None for non-deterministic)
+        """
+        self.latency_range = latency_range
+        self.per_output_token_latency = per_output_token_latency
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after_seconds = retry_after_seconds
+        self.quota_rpm = quota_rpm
+        self.quota_window_seconds = quota_window_seconds
+        self.malformed_rate = malformed_rate
+        self.chars_per_token = chars_per_token
+        self.seed = seed
+
+
+def _extract_product_list(prompt: str) -> Optional[List[Dict[str, Any]]]:
+    """Find the JSON product list appended to the end of a normalization prompt"""
+    start = prompt.rfind("\n[")
+    start = start + 1 if start != -1 else prompt.find("[")
+    if start == -1:
+        return None
+    try:
+        products = json.loads(prompt[start:])
+    except json.JSONDecodeError:
+        return None
+    if isinstance(products, list) and all(isinstance(p, dict) and "name" in p for p in products):
+        return products
+    return None
+
+
+def normalize_product_name(name: str) -> Dict[str, Any]:
+    """
+    Produce the structured output the normalization prompt asks for, using simple heuristics
+
+    Args:
+        name: Raw product name such as 'LG 50" UHD 4K Smart LED TV - 50UT7570PUB'
+
+    Returns:
+        Dictionary with input_name, brand, model_no and search_terms
+    """
+    if " - " in name:
+        description, model_no = name.rsplit(" - ", 1)
+    elif "-" in name:
+        description, model_no = name.rsplit("-", 1)
+    else:
+        description, model_no = name, name.split()[-1]
+    model_no = model_no.strip()
+
+    words = [word for word in re.findall(r"[a-z0-9]+", description.lower())]
+    brand = words[0] if words else "unknown"
+    features = [word for word in words[1:] if word != model_no.lower()]
+    return {
+        "input_name": name,
+        "brand": brand,
+        "model_no": model_no,
+        "search_terms": {
+            "short": " ".join([brand] + features[:2]),
+            "medium": " ".join([brand] + features[:4]),
+            "long": " ".join([brand] + features),
+        },
+    }
+
+
+def default_responder(prompt: str, payload: Dict[str, Any]) -> str:
+    """Answer product normalization prompts in the shape the real model returns"""
+    products = _extract_product_list(prompt)
+    if products is None:
+        return "This is a mock Gemini response."
+
+    body = json.dumps([normalize_product_name(product["name"]) for product in products], indent=2)
+    generation_config = payload.get("generationConfig") or {}
+    if generation_config.get("responseMimeType") == "application/json":
+        return body
+    # Free-text mode: wrap in a code fence like the live model usually does
+    return f"```json\n{body}\n```"
+
+
+class MockGeminiServer:
+    """Local stand-in for the generativelanguage.googleapis.com generateContent API"""
+
+    def __init__(self,
+                 config: Optional[MockGeminiConfig] = None,
+                 responder: Callable[[str, Dict[str, Any]], str] = default_responder,
+                 host: str = "127.0.0.1",
+                 port: int = 0):
+        """
+        Args:
+            config: Latency and fault injection settings
+            responder: Function mapping (prompt text, request payload) to the response text
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+        """
+        self.config = config or MockGeminiConfig()
+        self.responder = responder
+        self.rng = random.Random(self.config.seed)
+        self.stats: Dict[str, int] = {}
+        self.requests: List[Dict[str, Any]] = []
+        self._quota_hits: deque = deque()
+        self.app = self.build_app()
+        self._server = BackgroundAppServer(self.app, host=host, port=port)
+
+    @property
+    def base_url(self) -> str:
+        return self._server.base_url.rstrip("/")
+
+    def _count(self, key: str, amount: int = 1):
+        self.stats[key] = self.stats.get(key, 0) + amount
+
+    def _count_tokens(self, text: str) -> int:
+        return max(1, math.ceil(len(text) / self.config.chars_per_token)) if text else 0
+
+    def _quota_retry_delay(self) -> Optional[float]:
+        """Admit a request against the sliding-window quota, or return seconds until a slot frees up"""
+        if self.config.quota_rpm is None:
+            return None
+        now = time.monotonic()
+        while self._quota_hits and now - self._quota_hits[0] >= self.config.quota_window_seconds:
+            self._quota_hits.popleft()
+        if len(self._quota_hits) < self.config.quota_rpm:
+            self._quota_hits.append(now)
+            return None
+        return self._quota_hits[0] + self.config.quota_window_seconds - now
+
+    def _rate_limited(self, retry_after: float) -> web.Response:
+        response = self._error(429, "RESOURCE_EXHAUSTED", "Resource has been exhausted (e.g. check quota).",
+                               details=[{"@type": "type.googleapis.com/google.rpc.RetryInfo",
+                                         "retryDelay": f"{retry_after:.3g}s"}])
+        response.headers["Retry-After"] = str(int(math.ceil(retry_after)))
+        return response
+
+    async def _generate_content(self, request: web.Request) -> web.Response:
+        self._count("requests")
+        try:
+            payload = await request.json()
+        except json.JSONDecodeError:
+            return self._error(400, "INVALID_ARGUMENT", "Invalid JSON payload received.")
+        self.requests.append(payload)
+
+        quota_delay = self._quota_retry_delay()
+        if quota_delay is not None:
+            self._count("quota_429")
+            return self._rate_limited(quota_delay)
+
+        await asyncio.sleep(self.rng.uniform(*self.config.latency_range))
+
+        if self.rng.random() < self.config.rate_limit_rate:
+            self._count("injected_429")
+            return self._rate_limited(self.config.retry_after_seconds)
+
+        prompt = "".join(
+            part.get("text", "")
+            for message in payload.get("contents", [])
+            for part in message.get("parts", [])
+        )
+        text = self.responder(prompt, payload)
+
+        if self.rng.random() < self.config.malformed_rate:
+            self._count("injected_malformed")
+            text = text[:max(1, int(len(text) * self.rng.uniform(0.3, 0.9)))]
+
+        prompt_tokens = self._count_tokens(prompt)
+        output_tokens = self._count_tokens(text)
+        await asyncio.sleep(output_tokens * self.config.per_output_token_latency)
+        self._count("prompt_tokens", prompt_tokens)
+        self._count("output_tokens", output_tokens)
+
+        model = request.match_info["model"]
+        return web.json_response({
+            "candidates": [{
+                "content": {"parts": [{"text": text}], "role": "model"},
+                "finishReason": "STOP",
+                "index": 0,
+            }],
+            "usageMetadata": {
+                "promptTokenCount": prompt_tokens,
+                "candidatesTokenCount": output_tokens,
+                "totalTokenCount": prompt_tokens + output_tokens,
+            },
+            "modelVersion": model,
+        })
+
+    def _error(self, code: int, status: str, message: str, details: Optional[list] = None) -> web.Response:
+        error = {"code": code, "message": message, "status": status}
+        if details:
+            error["details"] = details
+        return web.json_response({"error": error}, status=code)
+
+    async def _stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    def build_app(self) -> web.Application:
+        """Create the aiohttp application serving the mock API"""
+        app = web.Application()
+        app.router.add_post("/v1beta/models/{model}:generateContent", self._generate_content)
+        app.router.add_get("/__stats", self._stats)
+        return app
+
+    def start(self) -> str:
+        """Start serving in a background thread and return the API base URL"""
+        self._server.start()
+        print(f"Mock Gemini API listening on {self.base_url}")
+        return self.base_url
+
+    def stop(self):
+        """Stop the background server"""
+        self._server.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+# Example usage
+if __name__ == "__main__":
+    import time
+
+    with MockGeminiServer() as server:
+        print(f"Set GEMINI_API_BASE={server.base_url} to use it. Press Ctrl+C to stop.")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
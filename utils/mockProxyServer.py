@@ -0,0 +1,140 @@
+import asyncio
+import random
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from utils.backgroundServer import BackgroundStreamServer
+
+BLOCKED_BODY = b"<html><head><title>Access Denied</title></head><body><h1>Access Denied</h1></body></html>"
+BLOCKED_RESPONSE = (
+    b"HTTP/1.1 403 Forbidden\r\nContent-Type: text/html\r\nConnection: close\r\n"
+    b"Content-Length: " + str(len(BLOCKED_BODY)).encode() + b"\r\n\r\n" + BLOCKED_BODY
+)
+BAD_GATEWAY_RESPONSE = b"HTTP/1.1 502 Bad Gateway\r\nConnection: close\r\nContent-Length: 0\r\n\r\n"
+
+
+class MockProxyServer:
+    """Local forward proxy stand-in with per-proxy latency, failures and IP blocks
+
+    Handles absolute-form HTTP requests and CONNECT tunnels, which is all Chrome's
+    --proxy-server and aiohttp's proxy= need.
+    """
+
+    def __init__(self,
+                 latency_range: Tuple[float, float] = (0.0, 0.05),
+                 failure_rate: float = 0.0,
+                 blocked: bool = False,
+                 seed: Optional[int] = None,
+                 host: str = "127.0.0.1",
+                 port: int = 0):
+        """
+        Args:
+            latency_range: Min and max seconds added before each request is forwarded
+            failure_rate: Probability of dropping a request with 502 Bad Gateway
+            blocked: Answer every request with a 403 block page, like an IP the target has banned
+            seed: Random seed for fault injection
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+        """
+        self.latency_range = latency_range
+        self.failure_rate = failure_rate
+        self.blocked = blocked
+        self.rng = random.Random(seed)
+        self.stats: Dict[str, int] = {}
+        self._server = BackgroundStreamServer(self._handle, host=host, port=port)
+
+    @property
+    def proxy_url(self) -> str:
+        return f"http://{self._server.host}:{self._server.port}"
+
+    def _count(self, key: str):
+        self.stats[key] = self.stats.get(key, 0) + 1
+
+    async def _pipe(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    async def _handle(self, client_reader: asyncio.StreamReader, client_writer: asyncio.StreamWriter):
+        try:
+            head = await client_reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            client_writer.close()
+            return
+
+        self._count("requests")
+        await asyncio.sleep(self.rng.uniform(*self.latency_range))
+
+        if self.blocked:
+            self._count("blocked")
+            client_writer.write(BLOCKED_RESPONSE)
+            await client_writer.drain()
+            client_writer.close()
+            return
+        if self.rng.random() < self.failure_rate:
+            self._count("failed")
+            client_writer.write(BAD_GATEWAY_RESPONSE)
+            await client_writer.drain()
+            client_writer.close()
+            return
+
+        request_line, _, header_block = head.decode("latin-1").partition("\r\n")
+        method, target, version = request_line.split(" ", 2)
+
+        try:
+            if method.upper() == "CONNECT":
+                host, _, port = target.rpartition(":")
+                upstream_reader, upstream_writer = await asyncio.open_connection(host, int(port))
+                client_writer.write(b"HTTP/1.1 200 Connection Established\r\n\r\n")
+                await client_writer.drain()
+            else:
+                url = urlsplit(target)
+                upstream_reader, upstream_writer = await asyncio.open_connection(url.hostname, url.port or 80)
+                path = url.path or "/"
+                if url.query:
+                    path += "?" + url.query
+                headers = [line for line in header_block.split("\r\n")
+                           if line and not line.lower().startswith(("proxy-", "connection:"))]
+                headers.append("Connection: close")
+                lines = [f"{method} {path} {version}"] + headers
+                upstream_writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+                await upstream_writer.drain()
+        except (OSError, ValueError):
+            self._count("failed")
+            client_writer.write(BAD_GATEWAY_RESPONSE)
+            await client_writer.drain()
+            client_writer.close()
+            return
+
+        self._count("forwarded")
+        await asyncio.gather(
+            self._pipe(client_reader, upstream_writer),
+            self._pipe(upstream_reader, client_writer),
+        )
+
+    def start(self) -> str:
+        """Start the proxy in a background thread and return its URL"""
+        self._server.start()
+        return self.proxy_url
+
+    def stop(self):
+        """Stop the background proxy"""
+        self._server.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,489 @@
+import asyncio
+import html
+import math
+import random
+import re
+from typing import List, Dict, Optional, Tuple, Any
+from urllib.parse import quote
+
+from aiohttp import web
+
+from utils.backgroundServer import BackgroundAppServer
+
+
+# Real products used by main.py that Best Buy actually lists, so end-to-end runs
+# against the mock produce the same found / not-found split as the live site
+KNOWN_PRODUCTS = [
+    {"brand": "lg", "model": "50UT7570PUB", "sku": "6578195", "price": 299.99, "rating": 4.6, "reviews": 169,
+     "name": "LG - 50” Class UT75 Series LED 4K UHD Smart webOS TV (2024)"},
+    {"brand": "lg", "model": "65UT7570PUB", "sku": "6578178", "price": 399.99, "rating": 4.5, "reviews": 290,
+     "name": "LG - 65” Class UT75 Series LED 4K UHD Smart webOS TV (2024)"},
+    {"brand": "lg", "model": "OLED65C4PUA", "sku": "6578042", "price": 1399.99, "rating": 4.8, "reviews": 719,
+     "name": "LG - 65\" Class C4 Series OLED evo 4K UHD Smart webOS TV (2024)"},
+    {"brand": "lg", "model": "86UT7590PUA", "sku": "6578185", "price": 749.99, "rating": 4.7, "reviews": 180,
+     "name": "LG - 86” Class UT75 Series LED 4K UHD Smart webOS TV (2024)"},
+    {"brand": "lg", "model": "55QNED80TUC", "sku": "6578181", "price": 549.99, "rating": 4.7, "reviews": 79,
+     "name": "LG - 55” Class 80 Series QNED 4K UHD Smart webOS TV (2024)"},
+    {"brand": "sony", "model": "KD75X77L", "sku": "6544129", "price": 799.99, "rating": 4.7, "reviews": 119,
+     "name": "Sony - 75\" Class X77L LED 4K UHD Smart Google TV (2023)"},
+]
+
+# Product lines used to pad the catalog with plausible filler listings
+PRODUCT_LINES = {
+    "lg": [("UT80", "LED 4K UHD Smart webOS TV"), ("QNED85", "QNED 4K UHD Smart webOS TV"),
+           ("B4", "OLED 4K UHD Smart webOS TV")],
+    "samsung": [("DU6900", "Crystal UHD 4K Smart Tizen TV"), ("Q60D", "QLED 4K Smart Tizen TV"),
+                ("QN90D", "Neo QLED 4K Smart Tizen TV")],
+    "sony": [("X85K", "LED 4K UHD Smart Google TV"), ("BRAVIA 7", "Mini LED QLED 4K Google TV")],
+    "hisense": [("A6", "LED 4K UHD Smart Google TV"), ("U8", "Mini-LED QLED 4K Google TV")],
+    "tcl": [("S4", "LED 4K UHD Smart Google TV"), ("Q6", "QLED 4K Smart Google TV")],
+    "insignia": [("F30", "LED 4K UHD Smart Fire TV"), ("F20", "LED HD Smart Fire TV")],
+}
+
+SCREEN_SIZES = [32, 43, 50, 55, 65, 75, 85]
+
+
+class MockRetailerConfig:
+    """Latency, failure injection and layout knobs for the mock retailer"""
+
+    def __init__(self,
+                 latency_range: Tuple[float, float] = (0.05, 0.25),
+                 failure_rate: float = 0.0,
+                 block_rate: float = 0.0,
+                 captcha_rate: float = 0.0,
+                 popup_rate: float = 0.3,
+                 first_visit_challenge_rate: float = 0.0,
+                 missing_model_rate: float = 0.0,
+                 page_size: int = 18,
+                 initial_cards: int = 6,
+                 lazy_chunk_size: int = 6,
+                 catalog_size: int = 400,
+                 seed: Optional[int] = 42):
+        """
+        Args:
+            latency_range: Min and max seconds added to every page and API response
+            failure_rate: Probability of answering a page request with HTTP 503
+            block_rate: Probability of answering a page request with an HTTP 403 block page
+            captcha_rate: Probability of answering a page request with a captcha challenge
+            popup_rate: Probability that the homepage shows a Best Buy style modal (never once
+                the visitor has dismissed one, which sets a cookie)
+            first_visit_challenge_rate: Probability that a visitor without the visitor cookie
+                is served a captcha instead of the homepage
+            missing_model_rate: Fraction of products whose cards show no Model/SKU attributes,
+                as happens on the live site for some listings
+            page_size: Number of products per results page
+            initial_cards: Number of cards rendered before any scrolling happens
+            lazy_chunk_size: Number of cards fetched each time the user nears the bottom
+            catalog_size: Number of filler products generated around the known products
+            seed: Random seed for the catalog and fault injection (None for non-deterministic)
+        """
+        self.latency_range = latency_range
+        self.failure_rate = failure_rate
+        self.block_rate = block_rate
+        self.captcha_rate = captcha_rate
+        self.popup_rate = popup_rate
+        self.first_visit_challenge_rate = first_visit_challenge_rate
+        self.missing_model_rate = missing_model_rate
+        self.page_size = page_size
+        self.initial_cards = initial_cards
+        self.lazy_chunk_size = lazy_chunk_size
+        self.catalog_size = catalog_size
+        self.seed = seed
+
+
+def build_catalog(size: int = 400, seed: Optional[int] = 42) -> List[Dict[str, Any]]:
+    """
+    Build a deterministic catalog of TV listings in the shape Best Buy renders them
+
+    Args:
+        size: Number of filler products to generate in addition to KNOWN_PRODUCTS
+        seed: Random seed so repeated runs search the same catalog
+
+    Returns:
+        List of product dictionaries (brand, model, sku, name, price, rating, reviews)
+    """
+    rng = random.Random(seed)
+    catalog = [dict(product) for product in KNOWN_PRODUCTS]
+    used_models = {product["model"] for product in catalog}
+    next_sku = 6400000
+
+    while len(catalog) < size + len(KNOWN_PRODUCTS):
+        brand = rng.choice(list(PRODUCT_LINES))
+        series, description = rng.choice(PRODUCT_LINES[brand])
+        screen_size = rng.choice(SCREEN_SIZES)
+        model = f"{screen_size}{series.replace(' ', '')}{rng.choice(['PUA', 'FXZA', 'UC', 'PUB', 'G'])}".upper()
+        if model in used_models:
+            continue
+        used_models.add(model)
+        next_sku += rng.randint(1, 97)
+        year = rng.choice([2023, 2024])
+        catalog.append({
+            "brand": brand,
+            "model": model,
+            "sku": str(next_sku),
+            "price": round(screen_size * rng.uniform(6.0, 30.0), 0) - 0.01,
+            "rating": round(rng.uniform(3.6, 4.9), 1),
+            "reviews": rng.randint(0, 2500),
+            "name": f"{brand.upper() if len(brand) <= 3 else brand.title()} - {screen_size}\" Class "
+                    f"{series} Series {description} ({year})",
+        })
+
+    return catalog
+
+
+def _query_int(request: web.Request, name: str, default: int) -> int:
+    """Integer query parameter, or the default when it is missing or not a number"""
+    try:
+        return int(request.query.get(name) or default)
+    except ValueError:
+        return default
+
+
+def _tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric search tokens"""
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def _slugify(text: str) -> str:
+    """Build a Best Buy style URL slug from a product name"""
+    return "-".join(_tokenize(text))
+
+
+def render_product_card(product: Dict[str, Any], show_attributes: bool = True) -> str:
+    """Render one product as a `.sku-item` card using the markup the scraper parses"""
+    name = html.escape(product["name"])
+    url = f"/site/{_slugify(product['name'])}/{product['sku']}.p?skuId={product['sku']}"
+    rating_text = f"Rating {product['rating']} out of 5 stars with {product['reviews']} reviews"
+    attributes = f"""
+  <div class="sku-attribute-title">
+    <div class="product-attributes">
+      <div class="attribute"><span class="attribute-title">Model:</span><span class="value">{html.escape(product['model'])}</span></div>
+      <div class="attribute"><span class="attribute-title">SKU:</span><span class="value">{product['sku']}</span></div>
+    </div>
+  </div>""" if show_attributes else ""
+    return f"""
+<li class="sku-item" data-sku-id="{product['sku']}">
+  <div class="sku-title"><h4><a href="{html.escape(url)}">{name}</a></h4></div>{attributes}
+  <div class="c-ratings-reviews"><p class="visually-hidden">{rating_text}</p></div>
+  <div class="priceView-customer-price"><span>${product['price']:,.2f}</span></div>
+</li>"""
+
+
+def render_product_page(product: Dict[str, Any]) -> str:
+    """Render a product detail page using the markup the scraper's product page parser reads"""
+    name = html.escape(product["name"])
+    rating_text = f"Rating {product['rating']} out of 5 stars with {product['reviews']} reviews"
+    return f"""<!DOCTYPE html>
+<html>
+<head><title>{name} - Best Buy (mock)</title></head>
+<body>
+<div class="shop-product-title">
+  <div class="sku-title"><h1>{name}</h1></div>
+  <div class="product-data-row">
+    <div class="model product-data"><span class="product-data-label">Model:</span><span class="product-data-value">{html.escape(product['model'])}</span></div>
+    <div class="sku product-data"><span class="product-data-label">SKU:</span><span class="product-data-value">{product['sku']}</span></div>
+  </div>
+</div>
+<div class="c-ratings-reviews"><p class="visually-hidden">{rating_text}</p></div>
+<div class="priceView-customer-price"><span>${product['price']:,.2f}</span></div>
+</body>
+</html>"""
+
+
+HOMEPAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><title>Best Buy | Official Online Store (mock)</title>
+<style>
+  body {{ font-family: sans-serif; margin: 0; }}
+  header {{ padding: 16px; background: #0046be; }}
+  .popup-layer {{ position: fixed; inset: 0; background: rgba(0, 0, 0, 0.6); z-index: 100; }}
+  .popup-box {{ background: #fff; width: 420px; margin: 120px auto; padding: 24px; }}
+</style>
+</head>
+<body>
+<header>
+  <form class="header-search" action="/site/searchpage.jsp" method="get">
+    <input id="gh-search-input" name="st" type="search" autocomplete="off" placeholder="What can we help you find today?">
+    <button type="submit" class="header-search-button">Search</button>
+  </form>
+</header>
+<main><h1>Deals of the Day</h1></main>
+<script>
+  // Like the real site, a dismissed modal is remembered and not shown again
+  function dismissPopup(id) {{
+    document.getElementById(id).remove();
+    document.cookie = "popup_dismissed=1; path=/; max-age=2592000";
+  }}
+</script>
+{popup}
+</body>
+</html>"""
+
+CONFIRMIT_POPUP = """
+<div id="confirmIt-backdrop" class="popup-layer">
+  <div class="popup-box">
+    <p>Would you be willing to take a short survey about your visit?</p>
+    <button id="confirmIt-yesBtn" onclick="dismissPopup('confirmIt-backdrop')">Yes</button>
+    <button id="confirmIt-noBtn" onclick="dismissPopup('confirmIt-backdrop')">No, thanks</button>
+  </div>
+</div>"""
+
+MODAL_GRID_POPUP = """
+<div class="c-modal-grid popup-layer" id="location-modal">
+  <div class="popup-box">
+    <p>Hello! Choose a country.</p>
+    <button class="c-close-icon" onclick="dismissPopup('location-modal')">Close</button>
+  </div>
+</div>"""
+
+RESULTS_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><title>{query} - Best Buy (mock)</title>
+<style>
+  body {{ font-family: sans-serif; margin: 0; }}
+  .sku-item-list {{ list-style: none; padding: 0; }}
+  .sku-item {{ height: 320px; border-bottom: 1px solid #ddd; padding: 8px; }}
+</style>
+</head>
+<body>
+<header>
+  <form class="header-search" action="/site/searchpage.jsp" method="get">
+    <input id="gh-search-input" name="st" type="search" value="{query}">
+    <button type="submit" class="header-search-button">Search</button>
+  </form>
+</header>
+<div class="item-count">{total_results} items</div>
+<ol class="sku-item-list">{cards}</ol>
+{pagination}
+<script>
+(function() {{
+  var list = document.querySelector('.sku-item-list');
+  var offset = {rendered};
+  var total = {page_total};
+  var loading = false;
+  function maybeLoad() {{
+    if (loading || offset >= total) return;
+    if (window.innerHeight + window.scrollY < document.body.scrollHeight - 600) return;
+    loading = true;
+    fetch('/api/search-cards?st={query_param}&cp={page}&offset=' + offset + '&limit={chunk}')
+      .then(function(response) {{ return response.text(); }})
+      .then(function(markup) {{
+        list.insertAdjacentHTML('beforeend', markup);
+        offset += {chunk};
+        loading = false;
+        maybeLoad();
+      }})
+      .catch(function() {{ loading = false; }});
+  }}
+  window.addEventListener('scroll', maybeLoad);
+}})();
+</script>
+</body>
+</html>"""
+
+# Cookies the homepage uses to recognize a returning visitor and a dismissed popup
+VISITOR_COOKIE = "visitor_id"
+POPUP_COOKIE = "popup_dismissed"
+
+PRODUCT_NOT_FOUND_PAGE = """<!DOCTYPE html>
+<html><head><title>Page Not Found - Best Buy (mock)</title></head>
+<body><h1>Sorry, something went wrong.</h1><p>The product you're looking for is no longer available.</p></body></html>"""
+
+CAPTCHA_PAGE = """<!DOCTYPE html>
+<html><head><title>Access to this page has been denied</title></head>
+<body><div id="px-captcha"></div><p>Please verify you are a human to continue.</p></body></html>"""
+
+BLOCK_PAGE = """<!DOCTYPE html>
+<html><head><title>Access Denied</title></head>
+<body><h1>Access Denied</h1><p>You don't have permission to access this server.</p></body></html>"""
+
+
+class MockRetailerServer:
+    """Local Best Buy stand-in with lazily loaded results, popups and fault injection"""
+
+    def __init__(self, config: Optional[MockRetailerConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or MockRetailerConfig()
+        self.catalog = build_catalog(self.config.catalog_size, self.config.seed)
+        self.products_by_sku = {product["sku"]: product for product in self.catalog}
+        self.rng = random.Random(self.config.seed)
+        self.stats: Dict[str, int] = {}
+        self.app = self.build_app()
+        self._server = BackgroundAppServer(self.app, host=host, port=port)
+
+    @property
+    def base_url(self) -> str:
+        return self._server.base_url
+
+    def _count(self, key: str):
+        self.stats[key] = self.stats.get(key, 0) + 1
+
+    def search_catalog(self, query: str) -> List[Dict[str, Any]]:
+        """
+        Rank catalog products against a search query
+
+        Args:
+            query: The search text typed by the user
+
+        Returns:
+            Matching products ordered by relevance
+        """
+        query_tokens = set(_tokenize(query))
+        if not query_tokens:
+            return []
+        min_score = max(1, math.ceil(len(query_tokens) / 2))
+
+        scored = []
+        for product in self.catalog:
+            product_tokens = set(_tokenize(f"{product['brand']} {product['name']}"))
+            score = len(query_tokens & product_tokens)
+            if score >= min_score:
+                scored.append((-score, product["sku"], product))
+        scored.sort(key=lambda entry: (entry[0], entry[1]))
+        return [product for _, _, product in scored]
+
+    def _page_slice(self, query: str, page: int) -> Tuple[List[Dict[str, Any]], int, int]:
+        results = self.search_catalog(query)
+        page_size = self.config.page_size
+        total_pages = max(1, math.ceil(len(results) / page_size))
+        start = (page - 1) * page_size
+        return results[start:start + page_size], len(results), total_pages
+
+    def _render_card(self, product: Dict[str, Any]) -> str:
+        # Decided per SKU, so a product looks the same on every page load
+        show_attributes = random.Random(product["sku"]).random() >= self.config.missing_model_rate
+        return render_product_card(product, show_attributes)
+
+    @web.middleware
+    async def _inject_faults(self, request: web.Request, handler):
+        """Add latency and randomly replace page responses with failures"""
+        if request.path.startswith("/__"):
+            return await handler(request)
+
+        await asyncio.sleep(self.rng.uniform(*self.config.latency_range))
+        self._count("requests")
+
+        if not request.path.startswith("/api/"):
+            roll = self.rng.random()
+            if roll < self.config.failure_rate:
+                self._count("injected_503")
+                return web.Response(status=503, text="Service Unavailable")
+            roll -= self.config.failure_rate
+            if roll < self.config.block_rate:
+                self._count("injected_403")
+                return web.Response(status=403, text=BLOCK_PAGE, content_type="text/html")
+            roll -= self.config.block_rate
+            if roll < self.config.captcha_rate:
+                self._count("injected_captcha")
+                return web.Response(text=CAPTCHA_PAGE, content_type="text/html")
+
+        return await handler(request)
+
+    async def _homepage(self, request: web.Request) -> web.Response:
+        self._count("homepage")
+        returning = VISITOR_COOKIE in request.cookies
+        self._count("returning_visits" if returning else "first_visits")
+        if not returning and self.rng.random() < self.config.first_visit_challenge_rate:
+            self._count("first_visit_challenges")
+            return web.Response(text=CAPTCHA_PAGE, content_type="text/html")
+        popup = ""
+        if POPUP_COOKIE not in request.cookies and self.rng.random() < self.config.popup_rate:
+            popup = self.rng.choice([CONFIRMIT_POPUP, MODAL_GRID_POPUP])
+            self._count("popups")
+        response = web.Response(text=HOMEPAGE_TEMPLATE.format(popup=popup), content_type="text/html")
+        if not returning:
+            response.set_cookie(VISITOR_COOKIE, f"{self.rng.getrandbits(64):016x}", max_age=30 * 24 * 3600)
+        return response
+
+    def _render_pagination(self, query: str, page: int, total_pages: int) -> str:
+        if total_pages <= 1:
+            return ""
+        query_param = html.escape(quote(query))
+        links = []
+        for number in range(1, total_pages + 1):
+            css = "page-number current-page" if number == page else "page-number"
+            links.append(f'<li><a class="trans-button {css}" href="/site/searchpage.jsp?st={query_param}&amp;cp={number}">{number}</a></li>')
+        next_link = ""
+        if page < total_pages:
+            next_link = f'<a class="sku-list-page-next" href="/site/searchpage.jsp?st={query_param}&amp;cp={page + 1}">Next</a>'
+        return f'<div class="footer-pagination"><ol class="paging-list">{"".join(links)}</ol>{next_link}</div>'
+
+    async def _search_page(self, request: web.Request) -> web.Response:
+        self._count("search")
+        query = request.query.get("st", "")
+        page = max(1, _query_int(request, "cp", 1))
+        products, total_results, total_pages = self._page_slice(query, page)
+        rendered = products[:self.config.initial_cards]
+
+        body = RESULTS_TEMPLATE.format(
+            query=html.escape(query),
+            query_param=quote(query),
+            total_results=total_results,
+            cards="".join(self._render_card(product) for product in rendered),
+            pagination=self._render_pagination(query, page, total_pages),
+            rendered=len(rendered),
+            page_total=len(products),
+            page=page,
+            chunk=self.config.lazy_chunk_size,
+        )
+        return web.Response(text=body, content_type="text/html")
+
+    async def _search_cards(self, request: web.Request) -> web.Response:
+        self._count("lazy_chunks")
+        query = request.query.get("st", "")
+        page = max(1, _query_int(request, "cp", 1))
+        offset = max(0, _query_int(request, "offset", 0))
+        limit = _query_int(request, "limit", self.config.lazy_chunk_size)
+        products, _, _ = self._page_slice(query, page)
+        markup = "".join(self._render_card(product) for product in products[offset:offset + limit])
+        return web.Response(text=markup, content_type="text/html")
+
+    async def _product_page(self, request: web.Request) -> web.Response:
+        self._count("product_page")
+        product = self.products_by_sku.get(request.match_info["sku"])
+        if product is None:
+            return web.Response(status=404, text=PRODUCT_NOT_FOUND_PAGE, content_type="text/html")
+        return web.Response(text=render_product_page(product), content_type="text/html")
+
+    async def _stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    def build_app(self) -> web.Application:
+        """Create the aiohttp application serving the mock site"""
+        app = web.Application(middlewares=[self._inject_faults])
+        app.router.add_get("/", self._homepage)
+        app.router.add_get("/site/searchpage.jsp", self._search_page)
+        app.router.add_get("/api/search-cards", self._search_cards)
+        app.router.add_get(r"/site/{slug}/{sku:\d+}.p", self._product_page)
+        app.router.add_get(r"/site/{sku:\d+}.p", self._product_page)
+        app.router.add_get("/__stats", self._stats)
+        return app
+
+    def start(self) -> str:
+        """Start serving in a background thread and return the base URL"""
+        base_url = self._server.start()
+        print(f"Mock retailer listening on {base_url}")
+        return base_url
+
+    def stop(self):
+        """Stop the background server"""
+        self._server.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+# Example usage
+if __name__ == "__main__":
+    import time
+
+    with MockRetailerServer(MockRetailerConfig(popup_rate=0.5)) as server:
+        print(f"Serving {len(server.catalog)} products. Press Ctrl+C to stop.")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
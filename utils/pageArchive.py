@@ -0,0 +1,218 @@
+import os
+import gzip
+import json
+import hashlib
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+from urllib.parse import urlparse, parse_qs
+
+INDEX_FILE = "index.jsonl"
+OBJECTS_DIR = "objects"
+
+# File extension per codec; the extension is how a stored page is decompressed later
+EXTENSIONS = {"zstd": ".html.zst", "gzip": ".html.gz"}
+
+
+def _zstandard():
+    """The zstandard module, or None when it is not installed (gzip is used instead)"""
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def _object_path(root: str, digest: str, compression: str) -> str:
+    return os.path.join(root, OBJECTS_DIR, digest[:2], digest + EXTENSIONS[compression])
+
+
+def read_page(root: str, digest: str, compression: Optional[str] = None) -> str:
+    """
+    Page source stored under an archive root
+
+    Raises:
+        KeyError: If the archive has no page with that digest
+    """
+    for codec in ([compression] if compression else list(EXTENSIONS)):
+        path = _object_path(root, digest, codec)
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as f:
+            data = f.read()
+        if codec == "zstd":
+            zstandard = _zstandard()
+            if zstandard is None:
+                raise ValueError(f"{path} is zstd-compressed; install zstandard to read it")
+            return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+        return gzip.decompress(data).decode("utf-8")
+    raise KeyError(digest)
+
+
+def query_from_url(url: str) -> Optional[str]:
+    """Search query of a results page URL (the st parameter), if it has one"""
+    values = parse_qs(urlparse(url or "").query).get("st")
+    return values[0] if values else None
+
+
+class PageArchive:
+    """
+    Content-addressed store of raw results pages
+
+    Each page is compressed and written once under objects/<2 hex>/<sha256>, so the same
+    page fetched twice costs one file. Every fetch appends a line to index.jsonl with the
+    page hash, URL, query, retailer and time, which is what re-extraction walks. Pages
+    are never rewritten, so an archive can be copied or synced while a run appends to it.
+    """
+
+    def __init__(self, root: str, compression: Optional[str] = None, level: Optional[int] = None):
+        """
+        Args:
+            root: Archive directory (created if missing)
+            compression: "zstd" or "gzip" (defaults to zstd when the zstandard package is installed)
+            level: Compression level (codec default when omitted)
+        """
+        if compression is None:
+            compression = "zstd" if _zstandard() else "gzip"
+        if compression not in EXTENSIONS:
+            raise ValueError(f"Unknown compression {compression!r}; use one of {sorted(EXTENSIONS)}")
+        if compression == "zstd" and not _zstandard():
+            raise ValueError("zstd compression needs the zstandard package")
+        self.root = root
+        self.compression = compression
+        self.level = level
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, OBJECTS_DIR), exist_ok=True)
+
+    @classmethod
+    def from_env(cls, variable: str = "PAGE_ARCHIVE_DIR", **kwargs) -> Optional["PageArchive"]:
+        """Build an archive rooted at an environment variable, or None if it is unset"""
+        root = os.getenv(variable)
+        return cls(root, **kwargs) if root else None
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.compression == "zstd":
+            return _zstandard().ZstdCompressor(level=self.level or 3).compress(data)
+        return gzip.compress(data, compresslevel=self.level or 6)
+
+    def put(self, html: str, url: str, base_url: str, **metadata) -> str:
+        """
+        Store a page and record the fetch in the index
+
+        Args:
+            html: Page source
+            url: URL the page was loaded from
+            base_url: Site root, needed to absolutize product links when re-extracting
+            **metadata: Extra fields for the index line (e.g. model_no, label)
+
+        Returns:
+            The page's sha256 hex digest
+        """
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = _object_path(self.root, digest, self.compression)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(self._compress(data))
+            os.replace(tmp_path, path)
+        entry = {
+            "sha256": digest,
+            "compression": self.compression,
+            "url": url,
+            "query": query_from_url(url),
+            "retailer": urlparse(base_url).netloc,
+            "base_url": base_url,
+            "archived_at": datetime.now(timezone.utc).isoformat(),
+            "bytes": len(data),
+            **metadata,
+        }
+        with self._lock, open(os.path.join(self.root, INDEX_FILE), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        return digest
+
+    def get(self, digest: str, compression: Optional[str] = None) -> str:
+        """Page source for a digest"""
+        return read_page(self.root, digest, compression)
+
+    def entries(self, retailer: Optional[str] = None, since: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Index lines, oldest first
+
+        Args:
+            retailer: Only pages from this host (e.g. "www.bestbuy.com")
+            since: Only pages archived at or after this ISO timestamp
+        """
+        try:
+            f = open(os.path.join(self.root, INDEX_FILE), encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if retailer and entry.get("retailer") != retailer:
+                    continue
+                if since and entry.get("archived_at", "") < since:
+                    continue
+                yield entry
+
+
+def _reextract_entry(root: str, entry: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Parse one archived page (runs in a worker process)"""
+    from scrapers.bestBuyParsing import parse_products
+
+    html = read_page(root, entry["sha256"], entry.get("compression"))
+    return entry, parse_products(html, entry["base_url"])
+
+
+def reextract(archive: PageArchive, entries: Optional[List[Dict[str, Any]]] = None, workers: Optional[int] = None,
+              unique: bool = True) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """
+    Run the product extractor over archived pages again, in parallel across cores
+
+    Parsing is CPU-bound, so pages are spread over worker processes. Each worker reads and
+    decompresses its own pages; only the index entry and the parsed products cross the
+    process boundary.
+
+    Args:
+        archive: Archive to read
+        entries: Index lines to re-extract (defaults to the whole index)
+        workers: Worker processes (defaults to the number of CPUs)
+        unique: Parse each distinct page once, keeping its latest fetch
+
+    Returns:
+        (index entry, products) pairs in the order of entries
+    """
+    entries = list(archive.entries() if entries is None else entries)
+    if unique:
+        entries = list({entry["sha256"]: entry for entry in entries}.values())
+    if not entries:
+        return
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for entry in entries:
+            yield _reextract_entry(archive.root, entry)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(entries) // (workers * 4))
+        yield from executor.map(_reextract_entry, [archive.root] * len(entries), entries, chunksize=chunksize)
+
+
+# Example usage
+if __name__ == "__main__":
+    import tempfile
+    from utils.mockRetailerServer import build_catalog, render_product_card
+
+    page = "<html><body>" + "".join(render_product_card(product) for product in build_catalog(24)) + "</body></html>"
+    with tempfile.TemporaryDirectory() as root:
+        archive = PageArchive(root)
+        url = "https://www.bestbuy.com/site/searchpage.jsp?st=lg+50+tv"
+        digest = archive.put(page, url, "https://www.bestbuy.com/")
+        archive.put(page, url, "https://www.bestbuy.com/")
+        print(f"Stored {len(page)} bytes as {digest[:12]} ({archive.compression}), indexed twice")
+        for entry, products in reextract(archive, workers=2):
+            print(f"{entry['query']}: {len(products)} products, first {products[0]['name']!r}")
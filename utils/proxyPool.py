@@ -0,0 +1,259 @@
+import os
+import time
+import asyncio
+import threading
+from typing import List, Dict, Optional, Tuple, Any
+
+import aiohttp
+
+# Errors Chrome reports when the proxy itself (rather than the site) is the problem
+PROXY_ERROR_MARKERS = (
+    "ERR_PROXY_CONNECTION_FAILED",
+    "ERR_TUNNEL_CONNECTION_FAILED",
+    "ERR_PROXY_AUTH",
+    "ERR_NO_SUPPORTED_PROXIES",
+    "ERR_TIMED_OUT",
+)
+
+# Block signals that mean the target has flagged the proxy's IP
+BLOCK_SIGNALS = ("captcha", "http_403", "http_429")
+
+
+class ProxyState:
+    """Health record for one proxy"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.success_rate = 1.0      # EWMA of request outcomes, optimistic for new proxies
+        self.latency = None          # EWMA of page load seconds
+        self.successes = 0
+        self.failures = 0
+        self.blocks = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.evicted = False
+        self.sessions = set()
+
+    def available(self, now: float) -> bool:
+        return not self.evicted and now >= self.cooldown_until
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "success_rate": round(self.success_rate, 3),
+            "latency": round(self.latency, 3) if self.latency is not None else None,
+            "successes": self.successes,
+            "failures": self.failures,
+            "blocks": self.blocks,
+            "cooldown_remaining": round(max(0.0, self.cooldown_until - time.monotonic()), 1),
+            "evicted": self.evicted,
+            "sessions": sorted(self.sessions),
+        }
+
+
+class ProxyPool:
+    """
+    Assigns proxies to driver sessions and tracks their health
+
+    Each proxy is scored by an exponentially weighted success rate divided by its
+    (weighted) latency. Sessions lease the best available proxy; failing proxies are
+    cooled down with exponential backoff and evicted after repeated failures, and a
+    block signal rotates the session onto a different proxy.
+
+    Chrome's --proxy-server cannot carry credentials, so authenticated proxies need
+    IP allowlisting on the provider side.
+    """
+
+    def __init__(self,
+                 proxies: List[str],
+                 max_sessions_per_proxy: int = 1,
+                 cooldown_seconds: float = 60.0,
+                 max_cooldown_seconds: float = 900.0,
+                 eviction_failures: int = 5,
+                 ewma_alpha: float = 0.3,
+                 latency_target: float = 2.0):
+        """
+        Args:
+            proxies: Proxy URLs such as "http://10.0.0.5:3128" or "socks5://10.0.0.6:1080"
+            max_sessions_per_proxy: Concurrent driver sessions allowed per proxy
+            cooldown_seconds: Base cooldown after a failure or block (doubles per consecutive failure)
+            max_cooldown_seconds: Upper bound on a single cooldown
+            eviction_failures: Consecutive failures after which a proxy is removed from rotation
+            ewma_alpha: Weight of the newest outcome in the success rate and latency averages
+            latency_target: Page load seconds at which a proxy's score is halved
+        """
+        self.max_sessions_per_proxy = max_sessions_per_proxy
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+        self.eviction_failures = eviction_failures
+        self.ewma_alpha = ewma_alpha
+        self.latency_target = latency_target
+        self._lock = threading.Lock()
+        self._proxies: Dict[str, ProxyState] = {url: ProxyState(url) for url in dict.fromkeys(proxies)}
+        self._leases: Dict[str, str] = {}
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "ProxyPool":
+        """Load one proxy URL per line, ignoring blanks and # comments"""
+        with open(path) as f:
+            proxies = [line.strip() for line in f if line.strip() and not line.strip().startswith("#")]
+        return cls(proxies, **kwargs)
+
+    @classmethod
+    def from_env(cls, variable: str = "PROXY_LIST", **kwargs) -> Optional["ProxyPool"]:
+        """Build a pool from a comma separated environment variable, or None if it is unset"""
+        value = os.getenv(variable, "")
+        proxies = [proxy.strip() for proxy in value.split(",") if proxy.strip()]
+        return cls(proxies, **kwargs) if proxies else None
+
+    def score(self, proxy: str) -> float:
+        """Health score: success rate discounted by latency (higher is better)"""
+        state = self._proxies[proxy]
+        latency = state.latency if state.latency is not None else 0.0
+        return state.success_rate / (1.0 + latency / self.latency_target)
+
+    def acquire(self, session_id: str, exclude: Tuple[str, ...] = ()) -> Optional[str]:
+        """
+        Lease the healthiest available proxy to a session
+
+        Args:
+            session_id: Driver session that will use the proxy
+            exclude: Proxies the session must not get back (e.g. the one it was just blocked on)
+
+        Returns:
+            The proxy URL, or None if every proxy is cooling down, evicted or fully leased
+            (the session then keeps any lease it already holds)
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [
+                state for state in self._proxies.values()
+                if state.available(now) and state.url not in exclude
+                and len(state.sessions - {session_id}) < self.max_sessions_per_proxy
+            ]
+            if not candidates:
+                return None
+            best = max(candidates, key=lambda state: (self.score(state.url), -len(state.sessions)))
+            # The old lease is only given up once a replacement is certain
+            self._release_locked(session_id)
+            best.sessions.add(session_id)
+            self._leases[session_id] = best.url
+            return best.url
+
+    def _release_locked(self, session_id: str):
+        proxy = self._leases.pop(session_id, None)
+        if proxy and proxy in self._proxies:
+            self._proxies[proxy].sessions.discard(session_id)
+
+    def release(self, session_id: str):
+        """Return a session's proxy to the pool"""
+        with self._lock:
+            self._release_locked(session_id)
+
+    def proxy_for(self, session_id: str) -> Optional[str]:
+        """The proxy currently leased to a session"""
+        with self._lock:
+            return self._leases.get(session_id)
+
+    def report_success(self, proxy: str, latency: Optional[float] = None):
+        """Record a page that loaded cleanly through the proxy"""
+        with self._lock:
+            state = self._proxies.get(proxy)
+            if state is None:
+                return
+            state.successes += 1
+            state.consecutive_failures = 0
+            state.success_rate += self.ewma_alpha * (1.0 - state.success_rate)
+            if latency is not None:
+                state.latency = latency if state.latency is None else (
+                    state.latency + self.ewma_alpha * (latency - state.latency))
+
+    def report_failure(self, proxy: str, blocked: bool = False):
+        """
+        Record a failed request and cool the proxy down
+
+        Args:
+            proxy: Proxy URL the failure happened on
+            blocked: True when the target served a block page rather than the proxy failing
+        """
+        with self._lock:
+            state = self._proxies.get(proxy)
+            if state is None:
+                return
+            state.failures += 1
+            state.blocks += 1 if blocked else 0
+            state.consecutive_failures += 1
+            state.success_rate -= self.ewma_alpha * state.success_rate
+            cooldown = min(self.max_cooldown_seconds,
+                           self.cooldown_seconds * 2 ** (state.consecutive_failures - 1))
+            state.cooldown_until = time.monotonic() + cooldown
+            if state.consecutive_failures >= self.eviction_failures:
+                state.evicted = True
+                print(f"Evicting proxy {proxy} after {state.consecutive_failures} consecutive failures")
+            else:
+                print(f"Cooling down proxy {proxy} for {cooldown:.0f}s")
+
+    def rotate(self, session_id: str, signal: str = "error") -> Optional[str]:
+        """
+        Penalize the session's current proxy and lease it a different one
+
+        Args:
+            session_id: Session that hit the problem
+            signal: Block signal or error kind that triggered the rotation
+
+        Returns:
+            The new proxy URL, or None if no other proxy is available (the session keeps
+            its current lease)
+        """
+        current = self.proxy_for(session_id)
+        if current:
+            self.report_failure(current, blocked=signal in BLOCK_SIGNALS)
+        return self.acquire(session_id, exclude=(current,) if current else ())
+
+    async def check_proxy(self, session: aiohttp.ClientSession, proxy: str, test_url: str,
+                          timeout: float = 10.0) -> Tuple[bool, float]:
+        """Fetch test_url through one proxy and report the outcome to the pool"""
+        started = time.perf_counter()
+        try:
+            async with session.get(test_url, proxy=proxy, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                await response.read()
+                ok = response.status < 400
+                # The target answering 403/429 means it has flagged the proxy's IP
+                blocked = response.status in (403, 429)
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+            ok = blocked = False
+        latency = time.perf_counter() - started
+        if ok:
+            self.report_success(proxy, latency)
+        else:
+            self.report_failure(proxy, blocked=blocked)
+        return ok, latency
+
+    async def health_check(self, test_url: str, timeout: float = 10.0) -> Dict[str, Tuple[bool, float]]:
+        """
+        Probe every non-evicted proxy concurrently
+
+        Args:
+            test_url: Lightweight URL to fetch through each proxy
+            timeout: Seconds before a probe counts as a failure
+
+        Returns:
+            Dictionary of proxy URL to (ok, latency_seconds)
+        """
+        with self._lock:
+            proxies = [state.url for state in self._proxies.values() if not state.evicted]
+        async with aiohttp.ClientSession() as session:
+            outcomes = await asyncio.gather(*(self.check_proxy(session, proxy, test_url, timeout) for proxy in proxies))
+        return dict(zip(proxies, outcomes))
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Health of every proxy, best first"""
+        with self._lock:
+            states = sorted(self._proxies.values(), key=lambda state: -self.score(state.url))
+            return [dict(state.to_dict(), score=round(self.score(state.url), 3)) for state in states]
+
+
+def is_proxy_error(error: Exception) -> bool:
+    """Whether a WebDriver error was caused by the proxy connection"""
+    message = str(error)
+    return any(marker in message for marker in PROXY_ERROR_MARKERS)
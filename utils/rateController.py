@@ -0,0 +1,165 @@
+import time
+import threading
+from typing import Dict, Optional, Any
+
+# Multiplicative decrease applied to a session's request rate for each kind of block signal.
+# Hard blocks cut deeper than soft hints that something may be wrong.
+SIGNAL_BACKOFF = {
+    "timeout": 0.75,
+    "empty_results": 0.8,
+    "http_429": 0.5,
+    "http_403": 0.3,
+    "captcha": 0.3,
+}
+
+# Seconds a session must stay idle after the strongest signals
+SIGNAL_COOLDOWN = {
+    "http_429": 30.0,
+    "http_403": 120.0,
+    "captcha": 120.0,
+}
+
+
+class SessionBudget:
+    """Pacing state for one browser session"""
+
+    def __init__(self, rate: float, concurrency: float):
+        self.rate = rate                # relative request rate; delays are scaled by 1 / rate
+        self.concurrency = concurrency  # congestion window of parallel lookups
+        self.clean_streak = 0
+        self.cooldown_until = 0.0
+        self.signals: Dict[str, int] = {}
+        self.successes = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rate": round(self.rate, 3),
+            "delay_scale": round(1.0 / self.rate, 3),
+            "concurrency": int(self.concurrency),
+            "clean_streak": self.clean_streak,
+            "successes": self.successes,
+            "signals": dict(self.signals),
+            "cooldown_remaining": round(max(0.0, self.cooldown_until - time.monotonic()), 1),
+        }
+
+
+class AdaptiveRateController:
+    """
+    AIMD pacing for scraper sessions
+
+    While pages load cleanly each session's rate grows additively (delays shrink) and its
+    concurrency window opens by one slot per window of successes. Block signals such as
+    captcha pages, 403/429 responses, empty result pages or timeouts cut the rate
+    multiplicatively, halve the concurrency window, and may impose a cooldown.
+    """
+
+    def __init__(self,
+                 initial_rate: float = 1.0,
+                 min_rate: float = 0.25,
+                 max_rate: float = 5.0,
+                 additive_step: float = 0.1,
+                 initial_concurrency: int = 1,
+                 max_concurrency: int = 8,
+                 signal_backoff: Optional[Dict[str, float]] = None,
+                 signal_cooldown: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            initial_rate: Starting rate (1.0 keeps the delayUtils ranges as-is)
+            min_rate: Slowest allowed rate (delays at most 1 / min_rate times longer)
+            max_rate: Fastest allowed rate (delays at least 1 / max_rate of the default)
+            additive_step: Rate added after each clean page
+            initial_concurrency: Starting number of parallel lookups per session
+            max_concurrency: Upper bound on parallel lookups per session
+            signal_backoff: Overrides for SIGNAL_BACKOFF
+            signal_cooldown: Overrides for SIGNAL_COOLDOWN
+        """
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.additive_step = additive_step
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.signal_backoff = dict(SIGNAL_BACKOFF, **(signal_backoff or {}))
+        self.signal_cooldown = dict(SIGNAL_COOLDOWN, **(signal_cooldown or {}))
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, SessionBudget] = {}
+
+    def _session(self, session_id: str) -> SessionBudget:
+        budget = self._sessions.get(session_id)
+        if budget is None:
+            budget = self._sessions[session_id] = SessionBudget(self.initial_rate, self.initial_concurrency)
+        return budget
+
+    def record_success(self, session_id: str):
+        """Additive increase after a page loaded and produced results"""
+        with self._lock:
+            budget = self._session(session_id)
+            budget.successes += 1
+            budget.clean_streak += 1
+            budget.rate = min(self.max_rate, budget.rate + self.additive_step)
+            budget.concurrency = min(self.max_concurrency, budget.concurrency + 1.0 / max(1.0, budget.concurrency))
+
+    def record_signal(self, session_id: str, signal: str, retry_after: Optional[float] = None):
+        """
+        Multiplicative decrease after a block signal
+
+        Args:
+            session_id: Session that observed the signal
+            signal: One of SIGNAL_BACKOFF's keys (unknown signals are treated like a timeout)
+            retry_after: Server supplied backoff hint in seconds, overriding the default cooldown
+        """
+        factor = self.signal_backoff.get(signal, self.signal_backoff["timeout"])
+        cooldown = retry_after if retry_after is not None else self.signal_cooldown.get(signal, 0.0)
+        with self._lock:
+            budget = self._session(session_id)
+            budget.signals[signal] = budget.signals.get(signal, 0) + 1
+            budget.clean_streak = 0
+            budget.rate = max(self.min_rate, budget.rate * factor)
+            budget.concurrency = max(1.0, budget.concurrency / 2)
+            if cooldown:
+                budget.cooldown_until = max(budget.cooldown_until, time.monotonic() + cooldown)
+        print(f"Rate controller: '{signal}' on session {session_id}, "
+              f"delay scale now {1.0 / budget.rate:.2f}x" + (f", cooling down {cooldown:.0f}s" if cooldown else ""))
+
+    def delay_scale(self, session_id: str) -> float:
+        """Multiplier to apply to the session's human-like delays"""
+        with self._lock:
+            return 1.0 / self._session(session_id).rate
+
+    def concurrency_limit(self, session_id: str) -> int:
+        """Number of lookups the session may currently run in parallel"""
+        with self._lock:
+            return max(1, int(self._session(session_id).concurrency))
+
+    def cooldown_remaining(self, session_id: str) -> float:
+        """Seconds until the session may send its next request"""
+        with self._lock:
+            return max(0.0, self._session(session_id).cooldown_until - time.monotonic())
+
+    def wait_for_cooldown(self, session_id: str) -> float:
+        """
+        Block until the session's cooldown has elapsed
+
+        Returns:
+            The number of seconds slept
+        """
+        remaining = self.cooldown_remaining(session_id)
+        if remaining > 0:
+            print(f"Session {session_id} cooling down for {remaining:.1f}s...")
+            time.sleep(remaining)
+        return remaining
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Get the current budget of every session"""
+        with self._lock:
+            return {session_id: budget.to_dict() for session_id, budget in self._sessions.items()}
+
+
+# Example usage
+if __name__ == "__main__":
+    controller = AdaptiveRateController(signal_cooldown={"captcha": 0})
+    for _ in range(10):
+        controller.record_success("session-1")
+    print("After 10 clean pages:", controller.snapshot()["session-1"])
+    controller.record_signal("session-1", "captcha")
+    print("After a captcha:", controller.snapshot()["session-1"])
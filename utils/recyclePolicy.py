@@ -0,0 +1,137 @@
+import os
+import sys
+from typing import Dict, List, Optional
+
+# Recycle thresholds when none are configured
+DEFAULT_MAX_RSS_MB = 1500
+DEFAULT_MAX_SEARCHES = 200
+DEFAULT_MAX_ERROR_STREAK = 5
+DEFAULT_MAX_TABS = 6
+
+
+def _proc_children() -> Dict[int, List[int]]:
+    """Parent pid -> child pids for every process in /proc"""
+    children: Dict[int, List[int]] = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name is parenthesized and may itself contain spaces or parentheses
+        fields = stat[stat.rindex(")") + 2:].split()
+        children.setdefault(int(fields[1]), []).append(int(name))
+    return children
+
+
+def _proc_rss(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def process_tree_rss(pid: int) -> Optional[int]:
+    """
+    Resident memory of a process and all its descendants, in bytes
+
+    Chrome spreads one browser over a dozen renderer, GPU and utility processes under
+    chromedriver, so the driver's own RSS says little; the whole tree is summed. Reads
+    /proc on Linux and falls back to psutil elsewhere when it is installed.
+
+    Returns:
+        None if the process is gone or memory cannot be read on this platform
+    """
+    if sys.platform.startswith("linux") and os.path.isdir("/proc"):
+        if not os.path.exists(f"/proc/{pid}"):
+            return None
+        children = _proc_children()
+        total, stack = 0, [pid]
+        while stack:
+            current = stack.pop()
+            total += _proc_rss(current)
+            stack.extend(children.get(current, []))
+        return total
+    try:
+        import psutil
+    except ImportError:
+        return None
+    try:
+        process = psutil.Process(pid)
+        return sum(p.memory_info().rss for p in [process] + process.children(recursive=True))
+    except psutil.Error:
+        return None
+
+
+class RecyclePolicy:
+    """
+    When a long-lived browser should be replaced with a fresh one
+
+    Chrome's memory creeps up over hundreds of searches (caches, leaked renderers, tabs
+    left behind by failed reads) and a run of consecutive failures usually means the
+    browser itself is wedged. Either is cheaper to fix by restarting the browser between
+    lookups than by waiting for an OOM kill or a crawl.
+    """
+
+    def __init__(self, max_rss_mb: Optional[float] = DEFAULT_MAX_RSS_MB,
+                 max_searches: Optional[int] = DEFAULT_MAX_SEARCHES,
+                 max_error_streak: Optional[int] = DEFAULT_MAX_ERROR_STREAK,
+                 max_tabs: Optional[int] = DEFAULT_MAX_TABS):
+        """
+        Args:
+            max_rss_mb: Memory watermark for the browser's whole process tree
+            max_searches: Lookups one browser serves before it is replaced
+            max_error_streak: Consecutive failed lookups before the browser is replaced
+            max_tabs: Open tabs above which the browser is assumed to be leaking them
+
+        Any limit set to None (or 0) is not checked.
+        """
+        self.max_rss_mb = max_rss_mb
+        self.max_searches = max_searches
+        self.max_error_streak = max_error_streak
+        self.max_tabs = max_tabs
+
+    @classmethod
+    def from_env(cls) -> "RecyclePolicy":
+        """Policy from DRIVER_MAX_RSS_MB, DRIVER_MAX_SEARCHES, DRIVER_MAX_ERROR_STREAK and DRIVER_MAX_TABS"""
+        return cls(max_rss_mb=float(os.getenv("DRIVER_MAX_RSS_MB", DEFAULT_MAX_RSS_MB)),
+                   max_searches=int(os.getenv("DRIVER_MAX_SEARCHES", DEFAULT_MAX_SEARCHES)),
+                   max_error_streak=int(os.getenv("DRIVER_MAX_ERROR_STREAK", DEFAULT_MAX_ERROR_STREAK)),
+                   max_tabs=int(os.getenv("DRIVER_MAX_TABS", DEFAULT_MAX_TABS)))
+
+    def reason(self, rss_bytes: Optional[int] = None, searches: int = 0, error_streak: int = 0,
+               tabs: Optional[int] = None) -> Optional[str]:
+        """
+        Why the browser should be recycled now
+
+        Args:
+            rss_bytes: Process-tree memory (None when unknown)
+            searches: Lookups served since the browser started
+            error_streak: Consecutive failed lookups
+            tabs: Open tabs (None when unknown)
+
+        Returns:
+            "memory", "searches", "errors" or "tabs", or None to keep the browser
+        """
+        if self.max_rss_mb and rss_bytes is not None and rss_bytes > self.max_rss_mb * 1024 * 1024:
+            return "memory"
+        if self.max_error_streak and error_streak >= self.max_error_streak:
+            return "errors"
+        if self.max_tabs and tabs is not None and tabs > self.max_tabs:
+            return "tabs"
+        if self.max_searches and searches >= self.max_searches:
+            return "searches"
+        return None
+
+
+# Example usage
+if __name__ == "__main__":
+    rss = process_tree_rss(os.getpid())
+    print(f"This process tree: {rss / 1024 / 1024:.1f} MB" if rss is not None else "Memory not readable here")
+    policy = RecyclePolicy(max_rss_mb=1024, max_searches=3)
+    for searches in range(1, 5):
+        print(f"After {searches} searches:", policy.reason(rss, searches=searches) or "keep")
+    print("Leaking tabs:", policy.reason(rss, searches=1, tabs=9))
@@ -0,0 +1,329 @@
+import os
+import json
+import math
+import time
+import heapq
+import threading
+from typing import List, Dict, Optional, Any, Callable, Tuple
+
+from utils.metrics import span, metrics
+
+# Fields whose change means the listing needs to be re-exported
+TRACKED_FIELDS = ("price", "rating", "name")
+
+
+class ProductRefreshState:
+    """Last-seen listing and observed change history for one model"""
+
+    def __init__(self, model_no: str, search_term: str):
+        self.model_no = model_no
+        self.search_term = search_term
+        self.first_checked: Optional[float] = None
+        self.last_checked: Optional[float] = None    # last successful check
+        self.last_attempt: Optional[float] = None    # last lookup, failed or not
+        self.last_changed: Optional[float] = None
+        self.last_seen: Optional[Dict[str, Any]] = None
+        self.checks = 0
+        self.changes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ProductRefreshState":
+        state = cls(data["model_no"], data["search_term"])
+        state.__dict__.update(data)
+        return state
+
+
+class RefreshScheduler:
+    """
+    Staleness-prioritized refresh loop for tracked products
+
+    Each model's change rate is estimated from how often its price, rating or title
+    changed between checks, treating changes as a Poisson process. A product becomes due
+    once it is expected to have changed about once since it was last checked, clamped to
+    [min_interval, max_interval]. Within a lookups-per-hour budget, the due product whose
+    listing has most likely changed (highest expected staleness) is refreshed first.
+    State is kept in a JSON file so a restarted scheduler picks up where it left off.
+    """
+
+    def __init__(self,
+                 lookup: Callable[[str, str], Optional[Dict[str, Any]]],
+                 lookups_per_hour: float = 60.0,
+                 min_interval: float = 15 * 60.0,
+                 max_interval: float = 7 * 24 * 3600.0,
+                 prior_change_interval: float = 24 * 3600.0,
+                 state_path: Optional[str] = None,
+                 clock: Callable[[], float] = time.time,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            lookup: Function mapping (search_term, model_no) to the listing, or None on failure
+                (e.g. BestBuyScraper.lookup)
+            lookups_per_hour: Browser lookup budget
+            min_interval: Seconds a product must rest between checks, however volatile it is
+            max_interval: Seconds after which a product is re-checked, however stable it is
+            prior_change_interval: Assumed seconds between changes before any have been observed
+            state_path: JSON file to load and persist per-model state (None keeps it in memory)
+            clock: Wall clock returning epoch seconds (persisted timestamps must survive restarts)
+            sleep: Sleep function, replaceable for simulations and tests
+        """
+        self.lookup = lookup
+        self.lookups_per_hour = lookups_per_hour
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.prior_change_interval = prior_change_interval
+        self.state_path = state_path
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._products: Dict[str, ProductRefreshState] = {}
+        # Heap of (due time, version, model) for models not yet due; due ones move to _ready
+        self._queue: List[Tuple[float, int, str]] = []
+        self._ready: Dict[str, Tuple[int, float]] = {}
+        self._versions: Dict[str, int] = {}
+        self._next_slot = 0.0
+        if state_path and os.path.exists(state_path):
+            self.load()
+
+    def change_rate(self, state: ProductRefreshState) -> float:
+        """
+        Estimated changes per second for a model
+
+        Counting changes per elapsed time underestimates volatile listings, because a
+        check only reveals whether *any* change happened since the last one. The
+        Cho & Garcia-Molina estimator -ln((n - X + 0.5) / (n + 0.5)) / interval corrects
+        for that; the prior of one change per observed + prior_change_interval keeps
+        listings that never changed from drifting out to max_interval immediately.
+        """
+        observed = 0.0
+        if state.first_checked is not None and state.last_checked is not None:
+            observed = state.last_checked - state.first_checked
+        prior_rate = 1.0 / (observed + self.prior_change_interval)
+        comparisons = state.checks - 1
+        if comparisons <= 0 or observed <= 0:
+            return prior_rate
+        estimate = -math.log((comparisons - state.changes + 0.5) / (comparisons + 0.5)) / (observed / comparisons)
+        return max(prior_rate, estimate)
+
+    def due_at(self, state: ProductRefreshState) -> float:
+        """Epoch time at which a model should next be checked"""
+        if state.consecutive_failures and state.last_attempt is not None:
+            # Failed lookups are retried with backoff rather than at the product's change rate
+            backoff = self.min_interval * 2 ** (state.consecutive_failures - 1)
+            return state.last_attempt + min(self.max_interval, backoff)
+        if state.last_checked is None:
+            return 0.0
+        interval = min(self.max_interval, max(self.min_interval, 1.0 / self.change_rate(state)))
+        return state.last_checked + interval
+
+    def expected_staleness(self, state: ProductRefreshState, now: Optional[float] = None) -> float:
+        """Probability that the model's listing has changed since it was last checked"""
+        if state.last_checked is None:
+            return 1.0
+        now = self.clock() if now is None else now
+        return 1.0 - math.exp(-self.change_rate(state) * max(0.0, now - state.last_checked))
+
+    def _schedule(self, state: ProductRefreshState):
+        # Lazy deletion: older heap entries for the model are skipped once its version moves on
+        version = self._versions.get(state.model_no, 0) + 1
+        self._versions[state.model_no] = version
+        heapq.heappush(self._queue, (self.due_at(state), version, state.model_no))
+
+    def track(self, model_no: str, search_term: str):
+        """Add a model to the refresh set, or update its search term"""
+        with self._lock:
+            state = self._products.get(model_no)
+            if state is None:
+                state = self._products[model_no] = ProductRefreshState(model_no, search_term)
+                self._schedule(state)
+            else:
+                state.search_term = search_term
+
+    def untrack(self, model_no: str):
+        """Stop refreshing a model"""
+        with self._lock:
+            if self._products.pop(model_no, None):
+                # Invalidate its queued entry; versions never reset so a re-tracked model can't revive it
+                self._versions[model_no] += 1
+
+    def _current(self, model_no: str, version: int) -> bool:
+        return model_no in self._products and self._versions[model_no] == version
+
+    def next_due(self, at: Optional[float] = None) -> Optional[Tuple[float, ProductRefreshState]]:
+        """
+        The model to refresh next and when, without removing it
+
+        Of the models due by `at` (default now), the one most likely to have changed since
+        its last check is picked. When none is due yet, the pick is made among those that
+        fall due first.
+
+        Returns:
+            (time to start the lookup, model state), or None when nothing is tracked
+        """
+        at = self.clock() if at is None else at
+        with self._lock:
+            # Stale entries are dropped lazily: only a model's latest version counts
+            self._ready = {model_no: entry for model_no, entry in self._ready.items()
+                           if self._current(model_no, entry[0])}
+            self._promote(at)
+            dues = [due for _, due in self._ready.values()]
+            if not any(due <= at for due in dues):
+                while self._queue and not self._current(self._queue[0][2], self._queue[0][1]):
+                    heapq.heappop(self._queue)
+                dues += [self._queue[0][0]] if self._queue else []
+                if not dues:
+                    return None
+                at = min(dues)
+                self._promote(at)
+            state = max((self._products[model_no] for model_no, (_, due) in self._ready.items() if due <= at),
+                        key=lambda state: self.expected_staleness(state, at))
+            return at, state
+
+    def _promote(self, at: float):
+        # Move the models due by `at` from the heap to the ready set
+        while self._queue and self._queue[0][0] <= at:
+            due, version, model_no = heapq.heappop(self._queue)
+            if self._current(model_no, version):
+                self._ready[model_no] = (version, due)
+
+    def record(self, model_no: str, listing: Optional[Dict[str, Any]], now: Optional[float] = None) -> Optional[bool]:
+        """
+        Record the outcome of a lookup and reschedule the model
+
+        Returns:
+            True if the listing changed, False if not, None if the lookup failed
+        """
+        now = self.clock() if now is None else now
+        with self._lock:
+            state = self._products.get(model_no)
+            if state is None:
+                return None
+            state.last_attempt = now
+            if listing is None:
+                # The listing was not seen, so last_checked (and the staleness built on it) stays put
+                state.failures += 1
+                state.consecutive_failures += 1
+                changed = None
+            else:
+                seen = {field: listing.get(field) for field in TRACKED_FIELDS}
+                changed = state.last_seen is not None and seen != state.last_seen
+                if state.first_checked is None:
+                    state.first_checked = now
+                state.last_checked = now
+                state.checks += 1
+                state.consecutive_failures = 0
+                state.last_seen = seen
+                if changed:
+                    state.changes += 1
+                    state.last_changed = now
+            self._schedule(state)
+        return changed
+
+    def run_once(self) -> Optional[Dict[str, Any]]:
+        """
+        Wait for the budget and the next due model, then refresh the most stale one
+
+        Returns:
+            Outcome of the lookup, or None when nothing is tracked
+        """
+        head = self.next_due(max(self.clock(), self._next_slot))
+        if head is None:
+            return None
+        start_at, state = head
+        wait = start_at - self.clock()
+        if wait > 0:
+            self.sleep(wait)
+
+        staleness = self.expected_staleness(state)
+        with span("refresh_lookup"):
+            try:
+                listing = self.lookup(state.search_term, state.model_no)
+            except Exception as e:
+                print(f"Refresh lookup for {state.model_no} failed: {e}")
+                listing = None
+        now = self.clock()
+        self._next_slot = now + 3600.0 / self.lookups_per_hour
+        changed = self.record(state.model_no, listing, now)
+        outcome = "failed" if changed is None else ("changed" if changed else "unchanged")
+        metrics.increment("refresh_lookups_total", outcome=outcome)
+        print(f"Refreshed {state.model_no}: {outcome} (expected staleness {staleness:.2f})")
+        if self.state_path:
+            self.save()
+        return {"model_no": state.model_no, "outcome": outcome, "staleness": staleness,
+                "listing": listing, "checked_at": now}
+
+    def run(self, max_lookups: Optional[int] = None, until: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Refresh products until the lookup count or epoch deadline is reached (or forever)
+
+        Returns:
+            Outcome of every lookup performed
+        """
+        outcomes = []
+        while max_lookups is None or len(outcomes) < max_lookups:
+            head = self.next_due(max(self.clock(), self._next_slot))
+            if head is None:
+                break
+            if until is not None and head[0] >= until:
+                break
+            outcomes.append(self.run_once())
+        return outcomes
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """State of every tracked model, most stale first"""
+        now = self.clock()
+        with self._lock:
+            states = list(self._products.values())
+        rows = [dict(state.to_dict(),
+                     expected_staleness=round(self.expected_staleness(state, now), 3),
+                     changes_per_day=round(self.change_rate(state) * 86400, 3),
+                     due_in=round(self.due_at(state) - now, 1))
+                for state in states]
+        return sorted(rows, key=lambda row: -row["expected_staleness"])
+
+    def save(self, path: Optional[str] = None):
+        """Write per-model state to JSON (atomically, so a crash never leaves a torn file)"""
+        path = path or self.state_path
+        with self._lock:
+            data = {"products": [state.to_dict() for state in self._products.values()]}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def load(self, path: Optional[str] = None):
+        """Load per-model state written by save()"""
+        with open(path or self.state_path) as f:
+            data = json.load(f)
+        with self._lock:
+            for row in data.get("products", []):
+                state = ProductRefreshState.from_dict(row)
+                self._products[state.model_no] = state
+                self._schedule(state)
+
+
+# Example usage
+if __name__ == "__main__":
+    import random
+
+    prices = {"50UT7570PUB": 299.99, "KD75X77L": 999.99}
+    volatility = {"50UT7570PUB": 0.5, "KD75X77L": 0.02}
+    simulated_now = [0.0]
+
+    def simulated_lookup(search_term, model_no):
+        if random.random() < volatility[model_no]:
+            prices[model_no] = round(prices[model_no] * random.uniform(0.9, 1.1), 2)
+        return {"name": search_term, "price": f"${prices[model_no]}", "rating": None}
+
+    scheduler = RefreshScheduler(simulated_lookup, lookups_per_hour=4, min_interval=600,
+                                 clock=lambda: simulated_now[0],
+                                 sleep=lambda seconds: simulated_now.__setitem__(0, simulated_now[0] + seconds))
+    scheduler.track("50UT7570PUB", "LG 50 UHD 4K Smart TV")
+    scheduler.track("KD75X77L", "Sony 75 X77L 4K TV")
+    outcomes = scheduler.run(until=14 * 86400)
+    for model_no in prices:
+        print(model_no, "checks:", sum(outcome["model_no"] == model_no for outcome in outcomes))
@@ -0,0 +1,242 @@
+import os
+import csv
+import sys
+import json
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Any, Iterator, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Flat row written for every looked-up model; nested listing fields are spread into columns
+RESULT_FIELDS = [
+    "model_no", "brand", "original_name", "found",
+    "name", "price", "rating", "sku", "url", "scraped_at", "error",
+]
+
+
+def build_result_row(model_no: str, product: Optional[Dict[str, Any]],
+                     original_info: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Flatten one lookup result into a RESULT_FIELDS row
+
+    Args:
+        model_no: Model number that was looked up
+        product: Listing returned by the scraper, or None if it was not found
+        original_info: Validated LLM output for the product (brand, input_name, ...)
+        error: Why the lookup failed (e.g. "deadline_exceeded"); such a row says nothing
+            about whether the model is listed, unlike one that is simply not found
+    """
+    original_info = original_info or {}
+    product = product or {}
+    return {
+        "model_no": model_no,
+        "brand": (original_info.get("brand") or "unknown").lower(),
+        "original_name": original_info.get("input_name"),
+        "found": bool(product),
+        "name": product.get("name"),
+        "price": product.get("price"),
+        "rating": product.get("rating"),
+        "sku": product.get("sku"),
+        "url": product.get("url"),
+        "scraped_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "error": error,
+    }
+
+
+class ResultSink:
+    """
+    Incremental writer for result rows
+
+    Rows are buffered up to buffer_size and then written out, so results land on disk
+    while the run is still going and memory stays bounded however large the catalog is.
+    Subclasses implement _write_rows() and _close().
+    """
+
+    def __init__(self, path: str, buffer_size: int = 100, fields: Optional[List[str]] = None):
+        """
+        Args:
+            path: Output file ("-" writes NDJSON/CSV to stdout)
+            buffer_size: Rows held in memory before they are written out
+            fields: Columns to write (defaults to RESULT_FIELDS)
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self.fields = fields or RESULT_FIELDS
+        self.rows_written = 0
+        self._buffer: List[Dict[str, Any]] = []
+
+    def write(self, row: Dict[str, Any]):
+        """Queue one row, writing the buffer out once it is full"""
+        self._buffer.append(row)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Write out every buffered row"""
+        if self._buffer:
+            self._write_rows(self._buffer)
+            self.rows_written += len(self._buffer)
+            self._buffer = []
+
+    def close(self):
+        self.flush()
+        self._close()
+
+    def _write_rows(self, rows: List[Dict[str, Any]]):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class _TextSink(ResultSink):
+    def __init__(self, path: str, buffer_size: int = 100, fields: Optional[List[str]] = None):
+        super().__init__(path, buffer_size, fields)
+        self._file = sys.stdout if path == "-" else open(path, "w", newline="", encoding="utf-8")
+
+    def _close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+class NDJSONSink(_TextSink):
+    """One JSON object per line"""
+
+    def _write_rows(self, rows: List[Dict[str, Any]]):
+        self._file.write("".join(json.dumps({field: row.get(field) for field in self.fields}) + "\n" for row in rows))
+        self._file.flush()
+
+
+class CSVSink(_TextSink):
+    """CSV with a header row"""
+
+    def __init__(self, path: str, buffer_size: int = 100, fields: Optional[List[str]] = None):
+        super().__init__(path, buffer_size, fields)
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fields, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def _write_rows(self, rows: List[Dict[str, Any]]):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+
+class ParquetSink(ResultSink):
+    """Parquet file with one row group per flushed buffer (requires pyarrow)"""
+
+    def __init__(self, path: str, buffer_size: int = 1000, fields: Optional[List[str]] = None):
+        super().__init__(path, buffer_size, fields)
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        types = {"found": pa.bool_()}
+        self._schema = pa.schema([(field, types.get(field, pa.string())) for field in self.fields])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def _write_rows(self, rows: List[Dict[str, Any]]):
+        columns = {field: [row.get(field) for row in rows] for field in self.fields}
+        self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+
+    def _close(self):
+        self._writer.close()
+
+
+SINKS = {
+    "ndjson": NDJSONSink,
+    "jsonl": NDJSONSink,
+    "csv": CSVSink,
+    "parquet": ParquetSink,
+}
+
+
+def _format_for(path: str, format: Optional[str]) -> str:
+    if format:
+        return format.lower()
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    return extension if extension in SINKS else "ndjson"
+
+
+def open_sink(path: str, format: Optional[str] = None, **kwargs) -> ResultSink:
+    """
+    Open a sink for path, picking the format from its extension unless one is given
+
+    Args:
+        path: Output file (.ndjson/.jsonl, .csv or .parquet; "-" for stdout)
+        format: Explicit format name, one of SINKS
+        **kwargs: Passed to the sink (buffer_size, fields)
+    """
+    format = _format_for(path, format)
+    if format not in SINKS:
+        raise ValueError(f"Unknown output format '{format}' (expected one of {', '.join(SINKS)})")
+    return SINKS[format](path, **kwargs)
+
+
+def iter_result_rows(path: str, format: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Read a sink's output back one row dict at a time, without pandas"""
+    format = _format_for(path, format)
+    if format == "parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+        return
+    with open(path, newline="", encoding="utf-8") as f:
+        if format == "csv":
+            for row in csv.DictReader(f):
+                yield dict({key: value or None for key, value in row.items()}, found=row.get("found") == "True")
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def iter_result_chunks(path: str, format: Optional[str] = None, chunk_size: int = 10_000) -> Iterator["pd.DataFrame"]:
+    """Read a sink's output back in DataFrame chunks without loading the whole file"""
+    # pandas costs a few hundred milliseconds to import, so writers that never read back don't pay for it
+    import pandas as pd
+
+    format = _format_for(path, format)
+    if format == "parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    elif format == "csv":
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False)
+    else:
+        yield from pd.read_json(path, lines=True, chunksize=chunk_size, dtype=False)
+
+
+def group_by_brand(path: str, format: Optional[str] = None, chunk_size: int = 10_000) -> Dict[str, Any]:
+    """
+    Post-pass over a sink's output building the {"brands": {brand: [entries]}} export
+
+    Args:
+        path: File written by a sink
+        format: Explicit format name (defaults to the file extension)
+        chunk_size: Rows read per chunk
+
+    Returns:
+        The structured export grouped by brand
+    """
+    structured_data: Dict[str, Any] = {"brands": {}}
+    for chunk in iter_result_chunks(path, format, chunk_size):
+        # CSV stores booleans as text
+        found = chunk["found"].astype(str).str.lower().isin(["true", "1"])
+        chunk = chunk.astype(object).where(chunk.notna() & (chunk != ""), None)
+        for row, was_found in zip(chunk.to_dict("records"), found):
+            entry = {"model_no": row["model_no"], "original_name": row["original_name"] or "N/A",
+                     "bestbuy": {"found": bool(was_found)}}
+            if was_found:
+                entry["bestbuy"].update({field: row[field] or "N/A" for field in ("name", "price", "rating", "sku", "url")})
+            elif row.get("error"):
+                entry["bestbuy"]["error"] = row["error"]
+            structured_data["brands"].setdefault(row["brand"] or "unknown", []).append(entry)
+    return structured_data
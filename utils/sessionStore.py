@@ -0,0 +1,178 @@
+import os
+import re
+import json
+import time
+import shutil
+import threading
+from typing import List, Dict, Optional, Any
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# A saved session older than this is treated as stale; the site has likely rotated its bot cookies
+DEFAULT_MAX_AGE_SECONDS = 7 * 24 * 3600
+
+STATE_FILE = "state.json"
+USER_DATA_DIR = "user-data"
+LOCK_FILE = "session.lock"
+
+# Cookie fields kept in saved sessions; CDP Network.setCookies rejects the read-only extras
+SAVED_COOKIE_FIELDS = ("name", "value", "domain", "path", "expires", "httpOnly", "secure", "sameSite")
+
+
+def identity_name(fingerprint) -> str:
+    """
+    Directory-safe identity for a fingerprint profile
+
+    Cookies are tied to the identity that earned them, so a saved session is only ever
+    restored into a browser presenting the same platform, window size and time zone.
+    """
+    platform, (width, height), locale, timezone = fingerprint.key
+    return re.sub(r"[^\w.-]+", "_", f"{platform}-{width}x{height}-{locale}-{timezone}").lower()
+
+
+def _try_lock(fd: int) -> bool:
+    """
+    Take an exclusive lock on an open file without waiting
+
+    The lock belongs to the open file and the OS drops it when the file is closed or the
+    process dies, so a crashed holder never leaves a lock behind to be taken over.
+    """
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+class SessionStore:
+    """
+    Per-identity browser state kept between runs
+
+    Each identity gets <root>/<identity>/ holding a Chrome user-data dir (so Chrome itself
+    keeps cookies, localStorage and cache) and state.json with cookies and localStorage in
+    the same {"cookies": [...], "origins": [...]} shape Playwright uses for storage state.
+    The JSON copy lets a session be warmed even when its user-data dir is missing or was
+    written by another Chrome version.
+
+    Chrome refuses to open a user-data dir that another browser is using, so an identity
+    is checked out by at most one session at a time, across threads and processes.
+    """
+
+    def __init__(self, root: str, max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS):
+        """
+        Args:
+            root: Directory holding one sub-directory per identity (created if missing)
+            max_age_seconds: Saved state older than this is ignored and the identity starts cold
+        """
+        self.root = root
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._checked_out: Dict[str, str] = {}
+        self._lock_fds: Dict[str, int] = {}
+        os.makedirs(root, exist_ok=True)
+
+    @classmethod
+    def from_env(cls, variable: str = "SESSION_DIR", **kwargs) -> Optional["SessionStore"]:
+        """Build a store rooted at an environment variable, or None if it is unset"""
+        root = os.getenv(variable)
+        return cls(root, **kwargs) if root else None
+
+    def _path(self, identity: str, name: str = "") -> str:
+        return os.path.join(self.root, identity, name) if name else os.path.join(self.root, identity)
+
+    def user_data_dir(self, identity: str) -> str:
+        """Chrome --user-data-dir for an identity"""
+        return os.path.abspath(self._path(identity, USER_DATA_DIR))
+
+    def checkout(self, identity: str, session_id: str) -> bool:
+        """
+        Reserve an identity's state for one session
+
+        Returns:
+            False if another session (in this or another process) is using it
+        """
+        with self._lock:
+            holder = self._checked_out.get(identity)
+            if holder is not None:
+                return holder == session_id
+            os.makedirs(self._path(identity), exist_ok=True)
+            # The lock file is never removed: a process that opened it just before a removal
+            # would lock the old file while the next one locks a new one
+            fd = os.open(self._path(identity, LOCK_FILE), os.O_CREAT | os.O_RDWR)
+            if not _try_lock(fd):
+                os.close(fd)
+                return False
+            # The holder's pid is only there for whoever inspects the directory
+            os.ftruncate(fd, 0)
+            os.write(fd, str(os.getpid()).encode())
+            self._lock_fds[identity] = fd
+            self._checked_out[identity] = session_id
+            return True
+
+    def checkin(self, identity: str, session_id: str):
+        """Release an identity reserved with checkout()"""
+        with self._lock:
+            if self._checked_out.get(identity) != session_id:
+                return
+            del self._checked_out[identity]
+            # Closing the file releases the lock
+            os.close(self._lock_fds.pop(identity))
+
+    def load(self, identity: str) -> Optional[Dict[str, Any]]:
+        """
+        Saved state for an identity with expired cookies removed
+
+        Returns:
+            {"cookies": [...], "origins": [...], "saved_at": ...}, or None when nothing
+            fresh enough is stored
+        """
+        try:
+            with open(self._path(identity, STATE_FILE), encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        now = time.time()
+        if now - state.get("saved_at", 0) > self.max_age_seconds:
+            return None
+        # Playwright marks session cookies with expires -1
+        state["cookies"] = [cookie for cookie in state.get("cookies", [])
+                            if cookie.get("expires", -1) in (-1, None) or cookie["expires"] > now]
+        state.setdefault("origins", [])
+        return state
+
+    def save(self, identity: str, cookies: List[Dict[str, Any]], origins: Optional[List[Dict[str, Any]]] = None):
+        """
+        Write an identity's cookies and localStorage atomically
+
+        Args:
+            identity: Identity name (see identity_name)
+            cookies: Cookie dicts as returned by CDP Network.getAllCookies
+            origins: [{"origin": url, "localStorage": [{"name": ..., "value": ...}]}]
+        """
+        state = {"saved_at": time.time(), "cookies": cookies, "origins": origins or []}
+        path = self._path(identity, STATE_FILE)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    def discard(self, identity: str):
+        """Forget an identity's state, e.g. after the site flagged it"""
+        shutil.rmtree(self._path(identity, USER_DATA_DIR), ignore_errors=True)
+        try:
+            os.remove(self._path(identity, STATE_FILE))
+        except FileNotFoundError:
+            pass
+
+    def identities(self) -> List[str]:
+        """Identities with saved state"""
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.exists(self._path(name, STATE_FILE)))
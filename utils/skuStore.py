@@ -0,0 +1,190 @@
+import os
+import re
+import json
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Optional, Any
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves stay atomic but are not merged under a lock
+    fcntl = None
+
+
+def clean_sku(sku: Optional[str]) -> Optional[str]:
+    """
+    Leading digits of a scraped SKU, or None
+
+    The card extractor's text fallback can run the SKU into the next label
+    (e.g. "6578195Rating"), so only the digit prefix is trusted.
+    """
+    match = re.match(r"\d+", (sku or "").strip())
+    return match.group(0) if match else None
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Hold an exclusive lock on a sidecar lock file (a no-op where fcntl is unavailable)"""
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class SkuStore:
+    """
+    Model number -> SKU and product page URL, learned from earlier lookups
+
+    Once a model has been found by searching, its product page can be loaded directly on
+    later runs. Entries are kept in a JSON file; a mapping whose page no longer shows the
+    model is forgotten, so the next lookup searches again and learns the new one.
+
+    Several scrapers or processes may use the same file: save() re-reads it under a lock
+    and applies only this store's own changes, so no writer drops another's mappings.
+    """
+
+    _shared: Dict[str, "SkuStore"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: JSON file holding the mappings (loaded if it exists)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # Model key -> mapping remembered, or None for one forgotten, since the last save
+        self._changes: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._mappings = self._read()
+
+    @classmethod
+    def shared(cls, path: str) -> "SkuStore":
+        """The one store for a file within this process, created on first use"""
+        with cls._shared_lock:
+            key = os.path.abspath(path)
+            if key not in cls._shared:
+                cls._shared[key] = cls(path)
+            return cls._shared[key]
+
+    @classmethod
+    def from_env(cls, variable: str = "SKU_STORE_PATH") -> Optional["SkuStore"]:
+        """The shared store for the file named in an environment variable, or None if it is unset"""
+        path = os.getenv(variable)
+        return cls.shared(path) if path else None
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, encoding="utf-8") as f:
+            return json.load(f).get("mappings", {})
+
+    @staticmethod
+    def _key(model_no: str) -> str:
+        return model_no.strip().upper()
+
+    def get(self, model_no: str) -> Optional[Dict[str, Any]]:
+        """Mapping for a model (sku, url, name, verified_at), or None if it has none"""
+        with self._lock:
+            mapping = self._mappings.get(self._key(model_no))
+            return dict(mapping) if mapping else None
+
+    def remember(self, model_no: str, product: Dict[str, Any]) -> bool:
+        """
+        Record where a found product lives
+
+        Products matched by title are skipped: their page may well show another model,
+        which would make the mapping look stale on every run.
+
+        Returns:
+            True if the product had a usable SKU or URL and was stored
+        """
+        sku = clean_sku(product.get("sku"))
+        url = product.get("url")
+        if not (sku or url) or product.get("match_method") == "title":
+            return False
+        mapping = {
+            "sku": sku,
+            "url": url,
+            "name": product.get("name"),
+            "verified_at": datetime.now(timezone.utc).isoformat(),
+        }
+        with self._lock:
+            self._mappings[self._key(model_no)] = self._changes[self._key(model_no)] = mapping
+        return True
+
+    def forget(self, model_no: str):
+        """Drop a stale mapping so the model is searched for again"""
+        with self._lock:
+            if self._mappings.pop(self._key(model_no), None) is not None:
+                self._changes[self._key(model_no)] = None
+
+    @staticmethod
+    def _apply(mappings: Dict[str, Dict[str, Any]], changes: Dict[str, Optional[Dict[str, Any]]]):
+        for key, mapping in changes.items():
+            if mapping is None:
+                mappings.pop(key, None)
+            else:
+                mappings[key] = mapping
+
+    def save(self):
+        """
+        Merge this store's changes into the file, if it has any
+
+        The file is re-read under an exclusive lock so mappings saved by other stores since
+        it was loaded are kept, then replaced atomically through a temp file of this
+        save's own (a crash never leaves a torn file).
+        """
+        with self._lock:
+            if not self._changes:
+                return
+            changes, self._changes = self._changes, {}
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with _file_lock(self.path + ".lock"):
+                mappings = self._read()
+                self._apply(mappings, changes)
+                fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self.path) + ".",
+                                                suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "w", encoding="utf-8") as f:
+                        json.dump({"mappings": mappings}, f, indent=2, sort_keys=True)
+                    os.replace(tmp_path, self.path)
+                except BaseException:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+        except BaseException:
+            # Keep the unsaved changes for the next save; newer ones win
+            with self._lock:
+                self._changes = {**changes, **self._changes}
+            raise
+        with self._lock:
+            # Pick up what other writers saved, keeping changes made while this save ran
+            self._apply(mappings, self._changes)
+            self._mappings = mappings
+
+    def __contains__(self, model_no: str) -> bool:
+        with self._lock:
+            return self._key(model_no) in self._mappings
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._mappings)
+
+
+# Example usage
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        store = SkuStore(os.path.join(directory, "skus.json"))
+        store.remember("50UT7570PUB", {"sku": "6578195Rating", "name": "LG - 50\" Class UT75",
+                                       "url": "https://www.bestbuy.com/site/lg-50/6578195.p?skuId=6578195"})
+        store.save()
+        print(SkuStore(store.path).get("50ut7570pub"))
@@ -0,0 +1,202 @@
+import re
+from typing import List, Dict, Optional, Tuple, Any
+
+import numpy as np
+
+# Character n-gram lengths; short enough that "UT75" in a title overlaps "50UT7570PUB"
+DEFAULT_NGRAM_RANGE = (2, 3)
+
+# Cosine similarity the best card needs to be accepted, and how far ahead of the runner-up it must be
+DEFAULT_MIN_CONFIDENCE = 0.2
+DEFAULT_MIN_MARGIN = 0.03
+
+# Screen size as titles and product names write it: 50", 50”, 50 inch, 50-in, 50 Class
+SCREEN_SIZE_PATTERN = re.compile(r"\b(\d{2,3})(?:\s*(?:\"|”|″|''|-?\s*inch(?:es)?\b|-?\s*in\b)|\s+class\b)",
+                                 re.IGNORECASE)
+
+# Letter/digit words that name a feature rather than a series (4k, 120hz, hdr10, ...),
+# including Wi-Fi generations and speed classes (6e, ax3000, ac1200, be9300)
+FEATURE_WORD_PATTERN = re.compile(r"\d+(?:k|hz|p|gb|tb|in|w)|(?:hdr|hdmi|usb|wifi|ddr)\d*|[67]e|(?:ax|ac|be)\d{3,5}")
+
+
+def normalize_title(text: str) -> str:
+    """Lowercase a title and collapse punctuation and whitespace to single spaces"""
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", (text or "").lower()).split())
+
+
+def expand_model_numbers(text: str) -> str:
+    """
+    Normalize a title and append the letter/digit pieces of any model numbers in it
+
+    Card titles name the series ("S4", "UT75") that model numbers embed ("65S4PUB"), so
+    "65s4pub" also contributes "65s", "s4", "s4pub", "4pub" and so on as separate words.
+    """
+    words = normalize_title(text).split()
+    fragments = []
+    for word in words:
+        runs = re.findall(r"\d+|[a-z]+", word)
+        if len(runs) < 2:
+            continue
+        for start in range(len(runs)):
+            for end in range(start + 1, len(runs) + 1):
+                fragment = "".join(runs[start:end])
+                if len(fragment) >= 2 and fragment != word:
+                    fragments.append(fragment)
+    return " ".join(words + fragments)
+
+
+def screen_size(text: str) -> Optional[int]:
+    """
+    Screen size in inches named by a title or product name, or None
+
+    Falls back to the size TV model numbers carry near their start (50UT7570PUB,
+    QN65S90DAFXZC, KD75X77L).
+    """
+    match = SCREEN_SIZE_PATTERN.search(text or "")
+    if match:
+        return int(match.group(1))
+    for word in normalize_title(text).split():
+        model = re.fullmatch(r"(?:[a-z]{2,4})?(\d{2,3})[a-z]+\d[a-z0-9]*", word)
+        if model and len(word) >= 6:
+            return int(model.group(1))
+    return None
+
+
+def series_words(text: str) -> List[str]:
+    """Words of a title that mix letters and digits and name a series or model (UT75, C4, X77L)"""
+    return [word for word in normalize_title(text).split()
+            if re.search(r"\d", word) and re.search(r"[a-z]", word) and not FEATURE_WORD_PATTERN.fullmatch(word)]
+
+
+def title_conflict(query: str, title: str) -> Optional[str]:
+    """
+    Why a card title cannot be the product the query names, or None if nothing rules it out
+
+    Similar titles differ mostly in size and series ("55” Class UT75" against "50 inch
+    UT75"), which n-gram similarity barely weighs, so those are compared outright: the
+    card's size must equal the query's, and each series word in the card must appear in
+    the query (usually inside its model number).
+    """
+    query_size, title_size = screen_size(query), screen_size(title)
+    if query_size and title_size and query_size != title_size:
+        return f"{title_size}\" screen, not {query_size}\""
+    query_words = normalize_title(query).split()
+    for word in series_words(title):
+        if not any(word in query_word for query_word in query_words):
+            return f"series {word.upper()} is not in the query"
+    return None
+
+
+def char_ngrams(text: str, ngram_range: Tuple[int, int] = DEFAULT_NGRAM_RANGE) -> List[str]:
+    """Character n-grams of a normalized title, padded so word starts and ends count"""
+    padded = f" {normalize_title(text)} "
+    low, high = ngram_range
+    return [padded[start:start + n] for n in range(low, high + 1) for start in range(len(padded) - n + 1)]
+
+
+class TitleRanker:
+    """
+    Scores product card titles against a product name with character n-gram TF-IDF
+
+    Used when a results card has no model attribute to compare. The n-grams of every card
+    on a page go into one count matrix; weighting, normalization and cosine similarity
+    against the query are then a handful of NumPy array operations for the whole page.
+    Terms that every card shares ("lg", "4k", "tv") get little weight, so the series and
+    size that set one card apart decide the ranking. Model numbers in the query are split
+    into their series pieces first, since titles rarely spell out the full model number.
+    """
+
+    def __init__(self, ngram_range: Tuple[int, int] = DEFAULT_NGRAM_RANGE,
+                 min_confidence: float = DEFAULT_MIN_CONFIDENCE, min_margin: float = DEFAULT_MIN_MARGIN):
+        """
+        Args:
+            ngram_range: Shortest and longest character n-grams
+            min_confidence: Similarity below which best_match() reports no match
+            min_margin: Lead over the second best card below which the match is ambiguous
+        """
+        self.ngram_range = ngram_range
+        self.min_confidence = min_confidence
+        self.min_margin = min_margin
+
+    def scores(self, query: str, titles: List[str]) -> np.ndarray:
+        """
+        Cosine similarity of each title to the query, between 0 and 1
+
+        Args:
+            query: Product name (and model number) being looked for
+            titles: Card titles from one results page
+        """
+        if not titles:
+            return np.zeros(0)
+        vocabulary: Dict[str, int] = {}
+        rows, columns = [], []
+        for row, text in enumerate([expand_model_numbers(query)] + list(titles)):
+            for ngram in char_ngrams(text, self.ngram_range):
+                rows.append(row)
+                columns.append(vocabulary.setdefault(ngram, len(vocabulary)))
+        counts = np.zeros((len(titles) + 1, max(len(vocabulary), 1)))
+        np.add.at(counts, (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)), 1)
+
+        # Sublinear term frequency and smoothed inverse document frequency over the page
+        present = counts > 0
+        tf = np.where(present, 1 + np.log(np.maximum(counts, 1)), 0)
+        idf = np.log((1 + len(titles) + 1) / (1 + present.sum(axis=0))) + 1
+        weights = tf * idf
+        norms = np.linalg.norm(weights, axis=1, keepdims=True)
+        weights = weights / np.where(norms == 0, 1, norms)
+        return weights[1:] @ weights[0]
+
+    def rank(self, query: str, products: List[Dict[str, Any]], key: str = "name") -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Products ordered from most to least similar to the query
+
+        Returns:
+            (product, confidence) pairs
+        """
+        similarity = self.scores(query, [product.get(key) or "" for product in products])
+        order = np.argsort(-similarity, kind="stable")
+        return [(products[index], float(similarity[index])) for index in order]
+
+    def best_match(self, query: str, products: List[Dict[str, Any]],
+                   key: str = "name") -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        The product the query most likely refers to
+
+        Returns:
+            (product, confidence), or None when no card is similar enough or two cards are
+            too close to call
+        """
+        ranked = self.rank(query, products, key)
+        if not ranked:
+            return None
+        product, confidence = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        if confidence < self.min_confidence or confidence - runner_up < self.min_margin:
+            return None
+        return product, confidence
+
+
+# Shared ranker for the scrapers
+default_title_ranker = TitleRanker()
+
+
+# Example usage
+if __name__ == "__main__":
+    import time
+
+    titles = [
+        "LG - 50” Class UT75 Series LED 4K UHD Smart webOS TV (2024)",
+        "LG - 55” Class UT75 Series LED 4K UHD Smart webOS TV (2024)",
+        "LG - 50” Class QNED80 Series LED 4K UHD Smart webOS TV (2024)",
+        "Samsung - 50” Class DU7200 Series Crystal UHD 4K Smart Tizen TV (2024)",
+    ]
+    products = [{"name": title} for title in titles]
+    ranker = TitleRanker()
+    for product, confidence in ranker.rank("LG 50 inch UT75 4K TV 50UT7570PUB", products):
+        print(f"{confidence:.3f}  {product['name']}")
+
+    page = products * 12
+    started = time.perf_counter()
+    for _ in range(100):
+        ranker.scores("LG 50 inch UT75 4K TV 50UT7570PUB", [product["name"] for product in page])
+    print(f"Scored a {len(page)} card page 100 times in {time.perf_counter() - started:.3f}s")
@@ -0,0 +1,75 @@
+import time
+import asyncio
+from typing import Optional
+
+
+class AsyncTokenBucket:
+    """
+    Token bucket shared by concurrent coroutines
+
+    Tokens refill continuously at `rate` per second up to `capacity`. acquire() waits
+    until enough tokens are available, so callers are smoothed to the configured rate
+    instead of bursting into a quota wall. pause_until() lets a server backoff hint
+    stall every caller at once.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size (defaults to one second's worth of tokens)
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    @classmethod
+    def per_minute(cls, amount: float, burst_seconds: float = 1.0) -> "AsyncTokenBucket":
+        """Bucket for a per-minute quota, allowing bursts of burst_seconds worth of quota"""
+        rate = amount / 60.0
+        return cls(rate, capacity=max(1.0, rate * burst_seconds))
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """
+        Wait until `amount` tokens can be taken
+
+        Requests larger than the capacity are allowed once the bucket is full, leaving it
+        in debt so later callers wait for the overdraft to be repaid.
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        if self._lock is None:
+            # Created lazily so the lock binds to the loop that actually uses the bucket
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                else:
+                    self._refill(now)
+                    needed = min(amount, self.capacity)
+                    if self.tokens >= needed:
+                        self.tokens -= amount
+                        return waited
+                    delay = (needed - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def refund(self, amount: float):
+        """Give back tokens that were reserved but not used (e.g. an over-estimated token count)"""
+        self._refill(time.monotonic())
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def pause_until(self, deadline: float):
+        """Stop handing out tokens until the given time.monotonic() deadline"""
+        self.paused_until = max(self.paused_until, deadline)
@@ -1,4 +1,6 @@
 import random
+import threading
+from collections import deque
 from typing import List, Dict, Optional
 
 
@@ -80,13 +82,17 @@ class UserAgentRotator:
                    self.safari_agents + self.edge_agents + self.mobile_agents)
         }
         
-        # Keep track of used user agents to avoid repetition
-        self.used_agents = set()
+        # Per browser type, the agents not yet handed out in the current round (shuffled)
+        self._unused: Dict[str, deque] = {}
+        self._lock = threading.Lock()
         
     def get_random_user_agent(self, browser_type: str = "all", avoid_duplicates: bool = True) -> str:
         """
         Get a random user agent string from the specified browser type
         
+        Safe to call from several threads. With avoid_duplicates, each browser type hands
+        out every one of its agents once (in random order) before any repeats.
+        
         Args:
             browser_type: Type of browser to get user agent for 
                           ('chrome', 'firefox', 'safari', 'edge', 'mobile', or 'all')
@@ -100,27 +106,17 @@ class UserAgentRotator:
         if browser_type not in self.user_agents:
             browser_type = "all"
         
-        available_agents = self.user_agents[browser_type]
-        
-        if avoid_duplicates and len(self.used_agents) >= len(available_agents):
-            # If we've used all agents, reset the used agents list
-            self.used_agents.clear()
-        
-        # Get unused agents
-        unused_agents = [agent for agent in available_agents if agent not in self.used_agents]
-        
-        # If all agents have been used or we're not avoiding duplicates, use all available agents
-        if not unused_agents:
-            unused_agents = available_agents
-        
-        # Select a random user agent
-        user_agent = random.choice(unused_agents)
-        
-        # Add to used agents if avoiding duplicates
-        if avoid_duplicates:
-            self.used_agents.add(user_agent)
+        if not avoid_duplicates:
+            return random.choice(self.user_agents[browser_type])
         
-        return user_agent
+        with self._lock:
+            unused = self._unused.get(browser_type)
+            if not unused:
+                # Start a new round once every agent of this type has been used
+                agents = list(self.user_agents[browser_type])
+                random.shuffle(agents)
+                unused = self._unused[browser_type] = deque(agents)
+            return unused.popleft()
     
     def get_desktop_user_agent(self) -> str:
         """Get a random desktop user agent (no mobile)"""